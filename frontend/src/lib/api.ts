@@ -2,8 +2,11 @@ import type {
   Task,
   TaskCreate,
   TaskListResponse,
+  TaskLookupResponse,
   TaskStatus,
   TaskPriority,
+  TaskSort,
+  SortOrder,
   TaskUpdate,
   ParseResponse,
   SuggestionsResponse,
@@ -15,14 +18,20 @@ const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
 export async function fetchTasks(params?: {
   limit?: number;
   offset?: number;
+  cursor?: string;
   status?: TaskStatus;
   priority?: TaskPriority;
+  sort?: TaskSort;
+  order?: SortOrder;
 }): Promise<TaskListResponse> {
   const searchParams = new URLSearchParams();
   if (params?.limit) searchParams.set("limit", String(params.limit));
   if (params?.offset) searchParams.set("offset", String(params.offset));
+  if (params?.cursor) searchParams.set("cursor", params.cursor);
   if (params?.status) searchParams.set("status", params.status);
   if (params?.priority) searchParams.set("priority", params.priority);
+  if (params?.sort) searchParams.set("sort", params.sort);
+  if (params?.order) searchParams.set("order", params.order);
 
   const query = searchParams.toString();
   const url = `${API_BASE_URL}/api/tasks${query ? `?${query}` : ""}`;
@@ -38,6 +47,22 @@ export async function fetchTasks(params?: {
   return res.json();
 }
 
+// 指定したIDのタスクをまとめて取得
+export async function lookupTasks(ids: string[]): Promise<TaskLookupResponse> {
+  const res = await fetch(`${API_BASE_URL}/api/tasks/lookup`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ ids }),
+    cache: "no-store",
+  });
+
+  if (!res.ok) {
+    throw new Error(`Failed to lookup tasks: ${res.status}`);
+  }
+
+  return res.json();
+}
+
 // タスクを作成
 export async function createTask(task: TaskCreate): Promise<Task> {
   const res = await fetch(`${API_BASE_URL}/api/tasks`, {
@@ -4,6 +4,10 @@ export type TaskStatus = "pending" | "in_progress" | "completed";
 // タスクの優先度
 export type TaskPriority = "low" | "medium" | "high";
 
+// タスク一覧の並び順
+export type TaskSort = "created_at" | "due_date" | "priority";
+export type SortOrder = "asc" | "desc";
+
 // タスクレスポンス
 export interface Task {
   id: string;
@@ -39,6 +43,13 @@ export interface TaskListResponse {
   total: number;
   limit: number;
   offset: number;
+  next_cursor: string | null;
+}
+
+// タスク一括取得レスポンス
+export interface TaskLookupResponse {
+  items: Task[];
+  missing: string[];
 }
 
 // 自然言語解析の結果
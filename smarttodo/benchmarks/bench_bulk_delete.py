@@ -0,0 +1,66 @@
+"""FirestoreTaskRepository.clear / delete_where のベンチマーク
+
+1件ずつ delete する旧実装と、バッチ書き込みによる delete_where を比較する。
+
+実行: uv run python -m benchmarks.bench_bulk_delete --size 2000 --latency 0.002
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime
+from uuid import uuid4
+
+from src.services.fake_firestore import FakeFirestoreClient
+from src.services.firestore import FirestoreTaskRepository
+
+
+def _seed(db: FakeFirestoreClient, size: int) -> None:
+    now = datetime.now()
+    store = db._collections.setdefault(FirestoreTaskRepository.COLLECTION, {})
+    for i in range(size):
+        doc_id = str(uuid4())
+        store[doc_id] = {
+            "id": doc_id,
+            "title": f"タスク{i}",
+            "status": "pending",
+            "created_at": now,
+        }
+
+
+def _delete_one_by_one(db: FakeFirestoreClient) -> None:
+    """旧実装: 全件をストリームして1件ずつ delete"""
+    for doc in db.collection(FirestoreTaskRepository.COLLECTION).stream():
+        doc.reference.delete()
+
+
+async def run(size: int, latency: float) -> None:
+    print(f"size={size} latency={latency * 1000:.1f}ms/rpc")
+
+    db = FakeFirestoreClient(latency=latency)
+    _seed(db, size)
+    start = time.perf_counter()
+    _delete_one_by_one(db)
+    elapsed = time.perf_counter() - start
+    print(f"  one-by-one:   {elapsed * 1000:10.1f} ms  rpcs={db.stats.rpcs}")
+
+    db = FakeFirestoreClient(latency=latency)
+    _seed(db, size)
+    repo = FirestoreTaskRepository(db=db)
+    start = time.perf_counter()
+    deleted = await repo.delete_where()
+    elapsed = time.perf_counter() - start
+    assert deleted == size
+    print(f"  delete_where: {elapsed * 1000:10.1f} ms  rpcs={db.stats.rpcs}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.002)
+    args = parser.parse_args()
+    asyncio.run(run(args.size, args.latency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""並列 GET /api/tasks/{id} のベンチマーク
+
+Firestore の RPC を time.sleep で模した FakeFirestoreClient を使い、
+N 件の並列リクエストが重なって実行されることを確認する。
+
+実行: uv run python -m benchmarks.bench_concurrency --requests 20 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import time
+from uuid import UUID
+
+from httpx import ASGITransport, AsyncClient
+
+from src.main import app
+from src.services.fake_firestore import FakeFirestoreClient
+from src.services.firestore import FirestoreTaskRepository, reset_repository, set_repository
+
+
+async def run(requests: int, latency: float, max_workers: int) -> None:
+    repo = FirestoreTaskRepository(db=FakeFirestoreClient(latency=latency), max_workers=max_workers)
+    reset_repository()
+    set_repository(repo)
+
+    task_ids: list[UUID] = []
+    for i in range(requests):
+        task = await repo.create({"title": f"タスク{i}"})
+        task_ids.append(task["id"])
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        start = time.perf_counter()
+        for task_id in task_ids:
+            await client.get(f"/api/tasks/{task_id}")
+        sequential = time.perf_counter() - start
+
+        start = time.perf_counter()
+        responses = await asyncio.gather(
+            *(client.get(f"/api/tasks/{task_id}") for task_id in task_ids)
+        )
+        parallel = time.perf_counter() - start
+
+    reset_repository()
+    assert all(r.status_code == 200 for r in responses)
+
+    print(f"requests={requests} latency={latency * 1000:.0f}ms max_workers={max_workers}")
+    print(f"  sequential: {sequential * 1000:8.1f} ms")
+    print(f"  parallel:   {parallel * 1000:8.1f} ms  (x{sequential / parallel:.1f})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--max-workers", type=int, default=32)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.latency, args.max_workers))
+
+
+if __name__ == "__main__":
+    main()
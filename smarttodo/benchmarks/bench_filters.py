@@ -0,0 +1,147 @@
+"""複数条件の絞り込みのベンチマーク
+
+ステータス・優先度・タグの IN 条件について、全タスクを内包表記で絞り込んで整列する素朴な実装と、
+InMemoryTaskRepository / ColumnarTaskRepository の list（値ごとのビットマップ索引の AND / OR）の
+1 ページ目・深いオフセットの取得の 1 回あたりの時間（中央値）と索引の構築時間を計測する。
+
+実行: uv run python -m benchmarks.bench_filters --sizes 10000 100000 1000000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from src.services.columnar import ColumnarTaskRepository
+from src.services.memory import InMemoryTaskRepository
+from src.services.pagination import sort_key
+
+PAGE_SIZE = 20
+_STATUSES = ("pending", "in_progress", "completed")
+_PRIORITIES = ("low", "medium", "high")
+_TAGS = ("work", "home", "urgent", "later", "errand", "review", "meeting", "idea")
+# (名前, ステータス, 優先度, タグ, オフセット)
+_QUERIES = (
+    ("in", ["pending", "in_progress"], None, None, 0),
+    ("in+tag", ["pending", "in_progress"], "high", ["work"], 0),
+    ("rare", None, None, ["rare"], 0),
+    ("deep", None, ["low", "high"], ["home", "urgent"], 5_000),
+)
+
+
+def _task(i: int, base: datetime) -> dict:
+    tags = [_TAGS[i % 8], _TAGS[(i // 8) % 8]] if i % 3 else []
+    if i % 1000 == 0:
+        tags.append("rare")
+    return {
+        "id": UUID(int=i),
+        "title": f"タスク{i}",
+        "description": "",
+        "due_date": None,
+        "status": _STATUSES[(i // 7) % 3],
+        "priority": _PRIORITIES[(i // 11) % 3],
+        "tags": tags,
+        "created_at": base + timedelta(microseconds=i),
+    }
+
+
+def _scan(tasks: list[dict]) -> Callable[..., tuple[list[dict], int]]:
+    """全件を内包表記で絞り込んで整列する比較用の実装（これまでの絞り込みと同じ考え方）"""
+
+    def list_tasks(
+        statuses: list[str] | None,
+        priorities: list[str] | None,
+        tags: list[str] | None,
+        offset: int,
+    ) -> tuple[list[dict], int]:
+        matched = [
+            t
+            for t in tasks
+            if (statuses is None or t["status"] in statuses)
+            and (priorities is None or t["priority"] in priorities)
+            and (tags is None or any(tag in tags for tag in t["tags"]))
+        ]
+        matched.sort(key=lambda t: sort_key(t, "created_at"))
+        return matched[offset : offset + PAGE_SIZE], len(matched)
+
+    return list_tasks
+
+
+def _values(value: str | list[str] | None) -> list[str] | None:
+    return [value] if isinstance(value, str) else value
+
+
+async def _median_ms(op: Callable[[], Awaitable[object] | object], operations: int) -> float:
+    samples = []
+    for _ in range(operations):
+        start = time.perf_counter()
+        result = op()
+        if asyncio.iscoroutine(result):
+            await result
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+async def _bench_scan(tasks: list[dict], operations: int) -> tuple[float, list[float]]:
+    start = time.perf_counter()
+    scan = _scan(tasks)
+    build = time.perf_counter() - start
+    return build, [
+        await _median_ms(
+            lambda s=s, p=p, t=t, o=o: scan(_values(s), _values(p), t, o),
+            operations,
+        )
+        for _, s, p, t, o in _QUERIES
+    ]
+
+
+async def _bench_repo(repo, tasks: list[dict], operations: int) -> tuple[float, list[float]]:
+    start = time.perf_counter()
+    repo.load(tasks)
+    build = time.perf_counter() - start
+    return build, [
+        await _median_ms(
+            lambda s=s, p=p, t=t, o=o: repo.list(PAGE_SIZE, o, s, p, tags=t), operations
+        )
+        for _, s, p, t, o in _QUERIES
+    ]
+
+
+async def _bench_memory(tasks: list[dict], operations: int) -> tuple[float, list[float]]:
+    return await _bench_repo(InMemoryTaskRepository(), tasks, operations)
+
+
+async def _bench_columnar(tasks: list[dict], operations: int) -> tuple[float, list[float]]:
+    return await _bench_repo(ColumnarTaskRepository(), tasks, operations)
+
+
+_IMPLS = {"scan": _bench_scan, "memory": _bench_memory, "columnar": _bench_columnar}
+
+
+async def run(sizes: list[int], operations: int) -> None:
+    print(f"operations={operations} page_size={PAGE_SIZE}")
+    print(
+        f"{'size':>9} {'impl':>9} {'build s':>8}"
+        + "".join(f" {name + ' ms':>10}" for name, *_ in _QUERIES)
+    )
+    for size in sizes:
+        base = datetime(2026, 1, 1)
+        tasks = [_task(i, base) for i in range(size)]
+        for impl, bench in _IMPLS.items():
+            build, times = await bench(tasks, operations)
+            print(f"{size:>9} {impl:>9} {build:>8.2f}" + "".join(f" {t:>10.2f}" for t in times))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--operations", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.operations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""GET /api/tasks の fields 指定（フィールド射影）のベンチマーク
+
+1000 文字の説明を持つタスクの 100 件ページについて、全フィールドを返す場合と
+一覧表示に必要なフィールドだけを返す場合のレスポンスサイズ・シリアライズ時間・
+API 全体の処理時間を比較する。
+
+実行: uv run python -m benchmarks.bench_list_fields --iterations 200
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from fastapi import Response
+from httpx import ASGITransport, AsyncClient
+
+from src.api.tasks import list_tasks
+from src.main import app
+from src.models.task import SortOrder, TaskSort
+from src.services.fake_firestore import FakeFirestoreClient
+from src.services.firestore import FirestoreTaskRepository, reset_repository, set_repository
+
+PAGE_SIZE = 100
+LIST_VIEW_FIELDS = "title,status,priority,due_date"
+
+
+def _seed(db: FakeFirestoreClient, size: int) -> None:
+    now = datetime.now()
+    store = db._collections.setdefault(FirestoreTaskRepository.COLLECTION, {})
+    for i in range(size):
+        doc_id = str(UUID(int=i))
+        store[doc_id] = {
+            "id": doc_id,
+            "title": f"タスク{i}",
+            "description": "説" * 1000,
+            "due_date": now + timedelta(days=i % 30),
+            "status": "pending",
+            "priority": "medium",
+            "tags": [],
+            "created_at": now + timedelta(microseconds=i),
+        }
+
+
+async def _median_ms(func: Callable[[], Awaitable[object]], iterations: int) -> float:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+async def run(iterations: int) -> None:
+    db = FakeFirestoreClient()
+    _seed(db, PAGE_SIZE * 2)
+    set_repository(FirestoreTaskRepository(db=db))
+
+    print(f"page_size={PAGE_SIZE} iterations={iterations}")
+    print(f"{'fields':>32} {'bytes':>9} {'serialize ms':>13} {'request ms':>11}")
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        for fields in (None, LIST_VIEW_FIELDS):
+            params = {"limit": PAGE_SIZE, **({"fields": fields} if fields else {})}
+
+            # レスポンスモデルの構築と JSON 化のみ（リポジトリ呼び出しを含む）
+            async def serialize(fields: str | None = fields) -> bytes:
+                response = await list_tasks(
+                    limit=PAGE_SIZE,
+                    offset=0,
+                    status=None,
+                    priority=None,
+                    tag=None,
+                    cursor=None,
+                    sort=TaskSort.CREATED_AT,
+                    order=SortOrder.ASC,
+                    fields=fields,
+                    due_after=None,
+                    due_before=None,
+                )
+                if isinstance(response, Response):
+                    return response.body
+                return response.model_dump_json().encode()
+
+            async def request(params: dict = params) -> bytes:
+                response = await client.get("/api/tasks", params=params)
+                response.raise_for_status()
+                return response.content
+
+            size = len(await request())
+            serialize_ms = await _median_ms(serialize, iterations)
+            request_ms = await _median_ms(request, iterations)
+            label = fields or "(all)"
+            print(f"{label:>32} {size:>9} {serialize_ms:>13.2f} {request_ms:>11.2f}")
+    reset_repository()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.iterations))
+
+
+if __name__ == "__main__":
+    main()
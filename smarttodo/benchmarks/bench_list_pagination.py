@@ -0,0 +1,105 @@
+"""FirestoreTaskRepository.list のページ取得コストのベンチマーク
+
+コレクションサイズを増やしながら 20 件ページの取得時間と読み取り数を計測し、
+全件ストリーム＋Python 側スライス（旧実装）と比較する。
+末尾付近のページについては offset 指定とカーソル指定を比較する。
+
+実行: uv run python -m benchmarks.bench_list_pagination --sizes 1000 10000 50000
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime
+from uuid import UUID
+
+from src.services.fake_firestore import FakeFirestoreClient
+from src.services.firestore import FirestoreTaskRepository
+from src.services.pagination import encode_cursor
+
+PAGE_SIZE = 20
+_ORDERS = (("created_at", "ASCENDING"), ("id", "ASCENDING"))
+
+
+def _seed(db: FakeFirestoreClient, size: int) -> None:
+    now = datetime.now()
+    store = db._collections.setdefault(FirestoreTaskRepository.COLLECTION, {})
+    for i in range(size):
+        doc_id = str(UUID(int=i))
+        store[doc_id] = {
+            "id": doc_id,
+            "title": f"タスク{i}",
+            "description": "",
+            "due_date": None,
+            "status": "pending",
+            "priority": "medium",
+            "created_at": now,
+        }
+
+
+def _task_at(db: FakeFirestoreClient, position: int) -> dict:
+    """(created_at, id) 順で position 番目のタスク"""
+    docs = db._sorted_documents(FirestoreTaskRepository.COLLECTION, _ORDERS)
+    data = dict(docs[position][1])
+    data["id"] = UUID(data["id"])
+    return data
+
+
+def _stream_all_and_slice(db: FakeFirestoreClient, offset: int) -> int:
+    """旧実装: 全件をストリームして total を数え、Python 側でスライス"""
+    all_docs = list(db.collection(FirestoreTaskRepository.COLLECTION).stream())
+    [doc.to_dict() for doc in all_docs[offset : offset + PAGE_SIZE]]
+    return len(all_docs)
+
+
+async def run(sizes: list[int], latency: float, per_document_latency: float) -> None:
+    print(f"page_size={PAGE_SIZE} latency={latency * 1000:.1f}ms/rpc")
+    print(f"{'size':>8} {'impl':>14} {'ms/page':>10} {'reads/page':>11}")
+    for size in sizes:
+        db = FakeFirestoreClient(latency=latency, per_document_latency=per_document_latency)
+        _seed(db, size)
+        repo = FirestoreTaskRepository(db=db)
+
+        # フェイク側の並び替えキャッシュを温める
+        await repo.list(PAGE_SIZE, 0, None, None)
+
+        db.stats.reset()
+        start = time.perf_counter()
+        _, total = await repo.list(PAGE_SIZE, 0, None, None)
+        elapsed = time.perf_counter() - start
+        assert total == size
+        print(f"{size:>8} {'count+limit':>14} {elapsed * 1000:>10.2f} {db.stats.reads:>11}")
+
+        deep_offset = size - PAGE_SIZE
+        db.stats.reset()
+        start = time.perf_counter()
+        items, _ = await repo.list(PAGE_SIZE, deep_offset, None, None)
+        elapsed = time.perf_counter() - start
+        print(f"{size:>8} {'deep offset':>14} {elapsed * 1000:>10.2f} {db.stats.reads:>11}")
+
+        cursor = encode_cursor(_task_at(db, deep_offset - 1))
+        db.stats.reset()
+        start = time.perf_counter()
+        cursor_items, _ = await repo.list(PAGE_SIZE, 0, None, None, cursor=cursor)
+        elapsed = time.perf_counter() - start
+        assert [t["id"] for t in cursor_items] == [t["id"] for t in items]
+        print(f"{size:>8} {'deep cursor':>14} {elapsed * 1000:>10.2f} {db.stats.reads:>11}")
+
+        db.stats.reset()
+        start = time.perf_counter()
+        _stream_all_and_slice(db, 0)
+        elapsed = time.perf_counter() - start
+        print(f"{size:>8} {'stream+slice':>14} {elapsed * 1000:>10.2f} {db.stats.reads:>11}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--per-document-latency", type=float, default=0.00001)
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.latency, args.per_document_latency))
+
+
+if __name__ == "__main__":
+    main()
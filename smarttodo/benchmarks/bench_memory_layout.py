@@ -0,0 +1,106 @@
+"""インメモリストアのメモリレイアウトのベンチマーク
+
+タスクを辞書で持つ InMemoryTaskRepository と、列指向の配列で持つ ColumnarTaskRepository
+について、読み込み後に保持しているメモリ（tracemalloc、1 タスクあたりのバイト数）と
+一括読み込みの時間、get / フィルタ付きページ取得の 1 操作あたりの時間を計測する。
+
+実行: uv run python -m benchmarks.bench_memory_layout --sizes 10000 100000 1000000
+"""
+
+import argparse
+import asyncio
+import gc
+import random
+import statistics
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from src.services.columnar import ColumnarTaskRepository
+from src.services.memory import InMemoryTaskRepository
+
+PAGE_SIZE = 20
+_STATUSES = ("pending", "in_progress", "completed")
+_PRIORITIES = ("low", "medium", "high")
+_IMPLS: dict[str, Callable[[], InMemoryTaskRepository | ColumnarTaskRepository]] = {
+    "dict": InMemoryTaskRepository,
+    "columnar": ColumnarTaskRepository,
+}
+
+
+def _task(i: int, base: datetime) -> dict:
+    # 説明は同じ内容の文字列が別々のオブジェクトとして届く（リクエストごとにデコードされる）想定
+    return {
+        "id": UUID(int=i),
+        "title": f"タスク{i}",
+        "description": f"定例の作業 {i % 50}",
+        "due_date": None if i % 5 == 0 else base + timedelta(hours=i % 5000),
+        "status": _STATUSES[i % 3],
+        "priority": _PRIORITIES[(i // 3) % 3],
+        "tags": [],
+        "created_at": base + timedelta(microseconds=i),
+    }
+
+
+async def _median_us(op: Callable[[int], Awaitable[object]], operations: int) -> float:
+    samples = []
+    for i in range(operations):
+        start = time.perf_counter()
+        await op(i)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1_000_000
+
+
+async def _run_impl(
+    impl: str, size: int, base: datetime, targets: list[UUID], operations: int
+) -> None:
+    gc.collect()
+    tracemalloc.start()
+    repo = _IMPLS[impl]()
+    tasks = [_task(i, base) for i in range(size)]
+    start = time.perf_counter()
+    repo.load(tasks)
+    load = time.perf_counter() - start
+    del tasks
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    # pending かつ medium（全体の 1/9）の中ほどのページ
+    deep = size // 18
+    get = await _median_us(lambda i: repo.get(targets[i]), operations)
+    page = await _median_us(lambda i: repo.list(PAGE_SIZE, 0, "pending", "medium"), operations)
+    deep_page = await _median_us(
+        lambda i: repo.list(PAGE_SIZE, deep, "pending", "medium"), operations
+    )
+    print(
+        f"{size:>9} {impl:>9} {retained / 2**20:>8.1f} {retained / size:>7.0f}"
+        f" {load:>7.2f} {get:>8.1f} {page:>8.1f} {deep_page:>8.1f}"
+    )
+
+
+async def run(sizes: list[int], operations: int) -> None:
+    print(f"operations={operations} page_size={PAGE_SIZE}")
+    print(
+        f"{'size':>9} {'impl':>9} {'MiB':>8} {'B/task':>7} {'load s':>7}"
+        f" {'get us':>8} {'page us':>8} {'deep us':>8}"
+    )
+    for size in sizes:
+        base = datetime(2026, 1, 1)
+        targets = [UUID(int=i) for i in random.Random(size).sample(range(size), operations)]
+        for impl in _IMPLS:
+            await _run_impl(impl, size, base, targets, operations)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--operations", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.operations))
+
+
+if __name__ == "__main__":
+    main()
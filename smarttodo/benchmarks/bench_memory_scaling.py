@@ -0,0 +1,116 @@
+"""InMemoryTaskRepository のスケーリングのベンチマーク
+
+タスク数を増やしながら get / update / delete とフィルタ付きページ取得の 1 操作あたりの時間を計測し、
+リストを線形走査する方式（索引化前の実装）と比較する。
+
+実行: uv run python -m benchmarks.bench_memory_scaling --sizes 1000 10000 100000 300000
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from src.services.memory import InMemoryTaskRepository
+
+PAGE_SIZE = 20
+_STATUSES = ("pending", "in_progress", "completed")
+_PRIORITIES = ("low", "medium", "high")
+_COLUMNS = ("get", "update", "update idx", "delete", "page", "deep page")
+
+
+def _task(i: int, base: datetime) -> dict:
+    return {
+        "id": UUID(int=i),
+        "title": f"タスク{i}",
+        "description": "",
+        "due_date": base + timedelta(hours=i % 1000),
+        "status": _STATUSES[i % 3],
+        "priority": _PRIORITIES[(i // 3) % 3],
+        "tags": [],
+        "created_at": base + timedelta(microseconds=i),
+    }
+
+
+async def _median_us(op: Callable[[int], Awaitable[object] | object], operations: int) -> float:
+    samples = []
+    for i in range(operations):
+        start = time.perf_counter()
+        result = op(i)
+        if asyncio.iscoroutine(result):
+            await result
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1_000_000
+
+
+def _scan_get(tasks: list[dict], task_id: UUID) -> dict | None:
+    """線形走査による取得"""
+    return next((t for t in tasks if t["id"] == task_id), None)
+
+
+def _scan_page(tasks: list[dict], offset: int) -> tuple[list[dict], int]:
+    """全件をフィルタしてから切り出す一覧"""
+    filtered = [t for t in tasks if t["status"] == "pending" and t["priority"] == "medium"]
+    return filtered[offset : offset + PAGE_SIZE], len(filtered)
+
+
+def _row(size: int, impl: str, values: dict[str, float]) -> str:
+    cells = " ".join(f"{values[c]:>10.1f}" if c in values else f"{'-':>10}" for c in _COLUMNS)
+    return f"{size:>8} {impl:>8} {cells}"
+
+
+async def run(sizes: list[int], operations: int) -> None:
+    print(f"operations={operations} page_size={PAGE_SIZE} (median us/op)")
+    print(f"{'size':>8} {'impl':>8} " + " ".join(f"{c:>10}" for c in _COLUMNS))
+    for size in sizes:
+        base = datetime(2026, 1, 1)
+        tasks = [_task(i, base) for i in range(size)]
+        repo = InMemoryTaskRepository()
+        repo.load(dict(task) for task in tasks)
+        # 更新・削除で全ての索引を入れ替えるよう、先に作っておく
+        await repo.build_indexes()
+        targets = random.Random(size).sample([t["id"] for t in tasks], operations * 2)
+        # pending かつ medium（全体の 1/9）の中ほどのページ
+        deep = size // 18
+
+        indexed = {
+            "get": await _median_us(lambda i: repo.get(targets[i]), operations),
+            "update": await _median_us(
+                lambda i: repo.update(targets[i], {"title": "更新"}), operations
+            ),
+            "update idx": await _median_us(
+                lambda i: repo.update(targets[i], {"status": _STATUSES[i % 3]}), operations
+            ),
+            "delete": await _median_us(lambda i: repo.delete(targets[operations + i]), operations),
+            "page": await _median_us(
+                lambda i: repo.list(PAGE_SIZE, 0, "pending", "medium"), operations
+            ),
+            "deep page": await _median_us(
+                lambda i: repo.list(PAGE_SIZE, deep, "pending", "medium"), operations
+            ),
+        }
+        print(_row(size, "indexed", indexed))
+
+        scan_operations = max(5, operations // 20)
+        scanned = {
+            "get": await _median_us(lambda i: _scan_get(tasks, targets[i]), scan_operations),
+            "page": await _median_us(lambda i: _scan_page(tasks, 0), scan_operations),
+            "deep page": await _median_us(lambda i: _scan_page(tasks, deep), scan_operations),
+        }
+        print(_row(size, "scan", scanned))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--operations", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.operations))
+
+
+if __name__ == "__main__":
+    main()
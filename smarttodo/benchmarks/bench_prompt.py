@@ -0,0 +1,73 @@
+"""提案のプロンプトのトークン数のベンチマーク
+
+提案のプロンプトに渡すタスク（100件まで）について、全件を1件5行で書く従来の形式と、
+予算内の表形式（build_budgeted_prompt）のトークン数の見積もり・含めた件数・構築時間（中央値）を比べる。
+説明の長さは 0〜1000 文字（上限）で変える。
+
+実行: uv run python -m benchmarks.bench_prompt --sizes 10 100 --budgets 800 1500 4000
+"""
+
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from src.ai.prompts import build_budgeted_prompt
+from src.models.task import TaskPriority, TaskResponse, TaskStatus
+
+_STATUSES = (TaskStatus.PENDING, TaskStatus.IN_PROGRESS, TaskStatus.COMPLETED)
+_PRIORITIES = (TaskPriority.LOW, TaskPriority.MEDIUM, TaskPriority.HIGH)
+_BASE = datetime(2026, 1, 1)
+
+
+def _task(i: int, description_chars: int) -> TaskResponse:
+    return TaskResponse(
+        id=UUID(int=i),
+        title=f"タスク{i} の資料をまとめる",
+        description=("先週の議事録を確認して対応を整理する。" * 60)[:description_chars],
+        due_date=_BASE + timedelta(days=i % 30 - 10) if i % 2 else None,
+        status=_STATUSES[(i // 7) % 3],
+        priority=_PRIORITIES[(i // 11) % 3],
+        created_at=_BASE + timedelta(minutes=i),
+    )
+
+
+def _median_ms(tasks: list[TaskResponse], budget: int, operations: int) -> float:
+    samples = []
+    for _ in range(operations):
+        start = time.perf_counter()
+        build_budgeted_prompt(tasks, 3, budget, now=_BASE)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def run(sizes: list[int], budgets: list[int], operations: int) -> None:
+    print(f"operations={operations}")
+    print(
+        f"{'size':>5} {'desc':>5} {'budget':>7} {'full':>8} {'tokens':>7} {'saved':>8}"
+        f" {'included':>9} {'ms':>7}"
+    )
+    for size in sizes:
+        for description_chars in (0, 200, 1000):
+            tasks = [_task(i, description_chars) for i in range(size)]
+            for budget in budgets:
+                prompt = build_budgeted_prompt(tasks, 3, budget, now=_BASE)
+                ms = _median_ms(tasks, budget, operations)
+                print(
+                    f"{size:>5} {description_chars:>5} {budget:>7} {prompt.full_tokens:>8}"
+                    f" {prompt.tokens:>7} {prompt.saved_tokens:>8} {prompt.included:>9} {ms:>7.2f}"
+                )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--budgets", type=int, nargs="+", default=[800, 1500, 4000])
+    parser.add_argument("--operations", type=int, default=20)
+    args = parser.parse_args()
+    run(args.sizes, args.budgets, args.operations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""TaskRepository の操作ごとのベンチマーク
+
+コレクションサイズごとに create / get / list / update / delete を一定の並列度で実行し、
+スループット（ops/s）、操作ごとのレイテンシ（p50 / p99）、課金対象の読み取り数を出力する。
+Firestore は RPC 遅延を注入した FakeFirestoreClient で、SQLite は一時ファイルで計測する。
+
+実行: uv run python -m benchmarks.bench_repository --sizes 1000 10000 100000 --repo all
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
+from pathlib import Path
+from uuid import UUID
+
+from src.services.fake_firestore import FakeFirestoreClient
+from src.services.firestore import (
+    FirestoreTaskRepository,
+    InMemoryTaskRepository,
+    TaskRepository,
+)
+from src.services.sqlite import _INSERT, SqliteTaskRepository
+
+PAGE_SIZE = 20
+_PRIORITIES = ("low", "medium", "high")
+_STATUSES = ("pending", "in_progress", "completed")
+
+
+def _task(i: int, base: datetime) -> dict:
+    return {
+        "id": UUID(int=i),
+        "title": f"タスク{i}",
+        "description": "",
+        "due_date": base + timedelta(hours=i),
+        "status": _STATUSES[i % 3],
+        "priority": _PRIORITIES[i % 3],
+        "tags": [],
+        "created_at": base + timedelta(microseconds=i),
+    }
+
+
+async def _seed(repo: TaskRepository, size: int) -> list[UUID]:
+    base = datetime(2026, 1, 1)
+    tasks = [_task(i, base) for i in range(size)]
+    if isinstance(repo, FirestoreTaskRepository):
+        # RPC を経由せずにフェイクのストアへ直接書き込む
+        store = repo._db._collections.setdefault(repo.COLLECTION, {})
+        for task in tasks:
+            store[str(task["id"])] = repo._to_firestore(task)
+    elif isinstance(repo, SqliteTaskRepository):
+        rows = [repo._to_row(task) for task in tasks]
+        await repo._run(repo._transaction, lambda conn: conn.executemany(_INSERT, rows))
+    else:
+        for task in tasks:
+            repo._insert(task)
+    return [task["id"] for task in tasks]
+
+
+async def _measure(
+    op: Callable[[int], Awaitable[object]], operations: int, concurrency: int
+) -> tuple[float, list[float]]:
+    """operations 回の op を concurrency 並列で実行し、(経過秒, 各操作の秒) を返す"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def timed(i: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await op(i)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(timed(i) for i in range(operations)))
+    return time.perf_counter() - start, latencies
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    return statistics.quantiles(samples, n=100, method="inclusive")[int(pct) - 1]
+
+
+async def run_repo(
+    name: str,
+    make_repo: Callable[[], TaskRepository],
+    size: int,
+    operations: int,
+    concurrency: int,
+) -> None:
+    repo = make_repo()
+    ids = await _seed(repo, size)
+    rng = random.Random(size)
+    targets = rng.sample(ids, min(operations, len(ids)))
+    db = repo._db if isinstance(repo, FirestoreTaskRepository) else None
+
+    # フェイク側の並び替えキャッシュを温める（計測対象外）
+    await repo.list(PAGE_SIZE, 0, None, None)
+
+    ops: dict[str, Callable[[int], Awaitable[object]]] = {
+        "create": lambda i: repo.create({"title": f"新規{i}"}),
+        "get": lambda i: repo.get(targets[i % len(targets)]),
+        "list": lambda i: repo.list(PAGE_SIZE, 0, None, None),
+        "update": lambda i: repo.update(targets[i % len(targets)], {"status": "completed"}),
+        "delete": lambda i: repo.delete(targets[i % len(targets)]),
+    }
+    for op_name, op in ops.items():
+        if op_name == "list":
+            await repo.list(PAGE_SIZE, 0, None, None)
+        if db is not None:
+            db.stats.reset()
+        elapsed, latencies = await _measure(op, operations, concurrency)
+        reads = f"{db.stats.reads / operations:.1f}" if db is not None else "-"
+        print(
+            f"{size:>8} {name:>10} {op_name:>7} {operations / elapsed:>10.0f}"
+            f" {statistics.median(latencies) * 1000:>8.2f}"
+            f" {_percentile(latencies, 99) * 1000:>8.2f} {reads:>9}"
+        )
+
+
+async def run(
+    sizes: list[int],
+    repos: list[str],
+    operations: int,
+    concurrency: int,
+    latency: float,
+    jitter: float,
+) -> None:
+    factories: dict[str, Callable[[], TaskRepository]] = {
+        "firestore": lambda: FirestoreTaskRepository(
+            db=FakeFirestoreClient(latency=latency, jitter=jitter, seed=0)
+        ),
+        "memory": InMemoryTaskRepository,
+        "sqlite": lambda: SqliteTaskRepository(
+            str(Path(tempfile.mkdtemp(prefix="bench_sqlite_")) / "tasks.db")
+        ),
+    }
+    print(
+        f"operations={operations} concurrency={concurrency}"
+        f" latency={latency * 1000:.1f}ms jitter={jitter * 1000:.1f}ms"
+    )
+    print(
+        f"{'size':>8} {'repo':>10} {'op':>7} {'ops/s':>10} {'p50 ms':>8} {'p99 ms':>8}"
+        f" {'reads/op':>9}"
+    )
+    for size in sizes:
+        for name in repos:
+            await run_repo(name, factories[name], size, operations, concurrency)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument(
+        "--repo", choices=["firestore", "memory", "sqlite", "both", "all"], default="both"
+    )
+    parser.add_argument("--operations", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--jitter", type=float, default=0.002)
+    args = parser.parse_args()
+    repos = {
+        "both": ["firestore", "memory"],
+        "all": ["firestore", "memory", "sqlite"],
+    }.get(args.repo, [args.repo])
+    asyncio.run(
+        run(args.sizes, repos, args.operations, args.concurrency, args.latency, args.jitter)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""全文検索のベンチマーク
+
+InMemoryTaskRepository（n-gram 索引）と SqliteTaskRepository（FTS5 のグラム索引）の search と、
+全タスクの正規化済みテキストを走査する素朴な実装について、一致の少ないクエリ・多いクエリ・
+複数語のクエリの 1 回あたりの時間（中央値）と索引の構築時間を計測する。
+
+実行: uv run python -m benchmarks.bench_search --sizes 10000 100000 1000000
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
+from pathlib import Path
+from uuid import UUID
+
+from src.services.memory import InMemoryTaskRepository
+from src.services.search import match_score, normalize, query_terms, rank
+from src.services.sqlite import SqliteTaskRepository
+
+PAGE_SIZE = 20
+_SQLITE_CHUNK = 10_000
+_VERBS = ("作成", "確認", "レビュー", "修正", "送付", "準備", "集計", "更新")
+_NOUNS = ("資料", "請求書", "見積書", "議事録", "Report", "API 仕様", "週次会議", "契約書")
+# (名前, クエリ): 一致が少ない / 多い / 複数語 / 1 文字
+_QUERIES = (
+    ("rare", "顧客123"),
+    ("common", "資料"),
+    ("and", "report 修正"),
+    ("char", "書"),
+)
+
+
+def _task(i: int, base: datetime) -> dict:
+    return {
+        "id": UUID(int=i),
+        "title": f"{_NOUNS[i % 8]}の{_VERBS[(i // 8) % 8]}",
+        "description": f"顧客{i % 1000} 向け 第{i % 52}週",
+        "due_date": None,
+        "status": "pending",
+        "priority": "medium",
+        "tags": [],
+        "created_at": base + timedelta(microseconds=i),
+    }
+
+
+def _scan(tasks: list[tuple[UUID, str, str, datetime]]) -> Callable[[str], list[UUID]]:
+    """正規化済みのテキストを全件走査する比較用の実装"""
+    created_at = {task_id: created for task_id, _, _, created in tasks}
+
+    def search(query: str) -> list[UUID]:
+        terms = query_terms(query)
+        matches = []
+        for task_id, title, description, _ in tasks:
+            score = match_score(terms, title, description)
+            if score:
+                matches.append((score, task_id))
+        return rank(matches, created_at.__getitem__, PAGE_SIZE)
+
+    return search
+
+
+async def _median_ms(op: Callable[[], Awaitable[object] | object], operations: int) -> float:
+    samples = []
+    for _ in range(operations):
+        start = time.perf_counter()
+        result = op()
+        if asyncio.iscoroutine(result):
+            await result
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+async def _bench_scan(tasks: list[dict], operations: int) -> tuple[float, list[float]]:
+    start = time.perf_counter()
+    scan = _scan(
+        [
+            (t["id"], normalize(t["title"]), normalize(t["description"]), t["created_at"])
+            for t in tasks
+        ]
+    )
+    build = time.perf_counter() - start
+    return build, [await _median_ms(lambda q=q: scan(q), operations) for _, q in _QUERIES]
+
+
+async def _bench_memory(tasks: list[dict], operations: int) -> tuple[float, list[float]]:
+    repo = InMemoryTaskRepository()
+    start = time.perf_counter()
+    repo.load(tasks)
+    build = time.perf_counter() - start
+    return build, [
+        await _median_ms(lambda q=q: repo.search(q, PAGE_SIZE), operations) for _, q in _QUERIES
+    ]
+
+
+async def _bench_sqlite(tasks: list[dict], operations: int) -> tuple[float, list[float]]:
+    with tempfile.TemporaryDirectory() as directory:
+        repo = SqliteTaskRepository(str(Path(directory) / "tasks.db"))
+        try:
+            # 作成時に FTS5 表へトリガーで登録する時間を含めて計測する
+            start = time.perf_counter()
+            for i in range(0, len(tasks), _SQLITE_CHUNK):
+                await repo.create_many(
+                    [
+                        {"title": t["title"], "description": t["description"]}
+                        for t in tasks[i : i + _SQLITE_CHUNK]
+                    ]
+                )
+            build = time.perf_counter() - start
+            return build, [
+                await _median_ms(lambda q=q: repo.search(q, PAGE_SIZE), operations)
+                for _, q in _QUERIES
+            ]
+        finally:
+            repo.close()
+
+
+_IMPLS = {"scan": _bench_scan, "memory": _bench_memory, "sqlite": _bench_sqlite}
+
+
+async def run(sizes: list[int], operations: int) -> None:
+    print(f"operations={operations} page_size={PAGE_SIZE}")
+    print(
+        f"{'size':>9} {'impl':>7} {'build s':>8}"
+        + "".join(f" {name + ' ms':>10}" for name, _ in _QUERIES)
+    )
+    for size in sizes:
+        base = datetime(2026, 1, 1)
+        tasks = [_task(i, base) for i in range(size)]
+        for impl, bench in _IMPLS.items():
+            build, times = await bench(tasks, operations)
+            print(f"{size:>9} {impl:>7} {build:>8.2f}" + "".join(f" {t:>10.2f}" for t in times))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--operations", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.operations))
+
+
+if __name__ == "__main__":
+    main()
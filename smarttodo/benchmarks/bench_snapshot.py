@@ -0,0 +1,103 @@
+"""インメモリストアのスナップショットのベンチマーク
+
+タスク数ごとにスナップショットの書き出し時間・ファイルサイズと、起動時の復元時間
+（スナップショットの読み込み + ログの適用）、起動後に後回しにした索引の作成時間
+（build_indexes）、復元直後の最初の一覧・検索の時間を計測する。
+--replay-limit 以下のサイズでは create() で1件ずつ投入し直す場合とも比較する。
+
+実行: uv run python -m benchmarks.bench_snapshot --sizes 10000 100000 1000000
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from uuid import UUID
+
+from src.services.memory import InMemoryTaskRepository
+from src.services.snapshot import SnapshotTaskRepository
+
+_STATUSES = ("pending", "in_progress", "completed")
+_PRIORITIES = ("low", "medium", "high")
+
+
+def _task(i: int, base: datetime) -> dict:
+    return {
+        "id": UUID(int=i),
+        "title": f"タスク{i}",
+        "description": "説明" if i % 2 else "",
+        "due_date": None if i % 5 == 0 else base + timedelta(hours=i % 5000),
+        "status": _STATUSES[i % 3],
+        "priority": _PRIORITIES[(i // 3) % 3],
+        "tags": [],
+        "created_at": base + timedelta(microseconds=i),
+    }
+
+
+async def run(sizes: list[int], log_records: int, replay_limit: int) -> None:
+    print(f"log_records={log_records}")
+    print(
+        f"{'size':>9} {'write s':>8} {'MiB':>8} {'B/task':>7} {'restore s':>10}"
+        f" {'list s':>7} {'search s':>9} {'index s':>8} {'create() s':>11}"
+    )
+    for size in sizes:
+        base = datetime(2026, 1, 1)
+        tasks = [_task(i, base) for i in range(size)]
+        with tempfile.TemporaryDirectory(prefix="bench_snapshot_") as directory:
+            memory = InMemoryTaskRepository()
+            repo = SnapshotTaskRepository(memory, directory)
+            memory.load(tasks)
+
+            start = time.perf_counter()
+            await repo.snapshot()
+            write = time.perf_counter() - start
+            # スナップショット後の変更（ログから適用される）
+            for i in range(log_records):
+                await repo.update(tasks[i % size]["id"], {"status": "completed"})
+            repo._log.close()
+            file_size = (Path(directory) / SnapshotTaskRepository.SNAPSHOT_FILE).stat().st_size
+
+            start = time.perf_counter()
+            restored = SnapshotTaskRepository(InMemoryTaskRepository(), directory)
+            restore = time.perf_counter() - start
+            # 索引を作る前の最初の一覧（使う索引だけを作る）
+            start = time.perf_counter()
+            assert (await restored.list(1, 0, None, None))[1] == size
+            first_list = time.perf_counter() - start
+            start = time.perf_counter()
+            assert (await restored.search(f"タスク{size - 1}", 1))[1] == 1
+            first_search = time.perf_counter() - start
+            restored._log.close()
+            restored = SnapshotTaskRepository(InMemoryTaskRepository(), directory)
+            start = time.perf_counter()
+            await restored.build_indexes()
+            indexing = time.perf_counter() - start
+            restored._log.close()
+
+        replay = "-"
+        if size <= replay_limit:
+            replayed = InMemoryTaskRepository()
+            start = time.perf_counter()
+            for task in tasks:
+                await replayed.create(task)
+            replay = f"{time.perf_counter() - start:.2f}"
+        print(
+            f"{size:>9} {write:>8.2f} {file_size / 2**20:>8.1f} {file_size / size:>7.0f}"
+            f" {restore:>10.2f} {first_list:>7.2f} {first_search:>9.2f} {indexing:>8.2f}"
+            f" {replay:>11}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--log-records", type=int, default=10_000)
+    parser.add_argument("--replay-limit", type=int, default=100_000)
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.log_records, args.replay_limit))
+
+
+if __name__ == "__main__":
+    main()
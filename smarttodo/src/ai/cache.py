@@ -0,0 +1,367 @@
+"""提案キャッシュのバックエンド
+
+SuggestionService はエントリの保存先を SuggestionCacheBackend として受け取る。
+
+- MemorySuggestionCache: プロセス内の TTLCache（デフォルト）
+- SqliteSuggestionCache: SQLite ファイル（同じホストのプロセス間・再起動後も共有）
+- RedisSuggestionCache: Redis プロトコルのサーバー（Cloud Run の全インスタンスで共有）
+
+どのバックエンドもエントリを使ったタスクごとに引けるようにし、書き込まれたタスクを含む
+エントリだけを無効化できる。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from collections.abc import Callable, Iterable, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, NamedTuple, Protocol
+from uuid import UUID
+
+from cachetools import TTLCache
+
+from src.services.resp import RedisClient, RedisError
+
+DEFAULT_TTL = 300  # 5分
+DEFAULT_MAXSIZE = 100
+
+
+class CacheEntry(NamedTuple):
+    """提案キャッシュのエントリ"""
+
+    # プロンプトに使ったタスクのフィンガープリント
+    fingerprints: dict[UUID, int]
+    # TaskSuggestion を JSON にできる形にしたもの
+    suggestions: list[dict]
+    # 書き込んだインスタンス
+    origin: str
+    # 保存した時刻（UNIX 時間、インスタンス間で比べるため壁時計）
+    created_at: float = 0.0
+
+
+class CacheBackendError(Exception):
+    """共有キャッシュに接続できない・応答しない"""
+
+
+class SuggestionCacheBackend(Protocol):
+    """提案キャッシュの保存先"""
+
+    async def get(self, key: str) -> CacheEntry | None:
+        """有効期限内のエントリを取得"""
+        ...
+
+    async def set(self, key: str, entry: CacheEntry) -> None:
+        """エントリを保存"""
+        ...
+
+    async def invalidate(self, changed: Mapping[UUID, int], removed: Iterable[UUID]) -> int:
+        """フィンガープリントの変わったタスク・削除したタスクを含むエントリを消し、件数を返す"""
+        ...
+
+    async def clear(self) -> None:
+        """全エントリを削除"""
+        ...
+
+    async def close(self) -> None:
+        """接続を閉じる"""
+        ...
+
+
+def encode_entry(entry: CacheEntry) -> str:
+    return json.dumps(
+        {
+            "fingerprints": {str(task_id): fp for task_id, fp in entry.fingerprints.items()},
+            "suggestions": entry.suggestions,
+            "origin": entry.origin,
+            "created_at": entry.created_at,
+        },
+        ensure_ascii=False,
+    )
+
+
+def decode_entry(data: str | bytes) -> CacheEntry:
+    """保存した値をエントリに戻す（読めない値は CacheBackendError）"""
+    try:
+        value = json.loads(data)
+        entry = CacheEntry(
+            {UUID(task_id): int(fp) for task_id, fp in value["fingerprints"].items()},
+            value["suggestions"],
+            str(value["origin"]),
+            # 保存時刻のないエントリは古いものとして扱い、次の読み取りで更新する
+            float(value.get("created_at", 0.0)),
+        )
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        raise CacheBackendError(f"不正なエントリ: {e!r}") from e
+    if not isinstance(entry.suggestions, list) or not all(
+        isinstance(s, dict) for s in entry.suggestions
+    ):
+        raise CacheBackendError("不正なエントリ: suggestions が配列ではありません")
+    return entry
+
+
+def is_stale(
+    fingerprints: Mapping[UUID, int], changed: Mapping[UUID, int], removed: Iterable[UUID]
+) -> bool:
+    """エントリが削除したタスクか、内容の変わったタスクを含むか"""
+    return any(task_id in fingerprints for task_id in removed) or any(
+        fingerprints.get(task_id, fingerprint) != fingerprint
+        for task_id, fingerprint in changed.items()
+    )
+
+
+class MemorySuggestionCache:
+    """プロセス内の TTLCache（インスタンスごと）"""
+
+    def __init__(
+        self,
+        maxsize: int = DEFAULT_MAXSIZE,
+        ttl: float = DEFAULT_TTL,
+        timer: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._cache: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl, timer=timer)
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    async def get(self, key: str) -> CacheEntry | None:
+        return self._cache.get(key)
+
+    async def set(self, key: str, entry: CacheEntry) -> None:
+        self._cache[key] = entry
+
+    async def invalidate(self, changed: Mapping[UUID, int], removed: Iterable[UUID]) -> int:
+        removed = set(removed)
+        stale = [
+            key
+            for key, entry in self._cache.items()
+            if is_stale(entry.fingerprints, changed, removed)
+        ]
+        for key in stale:
+            self._cache.pop(key, None)
+        return len(stale)
+
+    async def clear(self) -> None:
+        self._cache.clear()
+
+    async def close(self) -> None:
+        pass
+
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS suggestion_cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS suggestion_cache_expires ON suggestion_cache (expires_at);
+CREATE TABLE IF NOT EXISTS suggestion_cache_tasks (
+    task_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    PRIMARY KEY (task_id, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS suggestion_cache_tasks_key ON suggestion_cache_tasks (key);
+"""
+
+
+class SqliteSuggestionCache:
+    """SQLite ファイルのキャッシュ
+
+    有効期限は時刻の列で持ち、保存のたびに期限切れの行を削除する。エントリが使ったタスクは
+    別の表に (タスク ID, キー, フィンガープリント) で持ち、無効化は該当タスクの行だけを引く。
+    フィンガープリントは 64 ビット符号なしのため 16 進の文字列で保存する。
+    """
+
+    def __init__(
+        self, path: str, ttl: float = DEFAULT_TTL, timer: Callable[[], float] = time.time
+    ) -> None:
+        self._path = path
+        self._ttl = ttl
+        self._timer = timer
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="suggestion-cache")
+        self._conn = self._executor.submit(self._connect).result()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self._path, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.executescript(_SQLITE_SCHEMA)
+        return conn
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args))
+
+    async def get(self, key: str) -> CacheEntry | None:
+        return await self._run(self._get, key)
+
+    def _get(self, key: str) -> CacheEntry | None:
+        row = self._conn.execute(
+            "SELECT value FROM suggestion_cache WHERE key = ? AND expires_at > ?",
+            (key, self._timer()),
+        ).fetchone()
+        return None if row is None else decode_entry(row[0])
+
+    async def set(self, key: str, entry: CacheEntry) -> None:
+        await self._run(self._set, key, entry)
+
+    def _transaction(self, func: Callable[[sqlite3.Connection], Any]) -> Any:
+        """func を1トランザクションで実行"""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = func(self._conn)
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+        return result
+
+    def _set(self, key: str, entry: CacheEntry) -> None:
+        now = self._timer()
+        rows = [(str(task_id), key, f"{fp:016x}") for task_id, fp in entry.fingerprints.items()]
+
+        def write(conn: sqlite3.Connection) -> None:
+            expired = "SELECT key FROM suggestion_cache WHERE expires_at <= ?"
+            conn.execute(f"DELETE FROM suggestion_cache_tasks WHERE key IN ({expired})", (now,))
+            conn.execute("DELETE FROM suggestion_cache WHERE expires_at <= ?", (now,))
+            conn.execute(
+                "INSERT OR REPLACE INTO suggestion_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, encode_entry(entry), now + self._ttl),
+            )
+            conn.execute("DELETE FROM suggestion_cache_tasks WHERE key = ?", (key,))
+            conn.executemany(
+                "INSERT INTO suggestion_cache_tasks (task_id, key, fingerprint) VALUES (?, ?, ?)",
+                rows,
+            )
+
+        self._transaction(write)
+
+    async def invalidate(self, changed: Mapping[UUID, int], removed: Iterable[UUID]) -> int:
+        return await self._run(self._invalidate, dict(changed), set(removed))
+
+    def _invalidate(self, changed: dict[UUID, int], removed: set[UUID]) -> int:
+        wanted = {str(task_id): f"{fp:016x}" for task_id, fp in changed.items()}
+        wanted.update((str(task_id), None) for task_id in removed)
+        if not wanted:
+            return 0
+
+        def delete(conn: sqlite3.Connection) -> int:
+            placeholders = ", ".join("?" * len(wanted))
+            rows = conn.execute(
+                "SELECT task_id, key, fingerprint FROM suggestion_cache_tasks"
+                f" WHERE task_id IN ({placeholders})",
+                list(wanted),
+            ).fetchall()
+            stale = sorted({key for task_id, key, fp in rows if wanted[task_id] != fp})
+            if not stale:
+                return 0
+            placeholders = ", ".join("?" * len(stale))
+            conn.execute(f"DELETE FROM suggestion_cache_tasks WHERE key IN ({placeholders})", stale)
+            return conn.execute(
+                f"DELETE FROM suggestion_cache WHERE key IN ({placeholders})", stale
+            ).rowcount
+
+        return self._transaction(delete)
+
+    async def clear(self) -> None:
+        await self._run(
+            self._conn.executescript,
+            "DELETE FROM suggestion_cache; DELETE FROM suggestion_cache_tasks;",
+        )
+
+    async def close(self) -> None:
+        await self._run(self._conn.close)
+        self._executor.shutdown()
+
+
+class RedisSuggestionCache:
+    """Redis プロトコルのサーバーを使う共有キャッシュ
+
+    エントリは {prefix}entry:{キー} に有効期限付きで保存し、タスクごとのハッシュ
+    {prefix}task:{タスク ID} にキー → フィンガープリントを持つ。保存・無効化のコマンドは
+    パイプラインでまとめて送る。接続できない場合は CacheBackendError を送出する。
+    """
+
+    def __init__(
+        self, client: RedisClient, ttl: float = DEFAULT_TTL, prefix: str = "smarttodo:suggestions:"
+    ) -> None:
+        self._client = client
+        self._ttl_ms = int(ttl * 1000)
+        self._prefix = prefix
+
+    def _entry_key(self, key: str) -> str:
+        return f"{self._prefix}entry:{key}"
+
+    def _task_key(self, task_id: UUID) -> str:
+        return f"{self._prefix}task:{task_id}"
+
+    async def _pipeline(self, commands: list[tuple]) -> list[Any]:
+        try:
+            return await self._client.pipeline(commands)
+        except (OSError, TimeoutError, EOFError, RedisError) as e:
+            raise CacheBackendError(str(e) or type(e).__name__) from e
+
+    async def get(self, key: str) -> CacheEntry | None:
+        (data,) = await self._pipeline([("GET", self._entry_key(key))])
+        return None if data is None else decode_entry(data)
+
+    async def set(self, key: str, entry: CacheEntry) -> None:
+        commands: list[tuple] = [
+            ("SET", self._entry_key(key), encode_entry(entry), "PX", self._ttl_ms)
+        ]
+        for task_id, fingerprint in entry.fingerprints.items():
+            commands.append(("HSET", self._task_key(task_id), key, f"{fingerprint:016x}"))
+            commands.append(("PEXPIRE", self._task_key(task_id), self._ttl_ms))
+        await self._pipeline(commands)
+
+    async def invalidate(self, changed: Mapping[UUID, int], removed: Iterable[UUID]) -> int:
+        wanted = {task_id: f"{fp:016x}".encode() for task_id, fp in changed.items()}
+        wanted.update((task_id, None) for task_id in removed)
+        if not wanted:
+            return 0
+        replies = await self._pipeline([("HGETALL", self._task_key(t)) for t in wanted])
+
+        stale: set[bytes] = set()
+        commands: list[tuple] = []
+        for (task_id, fingerprint), reply in zip(wanted.items(), replies):
+            keys = [k for k, fp in zip(reply[::2], reply[1::2]) if fp != fingerprint]
+            if keys:
+                stale.update(keys)
+                commands.append(("HDEL", self._task_key(task_id), *keys))
+        if not stale:
+            return 0
+        commands.append(("DEL", *(self._entry_key(key.decode()) for key in sorted(stale))))
+        return (await self._pipeline(commands))[-1]
+
+    async def clear(self) -> None:
+        cursor = b"0"
+        while True:
+            cursor, keys = (
+                await self._pipeline([("SCAN", cursor, "MATCH", f"{self._prefix}*", "COUNT", 1000)])
+            )[0]
+            if keys:
+                await self._pipeline([("DEL", *keys)])
+            if cursor == b"0":
+                return
+
+    async def close(self) -> None:
+        await self._client.close()
+
+
+def cache_backend_from_env(ttl: float = DEFAULT_TTL) -> SuggestionCacheBackend:
+    """環境変数に応じたバックエンド
+
+    SUGGESTION_CACHE_REDIS_URL があれば Redis、SUGGESTION_CACHE_PATH があれば SQLite、
+    どちらもなければプロセス内。エントリは ttl 秒で消える。
+    """
+    if redis_url := os.environ.get("SUGGESTION_CACHE_REDIS_URL"):
+        return RedisSuggestionCache(RedisClient(redis_url), ttl)
+    if path := os.environ.get("SUGGESTION_CACHE_PATH"):
+        return SqliteSuggestionCache(path, ttl)
+    return MemorySuggestionCache(ttl=ttl)
@@ -1,4 +1,29 @@
-from src.models.task import TaskResponse
+"""タスク提案のプロンプト
+
+タスク一覧はトークン数の上限（予算）の範囲に収まるよう、提案に効くタスクから順に
+1行1件の表形式で書く。トークン数は tiktoken を使わずにローカルで見積もる。
+"""
+
+from datetime import UTC, datetime
+from typing import NamedTuple
+
+from src.models.task import SuggestionTask, TaskCounts, TaskPriority, TaskResponse, TaskStatus
+
+# プロンプトに書けるタスク（API のレスポンス、またはリポジトリの軽量な表現）
+PromptTask = TaskResponse | SuggestionTask
+
+# タスク一覧に使うトークン数の上限（システムプロンプトを除くユーザープロンプト全体）
+PROMPT_TOKEN_BUDGET = 1500
+# 説明を切り詰める文字数
+DESCRIPTION_MAX_CHARS = 60
+# 一覧に含める直近の完了タスクの上限
+COMPLETED_SAMPLE = 10
+
+# 表形式の列（_row と同じ順）
+_COLUMNS = "状態|優先度|期限|タイトル|説明"
+_STATUS_JA = {"pending": "未完了", "in_progress": "進行中", "completed": "完了"}
+_PRIORITY_JA = {"low": "低", "medium": "中", "high": "高"}
+_PRIORITY_RANK = {TaskPriority.HIGH: 0, TaskPriority.MEDIUM: 1, TaskPriority.LOW: 2}
 
 SUGGESTION_SYSTEM_PROMPT = """あなたはタスク管理のアシスタントです。
 ユーザーの過去のタスク履歴を分析し、次にやるべきタスクを提案してください。
@@ -14,40 +39,7 @@ SUGGESTION_SYSTEM_PROMPT = """あなたはタスク管理のアシスタント
 - 推奨優先度（high/medium/low）
 """
 
-
-def build_suggestion_prompt(tasks: list[TaskResponse], limit: int = 3) -> str:
-    """タスク提案用のプロンプトを構築"""
-    if not tasks:
-        return f"""タスク履歴がありません。
-一般的なタスク管理のベストプラクティスに基づいて、{limit}件のタスクを提案してください。
-新規ユーザー向けの基本的なタスクを提案してください。"""
-
-    # タスク情報をフォーマット
-    task_info = []
-    for task in tasks:
-        status_ja = {"pending": "未完了", "in_progress": "進行中", "completed": "完了"}.get(
-            task.status.value, task.status.value
-        )
-        priority_ja = {"low": "低", "medium": "中", "high": "高"}.get(
-            task.priority.value, task.priority.value
-        )
-        due_str = task.due_date.isoformat() if task.due_date else "なし"
-
-        task_info.append(
-            f"- タイトル: {task.title}\n"
-            f"  説明: {task.description or 'なし'}\n"
-            f"  ステータス: {status_ja}\n"
-            f"  優先度: {priority_ja}\n"
-            f"  期限: {due_str}"
-        )
-
-    tasks_text = "\n".join(task_info)
-
-    return f"""以下は現在のタスク一覧です:
-
-{tasks_text}
-
-上記のタスク履歴を分析して、次にやるべきタスクを{limit}件提案してください。
+_ANSWER_FORMAT = """上記のタスク履歴を分析して、次にやるべきタスクを{limit}件提案してください。
 JSON形式で以下の構造で回答してください:
 {{
   "suggestions": [
@@ -58,3 +50,164 @@ JSON形式で以下の構造で回答してください:
     }}
   ]
 }}"""
+
+
+class SuggestionPrompt(NamedTuple):
+    """構築したプロンプトとトークン数の見積もり"""
+
+    text: str
+    # text のトークン数の見積もり
+    tokens: int
+    # 全タスクを従来の形式（1件5行・説明を省略しない）で書いた場合のトークン数の見積もり
+    full_tokens: int
+    # 一覧に含めたタスクの数
+    included: int
+    # 予算・件数の上限のために省いたタスクの数（counts の全件から）
+    omitted: int
+
+    @property
+    def saved_tokens(self) -> int:
+        return max(self.full_tokens - self.tokens, 0)
+
+
+def estimate_tokens(text: str) -> int:
+    """トークン数の見積もり
+
+    日本語などの ASCII 以外の文字は1文字1トークン、ASCII は4文字で1トークンとみなす
+    （gpt-4o 系のトークナイザーでやや多めに出る程度の近似）。
+    """
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return len(text) - ascii_chars + (ascii_chars + 3) // 4
+
+
+def count_tasks(tasks: list[PromptTask], now: datetime | None = None) -> TaskCounts:
+    """渡されたタスクの件数（リポジトリで数えた件数がない場合に使う）"""
+    current = _naive_utc(now or datetime.now(UTC))
+    completed = sum(t.status == TaskStatus.COMPLETED for t in tasks)
+    overdue = sum(
+        t.status != TaskStatus.COMPLETED
+        and t.due_date is not None
+        and _naive_utc(t.due_date) < current
+        for t in tasks
+    )
+    return TaskCounts(len(tasks) - completed, completed, overdue)
+
+
+def rank_tasks(tasks: list[PromptTask], now: datetime | None = None) -> list[PromptTask]:
+    """プロンプトに含める順に並べる
+
+    未完了・進行中のタスクを期限切れ、優先度「高」、その他の順に（それぞれ期限の近い順）、
+    その後に直近の完了タスクを COMPLETED_SAMPLE 件まで並べる。
+    """
+    current = _naive_utc(now or datetime.now(UTC))
+    open_tasks = [t for t in tasks if t.status != TaskStatus.COMPLETED]
+    completed = [t for t in tasks if t.status == TaskStatus.COMPLETED]
+
+    def open_key(task: PromptTask) -> tuple:
+        due = _naive_utc(task.due_date) if task.due_date else None
+        if due is not None and due < current:
+            group = 0
+        elif task.priority == TaskPriority.HIGH:
+            group = 1
+        else:
+            group = 2
+        return (group, due is None, due or current, _PRIORITY_RANK[task.priority])
+
+    open_tasks.sort(key=open_key)
+    completed.sort(key=lambda t: _naive_utc(t.created_at), reverse=True)
+    return open_tasks + completed[:COMPLETED_SAMPLE]
+
+
+def build_budgeted_prompt(
+    tasks: list[PromptTask],
+    limit: int = 3,
+    budget: int = PROMPT_TOKEN_BUDGET,
+    now: datetime | None = None,
+    counts: TaskCounts | None = None,
+) -> SuggestionPrompt:
+    """トークン数の予算内でタスク提案用のプロンプトを構築
+
+    rank_tasks の順に、予算に収まるところまでタスクを表形式の行として書く。
+    counts（リポジトリで数えた全タスクの件数）がなければ tasks から数える。
+    """
+    full_tokens = estimate_tokens(_full_prompt(tasks, limit))
+    if not tasks:
+        text = _empty_prompt(limit)
+        return SuggestionPrompt(text, estimate_tokens(text), full_tokens, 0, 0)
+
+    counts = counts or count_tasks(tasks, now)
+    footer = _ANSWER_FORMAT.format(limit=limit)
+    # 件数の桁が最も多い場合の見出しで予算を確保しておく
+    used = estimate_tokens(_header(counts, len(tasks))) + estimate_tokens(footer) + 2
+    rows = []
+    for task in rank_tasks(tasks, now):
+        row = _row(task)
+        cost = estimate_tokens(row) + 1
+        if used + cost > budget:
+            break
+        rows.append(row)
+        used += cost
+
+    text = "\n".join([_header(counts, len(rows)), *rows, "", footer])
+    omitted = max(counts.open + counts.completed, len(tasks)) - len(rows)
+    return SuggestionPrompt(text, estimate_tokens(text), full_tokens, len(rows), omitted)
+
+
+def build_suggestion_prompt(tasks: list[PromptTask], limit: int = 3) -> str:
+    """タスク提案用のプロンプトを構築（PROMPT_TOKEN_BUDGET の予算内）"""
+    return build_budgeted_prompt(tasks, limit).text
+
+
+def _header(counts: TaskCounts, included: int) -> str:
+    return (
+        f"タスクは全{counts.open + counts.completed}件（未完了・進行中{counts.open}件、"
+        f"うち期限切れ{counts.overdue}件、完了{counts.completed}件）です。\n"
+        f"以下はそのうち{included}件の一覧です（{_COLUMNS}）:"
+    )
+
+
+def _row(task: PromptTask) -> str:
+    description = _cell(task.description or "")
+    if len(description) > DESCRIPTION_MAX_CHARS:
+        description = description[: DESCRIPTION_MAX_CHARS - 1] + "…"
+    return "|".join(
+        (
+            _STATUS_JA.get(task.status.value, task.status.value),
+            _PRIORITY_JA.get(task.priority.value, task.priority.value),
+            task.due_date.date().isoformat() if task.due_date else "-",
+            _cell(task.title),
+            description,
+        )
+    )
+
+
+def _cell(text: str) -> str:
+    # 改行と区切り文字は行の形を崩すため置き換える
+    return " ".join(text.split()).replace("|", "｜")
+
+
+def _naive_utc(value: datetime) -> datetime:
+    # タイムゾーンなしは UTC とみなす（src.services.pagination と同じ扱い）
+    return value if value.tzinfo is None else value.astimezone(UTC).replace(tzinfo=None)
+
+
+def _empty_prompt(limit: int) -> str:
+    return f"""タスク履歴がありません。
+一般的なタスク管理のベストプラクティスに基づいて、{limit}件のタスクを提案してください。
+新規ユーザー向けの基本的なタスクを提案してください。"""
+
+
+def _full_prompt(tasks: list[PromptTask], limit: int) -> str:
+    """従来の形式のプロンプト（削減できたトークン数の比較用）"""
+    if not tasks:
+        return _empty_prompt(limit)
+    task_info = [
+        f"- タイトル: {task.title}\n"
+        f"  説明: {task.description or 'なし'}\n"
+        f"  ステータス: {_STATUS_JA.get(task.status.value, task.status.value)}\n"
+        f"  優先度: {_PRIORITY_JA.get(task.priority.value, task.priority.value)}\n"
+        f"  期限: {task.due_date.isoformat() if task.due_date else 'なし'}"
+        for task in tasks
+    ]
+    tasks_text = "\n".join(task_info)
+    return f"以下は現在のタスク一覧です:\n\n{tasks_text}\n\n" + _ANSWER_FORMAT.format(limit=limit)
@@ -0,0 +1,77 @@
+"""ストリームで届く提案の JSON の逐次パース
+
+OpenAI の stream=True の応答は JSON が途中で区切られた断片で届く。
+{"suggestions": [{...}, {...}]} の配列の要素を、閉じ括弧が届いた時点で1つずつ取り出す。
+"""
+
+import json
+import re
+
+_ARRAY_START = re.compile(r'"suggestions"\s*:\s*\[')
+
+
+class SuggestionStreamParser:
+    """suggestions 配列の要素（オブジェクト）を完成した順に返すパーサー
+
+    文字列の中の括弧・エスケープを区別しながら括弧の深さを数え、配列の直下の
+    オブジェクトが閉じたらその範囲だけを json.loads する。
+    """
+
+    def __init__(self) -> None:
+        self._buffer = ""
+        # 次に読む位置（配列の開始が見つかるまでは None）
+        self._pos: int | None = None
+        self._depth = 0
+        self._start: int | None = None
+        self._in_string = False
+        self._escape = False
+        self.done = False
+
+    def feed(self, text: str) -> list[dict]:
+        """断片を追加し、新たに完成した要素を返す"""
+        self._buffer += text
+        if self._pos is None:
+            match = _ARRAY_START.search(self._buffer)
+            if match is None:
+                return []
+            self._pos = match.end()
+
+        buffer = self._buffer
+        items = []
+        i = self._pos
+        while i < len(buffer) and not self.done:
+            char = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if self._depth == 0 and char == "{":
+                    self._start = i
+                self._depth += 1
+            elif char in "}]":
+                if self._depth == 0:
+                    # suggestions 配列の終わり
+                    self.done = True
+                else:
+                    self._depth -= 1
+                    if self._depth == 0 and self._start is not None:
+                        item = _loads(buffer[self._start : i + 1])
+                        if isinstance(item, dict):
+                            items.append(item)
+                        self._start = None
+            i += 1
+        self._pos = i
+        return items
+
+
+def _loads(text: str) -> object:
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return None
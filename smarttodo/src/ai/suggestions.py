@@ -1,18 +1,43 @@
+import asyncio
+import hashlib
 import json
 import logging
+import os
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+from contextlib import aclosing
 from functools import lru_cache
-from typing import Protocol
+from typing import Protocol, TypeVar
+from uuid import UUID, uuid4
 
-from cachetools import TTLCache
 from openai import AsyncOpenAI
-from pydantic import BaseModel, Field
-
+from pydantic import BaseModel, Field, ValidationError
+
+from src.ai.cache import (
+    CacheBackendError,
+    CacheEntry,
+    MemorySuggestionCache,
+    SuggestionCacheBackend,
+    cache_backend_from_env,
+)
 from src.ai.client import get_openai_client
-from src.ai.prompts import SUGGESTION_SYSTEM_PROMPT, build_suggestion_prompt
-from src.models.task import TaskPriority, TaskResponse
+from src.ai.prompts import (
+    PROMPT_TOKEN_BUDGET,
+    SUGGESTION_SYSTEM_PROMPT,
+    PromptTask,
+    build_budgeted_prompt,
+    count_tasks,
+)
+from src.ai.stream import SuggestionStreamParser
+from src.models.task import SuggestionTask, TaskCounts, TaskPriority, TaskResponse
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# フィンガープリントを覚えておくタスクの件数（提案の作業セットの数十回分）
+FINGERPRINT_CACHE_SIZE = 4096
+
 
 class TaskSuggestion(BaseModel):
     """タスク提案"""
@@ -27,6 +52,86 @@ class SuggestionResponse(BaseModel):
 
     suggestions: list[TaskSuggestion]
     cached: bool = Field(default=False, description="キャッシュから取得したか")
+    stale: bool = Field(
+        default=False, description="有効期限を過ぎた提案か（バックグラウンドで更新中）"
+    )
+
+
+class SuggestionCacheMetrics(BaseModel):
+    """提案キャッシュの集計（このインスタンスの起動から）"""
+
+    backend: str = Field(..., description="キャッシュのバックエンド")
+    instance: str = Field(..., description="このインスタンスの ID")
+    hits: int = Field(..., description="キャッシュから返した回数")
+    stale_hits: int = Field(..., description="有効期限を過ぎた提案を返して更新した回数")
+    cross_instance_hits: int = Field(..., description="他のインスタンスが保存した提案を返した回数")
+    misses: int = Field(..., description="OpenAI API を呼んだ回数")
+    errors: int = Field(..., description="共有キャッシュに接続できなかった回数")
+    coalesced: int = Field(..., description="実行中の OpenAI API 呼び出しの結果を待って返した回数")
+    hit_rate: float = Field(..., description="ヒット率")
+    cross_instance_hit_rate: float = Field(..., description="他のインスタンスの提案によるヒット率")
+    prompt_tokens: int = Field(..., description="送ったプロンプトのトークン数（見積もり）")
+    prompt_tokens_saved: int = Field(
+        ..., description="全タスクを従来の形式で書いた場合から削減したトークン数（見積もり）"
+    )
+
+
+class SuggestionCacheStats:
+    """提案キャッシュのヒット・ミスの集計"""
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.stale_hits = 0
+        self.cross_instance_hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.coalesced = 0
+        self.prompt_tokens = 0
+        self.prompt_tokens_saved = 0
+
+    def reset(self) -> None:
+        self.hits = 0
+        self.stale_hits = 0
+        self.cross_instance_hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.coalesced = 0
+        self.prompt_tokens = 0
+        self.prompt_tokens_saved = 0
+
+    def rate(self, count: int) -> float:
+        lookups = self.hits + self.misses + self.coalesced
+        return count / lookups if lookups else 0.0
+
+
+def task_fingerprint(task: PromptTask) -> int:
+    """提案のプロンプトに影響するフィールドから求める 64 ビットのハッシュ
+
+    リポジトリから組み立てた SuggestionTask は、同じ内容のものに求めた値を使い回す
+    （提案のリクエストごとに作業セット全体をハッシュし直さない）。
+    """
+    if isinstance(task, SuggestionTask):
+        return _suggestion_fingerprint(task)
+    return _fingerprint(task)
+
+
+@lru_cache(maxsize=FINGERPRINT_CACHE_SIZE)
+def _suggestion_fingerprint(task: SuggestionTask) -> int:
+    return _fingerprint(task)
+
+
+def _fingerprint(task: PromptTask) -> int:
+    text = "\x1f".join(
+        (
+            str(task.id),
+            task.title,
+            task.description or "",
+            task.status.value,
+            task.priority.value,
+            task.due_date.isoformat() if task.due_date else "",
+        )
+    )
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little")
 
 
 class OpenAIClientProtocol(Protocol):
@@ -50,19 +155,69 @@ class ChatCompletionProtocol(Protocol):
     def choices(self) -> list: ...
 
 
+class _Flight:
+    """実行中の提案の生成と、その結果を待っているリクエストの数
+
+    ストリームでの生成は完成した提案を items に追加し、updated で待っている
+    リクエストに知らせる（後から加わったリクエストも items の先頭から受け取れる）。
+    """
+
+    __slots__ = ("key", "task", "waiters", "detached", "items", "updated")
+
+    def __init__(self, key: str, detached: bool = False) -> None:
+        self.key = key
+        self.task: asyncio.Task[list[TaskSuggestion]]
+        self.waiters = 0
+        # バックグラウンドの更新（待つリクエストがいなくても取り消さない）
+        self.detached = detached
+        self.items: list[TaskSuggestion] = []
+        self.updated = asyncio.Event()
+
+    def add(self, suggestion: TaskSuggestion) -> None:
+        self.items.append(suggestion)
+        self.notify()
+
+    def notify(self) -> None:
+        # 待っているリクエストを起こし、次の追加用に新しいイベントにする
+        self.updated.set()
+        self.updated = asyncio.Event()
+
+
 class SuggestionService:
-    """タスク提案サービス"""
+    """タスク提案サービス
+
+    同じキャッシュキーへの同時のリクエストは、実行中の1回の OpenAI API 呼び出しの結果を
+    共有する（single-flight）。保存から cache_ttl 秒を過ぎた提案はそのまま返しつつ
+    バックグラウンドで更新し（stale-while-revalidate）、cache_hard_ttl 秒を過ぎた提案は返さずに
+    生成を待つ。
+    """
 
     def __init__(
         self,
         client: AsyncOpenAI | OpenAIClientProtocol | None = None,
         model: str = "gpt-4o-mini",
         cache_ttl: int = 300,  # 5分
+        cache_hard_ttl: int = 3600,  # 1時間
         cache_maxsize: int = 100,
+        cache: SuggestionCacheBackend | None = None,
+        instance_id: str | None = None,
+        timer: Callable[[], float] = time.time,
+        prompt_budget: int = PROMPT_TOKEN_BUDGET,
     ):
         self._client = client
         self._model = model
-        self._cache: TTLCache = TTLCache(maxsize=cache_maxsize, ttl=cache_ttl)
+        self._cache_ttl = cache_ttl
+        self._timer = timer
+        self._prompt_budget = prompt_budget
+        self._cache = (
+            cache
+            if cache is not None
+            else MemorySuggestionCache(maxsize=cache_maxsize, ttl=max(cache_ttl, cache_hard_ttl))
+        )
+        # 共有キャッシュのエントリがどのインスタンスのものかを区別する
+        self.instance_id = instance_id or uuid4().hex[:12]
+        self.stats = SuggestionCacheStats()
+        self._inflight: dict[str, _Flight] = {}
 
     @property
     def client(self) -> AsyncOpenAI | OpenAIClientProtocol:
@@ -70,45 +225,276 @@ class SuggestionService:
             self._client = get_openai_client()
         return self._client
 
-    def _build_cache_key(self, tasks: list[TaskResponse], limit: int) -> str:
-        """キャッシュキーを構築"""
-        task_ids = sorted([str(t.id) for t in tasks])
-        return f"{':'.join(task_ids)}:{limit}"
+    def _build_cache_key(
+        self, fingerprints: dict[UUID, int], limit: int, counts: TaskCounts
+    ) -> str:
+        """キャッシュキーを構築
+
+        タスクごとのフィンガープリントの XOR は並び順に依存しないため、ID を整列せずに
+        内容の変わったタスクを含む組み合わせを別のキーにできる。プロンプトに書く件数
+        （一覧に含まれないタスクの増減や期限切れ）も提案に影響するため含める。
+        """
+        digest = 0
+        for fingerprint in fingerprints.values():
+            digest ^= fingerprint
+        total = ",".join(map(str, counts))
+        return f"{digest:016x}:{len(fingerprints)}:{total}:{limit}"
 
     async def get_suggestions(
-        self, tasks: list[TaskResponse], limit: int = 3
+        self, tasks: list[PromptTask], limit: int = 3, counts: TaskCounts | None = None
     ) -> SuggestionResponse:
-        """タスク提案を取得"""
-        cache_key = self._build_cache_key(tasks, limit)
-
-        # キャッシュチェック
-        if cache_key in self._cache:
-            cached_result = self._cache[cache_key]
-            return SuggestionResponse(suggestions=cached_result, cached=True)
+        """タスク提案を取得（counts は全タスクの件数で、ない場合は tasks から数える）"""
+        counts = counts or count_tasks(tasks)
+        fingerprints = {t.id: task_fingerprint(t) for t in tasks}
+        cache_key = self._build_cache_key(fingerprints, limit, counts)
+
+        # 生成中の同じ提案があればキャッシュを見ずに待つ
+        flight = self._pending(cache_key)
+        if flight is None:
+            cached = await self._lookup(tasks, limit, fingerprints, cache_key, counts)
+            if cached is not None:
+                return cached
+            # キャッシュを確認している間に他のリクエストが生成を始めていればそれを待つ
+            flight = self._running(cache_key)
+        if flight is None:
+            self.stats.misses += 1
+            flight = self._start(tasks, limit, fingerprints, cache_key, counts)
+        else:
+            self.stats.coalesced += 1
+
+        suggestions = await self._join(flight)
+        return SuggestionResponse(suggestions=suggestions, cached=False)
 
-        # プロンプト構築
-        user_prompt = build_suggestion_prompt(tasks, limit)
+    async def stream_suggestions(
+        self, tasks: list[PromptTask], limit: int = 3, counts: TaskCounts | None = None
+    ) -> AsyncIterator[TaskSuggestion | SuggestionResponse]:
+        """タスク提案を完成した順に返し、最後に全体の SuggestionResponse を返す
+
+        キャッシュにあればそれを返す。それ以外は stream=True で OpenAI API を呼ぶ生成を
+        実行中の一覧に登録し（同じ提案を求める他のリクエストはこれに加わる）、配列の
+        要素が閉じるたびに返す。最後まで受け取れた場合のみキャッシュに保存する
+        （待つリクエストが全て切断した場合は生成を取り消し、保存しない）。
+        """
+        counts = counts or count_tasks(tasks)
+        fingerprints = {t.id: task_fingerprint(t) for t in tasks}
+        cache_key = self._build_cache_key(fingerprints, limit, counts)
+
+        flight = self._pending(cache_key)
+        if flight is None:
+            response = await self._lookup(tasks, limit, fingerprints, cache_key, counts)
+            if response is not None:
+                for suggestion in response.suggestions:
+                    yield suggestion
+                yield response
+                return
+            flight = self._running(cache_key)
+        if flight is None:
+            self.stats.misses += 1
+            flight = self._start(tasks, limit, fingerprints, cache_key, counts, stream=True)
+        else:
+            self.stats.coalesced += 1
+
+        suggestions: list[TaskSuggestion] = []
+        async with aclosing(self._follow(flight)) as items:
+            async for suggestion in items:
+                suggestions.append(suggestion)
+                yield suggestion
+        yield SuggestionResponse(suggestions=suggestions, cached=False)
+
+    async def _lookup(
+        self,
+        tasks: list[PromptTask],
+        limit: int,
+        fingerprints: dict[UUID, int],
+        cache_key: str,
+        counts: TaskCounts | None,
+    ) -> SuggestionResponse | None:
+        """キャッシュチェック（共有キャッシュに接続できない場合はミスとして扱う）"""
+        entry = await self._cache_call(self._cache.get(cache_key))
+        if entry is None:
+            return None
+        try:
+            cached_result = [TaskSuggestion.model_validate(s) for s in entry.suggestions]
+        except ValidationError as e:
+            # 他のバージョンが書いた形の違うエントリは読めないものとして扱う
+            self.stats.errors += 1
+            logger.warning(f"提案キャッシュのエントリを読めません: {e}")
+            return None
+        self.stats.hits += 1
+        if entry.origin != self.instance_id:
+            self.stats.cross_instance_hits += 1
+        stale = self._timer() - entry.created_at >= self._cache_ttl
+        if stale:
+            # 古い提案を返し、更新はリクエストを待たせずに行う
+            self.stats.stale_hits += 1
+            if self._running(cache_key) is None:
+                self._start(tasks, limit, fingerprints, cache_key, counts, detached=True)
+        return SuggestionResponse(suggestions=cached_result, cached=True, stale=stale)
+
+    def _running(self, cache_key: str) -> _Flight | None:
+        """実行中の生成（終了後、_finish が呼ばれる前のものは除く）"""
+        flight = self._inflight.get(cache_key)
+        return flight if flight is not None and not flight.task.done() else None
+
+    def _pending(self, cache_key: str) -> _Flight | None:
+        """キャッシュを見る前に加わる生成（バックグラウンドの更新中は古い提案を返すため除く）"""
+        flight = self._running(cache_key)
+        return flight if flight is not None and not flight.detached else None
+
+    def _start(
+        self,
+        tasks: list[PromptTask],
+        limit: int,
+        fingerprints: dict[UUID, int],
+        cache_key: str,
+        counts: TaskCounts | None,
+        detached: bool = False,
+        stream: bool = False,
+    ) -> _Flight:
+        """提案の生成を始めて実行中の一覧に登録（stream=True は完成した提案を順に追加する）"""
+        flight = self._inflight[cache_key] = _Flight(cache_key, detached)
+        generate = (
+            self._generate_stream(tasks, limit, fingerprints, cache_key, counts, flight)
+            if stream
+            else self._generate(tasks, limit, fingerprints, cache_key, counts)
+        )
+        flight.task = asyncio.create_task(generate)
+        flight.task.add_done_callback(lambda _: self._finish(flight))
+        return flight
 
+    async def _join(self, flight: _Flight) -> list[TaskSuggestion]:
+        """生成の結果を待つ（エラーは全員に伝え、待つリクエストがいなくなれば生成を取り消す）"""
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.detached and not flight.task.done():
+                self._land(flight)
+                flight.task.cancel()
+
+    async def _follow(self, flight: _Flight) -> AsyncIterator[TaskSuggestion]:
+        """生成された提案を完成した順に返す（_join と同じく待つリクエストとして数える）
+
+        ストリームでない生成に加わった場合は、終了後にまとめて返す。
+        """
+        flight.waiters += 1
+        try:
+            sent = 0
+            while True:
+                # 追加を見逃さないよう、items を読む前にイベントを取っておく
+                updated = flight.updated
+                while sent < len(flight.items):
+                    yield flight.items[sent]
+                    sent += 1
+                if flight.task.done():
+                    break
+                await updated.wait()
+            for suggestion in flight.task.result()[sent:]:
+                yield suggestion
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.detached and not flight.task.done():
+                self._land(flight)
+                flight.task.cancel()
+
+    def _finish(self, flight: _Flight) -> None:
+        """生成の終了時の処理（バックグラウンドの更新のエラーはここで記録する）"""
+        self._land(flight)
+        flight.notify()
+        task = flight.task
+        if flight.detached and not task.cancelled() and task.exception() is not None:
+            logger.warning(f"提案の更新に失敗: {task.exception()}")
+
+    def _land(self, flight: _Flight) -> None:
+        """実行中の一覧から外す（以降のリクエストはキャッシュを見るか新たに生成する）"""
+        if self._inflight.get(flight.key) is flight:
+            del self._inflight[flight.key]
+
+    async def _generate(
+        self,
+        tasks: list[PromptTask],
+        limit: int,
+        fingerprints: dict[UUID, int],
+        cache_key: str,
+        counts: TaskCounts | None,
+    ) -> list[TaskSuggestion]:
+        """OpenAI API を呼んで提案を生成し、キャッシュに保存"""
         # OpenAI API呼び出し
-        response = await self.client.chat.completions.create(
-            model=self._model,
-            messages=[
-                {"role": "system", "content": SUGGESTION_SYSTEM_PROMPT},
-                {"role": "user", "content": user_prompt},
-            ],
-            response_format={"type": "json_object"},
-            temperature=0.7,
-            max_tokens=1000,
-        )
+        response = await self.client.chat.completions.create(**self._request(tasks, limit, counts))
 
         # レスポンスをパース
         content = response.choices[0].message.content
         suggestions = self._parse_response(content, limit)
 
-        # キャッシュに保存
-        self._cache[cache_key] = suggestions
+        await self._store(cache_key, fingerprints, suggestions)
+        return suggestions
 
-        return SuggestionResponse(suggestions=suggestions, cached=False)
+    async def _generate_stream(
+        self,
+        tasks: list[PromptTask],
+        limit: int,
+        fingerprints: dict[UUID, int],
+        cache_key: str,
+        counts: TaskCounts | None,
+        flight: _Flight,
+    ) -> list[TaskSuggestion]:
+        """stream=True で OpenAI API を呼び、配列の要素が閉じるたびに flight に追加"""
+        stream = await self.client.chat.completions.create(
+            **self._request(tasks, limit, counts), stream=True
+        )
+        parser = SuggestionStreamParser()
+        async with stream:
+            async for chunk in stream:
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                for item in parser.feed(chunk.choices[0].delta.content):
+                    if len(flight.items) >= limit:
+                        break
+                    flight.add(self._to_suggestion(item))
+                # limit 件そろった・配列が閉じた時点で残りの生成は読まずに接続を閉じる
+                if len(flight.items) >= limit or parser.done:
+                    break
+
+        suggestions = list(flight.items)
+        # 長さの上限などで配列の途中で終わった提案はキャッシュしない
+        if parser.done or len(suggestions) >= limit:
+            await self._store(cache_key, fingerprints, suggestions)
+        return suggestions
+
+    def _request(
+        self, tasks: list[PromptTask], limit: int, counts: TaskCounts | None = None
+    ) -> dict:
+        """chat.completions.create の引数（予算内でプロンプトを構築し、トークン数を集計）"""
+        prompt = build_budgeted_prompt(tasks, limit, self._prompt_budget, counts=counts)
+        self.stats.prompt_tokens += prompt.tokens
+        self.stats.prompt_tokens_saved += prompt.saved_tokens
+        logger.debug(
+            f"提案のプロンプト: {prompt.tokens} トークン（{prompt.saved_tokens} 削減、"
+            f"{prompt.included} 件を含め {prompt.omitted} 件を省略）"
+        )
+        return {
+            "model": self._model,
+            "messages": [
+                {"role": "system", "content": SUGGESTION_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt.text},
+            ],
+            "response_format": {"type": "json_object"},
+            "temperature": 0.7,
+            "max_tokens": 1000,
+        }
+
+    async def _store(
+        self, cache_key: str, fingerprints: dict[UUID, int], suggestions: list[TaskSuggestion]
+    ) -> None:
+        """キャッシュに保存"""
+        entry = CacheEntry(
+            fingerprints,
+            [s.model_dump(mode="json") for s in suggestions],
+            self.instance_id,
+            self._timer(),
+        )
+        await self._cache_call(self._cache.set(cache_key, entry))
 
     def _parse_response(self, content: str | None, limit: int) -> list[TaskSuggestion]:
         """OpenAI のレスポンスをパース"""
@@ -119,32 +505,84 @@ class SuggestionService:
             data = json.loads(content)
             suggestions_data = data.get("suggestions", [])[:limit]
 
-            suggestions = []
-            for item in suggestions_data:
-                priority_str = item.get("priority", "medium").lower()
-                try:
-                    priority = TaskPriority(priority_str)
-                except ValueError:
-                    priority = TaskPriority.MEDIUM
-
-                suggestions.append(
-                    TaskSuggestion(
-                        title=item.get("title", ""),
-                        reason=item.get("reason", ""),
-                        priority=priority,
-                    )
-                )
-            return suggestions
+            return [self._to_suggestion(item) for item in suggestions_data]
         except (json.JSONDecodeError, KeyError) as e:
             logger.error(f"レスポンスのパースに失敗: {e}")
             return []
 
-    def clear_cache(self) -> None:
+    @staticmethod
+    def _to_suggestion(item: dict) -> TaskSuggestion:
+        """レスポンスの要素を TaskSuggestion に変換（不正な優先度は medium）"""
+        priority_str = item.get("priority", "medium").lower()
+        try:
+            priority = TaskPriority(priority_str)
+        except ValueError:
+            priority = TaskPriority.MEDIUM
+
+        return TaskSuggestion(
+            title=item.get("title", ""),
+            reason=item.get("reason", ""),
+            priority=priority,
+        )
+
+    async def _cache_call(self, call: Awaitable[T]) -> T | None:
+        """キャッシュの操作を実行（共有キャッシュのエラーは記録して None）"""
+        try:
+            return await call
+        except CacheBackendError as e:
+            self.stats.errors += 1
+            logger.warning(f"提案キャッシュに接続できません: {e}")
+            return None
+
+    async def invalidate(
+        self, updated: Iterable[TaskResponse] = (), deleted: Iterable[UUID] = ()
+    ) -> int:
+        """書き込まれたタスクを含むエントリのみを無効化し、消した件数を返す
+
+        更新後もプロンプトに影響するフィールドが変わっていないタスクのエントリは残す。
+        """
+        changed = {task.id: task_fingerprint(task) for task in updated}
+        removed = set(deleted)
+        if not changed and not removed:
+            return 0
+        return await self._cache_call(self._cache.invalidate(changed, removed)) or 0
+
+    def metrics(self) -> SuggestionCacheMetrics:
+        """キャッシュの集計"""
+        return SuggestionCacheMetrics(
+            backend=type(self._cache).__name__,
+            instance=self.instance_id,
+            hits=self.stats.hits,
+            stale_hits=self.stats.stale_hits,
+            cross_instance_hits=self.stats.cross_instance_hits,
+            misses=self.stats.misses,
+            errors=self.stats.errors,
+            coalesced=self.stats.coalesced,
+            hit_rate=self.stats.rate(self.stats.hits),
+            cross_instance_hit_rate=self.stats.rate(self.stats.cross_instance_hits),
+            prompt_tokens=self.stats.prompt_tokens,
+            prompt_tokens_saved=self.stats.prompt_tokens_saved,
+        )
+
+    async def clear_cache(self) -> None:
         """キャッシュをクリア"""
-        self._cache.clear()
+        await self._cache_call(self._cache.clear())
 
 
 @lru_cache(maxsize=1)
 def get_suggestion_service() -> SuggestionService:
-    """SuggestionService のシングルトンを取得"""
-    return SuggestionService()
+    """SuggestionService のシングルトンを取得
+
+    提案は SUGGESTION_CACHE_TTL 秒（デフォルト: 300）を過ぎるとバックグラウンドで更新し、
+    SUGGESTION_CACHE_HARD_TTL 秒（デフォルト: 3600）を過ぎるとキャッシュから消える。
+    プロンプトは SUGGESTION_PROMPT_BUDGET トークン（デフォルト: 1500）に収める。
+    """
+    ttl = int(os.environ.get("SUGGESTION_CACHE_TTL", "300"))
+    hard_ttl = max(ttl, int(os.environ.get("SUGGESTION_CACHE_HARD_TTL", "3600")))
+    budget = int(os.environ.get("SUGGESTION_PROMPT_BUDGET", str(PROMPT_TOKEN_BUDGET)))
+    return SuggestionService(
+        cache_ttl=ttl,
+        cache_hard_ttl=hard_ttl,
+        cache=cache_backend_from_env(hard_ttl),
+        prompt_budget=budget,
+    )
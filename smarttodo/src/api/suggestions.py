@@ -1,22 +1,79 @@
+import logging
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+
 from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 
-from src.ai.suggestions import SuggestionResponse, SuggestionService, get_suggestion_service
-from src.models.task import TaskResponse
+from src.ai.suggestions import (
+    SuggestionCacheMetrics,
+    SuggestionResponse,
+    SuggestionService,
+    TaskSuggestion,
+    get_suggestion_service,
+)
 from src.services.firestore import get_repository
+from src.services.repository import SuggestionContext
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/tasks/suggestions", tags=["suggestions"])
 
 
+async def _suggestion_context() -> SuggestionContext:
+    """提案のプロンプトに使うタスク（未完了の期限の近いもの・直近の完了）と件数"""
+    return await get_repository().suggestion_context()
+
+
 @router.get("", response_model=SuggestionResponse)
 async def get_suggestions(
     limit: int = Query(default=3, ge=1, le=10, description="提案数（1-10）"),
     service: SuggestionService = Depends(get_suggestion_service),
 ) -> SuggestionResponse:
     """過去のタスクを分析して、次にやるべきタスクを提案する"""
-    repo = get_repository()
-    items, _ = await repo.list(limit=100, offset=0, status=None, priority=None)
-    tasks = [TaskResponse(**item) for item in items]
-    return await service.get_suggestions(tasks, limit)
+    context = await _suggestion_context()
+    return await service.get_suggestions(context.tasks, limit, context.counts)
+
+
+def _event(name: str, data: str) -> str:
+    return f"event: {name}\ndata: {data}\n\n"
+
+
+async def _suggestion_events(
+    service: SuggestionService, context: SuggestionContext, limit: int
+) -> AsyncIterator[str]:
+    try:
+        # 切断時にすぐ閉じて、待つリクエストがいなくなった生成を取り消せるようにする
+        async with aclosing(
+            service.stream_suggestions(context.tasks, limit, context.counts)
+        ) as items:
+            async for item in items:
+                if isinstance(item, TaskSuggestion):
+                    yield _event("suggestion", item.model_dump_json())
+                else:
+                    yield _event("done", item.model_dump_json())
+    except Exception as e:
+        # ステータスコードは送信済みのため、エラーはイベントで伝える
+        logger.error(f"提案のストリーミングに失敗: {e}")
+        yield _event("error", '{"detail": "提案の生成に失敗しました"}')
+
+
+@router.get("/stream")
+async def stream_suggestions(
+    limit: int = Query(default=3, ge=1, le=10, description="提案数（1-10）"),
+    service: SuggestionService = Depends(get_suggestion_service),
+) -> StreamingResponse:
+    """提案を Server-Sent Events で完成した順に送る
+
+    提案ごとに `suggestion` イベント（TaskSuggestion）を送り、最後に `done` イベント
+    （SuggestionResponse）を送る。生成に失敗した場合は `error` イベントを送る。
+    """
+    context = await _suggestion_context()
+    return StreamingResponse(
+        _suggestion_events(service, context, limit),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.delete("/cache", status_code=204)
@@ -24,4 +81,12 @@ async def clear_cache(
     service: SuggestionService = Depends(get_suggestion_service),
 ) -> None:
     """提案キャッシュをクリアする"""
-    service.clear_cache()
+    await service.clear_cache()
+
+
+@router.get("/metrics", response_model=SuggestionCacheMetrics)
+async def cache_metrics(
+    service: SuggestionService = Depends(get_suggestion_service),
+) -> SuggestionCacheMetrics:
+    """このインスタンスの提案キャッシュのヒット率（他のインスタンスの提案によるヒットを含む）"""
+    return service.metrics()
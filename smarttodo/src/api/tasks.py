@@ -1,53 +1,340 @@
+from datetime import UTC, date, datetime, time, timedelta
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 
+from src.ai.suggestions import SuggestionService, get_suggestion_service
 from src.models.task import (
+    CALENDAR_MAX_DAYS,
+    SEARCH_QUERY_MAX_LENGTH,
+    TAG_FILTER_MAX_ITEMS,
+    SortOrder,
+    TaskBatchRequest,
+    TaskBatchResponse,
+    TaskBatchResult,
+    TaskCalendarDay,
+    TaskCalendarResponse,
     TaskCreate,
     TaskListResponse,
+    TaskLookupRequest,
+    TaskLookupResponse,
+    TaskPartialListResponse,
+    TaskPartialResponse,
     TaskPriority,
     TaskResponse,
+    TaskSearchResponse,
+    TaskSort,
     TaskStatus,
     TaskUpdate,
 )
-from src.services.firestore import get_repository
+from src.services.firestore import FilterTooComplexError, get_repository
+from src.services.pagination import InvalidCursorError, encode_cursor
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
+# カレンダーの集計で1回に取得する件数
+CALENDAR_PAGE_SIZE = 500
 
-@router.get("", response_model=TaskListResponse)
+
+def _parse_fields(fields: str | None) -> list[str] | None:
+    """fields クエリ（カンマ区切り）を検証してフィールド名の一覧に変換"""
+    if fields is None:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    if not names:
+        return None
+    unknown = [name for name in names if name not in TaskResponse.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"不明なフィールドです: {', '.join(unknown)}")
+    return names
+
+
+def _filter_values(values: list[TaskStatus] | list[TaskPriority] | None) -> list[str] | None:
+    """複数指定できる列挙型のクエリを値の一覧に変換"""
+    return None if values is None else [value.value for value in values]
+
+
+def _check_tag_filter(tags: list[str] | None) -> None:
+    if tags is not None and len(tags) > TAG_FILTER_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400, detail=f"tag は {TAG_FILTER_MAX_ITEMS} 個以内で指定してください"
+        )
+
+
+@router.get(
+    "",
+    response_model=TaskListResponse | TaskPartialListResponse,
+    response_model_exclude_unset=True,
+)
 async def list_tasks(
     limit: int = Query(default=20, ge=1, le=100, description="取得件数（1-100）"),
     offset: int = Query(default=0, ge=0, description="取得開始位置"),
-    status: TaskStatus | None = Query(default=None, description="ステータスでフィルタ"),
-    priority: TaskPriority | None = Query(default=None, description="優先度でフィルタ"),
-) -> TaskListResponse:
-    """タスク一覧を取得する"""
+    status: list[TaskStatus] | None = Query(
+        default=None, description="ステータスでフィルタ（複数指定でいずれかに一致）"
+    ),
+    priority: list[TaskPriority] | None = Query(
+        default=None, description="優先度でフィルタ（複数指定でいずれかに一致）"
+    ),
+    tag: list[str] | None = Query(
+        default=None, description="タグでフィルタ（複数指定でいずれかを持つ）"
+    ),
+    cursor: str | None = Query(default=None, description="前ページの next_cursor"),
+    sort: TaskSort = Query(default=TaskSort.CREATED_AT, description="並び順"),
+    order: SortOrder = Query(default=SortOrder.ASC, description="並び順の方向（asc / desc）"),
+    fields: str | None = Query(
+        default=None, description="返すフィールド（カンマ区切り、例: title,status）。id は常に返す"
+    ),
+    due_after: datetime | None = Query(default=None, description="期限がこの日時以降（含む）"),
+    due_before: datetime | None = Query(default=None, description="期限がこの日時より前"),
+) -> TaskListResponse | Response:
+    """タスク一覧を取得する（デフォルトは作成日時の昇順）
+
+    due_date 順では期限なしのタスクが昇順で先頭、降順で末尾に並ぶ。
+    priority の降順は優先度の高い順。
+    status / priority / tag はそれぞれ複数指定でき、指定した条件を全て満たすタスクを返す。
+    due_after / due_before を指定した場合、期限なしのタスクは含まない。
+    """
+    if cursor is not None and offset > 0:
+        raise HTTPException(status_code=400, detail="cursor と offset は同時に指定できません")
+    field_names = _parse_fields(fields)
+    _check_tag_filter(tag)
+
     repo = get_repository()
-    status_val = status.value if status else None
-    priority_val = priority.value if priority else None
+    descending = order == SortOrder.DESC
 
-    items, total = await repo.list(limit, offset, status_val, priority_val)
-    task_responses = [TaskResponse(**item) for item in items]
+    # 次ページの有無を判定するため1件多く取得する
+    try:
+        items, total = await repo.list(
+            limit + 1,
+            offset,
+            _filter_values(status),
+            _filter_values(priority),
+            cursor=cursor,
+            fields=field_names,
+            sort=sort.value,
+            descending=descending,
+            due_after=due_after,
+            due_before=due_before,
+            tags=tag,
+        )
+    except (InvalidCursorError, FilterTooComplexError) as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    next_cursor = (
+        encode_cursor(items[limit - 1], sort.value, descending) if len(items) > limit else None
+    )
 
-    return TaskListResponse(items=task_responses, total=total, limit=limit, offset=offset)
+    if field_names is None:
+        return TaskListResponse(
+            items=[TaskResponse(**item) for item in items[:limit]],
+            total=total,
+            limit=limit,
+            offset=offset,
+            next_cursor=next_cursor,
+        )
+    # 指定外のフィールドは未設定のままにしてレスポンスから除外する。
+    # 構築済みのモデルを直接 JSON 化し、レスポンスモデルでの再検証を省く
+    keep = {"id", *field_names}
+    partial = TaskPartialListResponse(
+        items=[
+            TaskPartialResponse(**{k: v for k, v in item.items() if k in keep})
+            for item in items[:limit]
+        ],
+        total=total,
+        limit=limit,
+        offset=offset,
+        next_cursor=next_cursor,
+    )
+    return Response(
+        content=partial.model_dump_json(exclude_unset=True), media_type="application/json"
+    )
 
 
-@router.post("", response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
-async def create_task(task: TaskCreate) -> TaskResponse:
-    """タスクを作成する"""
+def _due_day(due_date: datetime) -> date:
+    """期限の日付（タイムゾーン付きは UTC に揃え、タイムゾーンなしは UTC とみなす）"""
+    return due_date.date() if due_date.tzinfo is None else due_date.astimezone(UTC).date()
+
+
+@router.get("/calendar", response_model=TaskCalendarResponse)
+async def task_calendar(
+    from_: date = Query(alias="from", description="開始日（含む）"),
+    to: date = Query(description="終了日（含む）"),
+    status: list[TaskStatus] | None = Query(
+        default=None, description="ステータスでフィルタ（複数指定でいずれかに一致）"
+    ),
+    priority: list[TaskPriority] | None = Query(
+        default=None, description="優先度でフィルタ（複数指定でいずれかに一致）"
+    ),
+    tag: list[str] | None = Query(
+        default=None, description="タグでフィルタ（複数指定でいずれかを持つ）"
+    ),
+) -> TaskCalendarResponse:
+    """期限が期間内のタスクを日ごとにまとめて取得する
+
+    日付は UTC（タイムゾーンなしの期限は UTC とみなす）。期限なしのタスクは含まない。
+    リポジトリの期限の範囲指定で期間内のタスクのみを期限順に取得する。
+    """
+    days = (to - from_).days + 1
+    if days < 1:
+        raise HTTPException(status_code=400, detail="to には from 以降の日付を指定してください")
+    if days > CALENDAR_MAX_DAYS:
+        raise HTTPException(
+            status_code=400, detail=f"期間は {CALENDAR_MAX_DAYS} 日以内で指定してください"
+        )
+    _check_tag_filter(tag)
+
+    repo = get_repository()
+    buckets: dict[date, list[TaskResponse]] = {from_ + timedelta(days=i): [] for i in range(days)}
+    cursor = None
+    while True:
+        try:
+            items, _ = await repo.list(
+                CALENDAR_PAGE_SIZE,
+                0,
+                _filter_values(status),
+                _filter_values(priority),
+                cursor=cursor,
+                sort="due_date",
+                due_after=datetime.combine(from_, time.min),
+                due_before=datetime.combine(to, time.min) + timedelta(days=1),
+                tags=tag,
+            )
+        except FilterTooComplexError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+        for item in items:
+            buckets[_due_day(item["due_date"])].append(TaskResponse(**item))
+        if len(items) < CALENDAR_PAGE_SIZE:
+            break
+        cursor = encode_cursor(items[-1], "due_date")
+
+    return TaskCalendarResponse(
+        days=[TaskCalendarDay(day=day, items=items) for day, items in buckets.items()],
+        total=sum(len(items) for items in buckets.values()),
+    )
+
+
+@router.get("/search", response_model=TaskSearchResponse)
+async def search_tasks(
+    q: str = Query(
+        min_length=1, max_length=SEARCH_QUERY_MAX_LENGTH, description="検索語（空白区切りで AND）"
+    ),
+    limit: int = Query(default=20, ge=1, le=100, description="取得件数（1-100）"),
+    offset: int = Query(default=0, ge=0, description="取得開始位置"),
+) -> TaskSearchResponse:
+    """タイトル・説明からタスクを検索する
+
+    全角・半角と大文字・小文字は区別せず、語の途中にも一致する。全ての検索語を含むタスクを
+    タイトルでの一致（先頭一致を優先）を説明での一致より高く採点し、得点の高い順
+    （同点は作成日時の新しい順）に返す。
+    """
     repo = get_repository()
-    task_data = {
+    items, total = await repo.search(q, limit, offset)
+    return TaskSearchResponse(
+        items=[TaskResponse(**item) for item in items], total=total, limit=limit, offset=offset
+    )
+
+
+def _create_data(task: TaskCreate) -> dict:
+    """作成リクエストをリポジトリ用のデータに変換"""
+    return {
         "title": task.title,
         "description": task.description,
         "due_date": task.due_date,
         "status": task.status.value,
         "priority": task.priority.value,
+        "tags": task.tags,
     }
-    result = await repo.create(task_data)
+
+
+def _update_data(task_update: TaskUpdate) -> dict:
+    """更新リクエストを指定されたフィールドのみのデータに変換（部分更新）"""
+    update_data = {}
+    if task_update.title is not None:
+        update_data["title"] = task_update.title
+    if task_update.description is not None:
+        update_data["description"] = task_update.description
+    if task_update.due_date is not None:
+        update_data["due_date"] = task_update.due_date
+    if task_update.status is not None:
+        update_data["status"] = task_update.status.value
+    if task_update.priority is not None:
+        update_data["priority"] = task_update.priority.value
+    if task_update.tags is not None:
+        update_data["tags"] = task_update.tags
+    return update_data
+
+
+@router.post("", response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
+async def create_task(task: TaskCreate) -> TaskResponse:
+    """タスクを作成する"""
+    repo = get_repository()
+    result = await repo.create(_create_data(task))
     return TaskResponse(**result)
 
 
+@router.post("/batch", response_model=TaskBatchResponse)
+async def batch_tasks(
+    request: TaskBatchRequest,
+    suggestions: SuggestionService = Depends(get_suggestion_service),
+) -> TaskBatchResponse:
+    """タスクの作成・更新・削除をまとめて実行する
+
+    作成 → 更新 → 削除 の順に種類ごとにまとめて書き込み、結果はリクエストと同じ順序で返す。
+    """
+    repo = get_repository()
+    creates = [(i, op) for i, op in enumerate(request.operations) if op.op == "create"]
+    updates = [(i, op) for i, op in enumerate(request.operations) if op.op == "update"]
+    deletes = [(i, op) for i, op in enumerate(request.operations) if op.op == "delete"]
+
+    created = await repo.create_many([_create_data(op.data) for _, op in creates])
+    updated = await repo.update_many([(op.id, _update_data(op.data)) for _, op in updates])
+    deleted = await repo.delete_many([op.id for _, op in deletes])
+    await suggestions.invalidate(
+        updated=[TaskResponse(**task) for task in updated if task is not None],
+        deleted=[op.id for (_, op), found in zip(deletes, deleted) if found],
+    )
+
+    results: list[TaskBatchResult | None] = [None] * len(request.operations)
+    for (i, _), task in zip(creates, created):
+        results[i] = TaskBatchResult(
+            op="create", status=201, id=task["id"], task=TaskResponse(**task)
+        )
+    for (i, op), task in zip(updates, updated):
+        if task is None:
+            results[i] = TaskBatchResult(
+                op="update", status=404, id=op.id, error="タスクが見つかりません"
+            )
+        else:
+            results[i] = TaskBatchResult(
+                op="update", status=200, id=op.id, task=TaskResponse(**task)
+            )
+    for (i, op), found in zip(deletes, deleted):
+        if found:
+            results[i] = TaskBatchResult(op="delete", status=204, id=op.id)
+        else:
+            results[i] = TaskBatchResult(
+                op="delete", status=404, id=op.id, error="タスクが見つかりません"
+            )
+
+    return TaskBatchResponse(results=results)
+
+
+@router.post("/lookup", response_model=TaskLookupResponse)
+async def lookup_tasks(request: TaskLookupRequest) -> TaskLookupResponse:
+    """指定したIDのタスクをまとめて取得する"""
+    repo = get_repository()
+    found = await repo.get_many(request.ids)
+
+    items: list[TaskResponse] = []
+    missing: list[UUID] = []
+    for task_id in dict.fromkeys(request.ids):
+        task = found.get(task_id)
+        if task is None:
+            missing.append(task_id)
+        else:
+            items.append(TaskResponse(**task))
+    return TaskLookupResponse(items=items, missing=missing)
+
+
 @router.get("/{task_id}", response_model=TaskResponse)
 async def get_task(task_id: UUID) -> TaskResponse:
     """個別タスクを取得する"""
@@ -59,36 +346,31 @@ async def get_task(task_id: UUID) -> TaskResponse:
 
 
 @router.put("/{task_id}", response_model=TaskResponse)
-async def update_task(task_id: UUID, task_update: TaskUpdate) -> TaskResponse:
+async def update_task(
+    task_id: UUID,
+    task_update: TaskUpdate,
+    suggestions: SuggestionService = Depends(get_suggestion_service),
+) -> TaskResponse:
     """タスクを更新する（部分更新対応）"""
     repo = get_repository()
 
-    # タスク存在確認
-    existing = await repo.get(task_id)
-    if existing is None:
+    # 存在確認はリポジトリ側で更新と同時に行う
+    result = await repo.update(task_id, _update_data(task_update))
+    if result is None:
         raise HTTPException(status_code=404, detail="タスクが見つかりません")
-
-    # 更新データを構築
-    update_data = {}
-    if task_update.title is not None:
-        update_data["title"] = task_update.title
-    if task_update.description is not None:
-        update_data["description"] = task_update.description
-    if task_update.due_date is not None:
-        update_data["due_date"] = task_update.due_date
-    if task_update.status is not None:
-        update_data["status"] = task_update.status.value
-    if task_update.priority is not None:
-        update_data["priority"] = task_update.priority.value
-
-    result = await repo.update(task_id, update_data)
-    return TaskResponse(**result)
+    task = TaskResponse(**result)
+    # 提案キャッシュはこのタスクを含み、内容の変わったエントリのみ無効化する
+    await suggestions.invalidate(updated=[task])
+    return task
 
 
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_task(task_id: UUID) -> None:
+async def delete_task(
+    task_id: UUID, suggestions: SuggestionService = Depends(get_suggestion_service)
+) -> None:
     """タスクを削除する"""
     repo = get_repository()
     deleted = await repo.delete(task_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="タスクが見つかりません")
+    await suggestions.invalidate(deleted=[task_id])
@@ -1,4 +1,5 @@
 import os
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -6,8 +7,21 @@ from fastapi.middleware.cors import CORSMiddleware
 from src.api.parser import router as parser_router
 from src.api.suggestions import router as suggestions_router
 from src.api.tasks import router as tasks_router
+from src.services.firestore import repository_lifespan
 
-app = FastAPI(title="SmartTodo", description="AI powered todo application", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with repository_lifespan():
+        yield
+
+
+app = FastAPI(
+    title="SmartTodo",
+    description="AI powered todo application",
+    version="0.1.0",
+    lifespan=lifespan,
+)
 
 
 @app.get("/health")
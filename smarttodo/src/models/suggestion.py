@@ -16,3 +16,6 @@ class SuggestionResponse(BaseModel):
 
     suggestions: list[TaskSuggestion]
     cached: bool = Field(default=False, description="キャッシュから取得したか")
+    stale: bool = Field(
+        default=False, description="有効期限を過ぎた提案か（バックグラウンドで更新中）"
+    )
@@ -1,8 +1,32 @@
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
+from typing import Annotated, Literal, NamedTuple
 from uuid import UUID, uuid4
 
-from pydantic import BaseModel, Field
+from pydantic import AfterValidator, BaseModel, Field
+
+# 一括操作APIで1リクエストに含められる最大操作数
+BATCH_MAX_OPERATIONS = 2000
+# 一括取得で1回に指定できる最大ID数
+LOOKUP_MAX_IDS = 500
+# カレンダーで1回に指定できる最大日数
+CALENDAR_MAX_DAYS = 366
+# 検索クエリの最大文字数
+SEARCH_QUERY_MAX_LENGTH = 100
+# 1タスクに付けられる最大タグ数とタグの最大文字数
+TAGS_MAX_ITEMS = 20
+TAG_MAX_LENGTH = 50
+# 一覧の絞り込みで1回に指定できる最大タグ数
+TAG_FILTER_MAX_ITEMS = 10
+
+# タグ（空白・カンマを含まない文字列）
+Tag = Annotated[str, Field(min_length=1, max_length=TAG_MAX_LENGTH, pattern=r"^[^\s,]+$")]
+# タグの一覧（重複は最初の1つにまとめる）
+Tags = Annotated[
+    list[Tag],
+    Field(max_length=TAGS_MAX_ITEMS),
+    AfterValidator(lambda tags: list(dict.fromkeys(tags))),
+]
 
 
 class TaskStatus(str, Enum):
@@ -21,6 +45,21 @@ class TaskPriority(str, Enum):
     HIGH = "high"
 
 
+class TaskSort(str, Enum):
+    """タスク一覧の並び順"""
+
+    CREATED_AT = "created_at"
+    DUE_DATE = "due_date"
+    PRIORITY = "priority"
+
+
+class SortOrder(str, Enum):
+    """並び順の方向"""
+
+    ASC = "asc"
+    DESC = "desc"
+
+
 class TaskCreate(BaseModel):
     """タスク作成リクエスト"""
 
@@ -29,6 +68,7 @@ class TaskCreate(BaseModel):
     due_date: datetime | None = Field(default=None, description="期限日時")
     status: TaskStatus = Field(default=TaskStatus.PENDING, description="ステータス")
     priority: TaskPriority = Field(default=TaskPriority.MEDIUM, description="優先度")
+    tags: Tags = Field(default_factory=list, description="タグ")
 
 
 class TaskResponse(BaseModel):
@@ -40,6 +80,7 @@ class TaskResponse(BaseModel):
     due_date: datetime | None
     status: TaskStatus
     priority: TaskPriority
+    tags: list[str] = Field(default_factory=list)
     created_at: datetime
 
     @classmethod
@@ -51,10 +92,48 @@ class TaskResponse(BaseModel):
             due_date=task.due_date,
             status=task.status,
             priority=task.priority,
+            tags=task.tags,
             created_at=datetime.now(),
         )
 
 
+class TaskCounts(NamedTuple):
+    """ステータスごとのタスクの件数（提案のプロンプト用）"""
+
+    # 未完了・進行中
+    open: int
+    completed: int
+    # 未完了・進行中のうち期限を過ぎたもの
+    overdue: int
+
+
+class SuggestionTask(NamedTuple):
+    """提案のプロンプトに使うタスクの軽量な表現
+
+    TaskResponse と同じ属性名を持ち、リポジトリの dict から検証なしで組み立てる。
+    """
+
+    id: UUID
+    title: str
+    description: str
+    due_date: datetime | None
+    status: TaskStatus
+    priority: TaskPriority
+    created_at: datetime
+
+    @classmethod
+    def from_dict(cls, task: dict) -> "SuggestionTask":
+        return cls(
+            task["id"],
+            task["title"],
+            task.get("description") or "",
+            task.get("due_date"),
+            TaskStatus(task["status"]),
+            TaskPriority(task["priority"]),
+            task["created_at"],
+        )
+
+
 class TaskUpdate(BaseModel):
     """タスク更新リクエスト（部分更新対応）"""
 
@@ -65,6 +144,7 @@ class TaskUpdate(BaseModel):
     due_date: datetime | None = Field(default=None, description="期限日時")
     status: TaskStatus | None = Field(default=None, description="ステータス")
     priority: TaskPriority | None = Field(default=None, description="優先度")
+    tags: Tags | None = Field(default=None, description="タグ（指定した一覧で置き換える）")
 
 
 class TaskListResponse(BaseModel):
@@ -74,3 +154,116 @@ class TaskListResponse(BaseModel):
     total: int
     limit: int
     offset: int
+    next_cursor: str | None = Field(default=None, description="次ページ取得用のカーソル")
+
+
+class TaskPartialResponse(BaseModel):
+    """フィールド指定時のタスクレスポンス（指定されたフィールドと id のみ）"""
+
+    id: UUID
+    title: str | None = None
+    description: str | None = None
+    due_date: datetime | None = None
+    status: TaskStatus | None = None
+    priority: TaskPriority | None = None
+    tags: list[str] | None = None
+    created_at: datetime | None = None
+
+
+class TaskPartialListResponse(BaseModel):
+    """フィールド指定時のタスク一覧レスポンス"""
+
+    items: list[TaskPartialResponse]
+    total: int
+    limit: int
+    offset: int
+    next_cursor: str | None = Field(default=None, description="次ページ取得用のカーソル")
+
+
+class TaskCalendarDay(BaseModel):
+    """カレンダーの1日分（期限がその日のタスク）"""
+
+    day: date
+    items: list[TaskResponse]
+
+
+class TaskCalendarResponse(BaseModel):
+    """カレンダーレスポンス（期間内の全ての日を日付順に含む）"""
+
+    days: list[TaskCalendarDay]
+    total: int = Field(..., description="期間内のタスク数")
+
+
+class TaskSearchResponse(BaseModel):
+    """タスク検索レスポンス（一致度の高い順）"""
+
+    items: list[TaskResponse]
+    total: int = Field(..., description="一致したタスク数")
+    limit: int
+    offset: int
+
+
+class TaskBatchCreate(BaseModel):
+    """一括操作: 作成"""
+
+    op: Literal["create"]
+    data: TaskCreate
+
+
+class TaskBatchUpdate(BaseModel):
+    """一括操作: 更新"""
+
+    op: Literal["update"]
+    id: UUID
+    data: TaskUpdate
+
+
+class TaskBatchDelete(BaseModel):
+    """一括操作: 削除"""
+
+    op: Literal["delete"]
+    id: UUID
+
+
+TaskBatchOperation = Annotated[
+    TaskBatchCreate | TaskBatchUpdate | TaskBatchDelete, Field(discriminator="op")
+]
+
+
+class TaskBatchRequest(BaseModel):
+    """タスク一括操作リクエスト"""
+
+    operations: list[TaskBatchOperation] = Field(
+        ..., min_length=1, max_length=BATCH_MAX_OPERATIONS, description="操作の一覧"
+    )
+
+
+class TaskBatchResult(BaseModel):
+    """一括操作の結果（1操作分）"""
+
+    op: Literal["create", "update", "delete"]
+    status: int = Field(..., description="操作ごとのHTTPステータス相当（201/200/204/404）")
+    id: UUID
+    task: TaskResponse | None = Field(default=None, description="作成・更新後のタスク")
+    error: str | None = Field(default=None, description="失敗時のエラーメッセージ")
+
+
+class TaskBatchResponse(BaseModel):
+    """タスク一括操作レスポンス（結果はリクエストと同じ順序）"""
+
+    results: list[TaskBatchResult]
+
+
+class TaskLookupRequest(BaseModel):
+    """タスク一括取得リクエスト"""
+
+    ids: list[UUID] = Field(
+        ..., min_length=1, max_length=LOOKUP_MAX_IDS, description="取得するタスクIDの一覧"
+    )
+
+
+class TaskLookupResponse(BaseModel):
+    """タスク一括取得レスポンス（いずれもリクエストの順序、重複IDは1件にまとめる）"""
+
+    items: list[TaskResponse]
+    missing: list[UUID] = Field(..., description="見つからなかったタスクID")
@@ -0,0 +1,119 @@
+"""フィルタ条件の値ごとのビットマップ索引
+
+タスクに位置（0 からの小さな整数）を割り当て、(フィールド, 値) ごとに該当するタスクの位置の
+ビットを立てたビットマップを持つ。複数条件の絞り込みは、条件内の値の OR と条件間の AND を
+int のビット演算でまとめて計算する。
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable, Iterator, Mapping
+
+# (フィールド, 値)
+BitmapKey = tuple[str, str]
+
+# 該当の少ない値は位置の集合で持ち、集合がビットマップより大きくなったら切り替える
+# （集合の 1 要素はおよそ 64 バイト = 512 ビット）
+_SET_BITS = 512
+_NONZERO = re.compile(rb"[^\x00]+")
+# バイト値ごとの立っているビットの位置
+_BITS = tuple(tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256))
+
+
+class Selection:
+    """ビット演算の結果（該当する位置の集合）
+
+    位置の判定は 1 バイトの参照で済むよう、結果の int をバイト列にして持つ。
+    """
+
+    __slots__ = ("_data", "_count")
+
+    def __init__(self, bits: int) -> None:
+        self._data = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+        self._count = bits.bit_count()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, position: int) -> bool:
+        index = position >> 3
+        return index < len(self._data) and self._data[index] >> (position & 7) & 1 == 1
+
+    def __iter__(self) -> Iterator[int]:
+        """該当する位置を昇順に列挙（0 のバイトの並びは正規表現でまとめて読み飛ばす）"""
+        data = self._data
+        for run in _NONZERO.finditer(data):
+            for index in range(run.start(), run.end()):
+                base = index * 8
+                for bit in _BITS[data[index]]:
+                    yield base + bit
+
+
+class BitmapIndex:
+    """(フィールド, 値) ごとのビットマップ索引
+
+    ビットマップは bytearray で持ち、1 件の追加・削除は 1 バイトの書き換えで済む。
+    """
+
+    def __init__(self) -> None:
+        self._bitmaps: dict[BitmapKey, bytearray | set[int]] = {}
+        # これまでに登録した位置の上限（ビット数）
+        self._size = 0
+
+    def add(self, position: int, keys: Iterable[BitmapKey]) -> None:
+        """位置を各値のビットマップに登録"""
+        if position >= self._size:
+            self._size = position + 1
+        for key in keys:
+            bitmap = self._bitmaps.get(key)
+            if bitmap is None:
+                self._bitmaps[key] = {position}
+            elif isinstance(bitmap, set):
+                bitmap.add(position)
+                if len(bitmap) * _SET_BITS > self._size:
+                    self._bitmaps[key] = _to_bytes(bitmap)
+            else:
+                index = position >> 3
+                if index >= len(bitmap):
+                    bitmap.extend(bytes(index + 1 - len(bitmap)))
+                bitmap[index] |= 1 << (position & 7)
+
+    def remove(self, position: int, keys: Iterable[BitmapKey]) -> None:
+        """位置を各値のビットマップから取り除く"""
+        for key in keys:
+            bitmap = self._bitmaps.get(key)
+            if isinstance(bitmap, set):
+                bitmap.discard(position)
+                if not bitmap:
+                    del self._bitmaps[key]
+            elif bitmap is not None and position >> 3 < len(bitmap):
+                bitmap[position >> 3] &= ~(1 << (position & 7)) & 0xFF
+
+    def select(self, conditions: Mapping[str, Iterable[str]]) -> Selection:
+        """フィールドごとにいずれかの値に該当し、全フィールドの条件を満たす位置"""
+        result: int | None = None
+        for field, values in conditions.items():
+            bits = 0
+            for value in values:
+                bitmap = self._bitmaps.get((field, value))
+                if bitmap is not None:
+                    bits |= int.from_bytes(
+                        _to_bytes(bitmap) if isinstance(bitmap, set) else bitmap, "little"
+                    )
+            result = bits if result is None else result & bits
+            if not result:
+                break
+        return Selection(result or 0)
+
+
+def _to_bytes(positions: set[int]) -> bytearray:
+    bitmap = bytearray((max(positions) >> 3) + 1)
+    for position in positions:
+        bitmap[position >> 3] |= 1 << (position & 7)
+    return bitmap
+
+
+def filter_keys(status: str, priority: str, tags: Iterable[str]) -> list[BitmapKey]:
+    """タスクを登録するビットマップ（ステータス・優先度・各タグ）"""
+    return [("status", status), ("priority", priority), *(("tags", tag) for tag in tags)]
@@ -0,0 +1,375 @@
+"""TaskRepository の読み取りキャッシュ
+
+任意の TaskRepository をラップし、get / get_many / list の結果を LRU + TTL で保持する。
+書き込み時は影響するエントリのみを無効化する。
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from collections.abc import Callable, Iterable, Sequence
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, NamedTuple
+from uuid import UUID
+
+from cachetools import TTLCache
+
+from src.services.pagination import DEFAULT_SORT, SORT_KEYS, due_in_range
+from src.services.repository import (
+    SUGGESTION_COMPLETED_LIMIT,
+    SUGGESTION_OPEN_LIMIT,
+    SuggestionContext,
+    filter_values,
+)
+
+if TYPE_CHECKING:
+    from src.services.repository import TaskRepository
+
+
+class ListKey(NamedTuple):
+    """list のキャッシュキー（絞り込み条件は repository.filter_values で揃えたもの）"""
+
+    limit: int
+    offset: int
+    status: tuple[str, ...] | None
+    priority: tuple[str, ...] | None
+    cursor: str | None
+    fields: tuple[str, ...] | None
+    sort: str
+    descending: bool
+    due_after: datetime | None = None
+    due_before: datetime | None = None
+    tags: tuple[str, ...] | None = None
+
+    @property
+    def has_due_range(self) -> bool:
+        return self.due_after is not None or self.due_before is not None
+
+
+_FILTER_FIELDS = ("status", "priority", "tags")
+
+
+class CacheStats:
+    """ヒット・ミス・追い出しの集計"""
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def reset(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+class _CountingTTLCache(TTLCache):
+    """容量超過・期限切れによる追い出しを数える TTLCache"""
+
+    def __init__(
+        self, maxsize: int, ttl: float, stats: CacheStats, timer: Callable[[], float]
+    ) -> None:
+        super().__init__(maxsize=maxsize, ttl=ttl, timer=timer)
+        self._stats = stats
+
+    def popitem(self) -> tuple[Any, Any]:
+        item = super().popitem()
+        self._stats.evictions += 1
+        return item
+
+    def expire(self, time: float | None = None) -> list[tuple[Any, Any]]:
+        expired = super().expire(time)
+        self._stats.evictions += len(expired)
+        return expired
+
+
+def _may_match(
+    filters: Sequence[tuple[str, ...] | None], task: dict, changed: Iterable[str] = ()
+) -> bool:
+    """フィルタ条件（_FILTER_FIELDS の順）にタスクが（変更前の値も含めて）一致し得るか"""
+    changed = set(changed)
+    for field, want in zip(_FILTER_FIELDS, filters):
+        if want is None or field in changed:
+            continue
+        value = task.get(field)
+        if field == "tags":
+            if want and set(want).isdisjoint(value or ()):
+                return False
+        elif value not in want:
+            return False
+    return True
+
+
+def _list_may_contain(key: ListKey, task: dict, changed: Iterable[str] = ()) -> bool:
+    """一覧の条件（期限の範囲を含む）にタスクが（変更前の値も含めて）一致し得るか"""
+    changed = set(changed)
+    if "due_date" not in changed and not due_in_range(
+        task.get("due_date"), key.due_after, key.due_before
+    ):
+        return False
+    return _may_match((key.status, key.priority, key.tags), task, changed)
+
+
+def _overlaps(key: ListKey, status: str | None, priority: str | None) -> bool:
+    """一覧のフィルタ条件と削除条件の両方に一致するタスクが存在し得るか"""
+    return all(
+        want is None or other is None or other in want
+        for want, other in zip((key.status, key.priority), (status, priority))
+    )
+
+
+class CachedTaskRepository:
+    """読み取りキャッシュ付きの TaskRepository デコレータ
+
+    - get / get_many はタスク単位、list はクエリ引数単位でキャッシュする
+    - create は新しいタスクが含まれ得る一覧のみ、update / delete は対象タスクと
+      それが含まれ得る一覧のみを無効化する
+    - 読み取り中に書き込みがあった場合、その読み取り結果はキャッシュしない
+    - search はクエリの種類が多く再利用されにくいため、キャッシュせずに委譲する
+    """
+
+    def __init__(
+        self,
+        repo: TaskRepository,
+        maxsize: int = 1024,
+        ttl: float = 30.0,
+        timer: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._repo = repo
+        self.stats = CacheStats()
+        self._tasks: TTLCache = _CountingTTLCache(maxsize, ttl, self.stats, timer)
+        self._lists: TTLCache = _CountingTTLCache(maxsize, ttl, self.stats, timer)
+        # 書き込みのたびに進める世代番号
+        self._generation = 0
+
+    @property
+    def inner(self) -> TaskRepository:
+        """キャッシュの下のリポジトリ"""
+        return self._repo
+
+    # --- 読み取り ---
+
+    async def get(self, task_id: UUID) -> dict | None:
+        """タスクを取得"""
+        task = self._tasks.get(task_id)
+        if task is not None:
+            self.stats.hits += 1
+            return task
+        self.stats.misses += 1
+        generation = self._generation
+        task = await self._repo.get(task_id)
+        if task is not None and generation == self._generation:
+            self._tasks[task_id] = task
+        return task
+
+    async def get_many(self, task_ids: Iterable[UUID]) -> dict[UUID, dict]:
+        """複数のタスクを取得（キャッシュにないものだけを元のリポジトリから取得）"""
+        found: dict[UUID, dict] = {}
+        missing: list[UUID] = []
+        for task_id in dict.fromkeys(task_ids):
+            task = self._tasks.get(task_id)
+            if task is None:
+                missing.append(task_id)
+            else:
+                found[task_id] = task
+        self.stats.hits += len(found)
+        self.stats.misses += len(missing)
+        if missing:
+            generation = self._generation
+            fetched = await self._repo.get_many(missing)
+            if generation == self._generation:
+                self._tasks.update(fetched)
+            found.update(fetched)
+        return found
+
+    async def list(
+        self,
+        limit: int,
+        offset: int,
+        status: str | Sequence[str] | None,
+        priority: str | Sequence[str] | None,
+        cursor: str | None = None,
+        fields: Sequence[str] | None = None,
+        sort: str = DEFAULT_SORT,
+        descending: bool = False,
+        due_after: datetime | None = None,
+        due_before: datetime | None = None,
+        tags: Sequence[str] | None = None,
+    ) -> tuple[list[dict], int]:
+        """タスク一覧を取得"""
+        key = ListKey(
+            limit,
+            offset,
+            filter_values(status),
+            filter_values(priority),
+            cursor,
+            None if fields is None else tuple(sorted(fields)),
+            sort,
+            descending,
+            due_after,
+            due_before,
+            filter_values(tags),
+        )
+        cached = self._lists.get(key)
+        if cached is not None:
+            self.stats.hits += 1
+            return cached
+        self.stats.misses += 1
+        generation = self._generation
+        result = await self._repo.list(
+            limit,
+            offset,
+            status,
+            priority,
+            cursor=cursor,
+            fields=fields,
+            sort=sort,
+            descending=descending,
+            due_after=due_after,
+            due_before=due_before,
+            tags=tags,
+        )
+        if generation == self._generation:
+            self._lists[key] = result
+        return result
+
+    async def search(self, query: str, limit: int, offset: int = 0) -> tuple[list[dict], int]:
+        """タスクを検索（結果はキャッシュしない）"""
+        return await self._repo.search(query, limit, offset)
+
+    async def suggestion_context(
+        self,
+        open_limit: int = SUGGESTION_OPEN_LIMIT,
+        completed_limit: int = SUGGESTION_COMPLETED_LIMIT,
+        now: datetime | None = None,
+    ) -> SuggestionContext:
+        """提案の生成に使うタスクと件数を取得
+
+        期限切れの判定の時刻が毎回変わり再利用されないため、キャッシュせずに委譲する。
+        """
+        return await self._repo.suggestion_context(open_limit, completed_limit, now)
+
+    # --- 書き込み ---
+
+    async def create(self, task_data: dict) -> dict:
+        """タスクを作成"""
+        task = await self._repo.create(task_data)
+        self._invalidate_created([task])
+        return task
+
+    async def update(self, task_id: UUID, update_data: dict) -> dict | None:
+        """タスクを更新"""
+        task = await self._repo.update(task_id, update_data)
+        self._invalidate_updated(task_id, task, update_data)
+        return task
+
+    async def delete(self, task_id: UUID) -> bool:
+        """タスクを削除"""
+        deleted = await self._repo.delete(task_id)
+        if deleted:
+            self._invalidate_deleted(task_id)
+        return deleted
+
+    async def create_many(self, tasks_data: list[dict]) -> list[dict]:
+        """タスクを一括作成"""
+        tasks = await self._repo.create_many(tasks_data)
+        self._invalidate_created(tasks)
+        return tasks
+
+    async def update_many(self, updates: list[tuple[UUID, dict]]) -> list[dict | None]:
+        """タスクを一括更新"""
+        results = await self._repo.update_many(updates)
+        for (task_id, update_data), task in zip(updates, results):
+            self._invalidate_updated(task_id, task, update_data)
+        return results
+
+    async def delete_many(self, task_ids: list[UUID]) -> list[bool]:
+        """タスクを一括削除"""
+        results = await self._repo.delete_many(task_ids)
+        for task_id, deleted in zip(task_ids, results):
+            if deleted:
+                self._invalidate_deleted(task_id)
+        return results
+
+    async def delete_where(
+        self,
+        status: str | None = None,
+        priority: str | None = None,
+        on_progress: Callable[[int], None] | None = None,
+    ) -> int:
+        """条件に一致するタスクを一括削除"""
+        deleted = await self._repo.delete_where(status, priority, on_progress)
+        self._generation += 1
+        for task_id, task in list(self._tasks.items()):
+            if _may_match((filter_values(status), filter_values(priority), None), task):
+                self._tasks.pop(task_id, None)
+        self._drop_lists(lambda key, _: _overlaps(key, status, priority))
+        return deleted
+
+    async def clear(self) -> None:
+        """全タスクを削除"""
+        await self._repo.clear()
+        self._generation += 1
+        self._tasks.clear()
+        self._lists.clear()
+
+    # --- 無効化 ---
+
+    def _drop_lists(self, affected: Callable[[ListKey, list[dict]], bool]) -> None:
+        """affected(キー, ページ) が真となる一覧を無効化"""
+        for key, (items, _) in list(self._lists.items()):
+            if affected(key, items):
+                self._lists.pop(key, None)
+
+    def _invalidate_created(self, tasks: list[dict]) -> None:
+        """作成したタスクが含まれ得る一覧を無効化"""
+        self._generation += 1
+        self._drop_lists(lambda key, _: any(_list_may_contain(key, task) for task in tasks))
+
+    def _invalidate_updated(self, task_id: UUID, task: dict | None, update_data: dict) -> None:
+        """更新したタスクと、それが含まれ得る一覧を無効化（task は更新後のタスク）"""
+        if task is None or not update_data:
+            return
+        self._generation += 1
+        self._tasks.pop(task_id, None)
+        filters_changed = bool(set(update_data) & set(_FILTER_FIELDS))
+
+        def affected(key: ListKey, items: list[dict]) -> bool:
+            if filters_changed or ("due_date" in update_data and key.has_due_range):
+                # フィルタ対象のフィールドが変わった場合は変更前・後の条件に一致し得る一覧
+                return _list_may_contain(key, task, changed=update_data)
+            # それ以外は件数が変わらないため、対象を含むページと、
+            # 並び順キーが変わった場合はその並び順で対象を含み得る一覧のみ
+            if any(t["id"] == task_id for t in items):
+                return True
+            return bool(set(update_data) & set(SORT_KEYS[key.sort])) and _list_may_contain(
+                key, task
+            )
+
+        self._drop_lists(affected)
+
+    def _invalidate_deleted(self, task_id: UUID) -> None:
+        """削除したタスクと、それが含まれ得る一覧を無効化"""
+        self._generation += 1
+        before = self._tasks.pop(task_id, None)
+        if before is not None:
+            self._drop_lists(lambda key, _: _list_may_contain(key, before))
+        else:
+            # 削除したタスクの内容が不明な場合は一覧をすべて無効化する
+            self._lists.clear()
+
+
+def with_cache(repo: TaskRepository) -> TaskRepository:
+    """環境変数に応じてリポジトリをキャッシュでラップ
+
+    USE_TASK_CACHE=true で有効化し、TASK_CACHE_MAXSIZE（デフォルト: 1024）と
+    TASK_CACHE_TTL（秒、デフォルト: 30）で容量と有効期限を設定する。
+    """
+    if os.environ.get("USE_TASK_CACHE", "").lower() != "true":
+        return repo
+    return CachedTaskRepository(
+        repo,
+        maxsize=int(os.environ.get("TASK_CACHE_MAXSIZE", "1024")),
+        ttl=float(os.environ.get("TASK_CACHE_TTL", "30")),
+    )
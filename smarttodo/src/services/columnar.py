@@ -0,0 +1,456 @@
+"""列指向のインメモリタスクリポジトリ（大量のタスクを少ないメモリで保持する）
+
+タスクを辞書で持つ代わりに、フィールドごとの配列（列）に行番号で格納する。
+ID は 16 バイトずつの bytearray、日時はエポックからのマイクロ秒の int64 配列、
+ステータス・優先度は小さな整数のコード、タイトル・説明は intern した文字列、
+タグは intern した文字列のタプルで持つ。
+索引も比較用キーではなく行番号の配列とし、辞書は返す行の分だけ組み立てる。
+"""
+
+from __future__ import annotations
+
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from collections.abc import Callable, Iterable, Sequence
+from datetime import UTC, datetime, timedelta
+from uuid import UUID
+
+from src.models.task import TaskPriority, TaskStatus
+from src.services.bitmap import BitmapIndex, filter_keys
+from src.services.memory import IndexKey, single_value, uses_bitmaps
+from src.services.pagination import DEFAULT_SORT, SORT_KEYS, decode_cursor, page_bounds, scan_page
+from src.services.repository import (
+    SUGGESTION_COMPLETED_LIMIT,
+    SUGGESTION_OPEN_LIMIT,
+    SuggestionContext,
+    fetch_suggestion_context,
+    filter_values,
+    new_task,
+)
+from src.services.search import SearchIndex
+
+# ステータス・優先度のコード（優先度のコードは PRIORITY_RANK と同じ順序）
+STATUSES = tuple(status.value for status in TaskStatus)
+PRIORITIES = tuple(priority.value for priority in TaskPriority)
+
+# 期限なし（他のどの日時よりも前に並ぶ）
+NO_DATE = -(2**63)
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+_DUE_DATE_TZ = 0x1
+_CREATED_AT_TZ = 0x2
+
+_INDEXED_FIELDS = {"status", "priority", "tags", "due_date", "created_at"}
+_TEXT_FIELDS = {"title", "description"}
+# ビットマップで絞り込む際、該当件数がこの倍率より少なければ索引を走査せずに整列する
+_SPARSE_RATIO = 16
+
+
+def encode_datetime(value: datetime | None) -> tuple[int, bool]:
+    """日時をエポックからのマイクロ秒とタイムゾーン有無に変換
+
+    タイムゾーン付きは UTC に揃え、タイムゾーンなしは UTC とみなす
+    （pagination.comparable_key と同じ順序）。
+    """
+    if value is None:
+        return NO_DATE, False
+    if value.tzinfo is None:
+        return (value - _EPOCH) // _MICROSECOND, False
+    return (value.astimezone(UTC).replace(tzinfo=None) - _EPOCH) // _MICROSECOND, True
+
+
+def decode_datetime(micros: int, aware: bool) -> datetime | None:
+    """encode_datetime の逆変換（タイムゾーン付きは UTC で返す）"""
+    if micros == NO_DATE:
+        return None
+    value = _EPOCH + _MICROSECOND * micros
+    return value.replace(tzinfo=UTC) if aware else value
+
+
+class ColumnarTaskRepository:
+    """列指向のインメモリタスクリポジトリImpl
+
+    InMemoryTaskRepository と同じ並び順・フィルタの索引を、行番号の配列（4 バイト/件）として
+    保持する。索引内の位置は二分探索で行の列から比較用キーを組み立てて求める。
+    複数の値・タグでの絞り込みは行番号を位置としたビットマップ（bitmap.BitmapIndex）で求める。
+    タイムゾーン付きの日時は UTC に揃えて保持する。
+    """
+
+    def __init__(self) -> None:
+        self._clear_columns()
+        self._search = SearchIndex()
+
+    def _clear_columns(self) -> None:
+        self._ids = bytearray()
+        self._created_at = array("q")
+        self._due_date = array("q")
+        self._flags = bytearray()
+        self._status = bytearray()
+        self._priority = bytearray()
+        self._titles: list[str] = []
+        self._descriptions: list[str] = []
+        self._tags: list[tuple[str, ...]] = []
+        # ID（16 バイト）から行番号
+        self._rows: dict[bytes, int] = {}
+        # 削除済みで再利用できる行番号
+        self._free: list[int] = []
+        self._indexes: defaultdict[IndexKey, array] = defaultdict(lambda: array("I"))
+        self._bitmaps = BitmapIndex()
+        self._sort_key_funcs: dict[str, Callable[[int], tuple]] = {
+            "created_at": lambda row: (self._created_at[row], self._id_bytes(row)),
+            "due_date": lambda row: (
+                self._due_date[row],
+                self._created_at[row],
+                self._id_bytes(row),
+            ),
+            "priority": lambda row: (
+                self._priority[row],
+                self._created_at[row],
+                self._id_bytes(row),
+            ),
+        }
+
+    def _id_bytes(self, row: int) -> bytes:
+        return bytes(self._ids[row * 16 : row * 16 + 16])
+
+    def _index_keys(self, row: int) -> list[IndexKey]:
+        status, priority = STATUSES[self._status[row]], PRIORITIES[self._priority[row]]
+        return [
+            (sort, s, p)
+            for sort in SORT_KEYS
+            for s, p in ((None, None), (status, None), (None, priority), (status, priority))
+        ]
+
+    def _filter_keys(self, row: int) -> list[tuple[str, str]]:
+        return filter_keys(
+            STATUSES[self._status[row]], PRIORITIES[self._priority[row]], self._tags[row]
+        )
+
+    def _write(self, row: int, task: dict) -> None:
+        """行の列にタスクの値を書き込む（ID 以外）"""
+        created_at, created_tz = encode_datetime(task["created_at"])
+        due_date, due_tz = encode_datetime(task["due_date"])
+        self._created_at[row] = created_at
+        self._due_date[row] = due_date
+        self._flags[row] = (_DUE_DATE_TZ if due_tz else 0) | (_CREATED_AT_TZ if created_tz else 0)
+        self._status[row] = STATUSES.index(task["status"])
+        self._priority[row] = PRIORITIES.index(task["priority"])
+        self._titles[row] = sys.intern(task["title"])
+        self._descriptions[row] = sys.intern(task["description"])
+        self._tags[row] = tuple(sys.intern(tag) for tag in task["tags"])
+
+    def _allocate(self, task_id: UUID) -> int:
+        """新しい行を確保（削除済みの行があれば再利用）"""
+        if self._free:
+            row = self._free.pop()
+            self._ids[row * 16 : row * 16 + 16] = task_id.bytes
+        else:
+            row = len(self._titles)
+            self._ids += task_id.bytes
+            self._created_at.append(0)
+            self._due_date.append(0)
+            self._flags.append(0)
+            self._status.append(0)
+            self._priority.append(0)
+            self._titles.append("")
+            self._descriptions.append("")
+            self._tags.append(())
+        self._rows[task_id.bytes] = row
+        return row
+
+    def _task(self, row: int, fields: Iterable[str] | None = None) -> dict:
+        """行をタスクの辞書に組み立てる（fields 指定時はそのフィールドのみ）"""
+        flags = self._flags[row]
+        task = {
+            "id": UUID(bytes=self._id_bytes(row)),
+            "title": self._titles[row],
+            "description": self._descriptions[row],
+            "due_date": decode_datetime(self._due_date[row], bool(flags & _DUE_DATE_TZ)),
+            "status": STATUSES[self._status[row]],
+            "priority": PRIORITIES[self._priority[row]],
+            "tags": list(self._tags[row]),
+            "created_at": decode_datetime(self._created_at[row], bool(flags & _CREATED_AT_TZ)),
+        }
+        return task if fields is None else {field: task[field] for field in fields}
+
+    def _index(self, row: int) -> None:
+        for key in self._index_keys(row):
+            sort_key = self._sort_key_funcs[key[0]]
+            index = self._indexes[key]
+            index.insert(bisect_right(index, sort_key(row), key=sort_key), row)
+        self._bitmaps.add(row, self._filter_keys(row))
+
+    def _unindex(self, row: int) -> None:
+        for key in self._index_keys(row):
+            sort_key = self._sort_key_funcs[key[0]]
+            index = self._indexes[key]
+            del index[bisect_left(index, sort_key(row), key=sort_key)]
+        self._bitmaps.remove(row, self._filter_keys(row))
+
+    def _insert(self, task: dict) -> None:
+        row = self._allocate(task["id"])
+        self._write(row, task)
+        self._index(row)
+
+    def _rebuild_indexes(self) -> None:
+        """列から索引を作り直す（大量削除・一括読み込み時）"""
+        groups: defaultdict[tuple[int, int], list[int]] = defaultdict(list)
+        for row in self._rows.values():
+            groups[(self._status[row], self._priority[row])].append(row)
+        indexes: defaultdict[IndexKey, array] = defaultdict(lambda: array("I"))
+        for sort, sort_key in self._sort_key_funcs.items():
+            merged: defaultdict[IndexKey, list[int]] = defaultdict(list)
+            for (status_code, priority_code), rows in groups.items():
+                status, priority = STATUSES[status_code], PRIORITIES[priority_code]
+                ordered = sorted(rows, key=sort_key)
+                indexes[(sort, status, priority)] = array("I", ordered)
+                merged[(sort, status, None)] += ordered
+                merged[(sort, None, priority)] += ordered
+                merged[(sort, None, None)] += ordered
+            for key, rows in merged.items():
+                # 整列済みの並びの連結なので、sort はほぼ併合だけで済む
+                rows.sort(key=sort_key)
+                indexes[key] = array("I", rows)
+        self._indexes = indexes
+        self._bitmaps = BitmapIndex()
+        for row in self._rows.values():
+            self._bitmaps.add(row, self._filter_keys(row))
+
+    def load(self, tasks: Iterable[dict]) -> None:
+        """タスクを一括で読み込む（既存のタスクは置き換え、索引はまとめて構築する）"""
+        self._clear_columns()
+        for task in tasks:
+            row = self._allocate(task["id"])
+            self._write(row, task)
+        self._rebuild_indexes()
+        self._search.load(self._task(row) for row in self._rows.values())
+
+    def dump(self) -> list[dict]:
+        """全タスクを作成日時順に取得（スナップショット用）"""
+        return [self._task(row) for row in self._indexes.get((DEFAULT_SORT, None, None), [])]
+
+    async def create(self, task_data: dict) -> dict:
+        """タスクを作成"""
+        task = new_task(task_data)
+        self._insert(task)
+        self._search.add(task["id"], task["title"], task["description"], task["created_at"])
+        return task
+
+    async def get(self, task_id: UUID) -> dict | None:
+        """タスクを取得"""
+        row = self._rows.get(task_id.bytes)
+        return None if row is None else self._task(row)
+
+    async def get_many(self, task_ids: Iterable[UUID]) -> dict[UUID, dict]:
+        """複数のタスクを取得"""
+        rows = ((task_id, self._rows.get(task_id.bytes)) for task_id in task_ids)
+        return {task_id: self._task(row) for task_id, row in rows if row is not None}
+
+    def _cursor_key(self, cursor: str, sort: str, descending: bool) -> tuple:
+        """カーソルの並び順キーを列の値と比較できる形に変換"""
+        key = []
+        for field, value in zip(SORT_KEYS[sort], decode_cursor(cursor, sort, descending)):
+            if field == "id":
+                key.append(value.bytes)
+            elif field in ("created_at", "due_date"):
+                key.append(encode_datetime(value)[0])
+            else:
+                key.append(value)
+        return tuple(key)
+
+    def _due_bounds(
+        self, due_after: datetime | None, due_before: datetime | None
+    ) -> tuple[int, int | None]:
+        """期限の範囲 [due_after, due_before) を列の値の範囲に変換（上限なしは None）"""
+        # 下限なしでも期限なし（NO_DATE、先頭に並ぶ）は範囲に含めない
+        lower = NO_DATE + 1 if due_after is None else encode_datetime(due_after)[0]
+        return lower, None if due_before is None else encode_datetime(due_before)[0]
+
+    def _due_range(
+        self, index: Sequence[int], due_after: datetime | None, due_before: datetime | None
+    ) -> tuple[int, int]:
+        """期限順の索引上で、期限が [due_after, due_before) の行の範囲 [lo, hi)"""
+        key = self._sort_key_funcs["due_date"]
+        lower, upper = self._due_bounds(due_after, due_before)
+        lo = bisect_left(index, (lower,), key=key)
+        hi = len(index)
+        if upper is not None:
+            hi = bisect_left(index, (upper,), lo, key=key)
+        return lo, hi
+
+    async def list(
+        self,
+        limit: int,
+        offset: int,
+        status: str | Sequence[str] | None,
+        priority: str | Sequence[str] | None,
+        cursor: str | None = None,
+        fields: Sequence[str] | None = None,
+        sort: str = DEFAULT_SORT,
+        descending: bool = False,
+        due_after: datetime | None = None,
+        due_before: datetime | None = None,
+        tags: Sequence[str] | None = None,
+    ) -> tuple[list[dict], int]:
+        """タスク一覧を取得（sort のキー順、descending で降順）"""
+        statuses, priorities, tag_values = (
+            filter_values(status),
+            filter_values(priority),
+            filter_values(tags),
+        )
+        key = (sort, single_value(statuses), single_value(priorities))
+        index: array | list[int] = self._indexes.get(key, array("I"))
+        sort_key = self._sort_key_funcs[sort]
+        lo, hi = 0, len(index)
+        due_range = due_after is not None or due_before is not None
+        if due_range:
+            if sort == "due_date":
+                lo, hi = self._due_range(index, due_after, due_before)
+            else:
+                # 期限順の索引から範囲内の行を取り出し、指定の並び順に整列する
+                due_index = self._indexes.get(("due_date", *key[1:]), array("I"))
+                start, end = self._due_range(due_index, due_after, due_before)
+                index = sorted(due_index[start:end], key=sort_key)
+                lo, hi = 0, len(index)
+        after = None if cursor is None else self._cursor_key(cursor, sort, descending)
+
+        if uses_bitmaps(statuses, priorities, tag_values):
+            conditions = {"status": statuses, "priority": priorities, "tags": tag_values}
+            selected = self._bitmaps.select(
+                {field: values for field, values in conditions.items() if values is not None}
+            )
+            if len(selected) * _SPARSE_RATIO < hi - lo:
+                # 該当が少なければ該当する行のみを取り出して整列する
+                rows: Iterable[int] = selected
+                if due_range:
+                    lower, upper = self._due_bounds(due_after, due_before)
+                    due_date = self._due_date
+                    rows = (
+                        row
+                        for row in selected
+                        if lower <= due_date[row] and (upper is None or due_date[row] < upper)
+                    )
+                index = sorted(rows, key=sort_key)
+                lo, hi = 0, len(index)
+            elif due_range:
+                index = [row for row in index[lo:hi] if row in selected]
+                lo, hi = 0, len(index)
+            else:
+                # 該当が多ければ索引を並び順に走査し、ページの件数が揃った時点でやめる
+                page = scan_page(
+                    index, lo, hi, after, offset, limit, descending, selected.__contains__, sort_key
+                )
+                return self._page(page, fields, sort), len(selected)
+        total = hi - lo
+
+        start, end = page_bounds(index, lo, hi, after, offset, limit, descending, sort_key)
+        page = index[start:end]
+        if descending:
+            page.reverse()
+        return self._page(page, fields, sort), total
+
+    def _page(self, rows: Iterable[int], fields: Sequence[str] | None, sort: str) -> list[dict]:
+        keep = None if fields is None else [*dict.fromkeys([*fields, *SORT_KEYS[sort]])]
+        return [self._task(row, keep) for row in rows]
+
+    async def update(self, task_id: UUID, update_data: dict) -> dict | None:
+        """タスクを更新"""
+        row = self._rows.get(task_id.bytes)
+        if row is None:
+            return None
+        updated = {**self._task(row), **update_data}
+        if _INDEXED_FIELDS.isdisjoint(update_data):
+            self._write(row, updated)
+        else:
+            # 索引のキーが変わり得る場合のみ入れ替える
+            self._unindex(row)
+            self._write(row, updated)
+            self._index(row)
+        if not _TEXT_FIELDS.isdisjoint(update_data):
+            self._search.add(
+                task_id, updated["title"], updated["description"], updated["created_at"]
+            )
+        return self._task(row)
+
+    def _remove(self, rows: list[int]) -> None:
+        """行を削除して再利用できるようにする（件数が多い場合は索引を作り直す）"""
+        if len(rows) * 8 > len(self._rows):
+            for row in rows:
+                self._release(row)
+            self._rebuild_indexes()
+        else:
+            for row in rows:
+                self._unindex(row)
+                self._release(row)
+
+    def _release(self, row: int) -> None:
+        task_id = self._id_bytes(row)
+        self._search.remove(UUID(bytes=task_id))
+        del self._rows[task_id]
+        self._titles[row] = ""
+        self._descriptions[row] = ""
+        self._tags[row] = ()
+        self._free.append(row)
+
+    async def delete(self, task_id: UUID) -> bool:
+        """タスクを削除"""
+        row = self._rows.get(task_id.bytes)
+        if row is None:
+            return False
+        self._remove([row])
+        return True
+
+    async def create_many(self, tasks_data: list[dict]) -> list[dict]:
+        """タスクを一括作成"""
+        return [await self.create(task_data) for task_data in tasks_data]
+
+    async def update_many(self, updates: list[tuple[UUID, dict]]) -> list[dict | None]:
+        """タスクを一括更新"""
+        return [await self.update(task_id, update_data) for task_id, update_data in updates]
+
+    async def delete_many(self, task_ids: list[UUID]) -> list[bool]:
+        """タスクを一括削除"""
+        rows: dict[int, None] = {}
+        results = []
+        for task_id in task_ids:
+            row = self._rows.get(task_id.bytes)
+            found = row is not None and row not in rows
+            if found:
+                rows[row] = None
+            results.append(found)
+        self._remove(list(rows))
+        return results
+
+    async def delete_where(
+        self,
+        status: str | None = None,
+        priority: str | None = None,
+        on_progress: Callable[[int], None] | None = None,
+    ) -> int:
+        """条件に一致するタスクを一括削除し、削除件数を返す"""
+        rows = list(self._indexes.get((DEFAULT_SORT, status, priority), []))
+        self._remove(rows)
+        if on_progress is not None:
+            on_progress(len(rows))
+        return len(rows)
+
+    async def search(self, query: str, limit: int, offset: int = 0) -> tuple[list[dict], int]:
+        """タイトル・説明からタスクを検索（一致度の高い順）"""
+        task_ids, total = self._search.search(query, limit, offset)
+        return [self._task(self._rows[task_id.bytes]) for task_id in task_ids], total
+
+    async def suggestion_context(
+        self,
+        open_limit: int = SUGGESTION_OPEN_LIMIT,
+        completed_limit: int = SUGGESTION_COMPLETED_LIMIT,
+        now: datetime | None = None,
+    ) -> SuggestionContext:
+        """提案の生成に使うタスクと件数を取得（repository.fetch_suggestion_context）"""
+        return await fetch_suggestion_context(self, open_limit, completed_limit, now)
+
+    async def clear(self) -> None:
+        """全タスクを削除"""
+        await self.delete_where()
@@ -0,0 +1,552 @@
+"""ローカル用の Firestore スタンドイン（テスト・ベンチマーク用）
+
+google-cloud-firestore の同期クライアントのうち FirestoreTaskRepository が使う API だけを
+インメモリで再現する。RPC ごとの遅延と課金対象の読み取り数を記録できる。
+"""
+
+import operator
+import os
+import random
+import threading
+import time
+from bisect import bisect_right
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from itertools import islice
+from typing import Any, NamedTuple
+
+from google.api_core.exceptions import FailedPrecondition, InvalidArgument, NotFound
+
+
+class FakeFirestoreStats:
+    """RPC 数と読み取り数の集計"""
+
+    def __init__(self) -> None:
+        self.rpcs = 0
+        self.reads = 0
+        self._lock = threading.Lock()
+
+    def record(self, reads: int) -> None:
+        with self._lock:
+            self.rpcs += 1
+            self.reads += reads
+
+    def reset(self) -> None:
+        with self._lock:
+            self.rpcs = 0
+            self.reads = 0
+
+
+class FakeDocumentSnapshot:
+    """DocumentSnapshot 相当（update_time は更新時刻の代わりに書き込みの通番）"""
+
+    def __init__(
+        self, reference: "FakeDocumentReference", data: dict | None, update_time: int | None = None
+    ):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+        self.exists = data is not None
+        self.update_time = update_time
+
+    def to_dict(self) -> dict | None:
+        return None if self._data is None else dict(self._data)
+
+    def get(self, field_path: str) -> Any:
+        if self._data is None:
+            raise KeyError(field_path)
+        return self._data[field_path]
+
+
+class FakeAggregationResult:
+    """AggregationResult 相当"""
+
+    def __init__(self, alias: str, value: int):
+        self.alias = alias
+        self.value = value
+
+
+class FakeWriteOption:
+    """write_option(exists=... / last_update_time=...) の戻り値相当"""
+
+    def __init__(self, exists: bool | None = None, last_update_time: int | None = None):
+        self.exists = exists
+        self.last_update_time = last_update_time
+
+
+class _Write(NamedTuple):
+    """バッチ内の1件の書き込み（kind は set / update / delete）"""
+
+    reference: "FakeDocumentReference"
+    kind: str
+    data: dict | None = None
+    option: FakeWriteOption | None = None
+
+
+def _apply_writes(writes: Iterable[_Write]) -> None:
+    """書き込みをまとめて適用（Firestore と同様に、前提条件を1件でも満たさなければ全て適用しない）
+
+    クライアントのロックを取得した状態で呼ぶ。
+    """
+    writes = list(writes)
+    # 先行する書き込みを反映した (存在するか, 更新時刻)
+    state: dict[str, tuple[bool, int | None]] = {}
+    for write in writes:
+        ref = write.reference
+        exists, update_time = state[ref.path] if ref.path in state else ref._state()
+        option = write.option
+        if write.kind == "update" and not exists:
+            raise NotFound(f"No document to update: {ref.id}")
+        if option is not None and option.exists and not exists:
+            raise NotFound(f"No document to {write.kind}: {ref.id}")
+        if option is not None and option.last_update_time is not None:
+            if not exists or update_time != option.last_update_time:
+                raise FailedPrecondition(f"The document was modified: {ref.id}")
+        state[ref.path] = (write.kind != "delete", ref._client._version + 1)
+    for write in writes:
+        write.reference._apply(write)
+
+
+class FakeWriteBatch:
+    """WriteBatch 相当（commit 時にまとめて適用）"""
+
+    def __init__(self, client: "FakeFirestoreClient"):
+        self._client = client
+        self._writes: list[_Write] = []
+
+    def __len__(self) -> int:
+        return len(self._writes)
+
+    def set(self, reference: "FakeDocumentReference", document_data: dict) -> None:
+        self._writes.append(_Write(reference, "set", dict(document_data)))
+
+    def update(
+        self,
+        reference: "FakeDocumentReference",
+        field_updates: dict,
+        option: FakeWriteOption | None = None,
+    ) -> None:
+        self._writes.append(_Write(reference, "update", dict(field_updates), option))
+
+    def delete(
+        self, reference: "FakeDocumentReference", option: FakeWriteOption | None = None
+    ) -> None:
+        self._writes.append(_Write(reference, "delete", option=option))
+
+    def commit(self) -> list:
+        limit = self._client.max_batch_writes
+        if len(self._writes) > limit:
+            raise InvalidArgument(f"maximum {limit} writes allowed per request")
+        self._client._rpc()
+        with self._client._write():
+            _apply_writes(self._writes)
+        self._writes = []
+        return []
+
+
+class FakeTransaction(FakeWriteBatch):
+    """Transaction 相当（firestore.transactional で利用できる最小限の実装）
+
+    読み取りは即時に行い、書き込みは commit 時にまとめて適用する。
+    """
+
+    def __init__(self, client: "FakeFirestoreClient", max_attempts: int = 5):
+        super().__init__(client)
+        self._max_attempts = max_attempts
+        self._read_only = False
+        self._id: bytes | None = None
+
+    @property
+    def in_progress(self) -> bool:
+        return self._id is not None
+
+    def _clean_up(self) -> None:
+        self._writes = []
+        self._id = None
+
+    def _begin(self, retry_id: bytes | None = None) -> None:
+        self._client._rpc()
+        self._id = b"fake-transaction"
+
+    def _rollback(self) -> None:
+        if self.in_progress:
+            self._client._rpc()
+        self._clean_up()
+
+    def _commit(self) -> list:
+        result = self.commit()
+        self._clean_up()
+        return result
+
+
+class FakeDocumentReference:
+    """DocumentReference 相当"""
+
+    def __init__(self, collection: "FakeCollectionReference", doc_id: str):
+        self._collection = collection
+        self._client = collection._client
+        self.id = doc_id
+
+    @property
+    def path(self) -> str:
+        return f"{self._collection.id}/{self.id}"
+
+    def _store(self) -> dict[str, dict]:
+        return self._client._collections.setdefault(self._collection.id, {})
+
+    def _state(self) -> tuple[bool, int | None]:
+        """(存在するか, 更新時刻)（直接投入したドキュメントの更新時刻は 0）"""
+        if self.id not in self._store():
+            return False, None
+        return True, self._client._update_times.get(self.path, 0)
+
+    def _snapshot(self, data: dict | None) -> FakeDocumentSnapshot:
+        update_time = None if data is None else self._client._update_times.get(self.path, 0)
+        return FakeDocumentSnapshot(self, None if data is None else dict(data), update_time)
+
+    def get(self, transaction: "FakeTransaction | None" = None) -> FakeDocumentSnapshot:
+        with self._client._lock:
+            snapshot = self._snapshot(self._store().get(self.id))
+        self._client._rpc(reads=1)
+        return snapshot
+
+    def set(self, document_data: dict) -> None:
+        self._write(_Write(self, "set", dict(document_data)))
+
+    def update(self, field_updates: dict, option: "FakeWriteOption | None" = None) -> None:
+        self._write(_Write(self, "update", dict(field_updates), option))
+
+    def delete(self, option: "FakeWriteOption | None" = None) -> None:
+        self._write(_Write(self, "delete", option=option))
+
+    def _write(self, write: _Write) -> None:
+        self._client._rpc()
+        with self._client._write():
+            _apply_writes([write])
+
+    def _apply(self, write: _Write) -> None:
+        """前提条件を確認済みの書き込みを適用し、更新時刻を進める"""
+        store = self._store()
+        if write.kind == "delete":
+            store.pop(self.id, None)
+            self._client._update_times.pop(self.path, None)
+            return
+        assert write.data is not None
+        store[self.id] = {**store[self.id], **write.data} if write.kind == "update" else write.data
+        self._client._update_times[self.path] = self._client._version + 1
+
+
+class _Descending:
+    """降順フィールド用に比較を反転するラッパー"""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: tuple):
+        self.value = value
+
+    def __lt__(self, other: "_Descending") -> bool:
+        return other.value < self.value
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _Descending) and self.value == other.value
+
+
+# 範囲フィルタの演算子
+_RANGE_OPS: dict[str, Callable[[Any, Any], bool]] = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+# 等価・要素の一致によるフィルタの演算子
+_MEMBERSHIP_OPS = ("==", "in", "array_contains", "array_contains_any")
+
+
+def _comparable(value: Any) -> Any:
+    # 日時は Firestore と同様に UTC で比較する（タイムゾーンなしは UTC とみなす）
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone(UTC).replace(tzinfo=None)
+    return value
+
+
+def _sort_key(data: dict, orders: tuple) -> tuple:
+    key = []
+    for field, direction in orders:
+        # Firestore と同様に null は他の値より前に並べる
+        value = _comparable(data.get(field))
+        ordered = (0,) if value is None else (1, value)
+        key.append(_Descending(ordered) if direction == FakeQuery.DESCENDING else ordered)
+    return tuple(key)
+
+
+class FakeQuery:
+    """Query 相当（フィルタ・order_by・start_after・select・offset・limit・count に対応）
+
+    フィルタは ==・in・範囲（<, <=, >, >=）・array_contains・array_contains_any に対応する。
+    """
+
+    ASCENDING = "ASCENDING"
+    DESCENDING = "DESCENDING"
+
+    def __init__(
+        self,
+        collection: "FakeCollectionReference",
+        filters: tuple = (),
+        orders: tuple = (),
+        start_after: dict | None = None,
+        projection: tuple | None = None,
+        offset: int = 0,
+        limit: int | None = None,
+    ):
+        self._collection = collection
+        self._client = collection._client
+        self._filters = filters
+        self._orders = orders
+        self._start_after = start_after
+        self._projection = projection
+        self._offset = offset
+        self._limit = limit
+
+    def _copy(self, **changes: Any) -> "FakeQuery":
+        params = {
+            "filters": self._filters,
+            "orders": self._orders,
+            "start_after": self._start_after,
+            "projection": self._projection,
+            "offset": self._offset,
+            "limit": self._limit,
+        }
+        params.update(changes)
+        return FakeQuery(self._collection, **params)
+
+    def where(
+        self,
+        field_path: str | None = None,
+        op_string: str | None = None,
+        value: Any = None,
+        *,
+        filter: Any = None,
+    ) -> "FakeQuery":
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        if op_string not in _MEMBERSHIP_OPS and op_string not in _RANGE_OPS:
+            raise NotImplementedError(f"unsupported operator: {op_string}")
+        return self._copy(filters=self._filters + ((field_path, op_string, value),))
+
+    def select(self, field_paths: Iterable[str]) -> "FakeQuery":
+        return self._copy(projection=tuple(field_paths))
+
+    def order_by(self, field_path: str, direction: str = ASCENDING) -> "FakeQuery":
+        return self._copy(orders=self._orders + ((field_path, direction),))
+
+    def start_after(self, document_fields: dict) -> "FakeQuery":
+        return self._copy(start_after=dict(document_fields))
+
+    def offset(self, num_to_skip: int) -> "FakeQuery":
+        return self._copy(offset=num_to_skip)
+
+    def limit(self, count: int) -> "FakeQuery":
+        return self._copy(limit=count)
+
+    def count(self, alias: str | None = None) -> "FakeAggregationQuery":
+        return FakeAggregationQuery(self, alias or "count")
+
+    def _matches(self, data: dict) -> bool:
+        for field, op_string, value in self._filters:
+            actual = data.get(field)
+            if op_string == "==":
+                if actual != value:
+                    return False
+            elif op_string == "in":
+                if actual not in value:
+                    return False
+            elif op_string == "array_contains":
+                if value not in (actual or ()):
+                    return False
+            elif op_string == "array_contains_any":
+                if not any(v in (actual or ()) for v in value):
+                    return False
+            # 範囲フィルタは null（フィールドなし）に一致しない
+            elif actual is None or not _RANGE_OPS[op_string](
+                _comparable(actual), _comparable(value)
+            ):
+                return False
+        return True
+
+    def _iter_matching(self) -> Iterator[tuple[str, dict]]:
+        # order_by 未指定時、実際の Firestore はドキュメントID順だが、ここでは挿入順で返す
+        if self._orders:
+            docs = self._client._sorted_documents(self._collection.id, self._orders)
+        else:
+            docs = self._client._documents(self._collection.id)
+        start = 0
+        if self._start_after is not None:
+            orders = self._orders
+            start = bisect_right(
+                docs,
+                _sort_key(self._start_after, orders),
+                key=lambda item: _sort_key(item[1], orders),
+            )
+        for i in range(start, len(docs)):
+            doc_id, data = docs[i]
+            if self._matches(data):
+                yield doc_id, data
+
+    def _count(self) -> int:
+        if not self._filters and self._start_after is None:
+            return len(self._client._collections.get(self._collection.id, {}))
+        return sum(1 for _ in self._iter_matching())
+
+    def stream(self) -> Iterator[FakeDocumentSnapshot]:
+        end = None if self._limit is None else self._offset + self._limit
+        page = list(islice(self._iter_matching(), self._offset, end))
+        # offset で読み飛ばしたドキュメントも課金対象になる
+        skipped = self._offset if page else min(self._offset, self._count())
+        self._client._rpc(reads=len(page) + skipped, documents=len(page))
+        for doc_id, data in page:
+            if self._projection is not None:
+                data = {k: v for k, v in data.items() if k in self._projection}
+            yield FakeDocumentSnapshot(self._collection.document(doc_id), dict(data))
+
+    def get(self) -> list[FakeDocumentSnapshot]:
+        return list(self.stream())
+
+
+class FakeAggregationQuery:
+    """AggregationQuery 相当（count のみ）"""
+
+    def __init__(self, query: FakeQuery, alias: str):
+        self._query = query
+        self._alias = alias
+
+    def get(self) -> list[list[FakeAggregationResult]]:
+        total = self._query._count()
+        # count 集約はインデックスエントリ 1000 件ごとに 1 読み取り
+        self._query._client._rpc(reads=max(1, (total + 999) // 1000))
+        return [[FakeAggregationResult(self._alias, total)]]
+
+
+class FakeCollectionReference(FakeQuery):
+    """CollectionReference 相当"""
+
+    def __init__(self, client: "FakeFirestoreClient", collection_id: str):
+        self._client = client
+        self.id = collection_id
+        super().__init__(self)
+
+    def document(self, document_id: str) -> FakeDocumentReference:
+        return FakeDocumentReference(self, document_id)
+
+
+class FakeFirestoreClient:
+    """Firestore クライアントのインメモリ実装
+
+    Args:
+        latency: RPC 1 回あたりの遅延（秒）
+        per_document_latency: 返却ドキュメント 1 件あたりの追加遅延（秒）
+        max_batch_writes: バッチ / トランザクション 1 回あたりの最大書き込み数
+        jitter: RPC 1 回あたりに加える 0〜jitter 秒の一様乱数の遅延
+        seed: jitter の乱数シード
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        per_document_latency: float = 0.0,
+        max_batch_writes: int = 500,
+        jitter: float = 0.0,
+        seed: int | None = None,
+    ) -> None:
+        self.latency = latency
+        self.per_document_latency = per_document_latency
+        self.max_batch_writes = max_batch_writes
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        self.stats = FakeFirestoreStats()
+        self._collections: dict[str, dict[str, dict]] = {}
+        # ドキュメントのパス → 最後に書き込んだ通番（FakeDocumentSnapshot.update_time）
+        self._update_times: dict[str, int] = {}
+        self._version = 0
+        self._sorted_cache: dict[tuple, tuple[int, list]] = {}
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_env(cls) -> "FakeFirestoreClient":
+        """環境変数 FAKE_FIRESTORE_LATENCY_MS / FAKE_FIRESTORE_JITTER_MS から構築"""
+        return cls(
+            latency=float(os.environ.get("FAKE_FIRESTORE_LATENCY_MS", "0")) / 1000,
+            jitter=float(os.environ.get("FAKE_FIRESTORE_JITTER_MS", "0")) / 1000,
+        )
+
+    def collection(self, collection_id: str) -> FakeCollectionReference:
+        return FakeCollectionReference(self, collection_id)
+
+    def get_all(
+        self,
+        references: Iterable[FakeDocumentReference],
+        field_paths: Iterable[str] | None = None,
+        transaction: FakeTransaction | None = None,
+    ) -> Iterator[FakeDocumentSnapshot]:
+        """複数ドキュメントを1回の RPC で取得（存在しないものは exists=False）"""
+        references = list(references)
+        projection = None if field_paths is None else set(field_paths)
+        with self._lock:
+            found = []
+            for ref in references:
+                data = ref._store().get(ref.id)
+                if data is not None and projection is not None:
+                    data = {k: v for k, v in data.items() if k in projection}
+                found.append(ref._snapshot(data))
+        self._rpc(reads=len(references), documents=len(references))
+        yield from found
+
+    def batch(self) -> FakeWriteBatch:
+        return FakeWriteBatch(self)
+
+    def transaction(self, max_attempts: int = 5) -> FakeTransaction:
+        return FakeTransaction(self, max_attempts=max_attempts)
+
+    def write_option(self, **kwargs: Any) -> FakeWriteOption:
+        return FakeWriteOption(**kwargs)
+
+    @contextmanager
+    def _write(self) -> Iterator[None]:
+        """書き込みを排他し、完了後にバージョンを進める"""
+        with self._lock:
+            yield
+            self._version += 1
+
+    def _documents(self, collection_id: str) -> list[tuple[str, dict]]:
+        with self._lock:
+            return list(self._collections.get(collection_id, {}).items())
+
+    def _sorted_documents(self, collection_id: str, orders: tuple) -> list[tuple[str, dict]]:
+        """order_by 済みのドキュメント一覧（書き込みがあるまでキャッシュ）"""
+        cache_key = (collection_id, orders)
+        with self._lock:
+            cached = self._sorted_cache.get(cache_key)
+            if cached is not None and cached[0] == self._version:
+                return cached[1]
+            # order_by のフィールドを持たないドキュメントは結果に含まれない
+            docs = sorted(
+                (
+                    item
+                    for item in self._collections.get(collection_id, {}).items()
+                    if all(field in item[1] for field, _ in orders)
+                ),
+                key=lambda item: _sort_key(item[1], orders),
+            )
+            self._sorted_cache[cache_key] = (self._version, docs)
+            return docs
+
+    def _rpc(self, reads: int = 0, documents: int = 0) -> None:
+        self.stats.record(reads)
+        delay = self.latency + self.per_document_latency * documents
+        if self.jitter > 0:
+            with self._lock:
+                delay += self._random.uniform(0, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
@@ -0,0 +1,216 @@
+"""ローカル用の Redis スタンドイン（テスト・複数インスタンスの検証用）
+
+RESP2 で待ち受け、提案キャッシュが使うコマンドだけをインメモリで再現する。
+複数のプロセスから同じポートに接続すれば、インスタンス間の共有キャッシュを手元で試せる。
+
+実行: uv run python -m src.services.fake_redis --port 6379
+"""
+
+import argparse
+import asyncio
+import time
+from collections.abc import Callable
+from fnmatch import fnmatchcase
+from typing import Any
+
+from src.services.resp import RedisError, read_reply
+
+
+class FakeRedisServer:
+    """GET / SET / DEL / HSET / HGETALL / HDEL / PEXPIRE / SCAN などに対応するサーバー"""
+
+    def __init__(
+        self, host: str = "127.0.0.1", port: int = 0, timer: Callable[[], float] = time.monotonic
+    ) -> None:
+        self._host = host
+        self._port = port
+        self._timer = timer
+        self._data: dict[bytes, bytes | dict[bytes, bytes]] = {}
+        self._expires: dict[bytes, float] = {}
+        self._server: asyncio.Server | None = None
+        self._writers: set[asyncio.StreamWriter] = set()
+        # 受け付けたコマンドの数
+        self.commands = 0
+
+    @property
+    def url(self) -> str:
+        assert self._server is not None, "start() の前には URL がありません"
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"redis://{host}:{port}/0"
+
+    async def start(self) -> str:
+        self._server = await asyncio.start_server(self._handle, self._host, self._port)
+        return self.url
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            # 再起動を再現できるよう、接続中のクライアントも切断する
+            for writer in list(self._writers):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "FakeRedisServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._writers.add(writer)
+        try:
+            while True:
+                request = await read_reply(reader)
+                self.commands += 1
+                try:
+                    reply = self._dispatch(request)
+                except RedisError as e:
+                    reply = e
+                writer.write(_encode_reply(reply))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    def _dispatch(self, request: Any) -> Any:
+        if not isinstance(request, list) or not request:
+            raise RedisError("ERR Protocol error")
+        name, *args = request
+        handler = getattr(self, f"_cmd_{name.decode().lower()}", None)
+        if handler is None:
+            raise RedisError(f"ERR unknown command '{name.decode()}'")
+        try:
+            return handler(*args)
+        except TypeError:
+            raise RedisError(
+                f"ERR wrong number of arguments for '{name.decode()}' command"
+            ) from None
+
+    def _get(self, key: bytes) -> bytes | dict[bytes, bytes] | None:
+        expires = self._expires.get(key)
+        if expires is not None and expires <= self._timer():
+            self._data.pop(key, None)
+            del self._expires[key]
+        return self._data.get(key)
+
+    def _hash(self, key: bytes) -> dict[bytes, bytes] | None:
+        value = self._get(key)
+        if value is not None and not isinstance(value, dict):
+            raise RedisError("WRONGTYPE Operation against a key holding the wrong kind of value")
+        return value
+
+    def _cmd_ping(self) -> str:
+        return "PONG"
+
+    def _cmd_select(self, db: bytes) -> str:
+        return "OK"
+
+    def _cmd_auth(self, *args: bytes) -> str:
+        return "OK"
+
+    def _cmd_get(self, key: bytes) -> bytes | None:
+        value = self._get(key)
+        if isinstance(value, dict):
+            raise RedisError("WRONGTYPE Operation against a key holding the wrong kind of value")
+        return value
+
+    def _cmd_set(self, key: bytes, value: bytes, *options: bytes) -> str:
+        self._data[key] = value
+        self._expires.pop(key, None)
+        if options:
+            unit = options[0].upper()
+            if unit not in (b"PX", b"EX") or len(options) != 2:
+                raise RedisError("ERR syntax error")
+            scale = 1000 if unit == b"PX" else 1
+            self._expires[key] = self._timer() + int(options[1]) / scale
+        return "OK"
+
+    def _cmd_del(self, *keys: bytes) -> int:
+        deleted = 0
+        for key in keys:
+            if self._get(key) is not None:
+                del self._data[key]
+                self._expires.pop(key, None)
+                deleted += 1
+        return deleted
+
+    def _cmd_hset(self, key: bytes, *pairs: bytes) -> int:
+        if not pairs or len(pairs) % 2:
+            raise RedisError("ERR wrong number of arguments for 'hset' command")
+        values = self._hash(key)
+        if values is None:
+            values = self._data[key] = {}
+        added = 0
+        for field, value in zip(pairs[::2], pairs[1::2]):
+            added += field not in values
+            values[field] = value
+        return added
+
+    def _cmd_hgetall(self, key: bytes) -> list[bytes]:
+        values = self._hash(key) or {}
+        return [item for pair in values.items() for item in pair]
+
+    def _cmd_hdel(self, key: bytes, *fields: bytes) -> int:
+        values = self._hash(key)
+        if values is None:
+            return 0
+        deleted = sum(values.pop(field, None) is not None for field in fields)
+        if not values:
+            self._cmd_del(key)
+        return deleted
+
+    def _cmd_pexpire(self, key: bytes, milliseconds: bytes) -> int:
+        if self._get(key) is None:
+            return 0
+        self._expires[key] = self._timer() + int(milliseconds) / 1000
+        return 1
+
+    def _cmd_scan(self, cursor: bytes, *options: bytes) -> list[Any]:
+        """全てのキーを1回で返す（カーソルは常に 0）"""
+        pattern = "*"
+        for name, value in zip(options[::2], options[1::2]):
+            if name.upper() == b"MATCH":
+                pattern = value.decode()
+        keys = [key for key in list(self._data) if self._get(key) is not None]
+        return [b"0", [key for key in keys if fnmatchcase(key.decode(), pattern)]]
+
+    def _cmd_flushdb(self, *args: bytes) -> str:
+        self._data.clear()
+        self._expires.clear()
+        return "OK"
+
+
+def _encode_reply(reply: Any) -> bytes:
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, RedisError):
+        return b"-%s\r\n" % str(reply).encode()
+    if isinstance(reply, str):
+        return b"+%s\r\n" % reply.encode()
+    if isinstance(reply, int):
+        return b":%d\r\n" % reply
+    if isinstance(reply, bytes):
+        return b"$%d\r\n%s\r\n" % (len(reply), reply)
+    return b"*%d\r\n" % len(reply) + b"".join(_encode_reply(item) for item in reply)
+
+
+async def _serve(host: str, port: int) -> None:
+    server = FakeRedisServer(host, port)
+    print(f"listening on {await server.start()}")
+    await asyncio.Event().wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    args = parser.parse_args()
+    asyncio.run(_serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,63 @@
 """Firestore サービス: タスクの永続化を担当"""
 
+from __future__ import annotations
+
+import asyncio
+import gc
 import os
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, suppress
 from datetime import datetime
-from typing import Protocol
-from uuid import UUID, uuid4
+from functools import partial
+from math import prod
+from typing import Any
+from uuid import UUID
 
 import firebase_admin
 from firebase_admin import credentials, firestore
-
-
-class TaskRepository(Protocol):
-    """タスクリポジトリのインターフェース"""
-
-    async def create(self, task_data: dict) -> dict: ...
-    async def get(self, task_id: UUID) -> dict | None: ...
-    async def list(
-        self,
-        limit: int,
-        offset: int,
-        status: str | None,
-        priority: str | None,
-    ) -> tuple[list[dict], int]: ...
-    async def update(self, task_id: UUID, update_data: dict) -> dict | None: ...
-    async def delete(self, task_id: UUID) -> bool: ...
-    async def clear(self) -> None: ...
-
-
-def _get_firestore_client() -> firestore.firestore.Client:
-    """Firestoreクライアントを取得（シングルトン）"""
+from google.api_core.exceptions import FailedPrecondition, NotFound
+from google.cloud.firestore_v1.base_query import FieldFilter
+from google.cloud.firestore_v1.field_path import FieldPath
+
+from src.services.cache import CachedTaskRepository, with_cache
+from src.services.columnar import ColumnarTaskRepository
+from src.services.fake_firestore import FakeFirestoreClient
+from src.services.memory import InMemoryTaskRepository
+from src.services.pagination import (
+    DEFAULT_SORT,
+    PRIORITY_RANK,
+    SORT_KEYS,
+    decode_cursor,
+)
+from src.services.repository import (
+    SUGGESTION_COMPLETED_LIMIT,
+    SUGGESTION_OPEN_LIMIT,
+    SuggestionContext,
+    TaskRepository,
+    fetch_suggestion_context,
+    filter_values,
+    new_task,
+)
+from src.services.search import (
+    match_score,
+    normalize,
+    query_terms,
+    rank,
+    term_grams,
+    text_grams,
+)
+from src.services.snapshot import SnapshotTaskRepository, with_snapshots
+from src.services.sqlite import SqliteTaskRepository
+
+
+def _get_firestore_client() -> firestore.firestore.Client | FakeFirestoreClient:
+    """Firestoreクライアントを取得（シングルトン）
+
+    USE_FAKE_FIRESTORE=true の場合はローカルのスタンドインを返す（オフラインでの動作確認用）。
+    """
+    if os.environ.get("USE_FAKE_FIRESTORE", "").lower() == "true":
+        return FakeFirestoreClient.from_env()
     if not firebase_admin._apps:
         cred_path = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS")
         if cred_path:
@@ -39,13 +69,52 @@ def _get_firestore_client() -> firestore.firestore.Client:
     return firestore.client()
 
 
+# 1 クエリの in / array_contains_any の値の組み合わせ数（選言標準形の項数）の上限
+MAX_DISJUNCTIONS = 30
+
+# 全文検索用にドキュメントに保存するグラム（search.ngrams）の配列のフィールド
+_SEARCH_GRAMS = "search_grams"
+_TEXT_FIELDS = {"title", "description"}
+# 検索で候補を絞るグラムを選ぶために件数を数えるグラムの最大数
+_MAX_COUNTED_GRAMS = 8
+
+
+class FilterTooComplexError(ValueError):
+    """Firestore のクエリで扱えない絞り込み条件の組み合わせ"""
+
+
+def _search_grams(task: dict) -> list[str]:
+    return sorted(text_grams(task["title"], task["description"]))
+
+
+def _default_max_workers() -> int:
+    """Firestore I/O 用スレッド数を取得（環境変数 FIRESTORE_MAX_WORKERS で変更可能）"""
+    return int(os.environ.get("FIRESTORE_MAX_WORKERS", "32"))
+
+
 class FirestoreTaskRepository:
-    """FirestoreによるタスクリポジトリImpl"""
+    """FirestoreによるタスクリポジトリImpl
 
-    COLLECTION = "tasks"
+    google-cloud-firestore の同期クライアントは呼び出しスレッドをブロックするため、
+    全ての RPC を専用のスレッドプールで実行してイベントループを止めないようにする。
+    """
 
-    def __init__(self) -> None:
-        self._db = _get_firestore_client()
+    COLLECTION = "tasks"
+    # 1バッチあたりの最大書き込み数（Firestore の上限）
+    BATCH_SIZE = 500
+    MAX_PARALLEL_BATCHES = 4
+
+    def __init__(self, db: Any | None = None, max_workers: int | None = None) -> None:
+        self._db = db if db is not None else _get_firestore_client()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or _default_max_workers(),
+            thread_name_prefix="firestore",
+        )
+
+    async def _run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """同期 RPC をスレッドプールで実行"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
 
     def _to_firestore(self, task_data: dict) -> dict:
         """Pydanticモデル形式からFirestore形式に変換"""
@@ -53,170 +122,444 @@ class FirestoreTaskRepository:
         # UUIDを文字列に変換
         if "id" in data and isinstance(data["id"], UUID):
             data["id"] = str(data["id"])
+        # 優先度順の並び替え用に数値の順位を併せて保存
+        if "priority" in data:
+            data["priority_rank"] = PRIORITY_RANK[data["priority"]]
+        # 全文検索用のグラム（部分更新では _with_search_grams で更新後の内容から付与する）
+        if _TEXT_FIELDS <= data.keys():
+            data[_SEARCH_GRAMS] = _search_grams(data)
         # datetimeは維持（Firestoreが対応）
         return data
 
+    def _update_fields(self, update_data: dict, updated: dict) -> dict:
+        """部分更新の内容を Firestore 形式に変換（タイトル・説明の変更時はグラムも更新）"""
+        data = self._to_firestore(update_data)
+        if not _TEXT_FIELDS.isdisjoint(update_data):
+            data[_SEARCH_GRAMS] = _search_grams(updated)
+        return data
+
     def _from_firestore(self, doc_data: dict) -> dict:
         """Firestore形式からPydanticモデル形式に変換"""
         data = doc_data.copy()
         # 文字列をUUIDに変換
         if "id" in data and isinstance(data["id"], str):
             data["id"] = UUID(data["id"])
+        data.pop("priority_rank", None)
+        data.pop(_SEARCH_GRAMS, None)
         return data
 
+    def _filtered_query(
+        self,
+        status: str | Sequence[str] | None,
+        priority: str | Sequence[str] | None,
+        due_after: datetime | None = None,
+        due_before: datetime | None = None,
+        tags: Sequence[str] | None = None,
+    ) -> Any:
+        """ステータス・優先度・タグのフィルタと期限の範囲フィルタを適用したクエリを構築
+
+        ステータス・優先度は値が 1 つなら ==、複数なら in、タグは array_contains_any とする
+        （空の条件は呼び出し側で除く）。
+        """
+        query = self._db.collection(self.COLLECTION)
+        for field, values in (
+            ("status", filter_values(status)),
+            ("priority", filter_values(priority)),
+        ):
+            if values is None:
+                continue
+            if len(values) == 1:
+                query = query.where(filter=FieldFilter(field, "==", values[0]))
+            else:
+                query = query.where(filter=FieldFilter(field, "in", list(values)))
+        tag_values = filter_values(tags)
+        if tag_values is not None:
+            query = query.where(filter=FieldFilter("tags", "array_contains_any", list(tag_values)))
+        # 範囲フィルタは due_date が null のドキュメントに一致しない
+        if due_after is not None:
+            query = query.where(filter=FieldFilter("due_date", ">=", due_after))
+        if due_before is not None:
+            query = query.where(filter=FieldFilter("due_date", "<", due_before))
+        return query
+
+    @staticmethod
+    def _order_field(field: str) -> str:
+        """並び順キーのフィールドに対応するドキュメントのフィールド"""
+        return "priority_rank" if field == "priority" else field
+
+    def _document(self, task_id: UUID) -> Any:
+        return self._db.collection(self.COLLECTION).document(str(task_id))
+
     async def create(self, task_data: dict) -> dict:
         """タスクを作成"""
-        task_id = uuid4()
-        now = datetime.now()
-        doc_data = {
-            "id": str(task_id),
-            "title": task_data["title"],
-            "description": task_data.get("description", ""),
-            "due_date": task_data.get("due_date"),
-            "status": task_data.get("status", "pending"),
-            "priority": task_data.get("priority", "medium"),
-            "created_at": now,
-        }
-        self._db.collection(self.COLLECTION).document(str(task_id)).set(doc_data)
-        return self._from_firestore(doc_data)
+        task = new_task(task_data)
+        await self._run(self._document(task["id"]).set, self._to_firestore(task))
+        return task
 
     async def get(self, task_id: UUID) -> dict | None:
         """タスクを取得"""
-        doc = self._db.collection(self.COLLECTION).document(str(task_id)).get()
+        doc = await self._run(self._document(task_id).get)
         if not doc.exists:
             return None
         return self._from_firestore(doc.to_dict())
 
+    async def get_many(self, task_ids: Iterable[UUID]) -> dict[UUID, dict]:
+        """複数のタスクを1回のバッチ読み取り（get_all）で取得"""
+        snapshots = await self._snapshots(task_ids)
+        return {task_id: self._from_firestore(s.to_dict()) for task_id, s in snapshots.items()}
+
+    async def _snapshots(self, task_ids: Iterable[UUID]) -> dict[UUID, Any]:
+        """存在するタスクのスナップショットを1回のバッチ読み取り（get_all）で取得"""
+        refs = [self._document(task_id) for task_id in set(task_ids)]
+        if not refs:
+            return {}
+        snapshots = await self._run(lambda: list(self._db.get_all(refs)))
+        return {UUID(s.id): s for s in snapshots if s.exists}
+
     async def list(
         self,
         limit: int,
         offset: int,
-        status: str | None,
-        priority: str | None,
+        status: str | Sequence[str] | None,
+        priority: str | Sequence[str] | None,
+        cursor: str | None = None,
+        fields: Sequence[str] | None = None,
+        sort: str = DEFAULT_SORT,
+        descending: bool = False,
+        due_after: datetime | None = None,
+        due_before: datetime | None = None,
+        tags: Sequence[str] | None = None,
     ) -> tuple[list[dict], int]:
-        """タスク一覧を取得"""
-        # クエリ構築
-        query = self._db.collection(self.COLLECTION)
-        if status is not None:
-            query = query.where("status", "==", status)
-        if priority is not None:
-            query = query.where("priority", "==", priority)
-
-        # 全件取得してtotalを計算（Firestoreにcount集約がないため）
-        all_docs = list(query.stream())
-        total = len(all_docs)
-
-        # offsetとlimitを適用
-        items = []
-        for doc in all_docs[offset : offset + limit]:
-            items.append(self._from_firestore(doc.to_dict()))
-
+        """タスク一覧を取得（sort のキー順、descending で降順）"""
+        filters = [filter_values(values) for values in (status, priority, tags)]
+        if any(values is not None and not values for values in filters):
+            # Firestore は空の in / array_contains_any を受け付けない
+            return [], 0
+        disjunctions = prod(len(values) for values in filters if values is not None)
+        if disjunctions > MAX_DISJUNCTIONS:
+            raise FilterTooComplexError(
+                f"絞り込み条件の組み合わせが多すぎます（最大 {MAX_DISJUNCTIONS} 通り）"
+            )
+        query = self._filtered_query(status, priority, due_after, due_before, tags)
+
+        # 複合インデックスは firestore.indexes.json で定義
+        order_fields = [self._order_field(field) for field in SORT_KEYS[sort]]
+        direction = firestore.Query.DESCENDING if descending else firestore.Query.ASCENDING
+        page_query = query
+        for field in order_fields:
+            page_query = page_query.order_by(field, direction=direction)
+        if cursor is not None:
+            values = decode_cursor(cursor, sort, descending)
+            page_query = page_query.start_after(
+                {
+                    field: str(value) if isinstance(value, UUID) else value
+                    for field, value in zip(order_fields, values)
+                }
+            )
+        else:
+            page_query = page_query.offset(offset)
+        page_query = page_query.limit(limit)
+        if fields is not None:
+            # 指定フィールドのみ転送する（カーソル生成用に並び順キーは常に含める）
+            page_query = page_query.select(sorted({*fields, *SORT_KEYS[sort]}))
+
+        # totalはcount集約、ページはサーバー側のlimitで取得（2つのRPCを並列実行）
+        count_query = query.count(alias="total")
+        count_result, docs = await asyncio.gather(
+            self._run(count_query.get),
+            self._run(lambda: list(page_query.stream())),
+        )
+        total = int(count_result[0][0].value)
+
+        items = [self._from_firestore(doc.to_dict()) for doc in docs]
         return items, total
 
     async def update(self, task_id: UUID, update_data: dict) -> dict | None:
-        """タスクを更新"""
-        doc_ref = self._db.collection(self.COLLECTION).document(str(task_id))
-        doc = doc_ref.get()
-        if not doc.exists:
-            return None
-
-        # 更新データを適用
-        firestore_update = {}
-        for key, value in update_data.items():
-            if isinstance(value, str) and hasattr(value, "value"):
-                # Enumの場合は値を取得
-                firestore_update[key] = value
-            else:
-                firestore_update[key] = value
-
-        doc_ref.update(firestore_update)
-
-        # 更新後のデータを取得
-        updated_doc = doc_ref.get()
-        return self._from_firestore(updated_doc.to_dict())
+        """タスクを更新（読み取りと書き込みを1トランザクションで行う）"""
+        steps = await self._run(self._update_sync, task_id, [update_data])
+        return None if steps is None else steps[-1]
+
+    def _update_sync(self, task_id: UUID, updates: Sequence[dict]) -> list[dict] | None:
+        """updates を順に適用し、各更新後のタスクを返す（存在しなければ None）"""
+        doc_ref = self._document(task_id)
+
+        @firestore.transactional
+        def update_in_transaction(transaction) -> list[dict] | None:
+            snapshot = doc_ref.get(transaction=transaction)
+            if not snapshot.exists:
+                return None
+            # 書き込んだ内容をローカルでマージして返す（再取得しない）
+            steps = _merge_steps(snapshot.to_dict(), updates)
+            combined = _combine(updates)
+            if combined:
+                transaction.update(doc_ref, self._update_fields(combined, steps[-1]))
+            return steps
+
+        steps = update_in_transaction(self._db.transaction())
+        return None if steps is None else [self._from_firestore(step) for step in steps]
 
     async def delete(self, task_id: UUID) -> bool:
-        """タスクを削除"""
-        doc_ref = self._db.collection(self.COLLECTION).document(str(task_id))
-        doc = doc_ref.get()
-        if not doc.exists:
+        """タスクを削除（存在を前提条件とした1回の書き込み）"""
+        doc_ref = self._document(task_id)
+        try:
+            await self._run(doc_ref.delete, option=self._db.write_option(exists=True))
+        except NotFound:
             return False
-        doc_ref.delete()
         return True
 
+    async def create_many(self, tasks_data: list[dict]) -> list[dict]:
+        """タスクを一括作成（バッチ書き込み）"""
+        tasks = [new_task(task_data) for task_data in tasks_data]
+        writes = [
+            partial(_batch_set, self._document(task["id"]), self._to_firestore(task))
+            for task in tasks
+        ]
+        await self._write_in_batches(writes)
+        return tasks
+
+    async def update_many(self, updates: list[tuple[UUID, dict]]) -> list[dict | None]:
+        """タスクを一括更新（get_all で読み取り後、バッチ書き込み）
+
+        各書き込みは読み取り時点から変更されていないこと（last_update_time）を前提条件とする。
+        間に更新・削除されたタスクを含むバッチは全体が失敗するため、そのバッチのタスクだけを
+        1件ずつのトランザクションでやり直す。
+        """
+        snapshots = await self._snapshots(task_id for task_id, _ in updates)
+        # 同一IDへの複数の更新はリクエスト順に1件の書き込みにまとめる
+        pending: dict[UUID, list[dict]] = {}
+        for task_id, update_data in updates:
+            if task_id in snapshots:
+                pending.setdefault(task_id, []).append(update_data)
+        steps: dict[UUID, list[dict] | None] = {}
+        written: list[UUID] = []
+        writes = []
+        for task_id, task_updates in pending.items():
+            snapshot = snapshots[task_id]
+            merged = _merge_steps(snapshot.to_dict(), task_updates)
+            steps[task_id] = [self._from_firestore(step) for step in merged]
+            combined = _combine(task_updates)
+            if combined:
+                option = self._db.write_option(last_update_time=snapshot.update_time)
+                fields = self._update_fields(combined, merged[-1])
+                writes.append(
+                    partial(_batch_update, self._document(task_id), fields, option=option)
+                )
+                written.append(task_id)
+
+        async def retry(indices: range) -> None:
+            task_ids = [written[i] for i in indices]
+            retried = await asyncio.gather(
+                *(self._run(self._update_sync, task_id, pending[task_id]) for task_id in task_ids)
+            )
+            steps.update(zip(task_ids, retried))
+
+        await self._write_in_batches(writes, on_conflict=retry)
+        results: list[dict | None] = []
+        applied: dict[UUID, int] = {}
+        for task_id, _ in updates:
+            task_steps = steps.get(task_id)
+            if task_steps is None:
+                results.append(None)
+                continue
+            index = applied.get(task_id, 0)
+            applied[task_id] = index + 1
+            results.append(task_steps[index])
+        return results
+
+    async def delete_many(self, task_ids: list[UUID]) -> list[bool]:
+        """タスクを一括削除（get_all で存在確認後、バッチ書き込み）
+
+        各削除は存在を前提条件とし、間に削除されたタスクを含むバッチは1件ずつやり直す。
+        """
+        existing = set(await self._snapshots(task_ids))
+        found: list[UUID] = []
+        for task_id in task_ids:
+            if task_id in existing:
+                existing.discard(task_id)
+                found.append(task_id)
+        option = self._db.write_option(exists=True)
+        writes = [
+            partial(_batch_delete, self._document(task_id), option=option) for task_id in found
+        ]
+        deleted = set(found)
+
+        async def retry(indices: range) -> None:
+            outcomes = await asyncio.gather(*(self.delete(found[i]) for i in indices))
+            deleted.difference_update(found[i] for i, ok in zip(indices, outcomes) if not ok)
+
+        await self._write_in_batches(writes, on_conflict=retry)
+        results = []
+        for task_id in task_ids:
+            results.append(task_id in deleted)
+            deleted.discard(task_id)
+        return results
+
+    async def delete_where(
+        self,
+        status: str | None = None,
+        priority: str | None = None,
+        on_progress: Callable[[int], None] | None = None,
+    ) -> int:
+        """条件に一致するタスクを一括削除し、削除件数を返す
+
+        ドキュメント名だけを取得し、BATCH_SIZE 件ずつのバッチ書き込みで削除する。
+        on_progress にはバッチのコミットごとに累計削除件数が渡される。
+        """
+        query = self._filtered_query(status, priority).select([FieldPath.document_id()])
+        refs = await self._run(lambda: [doc.reference for doc in query.stream()])
+        writes = [partial(_batch_delete, ref) for ref in refs]
+        return await self._write_in_batches(writes, on_progress)
+
+    async def search(self, query: str, limit: int, offset: int = 0) -> tuple[list[dict], int]:
+        """タイトル・説明からタスクを検索（一致度の高い順）
+
+        各ドキュメントの search_grams に検索語のグラムを array_contains で問い合わせる。
+        件数の集約で最も一致の少ないグラムを選んで候補を取得し、採点はクライアント側で行う。
+        """
+        terms = query_terms(query)
+        if not terms:
+            return [], 0
+        collection = self._db.collection(self.COLLECTION)
+        # 長い検索語のグラムほど一致が少ないことが多いため優先して数える
+        grams = list(
+            dict.fromkeys(
+                gram
+                for term in sorted(terms, key=len, reverse=True)
+                for gram in sorted(term_grams(term))
+            )
+        )[:_MAX_COUNTED_GRAMS]
+        queries = [
+            collection.where(filter=FieldFilter(_SEARCH_GRAMS, "array_contains", gram))
+            for gram in grams
+        ]
+        counts = await asyncio.gather(*(self._run(q.count(alias="total").get) for q in queries))
+        best = min(range(len(queries)), key=lambda i: counts[i][0][0].value)
+        if counts[best][0][0].value == 0:
+            return [], 0
+
+        candidates = queries[best].select(["title", "description", "created_at"])
+        docs = await self._run(lambda: list(candidates.stream()))
+        created_at: dict[UUID, Any] = {}
+        matches = []
+        for doc in docs:
+            data = doc.to_dict()
+            score = match_score(terms, normalize(data["title"]), normalize(data["description"]))
+            if score:
+                task_id = UUID(doc.id)
+                created_at[task_id] = data["created_at"]
+                matches.append((score, task_id))
+        ranked = rank(matches, created_at.__getitem__, limit, offset)
+        found = await self.get_many(ranked)
+        return [found[task_id] for task_id in ranked if task_id in found], len(matches)
+
+    async def suggestion_context(
+        self,
+        open_limit: int = SUGGESTION_OPEN_LIMIT,
+        completed_limit: int = SUGGESTION_COMPLETED_LIMIT,
+        now: datetime | None = None,
+    ) -> SuggestionContext:
+        """提案の生成に使うタスクと件数を取得（repository.fetch_suggestion_context）"""
+        return await fetch_suggestion_context(self, open_limit, completed_limit, now)
+
     async def clear(self) -> None:
         """全タスクを削除（テスト用）"""
-        docs = self._db.collection(self.COLLECTION).stream()
-        for doc in docs:
-            doc.reference.delete()
+        await self.delete_where()
+
+    async def backfill_priority_rank(self) -> int:
+        """priority_rank を持たない既存ドキュメントに付与し、更新件数を返す
+
+        order_by はフィールドを持たないドキュメントを結果から除外するため、
+        優先度順の一覧を使う前に一度実行する。
+        """
+        query = self._db.collection(self.COLLECTION).select(["priority", "priority_rank"])
+        docs = await self._run(lambda: list(query.stream()))
+        writes = [
+            partial(
+                _batch_update,
+                doc.reference,
+                {"priority_rank": PRIORITY_RANK[doc.to_dict()["priority"]]},
+            )
+            for doc in docs
+            if "priority_rank" not in doc.to_dict()
+        ]
+        return await self._write_in_batches(writes)
+
+    async def backfill_search_grams(self) -> int:
+        """search_grams を持たない既存ドキュメントに付与し、更新件数を返す
+
+        全文検索はこのフィールドで候補を取得するため、検索を使う前に一度実行する。
+        """
+        query = self._db.collection(self.COLLECTION).select(["title", "description", _SEARCH_GRAMS])
+        docs = await self._run(lambda: list(query.stream()))
+        writes = [
+            partial(_batch_update, doc.reference, {_SEARCH_GRAMS: _search_grams(doc.to_dict())})
+            for doc in docs
+            if _SEARCH_GRAMS not in doc.to_dict()
+        ]
+        return await self._write_in_batches(writes)
+
+    async def _write_in_batches(
+        self,
+        writes: Sequence[Callable[[Any], None]],
+        on_progress: Callable[[int], None] | None = None,
+        on_conflict: Callable[[range], Awaitable[None]] | None = None,
+    ) -> int:
+        """書き込みを BATCH_SIZE 件ずつコミット（同時コミット数は MAX_PARALLEL_BATCHES まで）
 
+        前提条件を満たさずに失敗したバッチは、on_conflict があれば含まれていた書き込みの
+        位置を渡して呼び出す（バッチは全体が失敗するため、他の書き込みも適用されていない）。
+        """
+        semaphore = asyncio.Semaphore(self.MAX_PARALLEL_BATCHES)
+        done = 0
 
-class InMemoryTaskRepository:
-    """インメモリによるタスクリポジトリImpl（テスト用）"""
+        async def commit(start: int) -> None:
+            nonlocal done
+            chunk = writes[start : start + self.BATCH_SIZE]
+            async with semaphore:
+                try:
+                    await self._run(self._commit_batch, chunk)
+                except (NotFound, FailedPrecondition):
+                    if on_conflict is None:
+                        raise
+                    await on_conflict(range(start, start + len(chunk)))
+            done += len(chunk)
+            if on_progress is not None:
+                on_progress(done)
 
-    def __init__(self) -> None:
-        self._tasks: list[dict] = []
+        await asyncio.gather(*(commit(i) for i in range(0, len(writes), self.BATCH_SIZE)))
+        return done
 
-    async def create(self, task_data: dict) -> dict:
-        """タスクを作成"""
-        task_id = uuid4()
-        now = datetime.now()
-        doc_data = {
-            "id": task_id,
-            "title": task_data["title"],
-            "description": task_data.get("description", ""),
-            "due_date": task_data.get("due_date"),
-            "status": task_data.get("status", "pending"),
-            "priority": task_data.get("priority", "medium"),
-            "created_at": now,
-        }
-        self._tasks.append(doc_data)
-        return doc_data
+    def _commit_batch(self, chunk: Sequence[Callable[[Any], None]]) -> None:
+        batch = self._db.batch()
+        for write in chunk:
+            write(batch)
+        batch.commit()
 
-    async def get(self, task_id: UUID) -> dict | None:
-        """タスクを取得"""
-        for task in self._tasks:
-            if task["id"] == task_id:
-                return task
-        return None
 
-    async def list(
-        self,
-        limit: int,
-        offset: int,
-        status: str | None,
-        priority: str | None,
-    ) -> tuple[list[dict], int]:
-        """タスク一覧を取得"""
-        filtered = self._tasks
-        if status is not None:
-            filtered = [t for t in filtered if t["status"] == status]
-        if priority is not None:
-            filtered = [t for t in filtered if t["priority"] == priority]
-
-        total = len(filtered)
-        items = filtered[offset : offset + limit]
-        return items, total
+def _batch_set(ref: Any, data: dict, batch: Any) -> None:
+    batch.set(ref, data)
 
-    async def update(self, task_id: UUID, update_data: dict) -> dict | None:
-        """タスクを更新"""
-        for i, task in enumerate(self._tasks):
-            if task["id"] == task_id:
-                self._tasks[i] = {**task, **update_data}
-                return self._tasks[i]
-        return None
 
-    async def delete(self, task_id: UUID) -> bool:
-        """タスクを削除"""
-        for i, task in enumerate(self._tasks):
-            if task["id"] == task_id:
-                self._tasks.pop(i)
-                return True
-        return False
+def _batch_update(ref: Any, data: dict, batch: Any, option: Any = None) -> None:
+    batch.update(ref, data, option=option)
 
-    async def clear(self) -> None:
-        """全タスクを削除"""
-        self._tasks.clear()
+
+def _batch_delete(ref: Any, batch: Any, option: Any = None) -> None:
+    batch.delete(ref, option=option)
+
+
+def _merge_steps(document: dict, updates: Sequence[dict]) -> list[dict]:
+    """ドキュメントに updates を順に適用した各時点の内容"""
+    steps = []
+    for update_data in updates:
+        document = {**document, **update_data}
+        steps.append(document)
+    return steps
+
+
+def _combine(updates: Sequence[dict]) -> dict:
+    """順に適用する部分更新を1件にまとめる"""
+    return {key: value for update_data in updates for key, value in update_data.items()}
 
 
 # デフォルトリポジトリ（環境に応じて切り替え）
@@ -228,12 +571,49 @@ def get_repository() -> TaskRepository:
     global _repository
     if _repository is None:
         if os.environ.get("USE_FIRESTORE", "").lower() == "true":
-            _repository = FirestoreTaskRepository()
+            repo: TaskRepository = FirestoreTaskRepository()
+        elif sqlite_path := os.environ.get("SQLITE_DB_PATH"):
+            repo = SqliteTaskRepository(sqlite_path)
+        elif os.environ.get("MEMORY_STORAGE", "").lower() == "columnar":
+            repo = with_snapshots(ColumnarTaskRepository())
         else:
-            _repository = InMemoryTaskRepository()
+            repo = with_snapshots(InMemoryTaskRepository())
+        _repository = with_cache(repo)
     return _repository
 
 
+@asynccontextmanager
+async def repository_lifespan() -> AsyncIterator[None]:
+    """アプリの起動から終了までのリポジトリの処理
+
+    インメモリストアのスナップショットが有効な場合、復元で後回しにした索引を起動後に作り、
+    MEMORY_SNAPSHOT_INTERVAL 秒（デフォルト: 300）ごとに書き出し、終了時に最終スナップショットを
+    書き出す。
+    """
+    repo = get_repository()
+    inner = repo.inner if isinstance(repo, CachedTaskRepository) else repo
+    if not isinstance(inner, SnapshotTaskRepository):
+        yield
+        return
+    # 復元した大量の長寿命オブジェクトを以降の循環 GC の走査対象から外す
+    # （インタプリタ全体に効くため、リポジトリではなくアプリの起動時に1回だけ行う）
+    gc.freeze()
+    interval = float(os.environ.get("MEMORY_SNAPSHOT_INTERVAL", "300"))
+    indexing = asyncio.create_task(inner.build_indexes())
+    periodic = asyncio.create_task(inner.run_periodic(interval))
+    try:
+        yield
+    finally:
+        indexing.cancel()
+        periodic.cancel()
+        # 書き出し中の定期スナップショットが終わってから最終スナップショットを書き出す
+        for task in (indexing, periodic):
+            with suppress(asyncio.CancelledError):
+                await task
+        await inner.close()
+        gc.unfreeze()
+
+
 def set_repository(repo: TaskRepository) -> None:
     """タスクリポジトリを設定（テスト用）"""
     global _repository
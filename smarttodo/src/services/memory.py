@@ -0,0 +1,480 @@
+"""インメモリによるタスクリポジトリ（テスト・デモ用の単一インスタンス向けストア）"""
+
+from __future__ import annotations
+
+import asyncio
+from bisect import bisect_left
+from collections import deque
+from collections.abc import Callable, Iterable, Sequence
+from datetime import datetime
+from uuid import UUID
+
+from src.models.task import TaskPriority, TaskStatus
+from src.services.bitmap import BitmapIndex, filter_keys
+from src.services.pagination import (
+    DEFAULT_SORT,
+    SORT_KEYS,
+    comparable_key,
+    decode_cursor,
+    due_in_range,
+    page_bounds,
+    scan_page,
+    sort_key,
+    sort_keys,
+)
+from src.services.repository import (
+    SUGGESTION_COMPLETED_LIMIT,
+    SUGGESTION_OPEN_LIMIT,
+    SuggestionContext,
+    fetch_suggestion_context,
+    filter_values,
+    new_task,
+)
+from src.services.search import SearchIndex
+from src.services.sortedlist import SortedList
+
+# 索引のキー: (並び順, ステータス, 優先度)。フィルタなしの条件は None
+IndexKey = tuple[str, str | None, str | None]
+
+# 変更されると索引内の位置・ビットマップが変わるフィールド
+_INDEXED_FIELDS = {"status", "priority", "tags"} | {
+    f for keys in SORT_KEYS.values() for f in keys
+} - {"id"}
+# ビットマップで絞り込む際、該当件数がこの倍率より少なければ索引を走査せずに整列する
+_SPARSE_RATIO = 16
+# 全文検索の対象のフィールド
+_TEXT_FIELDS = ("title", "description")
+# 一括読み込み後の全文検索の索引を build_indexes() で1回に登録するタスク数
+_SEARCH_BATCH = 4096
+
+
+def _index_keys(task: dict) -> list[IndexKey]:
+    """タスクが属する索引（並び順ごとに、フィルタなし・ステータス・優先度・両方）"""
+    status, priority = task["status"], task["priority"]
+    return [
+        (sort, s, p)
+        for sort in SORT_KEYS
+        for s, p in ((None, None), (status, None), (None, priority), (status, priority))
+    ]
+
+
+def _all_index_keys() -> list[IndexKey]:
+    """全ての索引（広い条件から順に）"""
+    return [
+        (sort, status, priority)
+        for sort in SORT_KEYS
+        for status in (None, *(status.value for status in TaskStatus))
+        for priority in (None, *(priority.value for priority in TaskPriority))
+    ]
+
+
+def single_value(values: tuple[str, ...] | None) -> str | None:
+    """絞り込み条件が 1 つの値のみならその値（それ以外は None）"""
+    return values[0] if values is not None and len(values) == 1 else None
+
+
+def uses_bitmaps(
+    statuses: tuple[str, ...] | None,
+    priorities: tuple[str, ...] | None,
+    tags: tuple[str, ...] | None,
+) -> bool:
+    """並び順ごとの索引だけでは絞り込めない条件（複数の値・タグ）か"""
+    return tags is not None or any(
+        values is not None and len(values) != 1 for values in (statuses, priorities)
+    )
+
+
+def _due_range(
+    entries: Sequence[tuple], due_after: datetime | None, due_before: datetime | None
+) -> tuple[int, int]:
+    """期限順の索引上で、期限が [due_after, due_before) のエントリの範囲 [lo, hi)"""
+    # 下限なしでも期限なし（先頭に並ぶ）は範囲に含めない
+    lo = bisect_left(entries, comparable_key((due_after or datetime.min,)))
+    hi = len(entries)
+    if due_before is not None:
+        hi = bisect_left(entries, comparable_key((due_before,)), lo)
+    return lo, hi
+
+
+class InMemoryTaskRepository:
+    """インメモリによるタスクリポジトリImpl（テスト用）
+
+    タスク本体は ID をキーとした辞書で持ち、並び順とフィルタ条件の組み合わせごとに
+    比較用キー（末尾が ID）の昇順リスト（sortedlist.SortedList）を索引として保持する。
+    一覧は該当する索引を二分探索して切り出すため、ページの件数分の処理で済む。
+    期限の範囲指定は期限順の索引を二分探索し、範囲内のタスクのみを対象にする。
+    ステータス・優先度の複数の値やタグでの絞り込みは、タスクごとの位置（スロット）を
+    値ごとのビットマップ（bitmap.BitmapIndex）に登録しておき、ビット演算で求める。
+    タイトル・説明は全文検索の n-gram 索引（search.SearchIndex）にも登録する。
+
+    索引は最初に使うときに ID 辞書から作り、以降は書き込みのたびに更新する。一括読み込みでは
+    作り直さずに捨てるため、大量のタスクの復元もタスクの辞書を作るだけで済む。
+    復元後は build_indexes() で残りの索引を少しずつ作っておける。
+    """
+
+    def __init__(self) -> None:
+        self._by_id: dict[UUID, dict] = {}
+        # 作成済みの索引
+        self._indexes: dict[IndexKey, SortedList] = {}
+        self._clear_slots()
+        self._search = SearchIndex()
+        # 一括読み込み後、まだ全文検索の索引に登録していないタスク
+        self._unsearched: deque[UUID] = deque()
+
+    def _clear_slots(self) -> None:
+        # 作成前は None（_slots() で作る）
+        self._bitmaps: BitmapIndex | None = None
+        # ID からビットマップ上の位置と、その逆引き（削除済みの位置は None）
+        self._slot_of: dict[UUID, int] = {}
+        self._slot_ids: list[UUID | None] = []
+        # 削除済みで再利用できる位置
+        self._free_slots: list[int] = []
+
+    def _slots(self) -> BitmapIndex:
+        """ビットマップ索引を取得（未作成なら ID 辞書の順に位置を振って作る）"""
+        if self._bitmaps is None:
+            bitmaps = BitmapIndex()
+            self._slot_ids = list(self._by_id)
+            self._slot_of = {task_id: slot for slot, task_id in enumerate(self._slot_ids)}
+            for slot, task in enumerate(self._by_id.values()):
+                bitmaps.add(slot, filter_keys(task["status"], task["priority"], task["tags"]))
+            self._bitmaps = bitmaps
+        return self._bitmaps
+
+    def _index(self, key: IndexKey) -> Sequence[tuple]:
+        """索引を取得（未作成なら作る）
+
+        フィルタなしの索引は整列して作り、条件付きの索引はそれを1回走査して、同じ並び順の
+        未作成の索引をまとめて振り分ける（整列済みの並びから取り出すため整列し直さない）。
+        """
+        index = self._indexes.get(key)
+        if index is not None:
+            return index
+        sort, status, priority = key
+        if status is None and priority is None:
+            index = SortedList(sorted(sort_key(task, sort) for task in self._by_id.values()))
+            self._indexes[key] = index
+            return index
+        full = self._index((sort, None, None))
+        parts: dict[IndexKey, list[tuple]] = {
+            k: [] for k in _all_index_keys() if k[0] == sort and k not in self._indexes
+        }
+        by_id = self._by_id
+        for entry in full if parts else ():
+            task = by_id[entry[-1]]
+            s, p = task["status"], task["priority"]
+            for part_key in ((sort, s, None), (sort, None, p), (sort, s, p)):
+                part = parts.get(part_key)
+                if part is not None:
+                    part.append(entry)
+        self._indexes.update((k, SortedList(part)) for k, part in parts.items())
+        # 存在しない値の条件（索引を作らない）は該当なし
+        return self._indexes.get(key, [])
+
+    def _insert(self, task: dict) -> None:
+        task_id = task["id"]
+        self._by_id[task_id] = task
+        entries = sort_keys(task)
+        for key in _index_keys(task):
+            index = self._indexes.get(key)
+            if index is not None:
+                index.add(entries[key[0]])
+        if self._bitmaps is None:
+            return
+        slot = self._slot_of.get(task_id)
+        if slot is None:
+            slot = self._free_slots.pop() if self._free_slots else len(self._slot_ids)
+            if slot == len(self._slot_ids):
+                self._slot_ids.append(task_id)
+            else:
+                self._slot_ids[slot] = task_id
+            self._slot_of[task_id] = slot
+        self._bitmaps.add(slot, filter_keys(task["status"], task["priority"], task["tags"]))
+
+    def _unindex(self, task: dict) -> None:
+        entries = sort_keys(task)
+        for key in _index_keys(task):
+            index = self._indexes.get(key)
+            if index is not None:
+                index.remove(entries[key[0]])
+        if self._bitmaps is not None:
+            slot = self._slot_of[task["id"]]
+            self._bitmaps.remove(slot, filter_keys(task["status"], task["priority"], task["tags"]))
+
+    def _release(self, task_id: UUID) -> None:
+        """索引から取り除いたタスクの位置を再利用できるようにする"""
+        if self._bitmaps is None:
+            return
+        slot = self._slot_of.pop(task_id)
+        self._slot_ids[slot] = None
+        self._free_slots.append(slot)
+
+    def _reset_indexes(self) -> None:
+        """索引を捨て、次に使うときに ID 辞書から作り直す（大量削除・一括読み込み時）"""
+        self._indexes = {}
+        self._clear_slots()
+
+    def dump(self) -> list[dict]:
+        """全タスクを作成日時順に取得（スナップショット用）
+
+        この順に load() すると作成日時順の索引は整列済みの並びから作れるため、作成が速い。
+        """
+        by_id = self._by_id
+        return [by_id[entry[-1]] for entry in self._index((DEFAULT_SORT, None, None))]
+
+    def load(self, tasks: Iterable[dict]) -> None:
+        """タスクを一括で読み込む（既存のタスクは置き換え、索引は後で作る）"""
+        self._by_id = {task["id"]: task for task in tasks}
+        self._reset_indexes()
+        self._search.clear()
+        self._unsearched = deque(self._by_id)
+
+    def _catch_up_search(self, limit: int) -> None:
+        """一括読み込み後、まだ全文検索の索引に登録していないタスクを limit 件まで登録"""
+        pending, by_id, search = self._unsearched, self._by_id, self._search
+        for _ in range(min(limit, len(pending))):
+            task = by_id.get(pending.popleft())
+            # 読み込み後に削除・登録し直したタスクは飛ばす
+            if task is not None and task["id"] not in search:
+                search.add(task["id"], task["title"], task["description"], task["created_at"])
+
+    async def build_indexes(self) -> None:
+        """一括読み込みで後回しにした索引を作る（イベントループを長く止めないよう分けて）
+
+        全文検索の索引は _SEARCH_BATCH 件ずつ、並び順の索引は索引を作るごとに制御を返す。
+        """
+        for key in _all_index_keys():
+            if key not in self._indexes:
+                self._index(key)
+                await asyncio.sleep(0)
+        self._slots()
+        while self._unsearched:
+            self._catch_up_search(_SEARCH_BATCH)
+            await asyncio.sleep(0)
+
+    async def create(self, task_data: dict) -> dict:
+        """タスクを作成"""
+        task = new_task(task_data)
+        self._insert(task)
+        self._search.add(task["id"], task["title"], task["description"], task["created_at"])
+        return task
+
+    async def get(self, task_id: UUID) -> dict | None:
+        """タスクを取得"""
+        return self._by_id.get(task_id)
+
+    async def get_many(self, task_ids: Iterable[UUID]) -> dict[UUID, dict]:
+        """複数のタスクを取得"""
+        return {task_id: self._by_id[task_id] for task_id in task_ids if task_id in self._by_id}
+
+    async def list(
+        self,
+        limit: int,
+        offset: int,
+        status: str | Sequence[str] | None,
+        priority: str | Sequence[str] | None,
+        cursor: str | None = None,
+        fields: Sequence[str] | None = None,
+        sort: str = DEFAULT_SORT,
+        descending: bool = False,
+        due_after: datetime | None = None,
+        due_before: datetime | None = None,
+        tags: Sequence[str] | None = None,
+    ) -> tuple[list[dict], int]:
+        """タスク一覧を取得（sort のキー順、descending で降順）"""
+        statuses, priorities, tag_values = (
+            filter_values(status),
+            filter_values(priority),
+            filter_values(tags),
+        )
+        key = (sort, single_value(statuses), single_value(priorities))
+        entries = self._index(key)
+        lo, hi = 0, len(entries)
+        if due_after is not None or due_before is not None:
+            if sort == "due_date":
+                lo, hi = _due_range(entries, due_after, due_before)
+            else:
+                # 期限順の索引から範囲内のタスクを取り出し、指定の並び順に整列する
+                due_entries = self._index(("due_date", *key[1:]))
+                start, end = _due_range(due_entries, due_after, due_before)
+                entries = sorted(
+                    sort_key(self._by_id[entry[-1]], sort) for entry in due_entries[start:end]
+                )
+                lo, hi = 0, len(entries)
+        after = None if cursor is None else comparable_key(decode_cursor(cursor, sort, descending))
+
+        if uses_bitmaps(statuses, priorities, tag_values):
+            conditions = {"status": statuses, "priority": priorities, "tags": tag_values}
+            page, total = self._select(
+                entries,
+                lo,
+                hi,
+                after,
+                offset,
+                limit,
+                sort,
+                descending,
+                conditions,
+                due_after,
+                due_before,
+            )
+        else:
+            total = hi - lo
+            start, end = page_bounds(entries, lo, hi, after, offset, limit, descending)
+            page = entries[start:end]
+            if descending:
+                page.reverse()
+
+        items = [self._by_id[entry[-1]] for entry in page]
+        if fields is not None:
+            keep = {*fields, *SORT_KEYS[sort]}
+            items = [{k: v for k, v in t.items() if k in keep} for t in items]
+        return items, total
+
+    def _select(
+        self,
+        entries: Sequence[tuple],
+        lo: int,
+        hi: int,
+        after: tuple | None,
+        offset: int,
+        limit: int,
+        sort: str,
+        descending: bool,
+        conditions: dict[str, tuple[str, ...] | None],
+        due_after: datetime | None,
+        due_before: datetime | None,
+    ) -> tuple[list[tuple], int]:
+        """ビットマップで絞り込んだページと件数を取得
+
+        entries[lo:hi] は単一の値の条件と期限の範囲で絞り込み済みの索引。
+        """
+        selected = self._slots().select(
+            {field: values for field, values in conditions.items() if values is not None}
+        )
+        slot_of = self._slot_of
+
+        def matches(entry: tuple) -> bool:
+            return slot_of[entry[-1]] in selected
+
+        due_range = due_after is not None or due_before is not None
+        if len(selected) * _SPARSE_RATIO < hi - lo:
+            # 該当が少なければ該当するタスクのみを取り出して整列する
+            by_id, slot_ids = self._by_id, self._slot_ids
+            tasks = (by_id[slot_ids[slot]] for slot in selected)
+            if due_range:
+                tasks = (t for t in tasks if due_in_range(t["due_date"], due_after, due_before))
+            entries = sorted(sort_key(task, sort) for task in tasks)
+        elif due_range:
+            entries = [entry for entry in entries[lo:hi] if matches(entry)]
+        else:
+            # 該当が多ければ索引を並び順に走査し、ページの件数が揃った時点でやめる
+            page = scan_page(entries, lo, hi, after, offset, limit, descending, matches)
+            return page, len(selected)
+        start, end = page_bounds(entries, 0, len(entries), after, offset, limit, descending)
+        page = entries[start:end]
+        if descending:
+            page.reverse()
+        return page, len(entries)
+
+    async def update(self, task_id: UUID, update_data: dict) -> dict | None:
+        """タスクを更新"""
+        task = self._by_id.get(task_id)
+        if task is None:
+            return None
+        updated = {**task, **update_data}
+        if any(task[field] != updated[field] for field in _INDEXED_FIELDS):
+            # 索引のキーが変わる場合のみ入れ替える
+            self._unindex(task)
+            self._insert(updated)
+        else:
+            self._by_id[task_id] = updated
+        if any(task[field] != updated[field] for field in _TEXT_FIELDS):
+            self._search.add(
+                task_id, updated["title"], updated["description"], updated["created_at"]
+            )
+        return updated
+
+    async def delete(self, task_id: UUID) -> bool:
+        """タスクを削除"""
+        task = self._by_id.pop(task_id, None)
+        if task is None:
+            return False
+        self._unindex(task)
+        self._release(task_id)
+        self._search.remove(task_id)
+        return True
+
+    async def create_many(self, tasks_data: list[dict]) -> list[dict]:
+        """タスクを一括作成"""
+        return [await self.create(task_data) for task_data in tasks_data]
+
+    async def update_many(self, updates: list[tuple[UUID, dict]]) -> list[dict | None]:
+        """タスクを一括更新"""
+        return [await self.update(task_id, update_data) for task_id, update_data in updates]
+
+    async def delete_many(self, task_ids: list[UUID]) -> list[bool]:
+        """タスクを一括削除"""
+        removed = [self._by_id.pop(task_id, None) for task_id in task_ids]
+        self._drop_from_indexes([task for task in removed if task is not None])
+        return [task is not None for task in removed]
+
+    async def delete_where(
+        self,
+        status: str | None = None,
+        priority: str | None = None,
+        on_progress: Callable[[int], None] | None = None,
+    ) -> int:
+        """条件に一致するタスクを一括削除し、削除件数を返す"""
+        index = self._indexes.get((DEFAULT_SORT, status, priority))
+        if index is not None:
+            removed = [self._by_id.pop(entry[-1]) for entry in index]
+        else:
+            removed = [
+                task
+                for task in self._by_id.values()
+                if (status is None or task["status"] == status)
+                and (priority is None or task["priority"] == priority)
+            ]
+            for task in removed:
+                del self._by_id[task["id"]]
+        self._drop_from_indexes(removed)
+        if on_progress is not None:
+            on_progress(len(removed))
+        return len(removed)
+
+    def _drop_from_indexes(self, removed: list[dict]) -> None:
+        """ID 辞書から取り除いたタスクを索引からも取り除く"""
+        for task in removed:
+            self._search.remove(task["id"])
+        # 件数が多い場合は1件ずつ二分探索で消すより作り直す方が速い
+        if len(removed) * 8 > len(self._by_id):
+            self._reset_indexes()
+        else:
+            for task in removed:
+                self._unindex(task)
+                self._release(task["id"])
+
+    async def search(self, query: str, limit: int, offset: int = 0) -> tuple[list[dict], int]:
+        """タイトル・説明からタスクを検索（一致度の高い順）
+
+        一括読み込みの後は、全文検索の索引に全てのタスクを登録し終えてから検索する。
+        """
+        while self._unsearched:
+            self._catch_up_search(_SEARCH_BATCH)
+            await asyncio.sleep(0)
+        task_ids, total = self._search.search(query, limit, offset)
+        return [self._by_id[task_id] for task_id in task_ids], total
+
+    async def suggestion_context(
+        self,
+        open_limit: int = SUGGESTION_OPEN_LIMIT,
+        completed_limit: int = SUGGESTION_COMPLETED_LIMIT,
+        now: datetime | None = None,
+    ) -> SuggestionContext:
+        """提案の生成に使うタスクと件数を取得（repository.fetch_suggestion_context）"""
+        return await fetch_suggestion_context(self, open_limit, completed_limit, now)
+
+    async def clear(self) -> None:
+        """全タスクを削除"""
+        await self.delete_where()
@@ -0,0 +1,205 @@
+"""並び順とカーソル（キーセット）ページネーション
+
+タスク一覧は指定された並び順のキー（末尾の id で順序が一意に決まる）で並べ、
+最後に返したタスクのキーを不透明なカーソル文字列としてクライアントに渡す。
+次ページはそのキーより後ろから取得する。
+"""
+
+import base64
+import binascii
+import json
+from bisect import bisect_left, bisect_right
+from collections.abc import Callable, Iterator, Sequence
+from datetime import UTC, datetime
+from itertools import islice
+from operator import itemgetter
+from typing import Any
+from uuid import UUID
+
+DEFAULT_SORT = "created_at"
+
+# 並び順ごとのキーとなるタスクのフィールド
+SORT_KEYS: dict[str, tuple[str, ...]] = {
+    "created_at": ("created_at", "id"),
+    "due_date": ("due_date", "created_at", "id"),
+    "priority": ("priority", "created_at", "id"),
+}
+
+# 優先度の並び順（数値が大きいほど高い）
+PRIORITY_RANK = {"low": 0, "medium": 1, "high": 2}
+
+# scan_page で索引から1回に切り出す件数
+_SCAN_BLOCK = 256
+
+
+class InvalidCursorError(ValueError):
+    """カーソル文字列が不正"""
+
+
+def sort_values(task: dict, sort: str = DEFAULT_SORT) -> tuple:
+    """並び順キーの値を取得（優先度は PRIORITY_RANK の数値）"""
+    return _field_values(task, SORT_KEYS[sort])
+
+
+def _field_values(task: dict, fields: tuple[str, ...]) -> tuple:
+    """フィールドの値を取得（優先度は PRIORITY_RANK の数値）"""
+    return tuple(
+        PRIORITY_RANK[task[field]] if field == "priority" else task[field] for field in fields
+    )
+
+
+def _naive_utc(value: datetime) -> datetime:
+    # タイムゾーン付きの日時は UTC に揃える（Firestore と同様にタイムゾーンなしは UTC とみなす）
+    return value if value.tzinfo is None else value.astimezone(UTC).replace(tzinfo=None)
+
+
+def comparable_key(values: tuple) -> tuple:
+    """並び順キーの値を Python で比較可能な形に変換（null は他の値より前）"""
+    key: list[Any] = []
+    for value in values:
+        if value is None:
+            key.append((0, datetime.min))
+        elif isinstance(value, datetime):
+            key.append((1, _naive_utc(value)))
+        else:
+            key.append(value)
+    return tuple(key)
+
+
+def due_in_range(
+    due_date: datetime | None, due_after: datetime | None, due_before: datetime | None
+) -> bool:
+    """期限が due_after 以上 due_before 未満か（範囲を指定した場合、期限なしは含まない）"""
+    if due_after is None and due_before is None:
+        return True
+    if due_date is None:
+        return False
+    due = _naive_utc(due_date)
+    return (due_after is None or due >= _naive_utc(due_after)) and (
+        due_before is None or due < _naive_utc(due_before)
+    )
+
+
+def sort_key(task: dict, sort: str = DEFAULT_SORT) -> tuple:
+    """タスクの比較用の並び順キーを取得"""
+    return comparable_key(sort_values(task, sort))
+
+
+# 全ての並び順のキーに含まれるフィールドと、そこから並び順ごとのキーを取り出す関数
+_KEY_FIELDS = tuple(dict.fromkeys(field for keys in SORT_KEYS.values() for field in keys))
+_KEY_GETTERS = {
+    sort: itemgetter(*(_KEY_FIELDS.index(field) for field in keys))
+    for sort, keys in SORT_KEYS.items()
+}
+
+
+def sort_keys(task: dict) -> dict[str, tuple]:
+    """全ての並び順の比較用キーを取得（各フィールドの変換は1回で済ませる）"""
+    values = comparable_key(_field_values(task, _KEY_FIELDS))
+    return {sort: getter(values) for sort, getter in _KEY_GETTERS.items()}
+
+
+def page_bounds(
+    entries: Sequence,
+    lo: int,
+    hi: int,
+    after: Any,
+    offset: int,
+    limit: int,
+    descending: bool,
+    key: Callable[[Any], Any] | None = None,
+) -> tuple[int, int]:
+    """昇順の並び entries の [lo, hi) のうち、ページとして返す範囲 [start, end)
+
+    after（カーソルの比較用キー）を指定した場合はその次から、それ以外は offset 件目から
+    limit 件とする。降順では末尾側から数える。
+    """
+    if after is not None:
+        if descending:
+            end = bisect_left(entries, after, lo, hi, key=key)
+            return max(lo, end - limit), end
+        start = bisect_right(entries, after, lo, hi, key=key)
+        return start, min(hi, start + limit)
+    if descending:
+        end = max(lo, hi - offset)
+        return max(lo, end - limit), end
+    start = lo + offset
+    return start, min(hi, start + limit)
+
+
+def scan_page(
+    entries: Sequence,
+    lo: int,
+    hi: int,
+    after: Any,
+    offset: int,
+    limit: int,
+    descending: bool,
+    matches: Callable[[Any], bool],
+    key: Callable[[Any], Any] | None = None,
+) -> list:
+    """昇順の並び entries の [lo, hi) を並び順に走査し、matches を満たす要素のページを取得
+
+    page_bounds と同じ位置から数え、ページの件数が揃った時点で走査をやめる。
+    降順では返すページも降順になる。
+    """
+    if after is not None:
+        if descending:
+            hi = bisect_left(entries, after, lo, hi, key=key)
+        else:
+            lo = bisect_right(entries, after, lo, hi, key=key)
+        offset = 0
+    found = (entry for entry in _iter_range(entries, lo, hi, descending) if matches(entry))
+    return list(islice(found, offset, offset + limit))
+
+
+def _iter_range(entries: Sequence, lo: int, hi: int, descending: bool) -> Iterator:
+    """entries[lo:hi] を並び順に列挙（途中でやめられるよう _SCAN_BLOCK 件ずつ切り出す）"""
+    if descending:
+        for end in range(hi, lo, -_SCAN_BLOCK):
+            yield from reversed(entries[max(lo, end - _SCAN_BLOCK) : end])
+    else:
+        for start in range(lo, hi, _SCAN_BLOCK):
+            yield from entries[start : min(hi, start + _SCAN_BLOCK)]
+
+
+def encode_cursor(task: dict, sort: str = DEFAULT_SORT, descending: bool = False) -> str:
+    """タスクの並び順キーをカーソル文字列にエンコード"""
+    values = [
+        v.isoformat() if isinstance(v, datetime) else str(v) if isinstance(v, UUID) else v
+        for v in sort_values(task, sort)
+    ]
+    payload = json.dumps([sort, descending, *values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str = DEFAULT_SORT, descending: bool = False) -> tuple:
+    """カーソル文字列を並び順キーの値にデコード
+
+    カーソルを発行したときと異なる並び順が指定された場合も InvalidCursorError とする。
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, cursor_descending, *values = json.loads(base64.urlsafe_b64decode(padded))
+        if cursor_sort != sort or cursor_descending != descending:
+            raise InvalidCursorError("カーソルと並び順が一致しません")
+        fields = SORT_KEYS[sort]
+        if len(values) != len(fields):
+            raise ValueError("wrong number of values")
+        return tuple(_decode_value(field, value) for field, value in zip(fields, values))
+    except InvalidCursorError:
+        raise
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise InvalidCursorError("不正なカーソルです") from e
+
+
+def _decode_value(field: str, value: Any) -> Any:
+    if field == "id":
+        return UUID(value)
+    if field == "priority":
+        if value not in PRIORITY_RANK.values():
+            raise ValueError(f"invalid priority rank: {value}")
+        return value
+    if field == "due_date" and value is None:
+        return None
+    return datetime.fromisoformat(value)
@@ -0,0 +1,159 @@
+"""タスクリポジトリのインターフェースと実装間で共通の処理"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable, Iterable, Sequence
+from datetime import UTC, datetime
+from typing import NamedTuple, Protocol
+from uuid import UUID, uuid4
+
+from src.models.task import SuggestionTask, TaskCounts
+from src.services.pagination import DEFAULT_SORT
+
+# suggestion_context で取得する未完了タスク・直近の完了タスクの件数
+SUGGESTION_OPEN_LIMIT = 50
+SUGGESTION_COMPLETED_LIMIT = 10
+# 提案のプロンプトに使うフィールド（並び順キーのフィールドは list が常に返す）
+SUGGESTION_FIELDS = ("title", "description", "due_date", "status", "priority")
+_OPEN_STATUSES = ("pending", "in_progress")
+
+
+class SuggestionContext(NamedTuple):
+    """提案の生成に使うタスクの作業セット"""
+
+    # 未完了・進行中のタスク（期限の近い順、期限なしは作成日時の古い順でその後）
+    open_tasks: list[SuggestionTask]
+    # 直近の完了タスク（作成日時の新しい順）
+    completed: list[SuggestionTask]
+    # 全タスクの件数（取得した件数ではない）
+    counts: TaskCounts
+
+    @property
+    def tasks(self) -> list[SuggestionTask]:
+        return self.open_tasks + self.completed
+
+
+class TaskRepository(Protocol):
+    """タスクリポジトリのインターフェース
+
+    update / delete は存在確認を内部で行い、存在しない場合はそれぞれ None / False を返す。
+    呼び出し側で事前に get する必要はない。*_many は入力と同じ順序で結果を返す
+    （get_many のみ、見つかったタスクを ID をキーとした辞書で返す）。
+    list は sort のキー（pagination.SORT_KEYS）順に並べ、descending で降順にする。
+    fields を指定した場合は、そのフィールドと並び順キーのフィールドのみを返す。
+    status / priority は単一の値または値の一覧（いずれかに一致）、tags は指定したタグの
+    いずれかを持つタスクを対象とする（空の一覧はどのタスクにも一致しない）。
+    due_after / due_before を指定した場合は、期限が due_after 以上 due_before 未満の
+    タスクのみを対象とする（期限なしのタスクは含まない）。
+    search はタイトル・説明の部分一致で検索し、search.match_score の得点の高い順
+    （同点は作成日時の新しい順）に並べたページと一致した件数を返す。
+    suggestion_context は提案の生成に使うタスク（SuggestionContext）を返す。
+    """
+
+    async def create(self, task_data: dict) -> dict: ...
+    async def get(self, task_id: UUID) -> dict | None: ...
+    async def get_many(self, task_ids: Iterable[UUID]) -> dict[UUID, dict]: ...
+    async def list(
+        self,
+        limit: int,
+        offset: int,
+        status: str | Sequence[str] | None,
+        priority: str | Sequence[str] | None,
+        cursor: str | None = None,
+        fields: Sequence[str] | None = None,
+        sort: str = DEFAULT_SORT,
+        descending: bool = False,
+        due_after: datetime | None = None,
+        due_before: datetime | None = None,
+        tags: Sequence[str] | None = None,
+    ) -> tuple[list[dict], int]: ...
+    async def update(self, task_id: UUID, update_data: dict) -> dict | None: ...
+    async def delete(self, task_id: UUID) -> bool: ...
+    async def create_many(self, tasks_data: list[dict]) -> list[dict]: ...
+    async def update_many(self, updates: list[tuple[UUID, dict]]) -> list[dict | None]: ...
+    async def delete_many(self, task_ids: list[UUID]) -> list[bool]: ...
+    async def delete_where(
+        self,
+        status: str | None = None,
+        priority: str | None = None,
+        on_progress: Callable[[int], None] | None = None,
+    ) -> int: ...
+    async def search(self, query: str, limit: int, offset: int = 0) -> tuple[list[dict], int]: ...
+    async def suggestion_context(
+        self,
+        open_limit: int = SUGGESTION_OPEN_LIMIT,
+        completed_limit: int = SUGGESTION_COMPLETED_LIMIT,
+        now: datetime | None = None,
+    ) -> SuggestionContext: ...
+    async def clear(self) -> None: ...
+
+
+def new_task(task_data: dict) -> dict:
+    """作成リクエストの内容からIDと作成日時を付与したタスクを構築"""
+    return {
+        "id": uuid4(),
+        "title": task_data["title"],
+        "description": task_data.get("description", ""),
+        "due_date": task_data.get("due_date"),
+        "status": task_data.get("status", "pending"),
+        "priority": task_data.get("priority", "medium"),
+        "tags": list(task_data.get("tags", [])),
+        "created_at": datetime.now(),
+    }
+
+
+def filter_values(values: str | Iterable[str] | None) -> tuple[str, ...] | None:
+    """一覧の絞り込み条件を、重複のない整列済みの値のタプルに揃える（None は絞り込みなし）"""
+    if values is None:
+        return None
+    if isinstance(values, str):
+        return (values,)
+    return tuple(sorted(set(values)))
+
+
+async def fetch_suggestion_context(
+    repo: TaskRepository,
+    open_limit: int = SUGGESTION_OPEN_LIMIT,
+    completed_limit: int = SUGGESTION_COMPLETED_LIMIT,
+    now: datetime | None = None,
+) -> SuggestionContext:
+    """list の絞り込み・並び順（各実装の索引）で提案に使うタスクと件数を取得
+
+    全件を読まずに、SUGGESTION_FIELDS のみを件数の上限まで取得する。件数は各 list の
+    合計件数を使う。期限なしは期限の昇順で先頭に並ぶため、期限ありと分けて問い合わせる。
+    """
+    now = now or datetime.now(UTC)
+    (
+        (dated, _),
+        (by_due, open_count),
+        (completed, completed_count),
+        (_, overdue_count),
+    ) = await asyncio.gather(
+        repo.list(
+            open_limit,
+            0,
+            _OPEN_STATUSES,
+            None,
+            fields=SUGGESTION_FIELDS,
+            sort="due_date",
+            due_after=datetime.min,
+        ),
+        repo.list(open_limit, 0, _OPEN_STATUSES, None, fields=SUGGESTION_FIELDS, sort="due_date"),
+        repo.list(
+            completed_limit,
+            0,
+            "completed",
+            None,
+            fields=SUGGESTION_FIELDS,
+            descending=True,
+        ),
+        repo.list(1, 0, _OPEN_STATUSES, None, fields=("id",), due_before=now),
+    )
+    undated = [task for task in by_due if task.get("due_date") is None]
+    open_tasks = (dated + undated)[:open_limit]
+    return SuggestionContext(
+        [SuggestionTask.from_dict(task) for task in open_tasks],
+        [SuggestionTask.from_dict(task) for task in completed],
+        TaskCounts(open_count, completed_count, overdue_count),
+    )
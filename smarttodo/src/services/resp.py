@@ -0,0 +1,126 @@
+"""Redis プロトコル（RESP2）の最小限の非同期クライアント
+
+提案キャッシュの共有に使うコマンドを送るだけの実装。1本の接続を使い回し、
+複数のコマンドはパイプラインでまとめて送って往復を1回にする。
+"""
+
+import asyncio
+from collections.abc import Sequence
+from typing import Any
+from urllib.parse import unquote, urlsplit
+
+Command = Sequence[str | bytes | int]
+
+
+class RedisError(Exception):
+    """Redis のエラー応答"""
+
+
+def encode_command(args: Command) -> bytes:
+    """コマンドを RESP の配列にエンコード"""
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+async def read_reply(reader: asyncio.StreamReader) -> Any:
+    """応答を1つ読み込む（エラー応答は RedisError の値として返す）"""
+    line = await reader.readuntil(b"\r\n")
+    kind, body = line[:1], line[1:-2]
+    if kind == b"+":
+        return body.decode()
+    if kind == b"-":
+        return RedisError(body.decode())
+    if kind == b":":
+        return int(body)
+    if kind == b"$":
+        length = int(body)
+        if length < 0:
+            return None
+        return (await reader.readexactly(length + 2))[:-2]
+    if kind == b"*":
+        length = int(body)
+        if length < 0:
+            return None
+        return [await read_reply(reader) for _ in range(length)]
+    raise RedisError(f"不正な応答: {line!r}")
+
+
+class RedisClient:
+    """redis://[:password@]host[:port][/db] に接続するクライアント"""
+
+    def __init__(self, url: str, timeout: float = 1.0) -> None:
+        parts = urlsplit(url)
+        if parts.scheme != "redis":
+            raise ValueError(f"redis:// 以外の URL には対応していません: {url}")
+        self._host = parts.hostname or "localhost"
+        self._port = parts.port or 6379
+        self._password = unquote(parts.password) if parts.password else None
+        self._db = int(parts.path.lstrip("/") or 0)
+        self._timeout = timeout
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._lock = asyncio.Lock()
+
+    async def execute(self, *args: str | bytes | int) -> Any:
+        """コマンドを1つ送って応答を返す"""
+        return (await self.pipeline([args]))[0]
+
+    async def pipeline(self, commands: Sequence[Command]) -> list[Any]:
+        """コマンドをまとめて送り、応答を同じ順序で返す
+
+        応答を読み終える前に抜けた場合（接続・タイムアウトのエラー、キャンセル）は接続を
+        破棄し、次の呼び出しで接続し直す。残った応答を次の呼び出しが読まないようにするため。
+        """
+        async with self._lock:
+            completed = False
+            try:
+                replies = await asyncio.wait_for(self._send(commands), self._timeout)
+                completed = True
+            finally:
+                if not completed:
+                    self._disconnect()
+        for reply in replies:
+            if isinstance(reply, RedisError):
+                raise reply
+        return replies
+
+    async def _send(self, commands: Sequence[Command]) -> list[Any]:
+        if self._writer is None:
+            await self._connect()
+        assert self._reader is not None and self._writer is not None
+        self._writer.write(b"".join(encode_command(args) for args in commands))
+        await self._writer.drain()
+        return [await read_reply(self._reader) for _ in commands]
+
+    async def _connect(self) -> None:
+        self._reader, self._writer = await asyncio.open_connection(self._host, self._port)
+        setup: list[Command] = []
+        if self._password is not None:
+            setup.append(("AUTH", self._password))
+        if self._db:
+            setup.append(("SELECT", self._db))
+        if setup:
+            self._writer.write(b"".join(encode_command(args) for args in setup))
+            for _ in setup:
+                reply = await read_reply(self._reader)
+                if isinstance(reply, RedisError):
+                    self._disconnect()
+                    raise reply
+
+    def _disconnect(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def close(self) -> None:
+        """接続を閉じる"""
+        writer = self._writer
+        self._disconnect()
+        if writer is not None:
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
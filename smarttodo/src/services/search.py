@@ -0,0 +1,218 @@
+"""タスクのタイトル・説明の全文検索（文字 n-gram の転置索引）
+
+テキストは NFKC 正規化と casefold で揃え、空白で区切った語ごとに 1〜3 文字の連続する
+文字列（unigram / bigram / trigram）を索引の単位（グラム）にする。検索語のグラムを全て含む
+タスクを候補とし、正規化したテキストに検索語が部分文字列として含まれるかを確かめてから
+採点する。
+分かち書きをしないため、日本語でも語の途中から一致する。
+
+採点（検索語ごとの合計）: タイトルに含む 2 点、タイトルの先頭に一致 +1 点、説明に含む 1 点。
+いずれかの検索語をタイトル・説明のどちらにも含まないタスクは一致しない。
+"""
+
+from __future__ import annotations
+
+import heapq
+import unicodedata
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from collections.abc import Callable, Collection, Iterable
+from datetime import datetime
+from uuid import UUID
+
+from src.services.pagination import comparable_key
+
+# 削除済みの文書がこの件数を超え、かつ有効な文書数を上回ったら索引を詰め直す
+_COMPACT_MIN_DEAD = 1024
+# 候補の件数のこの倍より長いポスティングは二分探索で照合する
+_BISECT_RATIO = 16
+
+
+def normalize(text: str) -> str:
+    """検索用にテキストを正規化（全角・半角と大文字・小文字の違いを吸収）"""
+    return unicodedata.normalize("NFKC", text).casefold()
+
+
+def query_terms(query: str) -> list[str]:
+    """検索クエリを正規化して空白で区切った検索語の一覧（重複は除く）"""
+    return list(dict.fromkeys(normalize(query).split()))
+
+
+def ngrams(text: str) -> set[str]:
+    """正規化済みのテキストに含まれるグラム（語ごとの unigram・bigram・trigram）"""
+    grams: set[str] = set()
+    for token in text.split():
+        grams.update(token)
+        grams.update(token[i : i + 2] for i in range(len(token) - 1))
+        grams.update(token[i : i + 3] for i in range(len(token) - 2))
+    return grams
+
+
+def text_grams(title: str, description: str) -> set[str]:
+    """タイトル・説明（正規化前）のグラム"""
+    return ngrams(normalize(title)) | ngrams(normalize(description))
+
+
+def term_grams(term: str) -> set[str]:
+    """検索語を含むテキストが必ず持つグラム（3 文字以上は trigram、2 文字以下は検索語そのもの）"""
+    if len(term) <= 2:
+        return {term}
+    return {term[i : i + 3] for i in range(len(term) - 2)}
+
+
+def match_score(terms: Iterable[str], title: str, description: str) -> int:
+    """正規化済みのタイトル・説明に対する検索語の得点（一致しない場合は 0）"""
+    score = 0
+    for term in terms:
+        term_score = 0
+        if term in title:
+            term_score += 3 if title.startswith(term) else 2
+        if term in description:
+            term_score += 1
+        if term_score == 0:
+            return 0
+        score += term_score
+    return score
+
+
+def _contains(posting: array, doc: int) -> bool:
+    i = bisect_left(posting, doc)
+    return i < len(posting) and posting[i] == doc
+
+
+def order_key(task_id: UUID, created_at: datetime) -> tuple:
+    """同点のタスクを並べるキー（大きいほど前: 作成日時の新しい順、同時刻は ID の降順）"""
+    return comparable_key((created_at, task_id.bytes))
+
+
+def rank(
+    matches: Iterable[tuple[int, UUID]],
+    created_at: Callable[[UUID], datetime],
+    limit: int,
+    offset: int = 0,
+) -> list[UUID]:
+    """一致したタスクを得点の高い順（同点は作成日時の新しい順）に並べて切り出す"""
+
+    def key(match: tuple[int, UUID]) -> tuple:
+        score, task_id = match
+        return (score, order_key(task_id, created_at(task_id)))
+
+    return [task_id for _, task_id in heapq.nlargest(offset + limit, matches, key=key)[offset:]]
+
+
+class SearchIndex:
+    """タスクのタイトル・説明の n-gram 転置索引
+
+    タスクごとに追加順の文書番号を振り、グラムごとに文書番号の昇順の配列（ポスティング）を
+    持つ。文書番号は単調増加するため追加は末尾への追記で済む。更新・削除では古い文書を
+    無効にするだけで、ポスティングからは索引を詰め直すときにまとめて取り除く。
+    候補は短いポスティングから順に絞り込み、得点ごとに分けてから必要な件数だけ並べる。
+    """
+
+    def __init__(self) -> None:
+        self.clear()
+
+    def clear(self) -> None:
+        """全ての文書を削除"""
+        # 文書番号ごとの (タスクID, 正規化したタイトル, 正規化した説明)。削除済みは None
+        self._docs: list[tuple[UUID, str, str] | None] = []
+        # 文書番号ごとの同点時の並び順キー（order_key）
+        self._order: list[tuple] = []
+        self._doc_of: dict[UUID, int] = {}
+        self._postings: dict[str, array] = {}
+        self._dead = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_of)
+
+    def __contains__(self, task_id: object) -> bool:
+        return task_id in self._doc_of
+
+    def add(self, task_id: UUID, title: str, description: str, created_at: datetime) -> None:
+        """タスクを索引に追加（既にある場合は置き換える）"""
+        self.remove(task_id)
+        self._append(
+            task_id, normalize(title), normalize(description), order_key(task_id, created_at)
+        )
+
+    def _append(self, task_id: UUID, title: str, description: str, order: tuple) -> None:
+        doc = len(self._docs)
+        self._docs.append((task_id, title, description))
+        self._order.append(order)
+        self._doc_of[task_id] = doc
+        postings = self._postings
+        for gram in ngrams(title) | ngrams(description):
+            posting = postings.get(gram)
+            if posting is None:
+                postings[gram] = array("I", (doc,))
+            else:
+                posting.append(doc)
+
+    def remove(self, task_id: UUID) -> None:
+        """タスクを索引から削除（ない場合は何もしない）"""
+        doc = self._doc_of.pop(task_id, None)
+        if doc is None:
+            return
+        self._docs[doc] = None
+        self._dead += 1
+        if self._dead > _COMPACT_MIN_DEAD and self._dead > len(self._doc_of):
+            self._compact()
+
+    def load(self, tasks: Iterable[dict]) -> None:
+        """タスクから索引を作り直す"""
+        self.clear()
+        for task in tasks:
+            self.add(task["id"], task["title"], task["description"], task["created_at"])
+
+    def _compact(self) -> None:
+        """削除済みの文書を取り除いて文書番号を振り直す"""
+        live = [(entry, order) for entry, order in zip(self._docs, self._order) if entry]
+        self.clear()
+        for (task_id, title, description), order in live:
+            self._append(task_id, title, description, order)
+
+    def _candidates(self, terms: list[str]) -> Collection[int]:
+        """全ての検索語のグラムを含む文書番号（削除済みを含む）"""
+        postings = []
+        for gram in set().union(*(term_grams(term) for term in terms)):
+            posting = self._postings.get(gram)
+            if posting is None:
+                return ()
+            postings.append(posting)
+        postings.sort(key=len)
+        candidates: Collection[int] = postings[0]
+        for posting in postings[1:]:
+            # 候補が十分少なければ二分探索、そうでなければ集合演算でまとめて絞り込む
+            if len(candidates) * _BISECT_RATIO < len(posting):
+                candidates = [doc for doc in candidates if _contains(posting, doc)]
+            else:
+                candidates = set(candidates).intersection(posting)
+        return candidates
+
+    def search(self, query: str, limit: int, offset: int = 0) -> tuple[list[UUID], int]:
+        """クエリの全ての検索語に一致するタスクを得点の高い順に切り出したIDと一致件数"""
+        terms = query_terms(query)
+        if not terms:
+            return [], 0
+        docs = self._docs
+        by_score: defaultdict[int, list[int]] = defaultdict(list)
+        for doc in self._candidates(terms):
+            entry = docs[doc]
+            if entry is not None:
+                score = match_score(terms, entry[1], entry[2])
+                if score:
+                    by_score[score].append(doc)
+
+        # 得点の高い順に、必要な件数に達するまで同点の中を並び順キーで並べる。
+        # 文書番号はおおむね作成順のため、新しい方から渡すとヒープの入れ替えが少ない
+        wanted = offset + limit
+        ranked: list[int] = []
+        for score in sorted(by_score, reverse=True):
+            ranked += heapq.nlargest(
+                wanted - len(ranked), reversed(by_score[score]), key=self._order.__getitem__
+            )
+            if len(ranked) >= wanted:
+                break
+        total = sum(len(matched) for matched in by_score.values())
+        return [docs[doc][0] for doc in ranked[offset:wanted]], total
@@ -0,0 +1,488 @@
+"""インメモリストアのスナップショットと追記ログ
+
+InMemoryTaskRepository の全タスクをバイナリ形式のスナップショットファイルに保存し、
+スナップショット間の変更は追記専用のログに記録する。起動時はスナップショットを mmap で
+読み込んでログを適用し、タスクを一括で読み込む（create() による再投入はしない）。
+InMemoryTaskRepository の索引は起動後に build_indexes() で作る。
+
+ファイル形式（数値はすべてリトルエンディアン）:
+    タスク: _TASK（ID、作成日時・期限のエポックからのマイクロ秒、フラグ、ステータス、優先度、
+        タイトル・説明・タグの文字数）と、タイトル・説明・タグ（改行区切り）を連結した
+        UTF-8 文字列
+    スナップショット: ヘッダ（マジック、件数、文字列部分のバイト数、本体の CRC32）
+        + 全タスクの _TASK の列 + 全タスクの文字列を連結したもの
+    ログ: レコード（ペイロードのバイト数、CRC32）+ ペイロード（操作の種類 + 内容）の列
+
+タグ導入前の形式（STSNAP02、ログの _OP_PUT_V2）も読み込める（タグなしとして復元する）。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gc
+import logging
+import mmap
+import os
+import shutil
+import struct
+import zlib
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from datetime import datetime
+from pathlib import Path
+from uuid import UUID
+
+from src.services.columnar import (
+    PRIORITIES,
+    STATUSES,
+    ColumnarTaskRepository,
+    decode_datetime,
+    encode_datetime,
+)
+from src.services.memory import InMemoryTaskRepository
+from src.services.pagination import DEFAULT_SORT
+from src.services.repository import (
+    SUGGESTION_COMPLETED_LIMIT,
+    SUGGESTION_OPEN_LIMIT,
+    SuggestionContext,
+)
+
+_MAGIC = b"STSNAP03"
+_MAGIC_V2 = b"STSNAP02"
+_HEADER = struct.Struct("<8sQQI")
+_TASK = struct.Struct("<16sqqBBBIII")
+_TASK_V2 = struct.Struct("<16sqqBBBII")
+_LOG_RECORD = struct.Struct("<II")
+
+_DUE_DATE_TZ = 0x1
+_CREATED_AT_TZ = 0x2
+
+# delete_where のフィルタなし
+_ANY = 0xFF
+
+# スナップショットの書き出しで1回にエンコードするタスク数
+_WRITE_BATCH = 4096
+
+_OP_PUT_V2 = 1
+_OP_DELETE = 2
+_OP_DELETE_WHERE = 3
+_OP_PUT = 4
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotCorruptedError(ValueError):
+    """スナップショットファイルが壊れている"""
+
+
+def _encode_task(task: dict) -> tuple[bytes, str]:
+    """タスクを固定長部分と、タイトル・説明・タグを連結した文字列に変換"""
+    created_at, created_tz = encode_datetime(task["created_at"])
+    due_date, due_tz = encode_datetime(task["due_date"])
+    title, description, tags = task["title"], task["description"], "\n".join(task["tags"])
+    flags = (_DUE_DATE_TZ if due_tz else 0) | (_CREATED_AT_TZ if created_tz else 0)
+    record = _TASK.pack(
+        task["id"].bytes,
+        created_at,
+        due_date,
+        flags,
+        STATUSES.index(task["status"]),
+        PRIORITIES.index(task["priority"]),
+        len(title),
+        len(description),
+        len(tags),
+    )
+    return record, title + description + tags
+
+
+def _decode_tasks(records: Iterable[tuple], text: str) -> Iterator[dict]:
+    """固定長部分を unpack した値の列と、タイトル・説明・タグを連結した文字列からタスクを復元"""
+    pos = 0
+    for (
+        raw_id,
+        created_at,
+        due_date,
+        flags,
+        status,
+        priority,
+        title_len,
+        description_len,
+        tags_len,
+    ) in records:
+        title_end = pos + title_len
+        description_end = title_end + description_len
+        end = description_end + tags_len
+        yield {
+            "id": UUID(bytes=raw_id),
+            "title": text[pos:title_end],
+            "description": text[title_end:description_end],
+            "due_date": decode_datetime(due_date, bool(flags & _DUE_DATE_TZ)),
+            "status": STATUSES[status],
+            "priority": PRIORITIES[priority],
+            "tags": text[description_end:end].split("\n") if tags_len else [],
+            "created_at": decode_datetime(created_at, bool(flags & _CREATED_AT_TZ)),
+        }
+        pos = end
+
+
+def write_snapshot(path: Path, tasks: Sequence[dict]) -> None:
+    """タスクをスナップショットファイルに書き出す（一時ファイルに書いてから置き換える）
+
+    固定長部分を先にまとめて書き、タイトル・説明は末尾に1つの UTF-8 文字列として書く。
+    """
+    tmp = path.with_name(path.name + ".tmp")
+    crc = 0
+    texts: list[bytes] = []
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, 0, 0, 0))
+        for i in range(0, len(tasks), _WRITE_BATCH):
+            records, text = zip(*(_encode_task(task) for task in tasks[i : i + _WRITE_BATCH]))
+            chunk = b"".join(records)
+            crc = zlib.crc32(chunk, crc)
+            f.write(chunk)
+            texts.append("".join(text).encode())
+        for chunk in texts:
+            crc = zlib.crc32(chunk, crc)
+            f.write(chunk)
+        f.seek(0)
+        f.write(_HEADER.pack(_MAGIC, len(tasks), sum(map(len, texts)), crc))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def read_snapshot(path: Path) -> dict[UUID, dict]:
+    """スナップショットファイルを mmap で読み込み、ID をキーとした辞書を返す"""
+    if not path.exists():
+        return {}
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        if len(buf) < _HEADER.size:
+            raise SnapshotCorruptedError(f"{path}: ヘッダが不完全です")
+        magic, count, text_size, crc = _HEADER.unpack_from(buf, 0)
+        if magic not in (_MAGIC, _MAGIC_V2):
+            raise SnapshotCorruptedError(f"{path}: スナップショットの形式が不正です")
+        layout = _TASK if magic == _MAGIC else _TASK_V2
+        records_end = _HEADER.size + count * layout.size
+        with memoryview(buf) as view:
+            if len(view) != records_end + text_size or zlib.crc32(view[_HEADER.size :]) != crc:
+                raise SnapshotCorruptedError(f"{path}: チェックサムが一致しません")
+            text = str(view[records_end:], "utf-8")
+            with view[_HEADER.size : records_end] as records:
+                unpacked = layout.iter_unpack(records)
+                if layout is _TASK_V2:
+                    unpacked = ((*values, 0) for values in unpacked)
+                decoded = _decode_tasks(unpacked, text)
+                tasks = {task["id"]: task for task in decoded}
+                del decoded
+    return tasks
+
+
+def _log_record(op: int, body: bytes) -> bytes:
+    payload = bytes((op,)) + body
+    return _LOG_RECORD.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def _put_record(task: dict) -> bytes:
+    record, text = _encode_task(task)
+    return _log_record(_OP_PUT, record + text.encode())
+
+
+def _delete_record(task_id: UUID) -> bytes:
+    return _log_record(_OP_DELETE, task_id.bytes)
+
+
+def _delete_where_record(status: str | None, priority: str | None) -> bytes:
+    return _log_record(
+        _OP_DELETE_WHERE,
+        bytes(
+            (
+                _ANY if status is None else STATUSES.index(status),
+                _ANY if priority is None else PRIORITIES.index(priority),
+            )
+        ),
+    )
+
+
+def _apply(payload: bytes, tasks: dict[UUID, dict]) -> None:
+    """ログの1レコードをタスクの辞書に適用"""
+    op = payload[0]
+    if op in (_OP_PUT, _OP_PUT_V2):
+        layout = _TASK if op == _OP_PUT else _TASK_V2
+        end = 1 + layout.size
+        values = layout.unpack(payload[1:end])
+        if op == _OP_PUT_V2:
+            values += (0,)
+        (task,) = _decode_tasks([values], payload[end:].decode())
+        tasks[task["id"]] = task
+    elif op == _OP_DELETE:
+        tasks.pop(UUID(bytes=payload[1:17]), None)
+    elif op == _OP_DELETE_WHERE:
+        status = None if payload[1] == _ANY else STATUSES[payload[1]]
+        priority = None if payload[2] == _ANY else PRIORITIES[payload[2]]
+        for task_id in [
+            task_id
+            for task_id, task in tasks.items()
+            if (status is None or task["status"] == status)
+            and (priority is None or task["priority"] == priority)
+        ]:
+            del tasks[task_id]
+
+
+def replay_log(path: Path, tasks: dict[UUID, dict]) -> int:
+    """ログをタスクの辞書に適用し、適用したレコード数を返す
+
+    書き込み途中で停止した場合の末尾の不完全なレコード（長さ不足・CRC 不一致）は
+    読み捨ててファイルを切り詰める。
+    """
+    size = path.stat().st_size if path.exists() else 0
+    if size == 0:
+        return 0
+    applied = 0
+    offset = 0
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        while offset + _LOG_RECORD.size <= size:
+            length, crc = _LOG_RECORD.unpack_from(buf, offset)
+            start = offset + _LOG_RECORD.size
+            payload = buf[start : start + length]
+            if length == 0 or len(payload) < length or zlib.crc32(payload) != crc:
+                break
+            _apply(payload, tasks)
+            applied += 1
+            offset = start + length
+    if offset < size:
+        os.truncate(path, offset)
+    return applied
+
+
+class SnapshotTaskRepository:
+    """スナップショットと追記ログでインメモリストアを永続化するラッパー
+
+    読み取りはそのまま委譲し、書き込みは成功したものを結果の状態（PUT / DELETE）として
+    ログに追記する。snapshot() はログを退避してから全タスクを別スレッドで書き出し、
+    書き出し中の変更は新しいログに記録する。InMemoryTaskRepository と
+    ColumnarTaskRepository（load / dump を持つもの）を包める。ログはレコードごとに OS へ書き出す
+    （fsync=True でディスクへの同期も行う）。
+    """
+
+    SNAPSHOT_FILE = "tasks.snapshot"
+    LOG_FILE = "tasks.log"
+    # スナップショットの書き出し中に退避したログ（書き出し完了で削除）
+    ROTATED_LOG_FILE = "tasks.log.1"
+
+    def __init__(
+        self,
+        repo: InMemoryTaskRepository | ColumnarTaskRepository,
+        directory: str | Path,
+        fsync: bool = False,
+    ) -> None:
+        self._repo = repo
+        self._directory = Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._snapshot_path = self._directory / self.SNAPSHOT_FILE
+        self._log_path = self._directory / self.LOG_FILE
+        self._rotated_path = self._directory / self.ROTATED_LOG_FILE
+        self._fsync = fsync
+        self._lock = asyncio.Lock()
+        self.restore()
+        self._log = open(self._log_path, "ab")
+        # 前回のスナップショット以降に追記したレコード数
+        self.pending = 0
+
+    def restore(self) -> int:
+        """スナップショットとログからタスクを復元し、件数を返す
+
+        大量の長寿命オブジェクトを作る間は循環 GC を止める（元の状態に戻す）。
+        """
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            tasks = read_snapshot(self._snapshot_path)
+            replay_log(self._rotated_path, tasks)
+            replay_log(self._log_path, tasks)
+            self._repo.load(tasks.values())
+        finally:
+            if enabled:
+                gc.enable()
+        return len(tasks)
+
+    def _append(self, records: Iterable[bytes]) -> None:
+        data = b"".join(records)
+        if not data:
+            return
+        self._log.write(data)
+        self._log.flush()
+        if self._fsync:
+            os.fsync(self._log.fileno())
+        self.pending += 1
+
+    async def snapshot(self) -> int:
+        """全タスクをスナップショットに書き出してログを空にし、件数を返す"""
+        async with self._lock:
+            tasks = self._repo.dump()
+            self._log.close()
+            if self._rotated_path.exists():
+                # 前回の書き出しが失敗していた場合は退避済みのログの後ろに連結する
+                with open(self._rotated_path, "ab") as rotated, open(self._log_path, "rb") as log:
+                    shutil.copyfileobj(log, rotated)
+                self._log_path.unlink()
+            else:
+                os.replace(self._log_path, self._rotated_path)
+            self._log = open(self._log_path, "ab")
+            self.pending = 0
+            write = asyncio.ensure_future(
+                asyncio.to_thread(write_snapshot, self._snapshot_path, tasks)
+            )
+            cancelled = False
+            while not write.done():
+                try:
+                    await asyncio.shield(write)
+                except asyncio.CancelledError:
+                    # 書き出し中のスレッドは止められないため、書き終えるまでロックを保持する
+                    cancelled = True
+            write.result()
+            self._rotated_path.unlink()
+            if cancelled:
+                raise asyncio.CancelledError
+            return len(tasks)
+
+    async def build_indexes(self) -> None:
+        """復元で後回しにした索引を作る（ColumnarTaskRepository は復元時に作成済み）"""
+        if isinstance(self._repo, InMemoryTaskRepository):
+            await self._repo.build_indexes()
+
+    async def run_periodic(self, interval: float) -> None:
+        """interval 秒ごとに、変更があればスナップショットを書き出す"""
+        while True:
+            await asyncio.sleep(interval)
+            if not self.pending:
+                continue
+            try:
+                await self.snapshot()
+            except OSError as e:
+                # 退避したログは残るため、次回のスナップショットで取り込まれる
+                logger.error(f"スナップショットの書き出しに失敗: {e}")
+
+    async def close(self) -> None:
+        """最終スナップショットを書き出してログを閉じる"""
+        await self.snapshot()
+        self._log.close()
+
+    async def create(self, task_data: dict) -> dict:
+        """タスクを作成"""
+        task = await self._repo.create(task_data)
+        self._append([_put_record(task)])
+        return task
+
+    async def get(self, task_id: UUID) -> dict | None:
+        """タスクを取得"""
+        return await self._repo.get(task_id)
+
+    async def get_many(self, task_ids: Iterable[UUID]) -> dict[UUID, dict]:
+        """複数のタスクを取得"""
+        return await self._repo.get_many(task_ids)
+
+    async def list(
+        self,
+        limit: int,
+        offset: int,
+        status: str | Sequence[str] | None,
+        priority: str | Sequence[str] | None,
+        cursor: str | None = None,
+        fields: Sequence[str] | None = None,
+        sort: str = DEFAULT_SORT,
+        descending: bool = False,
+        due_after: datetime | None = None,
+        due_before: datetime | None = None,
+        tags: Sequence[str] | None = None,
+    ) -> tuple[list[dict], int]:
+        """タスク一覧を取得"""
+        return await self._repo.list(
+            limit,
+            offset,
+            status,
+            priority,
+            cursor,
+            fields,
+            sort,
+            descending,
+            due_after=due_after,
+            due_before=due_before,
+            tags=tags,
+        )
+
+    async def search(self, query: str, limit: int, offset: int = 0) -> tuple[list[dict], int]:
+        """タスクを検索"""
+        return await self._repo.search(query, limit, offset)
+
+    async def suggestion_context(
+        self,
+        open_limit: int = SUGGESTION_OPEN_LIMIT,
+        completed_limit: int = SUGGESTION_COMPLETED_LIMIT,
+        now: datetime | None = None,
+    ) -> SuggestionContext:
+        """提案の生成に使うタスクと件数を取得"""
+        return await self._repo.suggestion_context(open_limit, completed_limit, now)
+
+    async def update(self, task_id: UUID, update_data: dict) -> dict | None:
+        """タスクを更新（更新後の内容をログに記録）"""
+        result = await self._repo.update(task_id, update_data)
+        if result is not None:
+            self._append([_put_record(result)])
+        return result
+
+    async def delete(self, task_id: UUID) -> bool:
+        """タスクを削除"""
+        deleted = await self._repo.delete(task_id)
+        if deleted:
+            self._append([_delete_record(task_id)])
+        return deleted
+
+    async def create_many(self, tasks_data: list[dict]) -> list[dict]:
+        """タスクを一括作成"""
+        tasks = await self._repo.create_many(tasks_data)
+        self._append(_put_record(task) for task in tasks)
+        return tasks
+
+    async def update_many(self, updates: list[tuple[UUID, dict]]) -> list[dict | None]:
+        """タスクを一括更新"""
+        results = await self._repo.update_many(updates)
+        self._append(_put_record(result) for result in results if result is not None)
+        return results
+
+    async def delete_many(self, task_ids: list[UUID]) -> list[bool]:
+        """タスクを一括削除"""
+        results = await self._repo.delete_many(task_ids)
+        self._append(
+            _delete_record(task_id) for task_id, deleted in zip(task_ids, results) if deleted
+        )
+        return results
+
+    async def delete_where(
+        self,
+        status: str | None = None,
+        priority: str | None = None,
+        on_progress: Callable[[int], None] | None = None,
+    ) -> int:
+        """条件に一致するタスクを一括削除（条件をログに記録）"""
+        deleted = await self._repo.delete_where(status, priority, on_progress)
+        if deleted:
+            self._append([_delete_where_record(status, priority)])
+        return deleted
+
+    async def clear(self) -> None:
+        """全タスクを削除"""
+        await self.delete_where()
+
+
+def with_snapshots(
+    repo: InMemoryTaskRepository | ColumnarTaskRepository,
+) -> InMemoryTaskRepository | ColumnarTaskRepository | SnapshotTaskRepository:
+    """環境変数に応じてインメモリストアをスナップショットで永続化
+
+    MEMORY_SNAPSHOT_DIR で保存先を指定すると有効になり、起動時にそこから復元する。
+    MEMORY_SNAPSHOT_FSYNC=true でログの追記ごとにディスクへ同期する。
+    """
+    directory = os.environ.get("MEMORY_SNAPSHOT_DIR")
+    if not directory:
+        return repo
+    fsync = os.environ.get("MEMORY_SNAPSHOT_FSYNC", "").lower() == "true"
+    return SnapshotTaskRepository(repo, directory, fsync=fsync)
@@ -0,0 +1,135 @@
+"""チャンクに分けた整列済みリスト（インメモリストアの並び順の索引）
+
+1本のリストへの挿入・削除は後ろの要素を全て詰め直すため件数に比例する。要素を最大
+_MAX_CHUNK 件のチャンクに分けて持ち、各チャンクの最大値で挿入・削除先のチャンクを二分探索する
+ことで、1件の挿入・削除はチャンク1つ分の詰め直しで済ませる。
+位置による参照はチャンクの先頭位置の累積（書き込み後の最初の参照時に作り直す）を二分探索する。
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import Iterable, Iterator, Sequence
+from itertools import chain
+from typing import Any, overload
+
+# チャンクの件数の目安（これの2倍を超えたら半分に分ける）
+_CHUNK = 1000
+_MAX_CHUNK = 2 * _CHUNK
+
+
+class SortedList(Sequence):
+    """昇順を保つリスト（要素は比較可能で重複しないこと）"""
+
+    def __init__(self, values: Iterable[Any] = ()) -> None:
+        """values は昇順であること"""
+        values = list(values)
+        self._chunks: list[list[Any]] = [
+            values[i : i + _CHUNK] for i in range(0, len(values), _CHUNK)
+        ]
+        self._maxes: list[Any] = [chunk[-1] for chunk in self._chunks]
+        self._len = len(values)
+        # チャンクの先頭位置の累積（None は作り直しが必要）
+        self._starts: list[int] | None = None
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[Any]:
+        return chain.from_iterable(self._chunks)
+
+    def __reversed__(self) -> Iterator[Any]:
+        return chain.from_iterable(reversed(chunk) for chunk in reversed(self._chunks))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, SortedList | list):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __repr__(self) -> str:
+        return f"SortedList({list(self)!r})"
+
+    def add(self, value: Any) -> None:
+        """値を順序を保って挿入"""
+        maxes = self._maxes
+        if not maxes:
+            self._chunks.append([value])
+            maxes.append(value)
+        else:
+            i = bisect_left(maxes, value)
+            if i == len(maxes):
+                i -= 1
+                self._chunks[i].append(value)
+                maxes[i] = value
+            else:
+                insort(self._chunks[i], value)
+            chunk = self._chunks[i]
+            if len(chunk) > _MAX_CHUNK:
+                self._chunks[i : i + 1] = [chunk[:_CHUNK], chunk[_CHUNK:]]
+                maxes[i : i + 1] = [chunk[_CHUNK - 1], chunk[-1]]
+        self._len += 1
+        self._starts = None
+
+    def remove(self, value: Any) -> None:
+        """値を取り除く（ない場合は ValueError）"""
+        i = bisect_left(self._maxes, value)
+        if i < len(self._maxes):
+            chunk = self._chunks[i]
+            j = bisect_left(chunk, value)
+            if chunk[j] == value:
+                del chunk[j]
+                if chunk:
+                    self._maxes[i] = chunk[-1]
+                else:
+                    del self._chunks[i], self._maxes[i]
+                self._len -= 1
+                self._starts = None
+                return
+        raise ValueError(f"{value!r} is not in list")
+
+    def _chunk_starts(self) -> list[int]:
+        if self._starts is None:
+            starts, total = [], 0
+            for chunk in self._chunks:
+                starts.append(total)
+                total += len(chunk)
+            self._starts = starts
+        return self._starts
+
+    def _locate(self, index: int) -> tuple[int, int]:
+        """位置 index の (チャンク, チャンク内の位置)"""
+        starts = self._chunk_starts()
+        i = bisect_right(starts, index) - 1
+        return i, index - starts[i]
+
+    @overload
+    def __getitem__(self, index: int) -> Any: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[Any]: ...
+
+    def __getitem__(self, index: int | slice) -> Any:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._len)
+            if step != 1:
+                return list(self)[index]
+            return self._slice(start, stop)
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("SortedList index out of range")
+        i, j = self._locate(index)
+        return self._chunks[i][j]
+
+    def _slice(self, start: int, stop: int) -> list[Any]:
+        if start >= stop:
+            return []
+        i, j = self._locate(start)
+        result: list[Any] = []
+        remaining = stop - start
+        while remaining > 0:
+            part = self._chunks[i][j : j + remaining]
+            result += part
+            remaining -= len(part)
+            i, j = i + 1, 0
+        return result
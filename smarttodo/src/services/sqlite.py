@@ -0,0 +1,550 @@
+"""SQLite サービス: 単一ノード構成向けのタスクの永続化を担当"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+from collections.abc import Callable, Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime
+from functools import partial
+from typing import Any
+from uuid import UUID
+
+from src.services.pagination import (
+    DEFAULT_SORT,
+    PRIORITY_RANK,
+    SORT_KEYS,
+    decode_cursor,
+)
+from src.services.repository import (
+    SUGGESTION_COMPLETED_LIMIT,
+    SUGGESTION_OPEN_LIMIT,
+    SuggestionContext,
+    fetch_suggestion_context,
+    filter_values,
+    new_task,
+)
+from src.services.search import normalize, query_terms, term_grams, text_grams
+
+_COLUMNS = ("id", "title", "description", "due_date", "status", "priority", "tags", "created_at")
+_DATETIME_FIELDS = ("due_date", "created_at")
+# 期限がタイムゾーン付きだったかどうか（due_date 自体は UTC のタイムゾーンなしで保存する）
+_TZ_COLUMN = "due_date_has_tz"
+_SELECT_COLUMNS = ", ".join((*_COLUMNS, _TZ_COLUMN))
+# IN 句に渡すパラメータ数の上限（SQLITE_MAX_VARIABLE_NUMBER の旧デフォルト 999 未満）
+_MAX_PARAMS = 900
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL,
+    due_date TEXT,
+    due_date_has_tz INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    priority_rank INTEGER NOT NULL,
+    tags TEXT NOT NULL DEFAULT '[]',
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks (created_at, id);
+CREATE INDEX IF NOT EXISTS idx_tasks_due_date ON tasks (due_date, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_tasks_priority_rank ON tasks (priority_rank, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_tasks_status_due_date ON tasks (status, due_date, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks (priority, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_tasks_status_priority ON tasks (status, priority, created_at, id);
+"""
+
+# タグ: tasks にはタグの JSON 配列を持ち、絞り込み用の (タグ, タスク ID) の表をトリガーで同期する
+_TAGS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS task_tags (
+    tag TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    PRIMARY KEY (tag, task_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_task_tags_task_id ON task_tags (task_id);
+CREATE TRIGGER IF NOT EXISTS task_tags_insert AFTER INSERT ON tasks BEGIN
+    INSERT OR IGNORE INTO task_tags (tag, task_id) SELECT value, new.id FROM json_each(new.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS task_tags_update AFTER UPDATE OF tags ON tasks BEGIN
+    DELETE FROM task_tags WHERE task_id = old.id;
+    INSERT OR IGNORE INTO task_tags (tag, task_id) SELECT value, new.id FROM json_each(new.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS task_tags_delete AFTER DELETE ON tasks BEGIN
+    DELETE FROM task_tags WHERE task_id = old.id;
+END;
+"""
+
+# 全文検索: タイトル・説明のグラム（search.ngrams）を空白区切りの語として FTS5 表に保持し、
+# 採点用に正規化したタイトル・説明も持つ。トリガーで tasks と同期する
+# （search_grams / search_normalize は接続ごとに登録する Python 関数）
+_SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS tasks_search
+    USING fts5(grams, title UNINDEXED, description UNINDEXED);
+CREATE TRIGGER IF NOT EXISTS tasks_search_insert AFTER INSERT ON tasks BEGIN
+    INSERT INTO tasks_search (rowid, grams, title, description) VALUES (
+        new.rowid,
+        search_grams(new.title, new.description),
+        search_normalize(new.title),
+        search_normalize(new.description)
+    );
+END;
+CREATE TRIGGER IF NOT EXISTS tasks_search_update AFTER UPDATE OF title, description ON tasks BEGIN
+    UPDATE tasks_search SET
+        grams = search_grams(new.title, new.description),
+        title = search_normalize(new.title),
+        description = search_normalize(new.description)
+    WHERE rowid = new.rowid;
+END;
+CREATE TRIGGER IF NOT EXISTS tasks_search_delete AFTER DELETE ON tasks BEGIN
+    DELETE FROM tasks_search WHERE rowid = old.rowid;
+END;
+"""
+
+_INSERT = (
+    "INSERT INTO tasks (id, title, description, due_date, due_date_has_tz, status, priority,"
+    " priority_rank, tags, created_at) VALUES (:id, :title, :description, :due_date,"
+    " :due_date_has_tz, :status, :priority, :priority_rank, :tags, :created_at)"
+)
+_SELECT_ONE = f"SELECT {_SELECT_COLUMNS} FROM tasks WHERE id = ?"
+
+
+def _encode_datetime(value: datetime | None) -> str | None:
+    """日時を文字列の大小が時刻順と一致する固定長の形式に変換
+
+    タイムゾーン付きは UTC に揃え、タイムゾーンなしは UTC とみなす
+    （pagination.comparable_key と同じ順序）。
+    """
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(UTC).replace(tzinfo=None)
+    # strftime の %Y は 1000 年より前を 4 桁に揃えないため isoformat を使う
+    return value.isoformat(timespec="microseconds")
+
+
+def _encode_value(field: str, value: Any) -> Any:
+    if field in _DATETIME_FIELDS:
+        return _encode_datetime(value)
+    if field == "tags":
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def _encode_fields(data: dict) -> dict:
+    """タスクのフィールドをカラムの値に変換（優先度の順位と期限のタイムゾーン有無を含む）"""
+    values = {field: _encode_value(field, value) for field, value in data.items()}
+    if "priority" in data:
+        values["priority_rank"] = PRIORITY_RANK[data["priority"]]
+    if "due_date" in data:
+        values[_TZ_COLUMN] = int(
+            data["due_date"] is not None and data["due_date"].tzinfo is not None
+        )
+    return values
+
+
+def _order_column(field: str) -> str:
+    """並び順キーのフィールドに対応するカラム"""
+    return "priority_rank" if field == "priority" else field
+
+
+def _keyset_condition(sort: str, values: tuple, descending: bool) -> tuple[str, list[Any]]:
+    """カーソルのキーより後ろ（降順では前）の行に一致する WHERE 句を構築
+
+    NULL は他の値より前に並ぶ（SQLite の ORDER BY と同じ）ため、比較演算子の代わりに
+    IS NULL / IS NOT NULL を使う。
+    """
+    fields = SORT_KEYS[sort]
+    alternatives: list[str] = []
+    params: list[Any] = []
+    for i, field in enumerate(fields):
+        terms: list[str] = []
+        term_params: list[Any] = []
+        for prev_field, prev_value in zip(fields[:i], values[:i]):
+            terms.append(f"{_order_column(prev_field)} IS ?")
+            term_params.append(_encode_value(prev_field, prev_value))
+        column, value = _order_column(field), _encode_value(field, values[i])
+        if value is None:
+            if descending:
+                continue
+            terms.append(f"{column} IS NOT NULL")
+        elif descending:
+            terms.append(f"({column} < ? OR {column} IS NULL)")
+            term_params.append(value)
+        else:
+            terms.append(f"{column} > ?")
+            term_params.append(value)
+        alternatives.append("(" + " AND ".join(terms) + ")")
+        params.extend(term_params)
+    if not alternatives:
+        return "0", []
+    return "(" + " OR ".join(alternatives) + ")", params
+
+
+def _filter_condition(
+    status: str | Sequence[str] | None,
+    priority: str | Sequence[str] | None,
+    due_after: datetime | None = None,
+    due_before: datetime | None = None,
+    tags: Sequence[str] | None = None,
+) -> tuple[list[str], list[Any]]:
+    conditions: list[str] = []
+    params: list[Any] = []
+    for column, values in (
+        ("status", filter_values(status)),
+        ("priority", filter_values(priority)),
+    ):
+        if values is not None:
+            conditions.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+    tag_values = filter_values(tags)
+    if tag_values is not None:
+        conditions.append(
+            "id IN (SELECT task_id FROM task_tags"
+            f" WHERE tag IN ({', '.join('?' * len(tag_values))}))"
+        )
+        params.extend(tag_values)
+    # 期限なし（NULL）は比較が真にならないため範囲指定時は含まれない
+    if due_after is not None:
+        conditions.append("due_date >= ?")
+        params.append(_encode_datetime(due_after))
+    if due_before is not None:
+        conditions.append("due_date < ?")
+        params.append(_encode_datetime(due_before))
+    return conditions, params
+
+
+def _where(conditions: list[str]) -> str:
+    return f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+
+def _fts_grams(title: str, description: str) -> str:
+    """FTS5 表に保持するグラム（空白区切り）
+
+    FTS5 の既定のトークナイザで 1 語になる（英数字・文字のみの）グラムに限る。
+    """
+    return " ".join(gram for gram in text_grams(title, description) if gram.isalnum())
+
+
+def _search_query(terms: list[str]) -> tuple[str, dict[str, Any]]:
+    """検索語ごとの得点（search.match_score と同じ）を列に持つ一致候補のクエリを構築
+
+    候補は検索語のグラムを全て含む行を FTS5 の MATCH で絞り、部分文字列としての一致は
+    正規化したタイトル・説明の instr で確かめる。
+    """
+    columns = []
+    params: dict[str, Any] = {}
+    for i, term in enumerate(terms):
+        columns.append(
+            f"(CASE instr(title, :t{i}) WHEN 0 THEN 0 WHEN 1 THEN 3 ELSE 2 END"
+            f" + (instr(description, :t{i}) > 0)) AS s{i}"
+        )
+        params[f"t{i}"] = term
+    grams = sorted(gram for term in terms for gram in term_grams(term) if gram.isalnum())
+    match = ""
+    if grams:
+        match = " WHERE tasks_search MATCH :match"
+        params["match"] = " ".join(f'"{gram}"' for gram in dict.fromkeys(grams))
+    matched = " AND ".join(f"s{i} > 0" for i in range(len(terms)))
+    sql = (
+        f"WITH scores AS (SELECT rowid, {', '.join(columns)} FROM tasks_search{match}),"
+        f" matches AS (SELECT rowid, {' + '.join(f's{i}' for i in range(len(terms)))} AS score"
+        f" FROM scores WHERE {matched})"
+    )
+    return sql, params
+
+
+class SqliteTaskRepository:
+    """SQLite によるタスクリポジトリImpl（オンプレミス・エッジなど単一ノード構成向け）
+
+    WAL モードで開いた1本の接続を専用の1スレッドで使い、全ての I/O をそのスレッドで
+    実行してイベントループを止めないようにする。SQL は固定の文字列にパラメータを
+    バインドするため、sqlite3 の文キャッシュにより準備済み文が再利用される。
+    全文検索の FTS5 表とタグの表はトリガーで同期するため、書き込みには search_grams /
+    search_normalize 関数を登録した接続（このクラス）を使う。
+    """
+
+    # sqlite3 が接続ごとに保持する準備済み文の数
+    CACHED_STATEMENTS = 256
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        self._conn = self._executor.submit(self._connect).result()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self._path,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=self.CACHED_STATEMENTS,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.create_function("search_grams", 2, _fts_grams, deterministic=True)
+        conn.create_function("search_normalize", 1, normalize, deterministic=True)
+        has_search = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'tasks_search'"
+        ).fetchone()
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(tasks)")}
+        conn.executescript(_SCHEMA)
+        if columns and "tags" not in columns:
+            # タグの導入前に作成したデータベースには列を追加する（既存のタスクはタグなし）
+            conn.execute("ALTER TABLE tasks ADD COLUMN tags TEXT NOT NULL DEFAULT '[]'")
+        conn.executescript(_TAGS_SCHEMA + _SEARCH_SCHEMA)
+        if has_search is None:
+            # 検索表がなかった既存のデータベースは既存の行から索引を作る
+            conn.execute(
+                "INSERT INTO tasks_search (rowid, grams, title, description)"
+                " SELECT rowid, search_grams(title, description), search_normalize(title),"
+                " search_normalize(description) FROM tasks"
+            )
+        return conn
+
+    async def _run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """同期の SQLite 呼び出しを専用スレッドで実行"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+    def close(self) -> None:
+        """接続を閉じる"""
+        self._executor.submit(self._conn.close).result()
+        self._executor.shutdown()
+
+    def _to_row(self, task: dict) -> dict:
+        """タスクをカラムの値に変換"""
+        return _encode_fields({field: task[field] for field in _COLUMNS})
+
+    def _from_row(self, row: sqlite3.Row) -> dict:
+        """行をタスクに変換"""
+        data = dict(row)
+        has_tz = data.pop(_TZ_COLUMN, 0)
+        if "id" in data:
+            data["id"] = UUID(data["id"])
+        for field in _DATETIME_FIELDS:
+            if data.get(field) is not None:
+                data[field] = datetime.fromisoformat(data[field])
+        if has_tz and data.get("due_date") is not None:
+            data["due_date"] = data["due_date"].replace(tzinfo=UTC)
+        if "tags" in data:
+            data["tags"] = json.loads(data["tags"])
+        return data
+
+    def _transaction(self, func: Callable[[sqlite3.Connection], Any]) -> Any:
+        """func を1トランザクションで実行"""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = func(self._conn)
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+        return result
+
+    async def create(self, task_data: dict) -> dict:
+        """タスクを作成"""
+        task = new_task(task_data)
+        await self._run(self._conn.execute, _INSERT, self._to_row(task))
+        return task
+
+    async def get(self, task_id: UUID) -> dict | None:
+        """タスクを取得"""
+        row = await self._run(lambda: self._conn.execute(_SELECT_ONE, (str(task_id),)).fetchone())
+        return None if row is None else self._from_row(row)
+
+    async def get_many(self, task_ids: Iterable[UUID]) -> dict[UUID, dict]:
+        """複数のタスクを IN 句でまとめて取得"""
+        ids = [str(task_id) for task_id in set(task_ids)]
+        if not ids:
+            return {}
+        rows = await self._run(self._select_ids, ids)
+        tasks = (self._from_row(row) for row in rows)
+        return {task["id"]: task for task in tasks}
+
+    def _select_ids(self, ids: list[str]) -> list[sqlite3.Row]:
+        rows: list[sqlite3.Row] = []
+        for i in range(0, len(ids), _MAX_PARAMS):
+            chunk = ids[i : i + _MAX_PARAMS]
+            sql = f"SELECT {_SELECT_COLUMNS} FROM tasks WHERE id IN ({', '.join('?' * len(chunk))})"
+            rows.extend(self._conn.execute(sql, chunk).fetchall())
+        return rows
+
+    async def list(
+        self,
+        limit: int,
+        offset: int,
+        status: str | Sequence[str] | None,
+        priority: str | Sequence[str] | None,
+        cursor: str | None = None,
+        fields: Sequence[str] | None = None,
+        sort: str = DEFAULT_SORT,
+        descending: bool = False,
+        due_after: datetime | None = None,
+        due_before: datetime | None = None,
+        tags: Sequence[str] | None = None,
+    ) -> tuple[list[dict], int]:
+        """タスク一覧を取得（sort のキー順、descending で降順）"""
+        conditions, params = _filter_condition(status, priority, due_after, due_before, tags)
+        count_sql = f"SELECT COUNT(*) FROM tasks{_where(conditions)}"
+        count_params = list(params)
+
+        if cursor is not None:
+            condition, cursor_params = _keyset_condition(
+                sort, decode_cursor(cursor, sort, descending), descending
+            )
+            conditions.append(condition)
+            params.extend(cursor_params)
+            offset = 0
+        if fields is None:
+            columns = _SELECT_COLUMNS
+        else:
+            keep = {*fields, *SORT_KEYS[sort]}
+            columns = ", ".join(
+                [c for c in _COLUMNS if c in keep] + ([_TZ_COLUMN] if "due_date" in keep else [])
+            )
+        direction = " DESC" if descending else ""
+        order = ", ".join(_order_column(field) + direction for field in SORT_KEYS[sort])
+        page_sql = (
+            f"SELECT {columns} FROM tasks{_where(conditions)} ORDER BY {order} LIMIT ? OFFSET ?"
+        )
+        params.extend([limit, offset])
+
+        def query() -> tuple[int, list[sqlite3.Row]]:
+            # 件数とページを同じ読み取りトランザクションで取得して整合させる
+            self._conn.execute("BEGIN")
+            try:
+                total = self._conn.execute(count_sql, count_params).fetchone()[0]
+                rows = self._conn.execute(page_sql, params).fetchall()
+            finally:
+                self._conn.execute("COMMIT")
+            return total, rows
+
+        total, rows = await self._run(query)
+        return [self._from_row(row) for row in rows], total
+
+    async def search(self, query: str, limit: int, offset: int = 0) -> tuple[list[dict], int]:
+        """タイトル・説明からタスクを検索（一致度の高い順）"""
+        terms = query_terms(query)
+        if not terms:
+            return [], 0
+        matches, params = _search_query(terms)
+        # 件数はページと同じ走査でウィンドウ関数により数える
+        page_sql = (
+            f"{matches} SELECT {_SELECT_COLUMNS}, COUNT(*) OVER () AS total FROM matches"
+            " JOIN tasks ON tasks.rowid = matches.rowid"
+            " ORDER BY score DESC, created_at DESC, id DESC LIMIT :limit OFFSET :offset"
+        )
+        count_sql = f"{matches} SELECT COUNT(*) FROM matches"
+
+        def query_sync() -> tuple[int, list[sqlite3.Row]]:
+            self._conn.execute("BEGIN")
+            try:
+                rows = self._conn.execute(
+                    page_sql, {**params, "limit": limit, "offset": offset}
+                ).fetchall()
+                if rows:
+                    total = rows[0]["total"]
+                elif offset:
+                    # 末尾を越えたページは件数を別に数える
+                    total = self._conn.execute(count_sql, params).fetchone()[0]
+                else:
+                    total = 0
+            finally:
+                self._conn.execute("COMMIT")
+            return total, rows
+
+        total, rows = await self._run(query_sync)
+        tasks = []
+        for row in rows:
+            task = self._from_row(row)
+            del task["total"]
+            tasks.append(task)
+        return tasks, total
+
+    async def suggestion_context(
+        self,
+        open_limit: int = SUGGESTION_OPEN_LIMIT,
+        completed_limit: int = SUGGESTION_COMPLETED_LIMIT,
+        now: datetime | None = None,
+    ) -> SuggestionContext:
+        """提案の生成に使うタスクと件数を取得（repository.fetch_suggestion_context）"""
+        return await fetch_suggestion_context(self, open_limit, completed_limit, now)
+
+    async def update(self, task_id: UUID, update_data: dict) -> dict | None:
+        """タスクを更新（RETURNING で更新後の行を1回の文で取得）"""
+        return await self._run(self._update_sync, self._conn, task_id, update_data)
+
+    def _update_sync(
+        self, conn: sqlite3.Connection, task_id: UUID, update_data: dict
+    ) -> dict | None:
+        values = _encode_fields(update_data)
+        if not values:
+            row = conn.execute(_SELECT_ONE, (str(task_id),)).fetchone()
+            return None if row is None else self._from_row(row)
+        assignments = ", ".join(f"{column} = :{column}" for column in values)
+        row = conn.execute(
+            f"UPDATE tasks SET {assignments} WHERE id = :_id RETURNING {_SELECT_COLUMNS}",
+            {**values, "_id": str(task_id)},
+        ).fetchone()
+        return None if row is None else self._from_row(row)
+
+    async def delete(self, task_id: UUID) -> bool:
+        """タスクを削除"""
+        cursor = await self._run(
+            self._conn.execute, "DELETE FROM tasks WHERE id = ?", (str(task_id),)
+        )
+        return cursor.rowcount > 0
+
+    async def create_many(self, tasks_data: list[dict]) -> list[dict]:
+        """タスクを一括作成（1トランザクション）"""
+        tasks = [new_task(task_data) for task_data in tasks_data]
+        rows = [self._to_row(task) for task in tasks]
+        await self._run(self._transaction, lambda conn: conn.executemany(_INSERT, rows))
+        return tasks
+
+    async def update_many(self, updates: list[tuple[UUID, dict]]) -> list[dict | None]:
+        """タスクを一括更新（1トランザクション、同一IDへの複数の更新はリクエスト順に適用）"""
+
+        def update_all(conn: sqlite3.Connection) -> list[dict | None]:
+            return [
+                self._update_sync(conn, task_id, update_data) for task_id, update_data in updates
+            ]
+
+        return await self._run(self._transaction, update_all)
+
+    async def delete_many(self, task_ids: list[UUID]) -> list[bool]:
+        """タスクを一括削除（1トランザクション）"""
+
+        def delete_all(conn: sqlite3.Connection) -> list[bool]:
+            return [
+                conn.execute("DELETE FROM tasks WHERE id = ?", (str(task_id),)).rowcount > 0
+                for task_id in task_ids
+            ]
+
+        return await self._run(self._transaction, delete_all)
+
+    async def delete_where(
+        self,
+        status: str | None = None,
+        priority: str | None = None,
+        on_progress: Callable[[int], None] | None = None,
+    ) -> int:
+        """条件に一致するタスクを1文で一括削除し、削除件数を返す"""
+        conditions, params = _filter_condition(status, priority)
+        cursor = await self._run(
+            self._conn.execute, f"DELETE FROM tasks{_where(conditions)}", params
+        )
+        if on_progress is not None:
+            on_progress(cursor.rowcount)
+        return cursor.rowcount
+
+    async def clear(self) -> None:
+        """全タスクを削除"""
+        await self.delete_where()
@@ -0,0 +1,343 @@
+"""CachedTaskRepository のテスト"""
+
+from datetime import datetime
+
+import pytest
+
+from src.services.cache import CachedTaskRepository
+from src.services.firestore import (
+    InMemoryTaskRepository,
+    get_repository,
+    reset_repository,
+)
+
+
+class CountingRepository(InMemoryTaskRepository):
+    """元のリポジトリへの読み取り回数を数える"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.reads = 0
+
+    async def get(self, task_id):
+        self.reads += 1
+        return await super().get(task_id)
+
+    async def get_many(self, task_ids):
+        self.reads += 1
+        return await super().get_many(task_ids)
+
+    async def list(self, *args, **kwargs):
+        self.reads += 1
+        return await super().list(*args, **kwargs)
+
+
+@pytest.fixture
+def inner() -> CountingRepository:
+    return CountingRepository()
+
+
+@pytest.fixture
+def repo(inner) -> CachedTaskRepository:
+    return CachedTaskRepository(inner, maxsize=16, ttl=60)
+
+
+async def _list(repo, status=None, priority=None):
+    return await repo.list(limit=10, offset=0, status=status, priority=priority)
+
+
+class TestReadThrough:
+    async def test_get_cached(self, repo, inner):
+        """2回目の get はキャッシュから返す"""
+        task = await repo.create({"title": "タスク"})
+
+        await repo.get(task["id"])
+        fetched = await repo.get(task["id"])
+
+        assert fetched["title"] == "タスク"
+        assert inner.reads == 1
+        assert (repo.stats.hits, repo.stats.misses) == (1, 1)
+
+    async def test_list_cached(self, repo, inner):
+        """同じ引数の list はキャッシュから返す"""
+        await repo.create({"title": "タスク"})
+
+        await _list(repo)
+        items, total = await _list(repo)
+
+        assert total == 1
+        assert inner.reads == 1
+
+    async def test_get_many_fetches_only_missing(self, repo, inner):
+        """キャッシュにないIDだけを元のリポジトリから取得する"""
+        first = await repo.create({"title": "タスク1"})
+        second = await repo.create({"title": "タスク2"})
+        await repo.get(first["id"])
+        inner.reads = 0
+
+        found = await repo.get_many([first["id"], second["id"]])
+
+        assert set(found) == {first["id"], second["id"]}
+        assert inner.reads == 1
+        await repo.get(second["id"])
+        assert inner.reads == 1
+
+    async def test_lru_eviction(self, inner):
+        """容量を超えると追い出しを数える"""
+        repo = CachedTaskRepository(inner, maxsize=2, ttl=60)
+        tasks = [await repo.create({"title": f"タスク{i}"}) for i in range(3)]
+
+        for task in tasks:
+            await repo.get(task["id"])
+
+        assert repo.stats.evictions == 1
+
+    async def test_ttl_expiry(self, inner):
+        """有効期限切れのエントリは再取得する"""
+        now = [0.0]
+        repo = CachedTaskRepository(inner, maxsize=16, ttl=60, timer=lambda: now[0])
+        task = await repo.create({"title": "タスク"})
+        await repo.get(task["id"])
+
+        now[0] = 61.0
+        await repo.get(task["id"])
+
+        assert inner.reads == 2
+        assert repo.stats.evictions == 1
+
+
+class TestInvalidation:
+    async def test_create_invalidates_matching_lists_only(self, repo, inner):
+        """作成したタスクを含み得る一覧のみ無効化する"""
+        await _list(repo, status="pending")
+        await _list(repo, status="completed")
+        inner.reads = 0
+
+        await repo.create({"title": "タスク", "status": "pending"})
+        items, _ = await _list(repo, status="pending")
+        await _list(repo, status="completed")
+
+        assert [t["title"] for t in items] == ["タスク"]
+        assert inner.reads == 1
+
+    async def test_update_refreshes_get_and_pages(self, repo, inner):
+        """更新したタスクの get と、それを含むページを無効化する"""
+        task = await repo.create({"title": "タスク"})
+        other = await repo.create({"title": "別", "status": "completed"})
+        await repo.get(task["id"])
+        await repo.get(other["id"])
+        await _list(repo, status="pending")
+        await _list(repo, status="completed")
+        inner.reads = 0
+
+        await repo.update(task["id"], {"title": "更新"})
+
+        assert (await repo.get(task["id"]))["title"] == "更新"
+        items, _ = await _list(repo, status="pending")
+        assert items[0]["title"] == "更新"
+        await repo.get(other["id"])
+        await _list(repo, status="completed")
+        assert inner.reads == 2
+
+    async def test_sort_key_change_invalidates_sorted_lists(self, repo):
+        """期限の更新で期限順の一覧を無効化する"""
+        task = await repo.create({"title": "タスク"})
+        await repo.create({"title": "別"})
+        await repo.list(limit=1, offset=0, status=None, priority=None, sort="due_date")
+
+        await repo.update(task["id"], {"due_date": datetime(2026, 1, 1)})
+        items, _ = await repo.list(limit=1, offset=0, status=None, priority=None, sort="due_date")
+
+        assert items[0]["title"] == "別"
+
+    async def test_status_change_moves_task_between_lists(self, repo):
+        """ステータス変更で変更前・後の一覧を無効化する"""
+        task = await repo.create({"title": "タスク"})
+        await _list(repo, status="pending")
+        await _list(repo, status="completed")
+
+        await repo.update(task["id"], {"status": "completed"})
+
+        assert (await _list(repo, status="pending"))[1] == 0
+        assert (await _list(repo, status="completed"))[1] == 1
+
+    async def test_delete_invalidates(self, repo):
+        """削除したタスクは get / list に現れない"""
+        task = await repo.create({"title": "タスク"})
+        await repo.get(task["id"])
+        await _list(repo)
+
+        assert await repo.delete(task["id"]) is True
+
+        assert await repo.get(task["id"]) is None
+        assert (await _list(repo))[1] == 0
+
+    async def test_delete_not_found_keeps_lists(self, repo, inner):
+        """存在しないタスクの削除では何も無効化しない"""
+        task = await repo.create({"title": "タスク"})
+        await _list(repo)
+        await repo.delete(task["id"])
+        await _list(repo)
+        inner.reads = 0
+
+        assert await repo.delete(task["id"]) is False
+        await _list(repo)
+
+        assert inner.reads == 0
+
+    async def test_delete_where_keeps_disjoint_lists(self, repo, inner):
+        """削除条件と重ならない一覧は残す"""
+        await repo.create({"title": "完了", "status": "completed"})
+        await repo.create({"title": "未完了"})
+        await _list(repo, status="pending")
+        await _list(repo, status="completed")
+        inner.reads = 0
+
+        assert await repo.delete_where(status="completed") == 1
+
+        assert (await _list(repo, status="completed"))[1] == 0
+        assert (await _list(repo, status="pending"))[1] == 1
+        assert inner.reads == 1
+
+    async def test_batch_writes_invalidate(self, repo):
+        """一括操作でもキャッシュを無効化する"""
+        created = await repo.create_many([{"title": "タスク1"}, {"title": "タスク2"}])
+        await _list(repo)
+        await repo.get(created[0]["id"])
+
+        await repo.update_many([(created[0]["id"], {"title": "更新"})])
+        assert (await repo.get(created[0]["id"]))["title"] == "更新"
+
+        await repo.delete_many([created[1]["id"]])
+        assert (await _list(repo))[1] == 1
+
+    async def test_write_during_read_is_not_cached(self, repo, inner):
+        """読み取り中に書き込みがあった場合、古い結果をキャッシュしない"""
+        task = await repo.create({"title": "タスク"})
+        original_get = InMemoryTaskRepository.get
+
+        async def get_then_update(task_id):
+            result = await original_get(inner, task_id)
+            await repo.update(task_id, {"title": "更新"})
+            return result
+
+        inner.get = get_then_update
+        await repo.get(task["id"])
+        del inner.get
+
+        assert (await repo.get(task["id"]))["title"] == "更新"
+
+
+class TestMultiValueFilterInvalidation:
+    async def test_list_key_ignores_value_order(self, repo, inner):
+        """値の順序・重複が異なるだけの条件は同じキャッシュを使う"""
+        await _list(repo, status=["pending", "completed"])
+        await _list(repo, status=["completed", "pending", "pending"])
+
+        assert inner.reads == 1
+
+    async def test_create_invalidates_matching_tag_lists_only(self, repo, inner):
+        """作成したタスクのタグを含む条件の一覧のみ無効化する"""
+        await repo.list(10, 0, None, None, tags=["work", "home"])
+        await repo.list(10, 0, None, None, tags=["later"])
+        inner.reads = 0
+
+        await repo.create({"title": "タスク", "tags": ["home"]})
+        items, _ = await repo.list(10, 0, None, None, tags=["work", "home"])
+        await repo.list(10, 0, None, None, tags=["later"])
+
+        assert [t["title"] for t in items] == ["タスク"]
+        assert inner.reads == 1
+
+    async def test_tag_change_moves_task_between_lists(self, repo):
+        """タグの変更で変更前・後のタグの一覧を無効化する"""
+        task = await repo.create({"title": "タスク", "tags": ["work"]})
+        await repo.list(10, 0, ["pending", "in_progress"], None, tags=["work"])
+        await repo.list(10, 0, None, None, tags=["home"])
+
+        await repo.update(task["id"], {"tags": ["home"]})
+
+        assert (await repo.list(10, 0, ["pending", "in_progress"], None, tags=["work"]))[1] == 0
+        assert (await repo.list(10, 0, None, None, tags=["home"]))[1] == 1
+
+    async def test_delete_where_keeps_disjoint_multi_value_lists(self, repo, inner):
+        """削除条件の値を含まない複数値の条件の一覧は残す"""
+        await repo.create({"title": "完了", "status": "completed"})
+        await repo.create({"title": "未完了"})
+        await _list(repo, status=["pending", "in_progress"])
+        await _list(repo, status=["completed", "in_progress"])
+        inner.reads = 0
+
+        await repo.delete_where(status="completed")
+
+        assert (await _list(repo, status=["pending", "in_progress"]))[1] == 1
+        assert (await _list(repo, status=["completed", "in_progress"]))[1] == 0
+        assert inner.reads == 1
+
+
+class TestDueRangeInvalidation:
+    async def _due_list(self, repo):
+        return await repo.list(
+            limit=10,
+            offset=0,
+            status=None,
+            priority=None,
+            due_after=datetime(2026, 1, 1),
+            due_before=datetime(2026, 2, 1),
+        )
+
+    async def test_create_outside_range_keeps_list(self, repo, inner):
+        """期限が範囲外のタスクの作成では期限の範囲指定の一覧を無効化しない"""
+        await self._due_list(repo)
+        inner.reads = 0
+
+        await repo.create({"title": "範囲外", "due_date": datetime(2026, 3, 1)})
+        await repo.create({"title": "期限なし"})
+        await self._due_list(repo)
+
+        assert inner.reads == 0
+
+    async def test_due_date_change_into_range(self, repo):
+        """期限の変更で範囲に入ったタスクが一覧に現れる"""
+        task = await repo.create({"title": "タスク", "due_date": datetime(2026, 3, 1)})
+        assert (await self._due_list(repo))[1] == 0
+
+        await repo.update(task["id"], {"due_date": datetime(2026, 1, 15)})
+
+        items, total = await self._due_list(repo)
+        assert total == 1
+        assert items[0]["id"] == task["id"]
+
+    async def test_due_date_change_out_of_range(self, repo):
+        """期限の変更で範囲外に出たタスクは一覧から消える"""
+        task = await repo.create({"title": "タスク", "due_date": datetime(2026, 1, 15)})
+        assert (await self._due_list(repo))[1] == 1
+
+        await repo.update(task["id"], {"due_date": datetime(2026, 3, 1)})
+
+        assert (await self._due_list(repo))[1] == 0
+
+
+class TestConfiguration:
+    def test_enabled_by_env(self, monkeypatch):
+        """USE_TASK_CACHE=true で get_repository がキャッシュ付きになる"""
+        monkeypatch.delenv("USE_FIRESTORE", raising=False)
+        monkeypatch.setenv("USE_TASK_CACHE", "true")
+        monkeypatch.setenv("TASK_CACHE_MAXSIZE", "8")
+        reset_repository()
+        try:
+            repo = get_repository()
+            assert isinstance(repo, CachedTaskRepository)
+            assert repo._tasks.maxsize == 8
+        finally:
+            reset_repository()
+
+    def test_disabled_by_default(self, monkeypatch):
+        """デフォルトではキャッシュしない"""
+        monkeypatch.delenv("USE_FIRESTORE", raising=False)
+        monkeypatch.delenv("USE_TASK_CACHE", raising=False)
+        reset_repository()
+        try:
+            assert isinstance(get_repository(), InMemoryTaskRepository)
+        finally:
+            reset_repository()
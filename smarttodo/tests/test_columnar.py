@@ -0,0 +1,201 @@
+"""ColumnarTaskRepository のテスト"""
+
+import random
+from datetime import UTC, datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+
+from src.services.columnar import ColumnarTaskRepository, decode_datetime, encode_datetime
+from src.services.firestore import get_repository, reset_repository
+from src.services.memory import InMemoryTaskRepository
+from src.services.pagination import SORT_KEYS, encode_cursor
+from src.services.snapshot import SnapshotTaskRepository
+
+# 一覧の条件: (ステータス, 優先度[, 期限の下限, 期限の上限])
+_CONDITIONS = [
+    (None, None),
+    ("pending", None),
+    (None, "high"),
+    ("done", None),
+    (None, None, datetime(2026, 1, 2), datetime(2026, 1, 4)),
+    ("pending", None, datetime(2026, 1, 2, tzinfo=UTC), None),
+    (None, "high", None, datetime(2026, 1, 3)),
+    (["pending", "in_progress"], None),
+    (None, ["low", "high"], datetime(2026, 1, 2), None),
+]
+
+
+def _task_data(i: int, rng: random.Random) -> dict:
+    base = datetime(2026, 1, 1)
+    return {
+        "title": f"タスク{i}",
+        "status": rng.choice(["pending", "in_progress", "completed"]),
+        "priority": rng.choice(["low", "medium", "high"]),
+        # 期限なし・タイムゾーン付き・同じ期限を混在させる
+        "due_date": rng.choice(
+            [
+                None,
+                base + timedelta(days=rng.randrange(5)),
+                (base + timedelta(days=rng.randrange(5))).replace(tzinfo=UTC),
+            ]
+        ),
+    }
+
+
+async def _apply_random_ops(repos: list, rng: random.Random, count: int) -> None:
+    """同じ操作を各リポジトリに適用する（ID と作成日時は最初の実装の結果に揃える）"""
+    ids = []
+    for i in range(count):
+        op = rng.random()
+        if op < 0.6 or not ids:
+            task = await repos[0].create(_task_data(i, rng))
+            for repo in repos[1:]:
+                repo._insert(dict(task))
+            ids.append(task["id"])
+        elif op < 0.85:
+            task_id = rng.choice(ids)
+            data = _task_data(i, rng)
+            update = dict(rng.sample(sorted(data.items()), rng.randint(1, len(data))))
+            for repo in repos:
+                await repo.update(task_id, update)
+        else:
+            task_id = ids.pop(rng.randrange(len(ids)))
+            for repo in repos:
+                assert await repo.delete(task_id)
+
+
+class TestColumnarCodec:
+    def test_datetime_round_trip(self):
+        """日時はマイクロ秒単位で往復し、タイムゾーン付きは UTC で返す"""
+        naive = datetime(2026, 3, 1, 9, 30, 0, 123456)
+        jst = datetime(2026, 3, 1, 9, tzinfo=timezone(timedelta(hours=9)))
+
+        assert decode_datetime(*encode_datetime(naive)) == naive
+        assert decode_datetime(*encode_datetime(None)) is None
+        restored = decode_datetime(*encode_datetime(jst))
+        assert restored == jst
+        assert restored.utcoffset() == timedelta(0)
+
+    def test_no_date_sorts_first(self):
+        """期限なしはどの日時よりも前に並ぶ"""
+        assert encode_datetime(None)[0] < encode_datetime(datetime(1, 1, 1))[0]
+
+
+class TestColumnarList:
+    @pytest.mark.parametrize("sort", list(SORT_KEYS))
+    @pytest.mark.parametrize("descending", [False, True])
+    async def test_matches_memory_repository(self, sort, descending):
+        """作成・更新・削除の後も並び順・フィルタ・カーソルの結果がインメモリ実装と一致する"""
+        memory, columnar = InMemoryTaskRepository(), ColumnarTaskRepository()
+        await _apply_random_ops([memory, columnar], random.Random(0), 150)
+
+        for status, priority, *due_range in _CONDITIONS:
+            due = dict(zip(("due_after", "due_before"), due_range))
+            expected, expected_total = await memory.list(
+                200, 0, status, priority, sort=sort, descending=descending, **due
+            )
+            offset_page, _ = await columnar.list(
+                5, 3, status, priority, sort=sort, descending=descending, **due
+            )
+            assert [t["id"] for t in offset_page] == [t["id"] for t in expected[3:8]]
+
+            pages = []
+            cursor = None
+            while True:
+                page, total = await columnar.list(
+                    7, 0, status, priority, cursor=cursor, sort=sort, descending=descending, **due
+                )
+                assert total == expected_total
+                if not page:
+                    break
+                pages.extend(page)
+                cursor = encode_cursor(page[-1], sort, descending)
+
+            assert [t["id"] for t in pages] == [t["id"] for t in expected]
+
+    async def test_fields_projection(self):
+        """指定フィールドと並び順キーのみを返す"""
+        repo = ColumnarTaskRepository()
+        await repo.create({"title": "タスク"})
+
+        items, _ = await repo.list(10, 0, None, None, fields=["title"], sort="priority")
+
+        assert set(items[0]) == {"title", "priority", "created_at", "id"}
+
+
+class TestColumnarWrites:
+    async def test_get_returns_created(self):
+        """作成したタスクをそのまま取得できる"""
+        repo = ColumnarTaskRepository()
+        created = await repo.create(
+            {"title": "タスク", "description": "説明", "due_date": datetime(2026, 1, 1)}
+        )
+
+        assert await repo.get(created["id"]) == created
+        assert await repo.get(uuid4()) is None
+
+    async def test_deleted_rows_are_reused(self):
+        """削除した行は次の作成で再利用する"""
+        repo = ColumnarTaskRepository()
+        first = await repo.create({"title": "削除"})
+        await repo.delete(first["id"])
+
+        second = await repo.create({"title": "追加"})
+
+        assert len(repo._titles) == 1
+        assert await repo.get(first["id"]) is None
+        assert (await repo.get(second["id"]))["title"] == "追加"
+
+    async def test_delete_many_duplicates(self):
+        """重複したIDは最初の1件のみ True"""
+        repo = ColumnarTaskRepository()
+        created = await repo.create({"title": "タスク"})
+
+        assert await repo.delete_many([created["id"], created["id"], uuid4()]) == [
+            True,
+            False,
+            False,
+        ]
+
+    async def test_delete_where(self):
+        """条件に一致するタスクのみ削除し、索引も更新する"""
+        repo = ColumnarTaskRepository()
+        await repo.create_many([{"title": "完了", "status": "completed"}, {"title": "未完了"}] * 3)
+
+        assert await repo.delete_where(status="completed") == 3
+
+        items, total = await repo.list(10, 0, None, None)
+        assert total == 3
+        assert {t["title"] for t in items} == {"未完了"}
+        assert (await repo.list(10, 0, "completed", None))[1] == 0
+
+
+class TestColumnarSnapshot:
+    async def test_snapshot_round_trip(self, tmp_path):
+        """スナップショットで永続化し、列指向のまま復元できる"""
+        repo = SnapshotTaskRepository(ColumnarTaskRepository(), tmp_path)
+        await repo.create_many([_task_data(i, random.Random(i)) for i in range(20)])
+        await repo.close()
+
+        restored = SnapshotTaskRepository(ColumnarTaskRepository(), tmp_path)
+
+        assert restored._repo.dump() == repo._repo.dump()
+        for sort in SORT_KEYS:
+            expected = await repo.list(30, 0, None, "high", sort=sort)
+            assert await restored.list(30, 0, None, "high", sort=sort) == expected
+
+
+class TestColumnarConfiguration:
+    def test_selected_by_env(self, monkeypatch):
+        """MEMORY_STORAGE=columnar で get_repository が列指向の実装を使う"""
+        monkeypatch.delenv("USE_FIRESTORE", raising=False)
+        monkeypatch.delenv("SQLITE_DB_PATH", raising=False)
+        monkeypatch.delenv("USE_TASK_CACHE", raising=False)
+        monkeypatch.delenv("MEMORY_SNAPSHOT_DIR", raising=False)
+        monkeypatch.setenv("MEMORY_STORAGE", "columnar")
+        reset_repository()
+        try:
+            assert isinstance(get_repository(), ColumnarTaskRepository)
+        finally:
+            reset_repository()
@@ -0,0 +1,259 @@
+"""複数条件の絞り込み（bitmap.BitmapIndex と各リポジトリの list の IN・タグ条件）のテスト"""
+
+import random
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from src.services import columnar, memory
+from src.services.bitmap import BitmapIndex
+from src.services.columnar import ColumnarTaskRepository
+from src.services.fake_firestore import FakeFirestoreClient
+from src.services.firestore import FilterTooComplexError, FirestoreTaskRepository
+from src.services.memory import InMemoryTaskRepository
+from src.services.pagination import SORT_KEYS, due_in_range, encode_cursor, sort_key
+from src.services.sqlite import SqliteTaskRepository
+
+_BASE = datetime(2026, 1, 1)
+_TAGS = ["work", "home", "urgent", "later", "仕事"]
+# (ステータス, 優先度, タグ, 期限の下限, 期限の上限)
+_CONDITIONS = [
+    (["pending", "in_progress"], None, None, None, None),
+    (None, ["low", "high"], None, None, None),
+    (["pending", "in_progress"], "high", ["work"], None, None),
+    (None, None, ["home", "仕事"], None, None),
+    ("completed", ["medium"], ["urgent", "later"], None, None),
+    (
+        ["pending", "completed"],
+        None,
+        ["work"],
+        _BASE + timedelta(days=1),
+        _BASE + timedelta(days=4),
+    ),
+    (None, None, ["存在しない"], None, None),
+    ([], None, None, None, None),
+    (None, None, [], None, None),
+]
+
+
+def _task_data(i: int, rng: random.Random) -> dict:
+    return {
+        "title": f"タスク{i}",
+        "status": rng.choice(["pending", "in_progress", "completed"]),
+        "priority": rng.choice(["low", "medium", "high"]),
+        "tags": rng.sample(_TAGS, rng.randint(0, 3)),
+        "due_date": rng.choice(
+            [
+                None,
+                _BASE + timedelta(days=rng.randrange(6)),
+                (_BASE + timedelta(days=rng.randrange(6))).replace(tzinfo=UTC),
+            ]
+        ),
+    }
+
+
+def _expected(tasks, status, priority, tags, due_after, due_before, sort, descending):
+    """全タスクを内包表記で絞り込んで整列した結果"""
+    statuses = [status] if isinstance(status, str) else status
+    priorities = [priority] if isinstance(priority, str) else priority
+    return sorted(
+        (
+            t
+            for t in tasks
+            if (statuses is None or t["status"] in statuses)
+            and (priorities is None or t["priority"] in priorities)
+            and (tags is None or set(tags) & set(t["tags"]))
+            and due_in_range(t["due_date"], due_after, due_before)
+        ),
+        key=lambda t: sort_key(t, sort),
+        reverse=descending,
+    )
+
+
+@pytest.fixture(params=["memory", "columnar", "sqlite", "firestore"])
+async def repo(request, tmp_path):
+    if request.param == "sqlite":
+        repo = SqliteTaskRepository(str(tmp_path / "tasks.db"))
+    elif request.param == "firestore":
+        repo = FirestoreTaskRepository(db=FakeFirestoreClient(), max_workers=2)
+    elif request.param == "columnar":
+        repo = ColumnarTaskRepository()
+    else:
+        repo = InMemoryTaskRepository()
+    yield repo
+    if isinstance(repo, SqliteTaskRepository):
+        repo.close()
+
+
+class TestBitmapIndex:
+    def test_or_within_and_across_fields(self):
+        """同じフィールドの値は OR、フィールド間は AND で絞り込む"""
+        index = BitmapIndex()
+        index.add(0, [("status", "pending"), ("tags", "work")])
+        index.add(1, [("status", "done"), ("tags", "work"), ("tags", "home")])
+        index.add(2, [("status", "pending"), ("tags", "home")])
+        index.add(9, [("status", "done")])
+
+        assert list(index.select({"status": ["pending", "done"]})) == [0, 1, 2, 9]
+        assert list(index.select({"status": ["pending"], "tags": ["work", "home"]})) == [0, 2]
+        assert list(index.select({"status": ["done"], "tags": ["work"]})) == [1]
+        assert len(index.select({"tags": ["none"]})) == 0
+        assert len(index.select({"status": []})) == 0
+
+    def test_sparse_values_promoted_to_bitmap(self):
+        """該当の多い値は集合からビットマップに切り替え、結果は変わらない"""
+        index = BitmapIndex()
+        for position in range(5000):
+            keys = [("parity", str(position % 2))]
+            if position in (3000, 4000, 4999):
+                keys.append(("rare", "x"))
+            index.add(position, keys)
+
+        assert isinstance(index._bitmaps[("parity", "0")], bytearray)
+        assert isinstance(index._bitmaps[("rare", "x")], set)
+        selected = index.select({"parity": ["0"], "rare": ["x"]})
+        assert list(selected) == [3000, 4000]
+        assert 4000 in selected and 4999 not in selected and 10**6 not in selected
+
+    def test_remove(self):
+        """取り除いた位置は一致しない（空になった集合は消す）"""
+        index = BitmapIndex()
+        for position in range(100):
+            index.add(position, [("status", "pending")])
+        index.add(50, [("tags", "work")])
+        index.remove(50, [("status", "pending"), ("tags", "work")])
+        index.remove(500, [("status", "pending")])
+
+        assert len(index.select({"status": ["pending"]})) == 99
+        assert 50 not in index.select({"status": ["pending"]})
+        assert ("tags", "work") not in index._bitmaps
+
+
+class TestRepositoryFilters:
+    @pytest.mark.parametrize("sort", list(SORT_KEYS))
+    @pytest.mark.parametrize("descending", [False, True])
+    async def test_matches_list_comprehension(self, repo, sort, descending):
+        """IN・タグ条件の件数・オフセット・カーソルのページが内包表記の結果と一致する"""
+        rng = random.Random(0)
+        await repo.create_many([_task_data(i, rng) for i in range(80)])
+        tasks, _ = await repo.list(200, 0, None, None)
+
+        for status, priority, tags, due_after, due_before in _CONDITIONS:
+            expected = _expected(
+                tasks, status, priority, tags, due_after, due_before, sort, descending
+            )
+            args = {"sort": sort, "descending": descending, "tags": tags}
+            args.update(due_after=due_after, due_before=due_before)
+            page, total = await repo.list(5, 3, status, priority, **args)
+            assert total == len(expected), (status, priority, tags)
+            assert [t["id"] for t in page] == [t["id"] for t in expected[3:8]]
+
+            pages = []
+            cursor = None
+            while len(pages) < len(expected):
+                page, _ = await repo.list(7, 0, status, priority, cursor=cursor, **args)
+                assert page
+                pages.extend(page)
+                cursor = encode_cursor(page[-1], sort, descending)
+            assert [t["id"] for t in pages] == [t["id"] for t in expected]
+
+    async def test_reflects_writes(self, repo):
+        """タグ・ステータスの変更と削除が絞り込みに反映される"""
+        first = await repo.create({"title": "資料", "tags": ["work"]})
+        second = await repo.create({"title": "買い物", "tags": ["home"], "status": "in_progress"})
+        third = await repo.create({"title": "掃除", "tags": ["home", "work"]})
+
+        await repo.update(first["id"], {"tags": ["home"]})
+        await repo.update(second["id"], {"status": "completed"})
+        await repo.delete(third["id"])
+
+        items, total = await repo.list(10, 0, ["pending", "in_progress"], None, tags=["home"])
+        assert total == 1
+        assert items[0]["id"] == first["id"]
+        assert items[0]["tags"] == ["home"]
+        assert (await repo.list(10, 0, None, None, tags=["work"]))[1] == 0
+        assert (await repo.get(second["id"]))["tags"] == ["home"]
+
+    async def test_due_dates_before_year_1000(self, repo):
+        """1000 年より前の期限も取得でき、期限順・期限の範囲で他の日時と正しく比べる"""
+        ancient = await repo.create({"title": "古い期限", "due_date": datetime(999, 1, 1)})
+        recent = await repo.create({"title": "新しい期限", "due_date": _BASE})
+        await repo.create({"title": "期限なし"})
+
+        assert (await repo.get(ancient["id"]))["due_date"] == datetime(999, 1, 1)
+        items, _ = await repo.list(10, 0, None, None, sort="due_date", due_after=datetime.min)
+        assert [t["id"] for t in items] == [ancient["id"], recent["id"]]
+        items, total = await repo.list(10, 0, None, None, due_before=datetime(1000, 1, 1))
+        assert total == 1
+        assert items[0]["id"] == ancient["id"]
+
+
+@pytest.mark.parametrize("module", [memory, columnar])
+@pytest.mark.parametrize("ratio", [0, 1_000_000])
+async def test_scan_and_sort_strategies(monkeypatch, module, ratio):
+    """索引の走査・該当タスクの整列のどちらで取り出してもページは同じ"""
+    monkeypatch.setattr(module, "_SPARSE_RATIO", ratio)
+    rng = random.Random(1)
+    repo = ColumnarTaskRepository() if module is columnar else InMemoryTaskRepository()
+    await repo.create_many([_task_data(i, rng) for i in range(120)])
+    for task_id in [t["id"] for t in (await repo.list(200, 0, None, None))[0]][::7]:
+        await repo.delete(task_id)
+    await repo.create_many([_task_data(i, rng) for i in range(120, 130)])
+    tasks, _ = await repo.list(200, 0, None, None)
+
+    for descending in (False, True):
+        for status, priority, tags, due_after, due_before in _CONDITIONS:
+            expected = _expected(
+                tasks, status, priority, tags, due_after, due_before, "due_date", descending
+            )
+            page, total = await repo.list(
+                6,
+                2,
+                status,
+                priority,
+                sort="due_date",
+                descending=descending,
+                due_after=due_after,
+                due_before=due_before,
+                tags=tags,
+            )
+            assert total == len(expected)
+            assert [t["id"] for t in page] == [t["id"] for t in expected[2:8]]
+
+
+async def test_load_rebuilds_bitmaps():
+    """一括読み込み・大量削除の後もタグで絞り込める"""
+    rng = random.Random(2)
+    source = InMemoryTaskRepository()
+    await source.create_many([_task_data(i, rng) for i in range(60)])
+    for repo in (InMemoryTaskRepository(), ColumnarTaskRepository()):
+        repo.load(source.dump())
+        await repo.delete_where(status="completed")
+        tasks, _ = await repo.list(200, 0, None, None)
+
+        items, total = await repo.list(100, 0, None, None, tags=["work", "home"])
+
+        expected = _expected(tasks, None, None, ["work", "home"], None, None, "created_at", False)
+        assert total == len(expected)
+        assert [t["id"] for t in items] == [t["id"] for t in expected]
+
+
+class TestFirestoreFilters:
+    async def test_rejects_too_many_disjunctions(self):
+        """in / array_contains_any の組み合わせが上限を超える条件はエラー"""
+        repo = FirestoreTaskRepository(db=FakeFirestoreClient(), max_workers=2)
+
+        with pytest.raises(FilterTooComplexError):
+            await repo.list(
+                10, 0, ["pending", "completed"], ["low", "high"], tags=[f"t{i}" for i in range(8)]
+            )
+
+    async def test_empty_condition_skips_query(self):
+        """空の条件はクエリを発行せずに 0 件"""
+        db = FakeFirestoreClient()
+        repo = FirestoreTaskRepository(db=db, max_workers=2)
+        await repo.create({"title": "タスク"})
+        db.stats.reset()
+
+        assert await repo.list(10, 0, [], None) == ([], 0)
+        assert db.stats.rpcs == 0
@@ -0,0 +1,528 @@
+"""FirestoreTaskRepository のテスト（Firestore への接続は行わない）"""
+
+import asyncio
+import time
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+
+from src.services.fake_firestore import FakeFirestoreClient
+from src.services.firestore import FirestoreTaskRepository
+from src.services.pagination import encode_cursor
+
+
+class TestFirestoreNonBlocking:
+    async def test_create_and_get(self):
+        """FakeFirestoreClient 経由で作成・取得できる"""
+        repo = FirestoreTaskRepository(db=FakeFirestoreClient(), max_workers=2)
+
+        created = await repo.create({"title": "タスク"})
+        fetched = await repo.get(created["id"])
+
+        assert fetched is not None
+        assert fetched["id"] == created["id"]
+        assert fetched["title"] == "タスク"
+        assert await repo.get(uuid4()) is None
+
+    async def test_parallel_gets_overlap(self):
+        """並列の get が逐次実行されない"""
+        latency = 0.1
+        repo = FirestoreTaskRepository(db=FakeFirestoreClient(latency=latency), max_workers=8)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(repo.get(uuid4()) for _ in range(8)))
+        elapsed = time.perf_counter() - start
+
+        # 逐次実行なら 0.8 秒かかる
+        assert elapsed < latency * 4
+
+    async def test_event_loop_not_blocked(self):
+        """RPC 実行中もイベントループが他の処理を進められる"""
+        repo = FirestoreTaskRepository(db=FakeFirestoreClient(latency=0.2), max_workers=1)
+
+        get_task = asyncio.create_task(repo.get(uuid4()))
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        assert time.perf_counter() - start < 0.1
+        await get_task
+
+    async def test_max_workers_bounds_concurrency(self):
+        """max_workers で同時実行数が制限される"""
+        latency = 0.05
+        repo = FirestoreTaskRepository(db=FakeFirestoreClient(latency=latency), max_workers=1)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(repo.get(uuid4()) for _ in range(4)))
+        elapsed = time.perf_counter() - start
+
+        assert elapsed >= latency * 4
+
+    @pytest.mark.parametrize("env_value,expected", [("4", 4), (None, 32)])
+    def test_max_workers_from_env(self, monkeypatch, env_value, expected):
+        """FIRESTORE_MAX_WORKERS 環境変数でスレッド数を設定できる"""
+        if env_value is None:
+            monkeypatch.delenv("FIRESTORE_MAX_WORKERS", raising=False)
+        else:
+            monkeypatch.setenv("FIRESTORE_MAX_WORKERS", env_value)
+
+        repo = FirestoreTaskRepository(db=FakeFirestoreClient())
+
+        assert repo._executor._max_workers == expected
+
+
+class TestFakeFirestoreClient:
+    def test_selected_by_env(self, monkeypatch):
+        """USE_FAKE_FIRESTORE=true でスタンドインを遅延設定付きで使う"""
+        monkeypatch.setenv("USE_FAKE_FIRESTORE", "true")
+        monkeypatch.setenv("FAKE_FIRESTORE_LATENCY_MS", "5")
+        monkeypatch.setenv("FAKE_FIRESTORE_JITTER_MS", "2")
+
+        repo = FirestoreTaskRepository(max_workers=1)
+
+        assert isinstance(repo._db, FakeFirestoreClient)
+        assert repo._db.latency == 0.005
+        assert repo._db.jitter == 0.002
+
+    def test_jitter_adds_bounded_delay(self):
+        """jitter 分の遅延が RPC ごとに加わる"""
+        db = FakeFirestoreClient(latency=0.01, jitter=0.01, seed=1)
+        ref = db.collection("tasks").document("x")
+
+        elapsed = []
+        for _ in range(5):
+            start = time.perf_counter()
+            ref.get()
+            elapsed.append(time.perf_counter() - start)
+
+        assert min(elapsed) >= 0.01
+        assert max(elapsed) < 0.05
+
+
+class TestFirestoreList:
+    @pytest.fixture
+    async def repo(self):
+        repo = FirestoreTaskRepository(db=FakeFirestoreClient(), max_workers=2)
+        for i in range(30):
+            await repo.create(
+                {
+                    "title": f"タスク{i}",
+                    "status": "completed" if i % 3 == 0 else "pending",
+                    "priority": "high" if i % 2 == 0 else "low",
+                }
+            )
+        return repo
+
+    async def test_list_total_and_page(self, repo):
+        """totalは全件数、itemsはlimit件"""
+        items, total = await repo.list(limit=5, offset=0, status=None, priority=None)
+
+        assert total == 30
+        assert len(items) == 5
+
+    async def test_list_with_filters(self, repo):
+        """フィルタ付きのtotalとページ"""
+        items, total = await repo.list(limit=100, offset=0, status="completed", priority="high")
+
+        assert total == 5
+        assert len(items) == 5
+        assert all(t["status"] == "completed" and t["priority"] == "high" for t in items)
+
+    async def test_list_offset_pages_do_not_overlap(self, repo):
+        """offsetで取得したページが重複しない"""
+        page1, _ = await repo.list(limit=10, offset=0, status=None, priority=None)
+        page2, _ = await repo.list(limit=10, offset=10, status=None, priority=None)
+
+        ids1 = {t["id"] for t in page1}
+        ids2 = {t["id"] for t in page2}
+        assert len(ids1 | ids2) == 20
+
+    async def test_list_reads_only_requested_page(self, repo):
+        """全件をストリームせず、ページ分＋集約分のみ読み取る"""
+        repo._db.stats.reset()
+
+        await repo.list(limit=5, offset=0, status=None, priority=None)
+
+        assert repo._db.stats.rpcs == 2
+        assert repo._db.stats.reads == 5 + 1
+
+    async def test_list_fields_projection(self, repo):
+        """fields 指定時は select で指定フィールドと並び順キーのみ取得する"""
+        items, total = await repo.list(
+            limit=3, offset=0, status=None, priority=None, fields=["title"]
+        )
+
+        assert total == 30
+        assert [set(t) for t in items] == [{"id", "title", "created_at"}] * 3
+        assert items[0]["title"] == "タスク0"
+
+    async def test_list_cursor_pages(self, repo):
+        """カーソルで (created_at, id) 順に続きを取得できる"""
+        page1, total = await repo.list(limit=7, offset=0, status="pending", priority=None)
+        cursor = encode_cursor(page1[-1])
+        page2, _ = await repo.list(
+            limit=20, offset=0, status="pending", priority=None, cursor=cursor
+        )
+
+        assert total == 20
+        assert len(page2) == 13
+        assert [t["title"] for t in page1 + page2] == [
+            f"タスク{i}" for i in range(30) if i % 3 != 0
+        ]
+
+    async def test_list_cursor_does_not_read_skipped_documents(self, repo):
+        """カーソル指定時は読み飛ばし分が課金されない"""
+        page1, _ = await repo.list(limit=25, offset=0, status=None, priority=None)
+        repo._db.stats.reset()
+
+        await repo.list(
+            limit=5, offset=0, status=None, priority=None, cursor=encode_cursor(page1[-1])
+        )
+
+        assert repo._db.stats.reads == 5 + 1
+
+
+class TestFirestoreGetMany:
+    async def test_get_many_single_rpc(self):
+        """get_all による1回の RPC で存在するタスクのみ返す"""
+        repo = FirestoreTaskRepository(db=FakeFirestoreClient(), max_workers=2)
+        tasks = [await repo.create({"title": f"タスク{i}"}) for i in range(3)]
+        missing = uuid4()
+        repo._db.stats.reset()
+
+        found = await repo.get_many([tasks[0]["id"], missing, tasks[2]["id"], tasks[0]["id"]])
+
+        assert set(found) == {tasks[0]["id"], tasks[2]["id"]}
+        assert found[tasks[2]["id"]]["title"] == "タスク2"
+        assert repo._db.stats.rpcs == 1
+
+    async def test_get_many_empty(self):
+        """空の入力では RPC を発行しない"""
+        repo = FirestoreTaskRepository(db=FakeFirestoreClient(), max_workers=2)
+
+        assert await repo.get_many([]) == {}
+        assert repo._db.stats.rpcs == 0
+
+
+class TestFirestoreSort:
+    @pytest.fixture
+    async def repo(self):
+        repo = FirestoreTaskRepository(db=FakeFirestoreClient(), max_workers=2)
+        for i, priority in enumerate(["low", "high", "medium", "high", "low"]):
+            await repo.create(
+                {
+                    "title": f"タスク{i}",
+                    "priority": priority,
+                    "due_date": None if i == 2 else datetime(2026, 1, 10 - i),
+                }
+            )
+        return repo
+
+    async def test_sort_priority_desc(self, repo):
+        """priority_rank の降順（同順位は作成日時の降順）"""
+        items, _ = await repo.list(
+            limit=10, offset=0, status=None, priority=None, sort="priority", descending=True
+        )
+
+        assert [t["title"] for t in items] == [
+            "タスク3",
+            "タスク1",
+            "タスク2",
+            "タスク4",
+            "タスク0",
+        ]
+        assert all("priority_rank" not in t for t in items)
+
+    async def test_sort_due_date_cursor(self, repo):
+        """期限順でカーソルをたどっても重複・欠落しない"""
+        page1, _ = await repo.list(limit=2, offset=0, status=None, priority=None, sort="due_date")
+        page2, _ = await repo.list(
+            limit=10,
+            offset=0,
+            status=None,
+            priority=None,
+            sort="due_date",
+            cursor=encode_cursor(page1[-1], "due_date"),
+        )
+
+        titles = [t["title"] for t in page1 + page2]
+        assert titles == ["タスク2", "タスク4", "タスク3", "タスク1", "タスク0"]
+
+    async def test_due_range(self, repo):
+        """期限の範囲フィルタ（下限を含み上限を含まない、期限なしは除く）"""
+        items, total = await repo.list(
+            limit=10,
+            offset=0,
+            status=None,
+            priority=None,
+            sort="priority",
+            due_after=datetime(2026, 1, 7),
+            due_before=datetime(2026, 1, 10),
+        )
+
+        assert total == 2
+        assert [t["title"] for t in items] == ["タスク1", "タスク3"]
+
+    async def test_due_range_counts_only_window(self, repo):
+        """件数の集約も範囲フィルタを適用する"""
+        _, total = await repo.list(
+            limit=1, offset=0, status=None, priority=None, due_before=datetime(2026, 1, 8)
+        )
+
+        assert total == 2
+
+    async def test_update_priority_keeps_rank_in_sync(self, repo):
+        """優先度の更新で priority_rank も更新される"""
+        items, _ = await repo.list(limit=2, offset=0, status=None, priority=None)
+        await repo.update(items[0]["id"], {"priority": "high"})
+        await repo.update_many([(items[1]["id"], {"priority": "medium"})])
+
+        store = repo._db._collections[FirestoreTaskRepository.COLLECTION]
+        assert store[str(items[0]["id"])]["priority_rank"] == 2
+        assert store[str(items[1]["id"])]["priority_rank"] == 1
+
+    async def test_backfill_priority_rank(self, repo):
+        """priority_rank のない既存ドキュメントに付与する"""
+        store = repo._db._collections[FirestoreTaskRepository.COLLECTION]
+        for data in store.values():
+            del data["priority_rank"]
+        missing, _ = await repo.list(
+            limit=10, offset=0, status=None, priority=None, sort="priority"
+        )
+        assert missing == []
+
+        assert await repo.backfill_priority_rank() == 5
+        items, _ = await repo.list(limit=10, offset=0, status=None, priority=None, sort="priority")
+        assert len(items) == 5
+        assert await repo.backfill_priority_rank() == 0
+
+
+class TestFirestoreSearch:
+    @pytest.fixture
+    async def repo(self):
+        repo = FirestoreTaskRepository(db=FakeFirestoreClient(), max_workers=2)
+        for i in range(10):
+            await repo.create({"title": f"タスク{i}", "description": "会議" if i < 3 else ""})
+        return repo
+
+    async def test_candidates_from_rarest_gram(self, repo):
+        """件数の最も少ないグラムの一致ドキュメントのみ読み取る"""
+        repo._db.stats.reset()
+
+        items, total = await repo.search("タスク 会議", 10)
+
+        assert total == 3
+        assert [t["title"] for t in items] == ["タスク2", "タスク1", "タスク0"]
+        # グラム 2 つ（タスク・会議）の件数の集約（各 1 読み取り）、候補 3 件、結果 3 件
+        assert repo._db.stats.reads == 2 + 3 + 3
+
+    async def test_update_keeps_grams_in_sync(self, repo):
+        """タイトル・説明の更新で search_grams も更新される"""
+        items, _ = await repo.search("タスク9", 1)
+        await repo.update(items[0]["id"], {"description": "打ち合わせ"})
+        await repo.update_many([(items[0]["id"], {"title": "資料"})])
+
+        assert [t["title"] for t in (await repo.search("打ち合わせ", 10))[0]] == ["資料"]
+        assert (await repo.search("タスク9", 10))[1] == 0
+
+    async def test_backfill_search_grams(self, repo):
+        """search_grams のない既存ドキュメントに付与する"""
+        store = repo._db._collections[FirestoreTaskRepository.COLLECTION]
+        for data in store.values():
+            del data["search_grams"]
+        assert await repo.search("タスク", 10) == ([], 0)
+
+        assert await repo.backfill_search_grams() == 10
+        assert (await repo.search("タスク", 10))[1] == 10
+        assert await repo.backfill_search_grams() == 0
+
+
+class TestFirestoreWrites:
+    @pytest.fixture
+    def repo(self):
+        return FirestoreTaskRepository(db=FakeFirestoreClient(), max_workers=2)
+
+    async def test_update_returns_merged_document(self, repo):
+        """更新後のドキュメントを再取得せずに返す"""
+        created = await repo.create({"title": "タスク", "description": "説明"})
+        repo._db.stats.reset()
+
+        updated = await repo.update(created["id"], {"status": "completed"})
+
+        assert updated["status"] == "completed"
+        assert updated["description"] == "説明"
+        assert updated["id"] == created["id"]
+        # begin / get / commit の1トランザクション
+        assert repo._db.stats.rpcs == 3
+        assert (await repo.get(created["id"]))["status"] == "completed"
+
+    async def test_update_not_found(self, repo):
+        """存在しないタスクの更新は None を返し、ドキュメントを作らない"""
+        task_id = uuid4()
+
+        assert await repo.update(task_id, {"title": "更新"}) is None
+        assert await repo.get(task_id) is None
+
+    async def test_update_empty_data(self, repo):
+        """空の更新データでは現在の内容を返す"""
+        created = await repo.create({"title": "タスク"})
+
+        updated = await repo.update(created["id"], {})
+
+        assert updated["title"] == "タスク"
+
+    async def test_delete_single_rpc(self, repo):
+        """削除は存在を前提条件とした1回の書き込み"""
+        created = await repo.create({"title": "タスク"})
+        repo._db.stats.reset()
+
+        assert await repo.delete(created["id"]) is True
+        assert repo._db.stats.rpcs == 1
+        assert await repo.get(created["id"]) is None
+
+    async def test_delete_not_found(self, repo):
+        """存在しないタスクの削除は False"""
+        repo._db.stats.reset()
+
+        assert await repo.delete(uuid4()) is False
+        assert repo._db.stats.rpcs == 1
+
+
+class TestFirestoreDeleteWhere:
+    @pytest.fixture
+    async def repo(self):
+        repo = FirestoreTaskRepository(db=FakeFirestoreClient(max_batch_writes=500), max_workers=4)
+        await asyncio.gather(
+            *(
+                repo.create({"title": f"タスク{i}", "status": "completed" if i % 4 else "pending"})
+                for i in range(1200)
+            )
+        )
+        return repo
+
+    async def test_delete_where_uses_batches(self, repo):
+        """500件ずつのバッチでコミットし、進捗を通知する"""
+        progress: list[int] = []
+        repo._db.stats.reset()
+
+        deleted = await repo.delete_where(on_progress=progress.append)
+
+        assert deleted == 1200
+        assert sorted(progress) == [500, 1000, 1200]
+        # 名前のみのクエリ1回 + バッチコミット3回
+        assert repo._db.stats.rpcs == 4
+        assert (await repo.list(limit=10, offset=0, status=None, priority=None))[1] == 0
+
+    async def test_delete_where_with_filter(self, repo):
+        """条件に一致するタスクのみ削除する"""
+        deleted = await repo.delete_where(status="pending")
+
+        assert deleted == 300
+        _, total = await repo.list(limit=10, offset=0, status=None, priority=None)
+        assert total == 900
+
+    async def test_clear(self, repo):
+        """clear で全件削除する"""
+        await repo.clear()
+
+        _, total = await repo.list(limit=10, offset=0, status=None, priority=None)
+        assert total == 0
+
+
+class TestFirestoreBatchWrites:
+    @pytest.fixture
+    def repo(self):
+        return FirestoreTaskRepository(db=FakeFirestoreClient(), max_workers=4)
+
+    async def test_create_many_commits_in_chunks(self, repo):
+        """500件ずつのバッチで作成する"""
+        created = await repo.create_many([{"title": f"タスク{i}"} for i in range(1200)])
+
+        assert len(created) == 1200
+        assert repo._db.stats.rpcs == 3
+        _, total = await repo.list(limit=1, offset=0, status=None, priority=None)
+        assert total == 1200
+
+    async def test_update_many(self, repo):
+        """存在するタスクのみ更新し、同一IDへの更新は順に適用する"""
+        task = await repo.create({"title": "タスク", "description": "説明"})
+        missing = uuid4()
+        repo._db.stats.reset()
+
+        results = await repo.update_many(
+            [
+                (task["id"], {"title": "更新1"}),
+                (missing, {"title": "更新"}),
+                (task["id"], {"status": "completed"}),
+            ]
+        )
+
+        assert results[1] is None
+        assert results[2]["title"] == "更新1"
+        assert results[2]["status"] == "completed"
+        assert results[2]["description"] == "説明"
+        # get_all 1回 + バッチコミット1回
+        assert repo._db.stats.rpcs == 2
+        stored = await repo.get(task["id"])
+        assert stored["title"] == "更新1"
+        assert stored["status"] == "completed"
+
+    async def test_delete_many(self, repo):
+        """存在するタスクのみ削除し、重複IDは2回目以降 False"""
+        task = await repo.create({"title": "タスク"})
+
+        results = await repo.delete_many([task["id"], uuid4(), task["id"]])
+
+        assert results == [True, False, False]
+        assert await repo.get(task["id"]) is None
+
+    @staticmethod
+    def _after_read(monkeypatch, repo, write):
+        """get_all の読み取り直後（バッチのコミット前）に write を実行する"""
+        read = repo._snapshots
+
+        async def read_then_write(task_ids):
+            snapshots = await read(task_ids)
+            await write()
+            return snapshots
+
+        monkeypatch.setattr(repo, "_snapshots", read_then_write)
+
+    async def test_update_many_task_deleted_after_read(self, repo, monkeypatch):
+        """読み取り後に削除されたタスクは None とし、他のタスクの更新は適用する"""
+        repo.BATCH_SIZE = 2
+        tasks = await repo.create_many([{"title": f"タスク{i}"} for i in range(5)])
+        self._after_read(monkeypatch, repo, lambda: repo.delete(tasks[3]["id"]))
+
+        results = await repo.update_many([(task["id"], {"status": "completed"}) for task in tasks])
+
+        assert [r is not None for r in results] == [True, True, True, False, True]
+        assert all(r["status"] == "completed" for r in results if r is not None)
+        assert await repo.get(tasks[3]["id"]) is None
+        for task in tasks[:3] + tasks[4:]:
+            assert (await repo.get(task["id"]))["status"] == "completed"
+
+    async def test_update_many_task_changed_after_read(self, repo, monkeypatch):
+        """読み取り後に変更されたタスクは最新の内容に更新を適用し、検索用のグラムも作り直す"""
+        task = await repo.create({"title": "資料作成", "description": ""})
+        self._after_read(monkeypatch, repo, lambda: repo.update(task["id"], {"title": "会議準備"}))
+
+        (result,) = await repo.update_many([(task["id"], {"description": "議事録"})])
+
+        assert (result["title"], result["description"]) == ("会議準備", "議事録")
+        stored = await repo.get(task["id"])
+        assert (stored["title"], stored["description"]) == ("会議準備", "議事録")
+        assert (await repo.search("会議", 10))[1] == 1
+        assert (await repo.search("資料", 10))[1] == 0
+
+    async def test_delete_many_task_deleted_after_read(self, repo, monkeypatch):
+        """読み取り後に削除されたタスクは False とし、他のタスクは削除する"""
+        repo.BATCH_SIZE = 2
+        tasks = await repo.create_many([{"title": f"タスク{i}"} for i in range(3)])
+        self._after_read(monkeypatch, repo, lambda: repo.delete(tasks[0]["id"]))
+
+        results = await repo.delete_many([task["id"] for task in tasks])
+
+        assert results == [False, True, True]
+        _, total = await repo.list(limit=10, offset=0, status=None, priority=None)
+        assert total == 0
@@ -0,0 +1,277 @@
+"""InMemoryTaskRepository のテスト"""
+
+import random
+from datetime import UTC, datetime
+
+import pytest
+
+from src.services.memory import InMemoryTaskRepository, _all_index_keys
+from src.services.pagination import SORT_KEYS, due_in_range, encode_cursor, sort_key
+
+
+@pytest.fixture
+async def repo() -> InMemoryTaskRepository:
+    repo = InMemoryTaskRepository()
+    for i in range(12):
+        await repo.create(
+            {
+                "title": f"タスク{i}",
+                "status": "completed" if i % 3 == 0 else "pending",
+                "priority": "high" if i % 2 == 0 else "low",
+            }
+        )
+    return repo
+
+
+class TestDeleteWhere:
+    async def test_delete_where_status(self, repo):
+        """ステータス条件で一括削除する"""
+        deleted = await repo.delete_where(status="completed")
+
+        assert deleted == 4
+        items, total = await repo.list(limit=100, offset=0, status=None, priority=None)
+        assert total == 8
+        assert all(t["status"] == "pending" for t in items)
+
+    async def test_delete_where_status_and_priority(self, repo):
+        """複数条件はANDで評価する"""
+        deleted = await repo.delete_where(status="completed", priority="high")
+
+        assert deleted == 2
+        _, total = await repo.list(limit=100, offset=0, status="completed", priority=None)
+        assert total == 2
+
+    async def test_delete_where_reports_progress(self, repo):
+        """進捗コールバックに削除件数が渡される"""
+        progress: list[int] = []
+
+        deleted = await repo.delete_where(on_progress=progress.append)
+
+        assert deleted == 12
+        assert progress == [12]
+
+    async def test_clear(self, repo):
+        """clear で全件削除する"""
+        await repo.clear()
+
+        _, total = await repo.list(limit=100, offset=0, status=None, priority=None)
+        assert total == 0
+
+
+class TestGetMany:
+    async def test_get_many(self, repo):
+        """存在するタスクのみIDをキーとして返す"""
+        items, _ = await repo.list(limit=3, offset=0, status=None, priority=None)
+        ids = [t["id"] for t in items]
+        await repo.delete(ids[1])
+
+        found = await repo.get_many(ids)
+
+        assert set(found) == {ids[0], ids[2]}
+        assert found[ids[0]]["title"] == "タスク0"
+
+    async def test_get_many_reflects_update(self, repo):
+        """更新後の内容を返し、一覧の並び順も維持される"""
+        items, _ = await repo.list(limit=3, offset=0, status=None, priority=None)
+        await repo.update(items[1]["id"], {"title": "更新"})
+
+        found = await repo.get_many([items[1]["id"]])
+        page, _ = await repo.list(limit=3, offset=0, status=None, priority=None)
+
+        assert found[items[1]["id"]]["title"] == "更新"
+        assert [t["title"] for t in page] == ["タスク0", "更新", "タスク2"]
+
+
+class TestSort:
+    async def test_update_moves_task_in_sorted_index(self, repo):
+        """並び順キーの更新で並び順リスト内の位置が変わる"""
+        items, _ = await repo.list(limit=1, offset=0, status=None, priority=None)
+        # 作成済みの索引は更新で入れ替わる
+        assert repo._index(("priority", None, "medium")) == []
+        await repo.update(items[0]["id"], {"priority": "medium"})
+
+        page, total = await repo.list(
+            limit=1, offset=0, status=None, priority=None, sort="priority", descending=True
+        )
+        last, _ = await repo.list(
+            limit=1, offset=11, status=None, priority=None, sort="priority", descending=True
+        )
+
+        assert total == 12
+        assert page[0]["title"] == "タスク10"
+        assert last[0]["title"] == "タスク1"
+        assert len(repo._indexes[("priority", None, None)]) == 12
+        assert len(repo._indexes[("priority", None, "medium")]) == 1
+
+    async def test_descending_cursor_with_filter(self, repo):
+        """降順・フィルタ付きでカーソルをたどる"""
+        titles = []
+        cursor = None
+        while True:
+            items, _ = await repo.list(
+                limit=3,
+                offset=0,
+                status="pending",
+                priority=None,
+                cursor=cursor,
+                descending=True,
+            )
+            titles += [t["title"] for t in items]
+            if len(items) < 3:
+                break
+            cursor = encode_cursor(items[-1], descending=True)
+
+        assert titles == [f"タスク{i}" for i in reversed(range(12)) if i % 3 != 0]
+
+
+class TestIndexConsistency:
+    async def test_pages_match_full_sort_after_random_writes(self):
+        """ランダムな書き込み後も、全件を並べ替えた結果と索引による一覧が一致する"""
+        rng = random.Random(0)
+        repo = InMemoryTaskRepository()
+        statuses = ["pending", "in_progress", "completed"]
+        priorities = ["low", "medium", "high"]
+
+        def random_fields() -> dict:
+            return {
+                "status": rng.choice(statuses),
+                "priority": rng.choice(priorities),
+                "due_date": rng.choice([None, datetime(2026, 1, rng.randint(1, 28))]),
+            }
+
+        for i in range(200):
+            await repo.create({"title": f"タスク{i}", **random_fields()})
+        ids = list(repo._by_id)
+        for task_id in rng.sample(ids, 80):
+            await repo.update(task_id, random_fields())
+        await repo.delete_many(rng.sample(ids, 10))
+        for task_id in rng.sample(list(repo._by_id), 5):
+            await repo.delete(task_id)
+        await repo.delete_where(status="completed", priority="low")
+
+        tasks = list(repo._by_id.values())
+        for sort in SORT_KEYS:
+            for descending in (False, True):
+                for status, priority in [(None, None), ("pending", None), ("in_progress", "high")]:
+                    expected = sorted(
+                        (
+                            t
+                            for t in tasks
+                            if (status is None or t["status"] == status)
+                            and (priority is None or t["priority"] == priority)
+                        ),
+                        key=lambda t: sort_key(t, sort),
+                        reverse=descending,
+                    )
+                    items, total = await repo.list(
+                        limit=7,
+                        offset=3,
+                        status=status,
+                        priority=priority,
+                        sort=sort,
+                        descending=descending,
+                    )
+                    assert total == len(expected)
+                    assert [t["id"] for t in items] == [t["id"] for t in expected[3:10]]
+
+    async def test_load_matches_incremental_inserts(self):
+        """一括読み込みで構築した索引は1件ずつ追加した場合と一致する"""
+        rng = random.Random(1)
+        repo = InMemoryTaskRepository()
+        # 空の索引を作っておき、以降は1件ずつ追加する
+        for key in _all_index_keys():
+            repo._index(key)
+        for i in range(100):
+            await repo.create(
+                {
+                    "title": f"タスク{i}",
+                    "status": rng.choice(["pending", "in_progress", "completed"]),
+                    "priority": rng.choice(["low", "medium", "high"]),
+                    "due_date": rng.choice([None, datetime(2026, 1, rng.randint(1, 28))]),
+                }
+            )
+
+        loaded = InMemoryTaskRepository()
+        loaded.load(reversed(repo.dump()))
+        assert loaded._indexes == {}
+        await loaded.build_indexes()
+
+        assert loaded._indexes == repo._indexes
+        assert len(loaded._search) == 100
+
+
+class TestDueRange:
+    @pytest.fixture
+    async def dated(self) -> InMemoryTaskRepository:
+        rng = random.Random(2)
+        repo = InMemoryTaskRepository()
+        for i in range(120):
+            await repo.create(
+                {
+                    "title": f"タスク{i}",
+                    "status": rng.choice(["pending", "completed"]),
+                    "priority": rng.choice(["low", "medium", "high"]),
+                    # 期限なし・タイムゾーン付き・同じ期限を混在させる
+                    "due_date": rng.choice(
+                        [
+                            None,
+                            datetime(2026, 1, rng.randint(1, 20)),
+                            datetime(2026, 1, rng.randint(1, 20), 9, tzinfo=UTC),
+                        ]
+                    ),
+                }
+            )
+        return repo
+
+    @pytest.mark.parametrize("sort", list(SORT_KEYS))
+    @pytest.mark.parametrize("descending", [False, True])
+    async def test_matches_full_filter(self, dated, sort, descending):
+        """期限の範囲指定の結果が、全件を絞り込んで並べ替えた結果と一致する（カーソル含む）"""
+        tasks = list(dated._by_id.values())
+        ranges = [
+            (datetime(2026, 1, 5), datetime(2026, 1, 12)),
+            (datetime(2026, 1, 5, 9, tzinfo=UTC), None),
+            (None, datetime(2026, 1, 3)),
+        ]
+        for due_after, due_before in ranges:
+            for status in (None, "pending"):
+                expected = sorted(
+                    (
+                        t
+                        for t in tasks
+                        if (status is None or t["status"] == status)
+                        and due_in_range(t["due_date"], due_after, due_before)
+                    ),
+                    key=lambda t: sort_key(t, sort),
+                    reverse=descending,
+                )
+                params = {
+                    "status": status,
+                    "priority": None,
+                    "sort": sort,
+                    "descending": descending,
+                    "due_after": due_after,
+                    "due_before": due_before,
+                }
+                items, total = await dated.list(limit=5, offset=2, **params)
+                assert total == len(expected)
+                assert [t["id"] for t in items] == [t["id"] for t in expected[2:7]]
+
+                pages = []
+                cursor = None
+                while True:
+                    page, _ = await dated.list(limit=4, offset=0, cursor=cursor, **params)
+                    if not page:
+                        break
+                    pages += page
+                    cursor = encode_cursor(page[-1], sort, descending)
+                assert [t["id"] for t in pages] == [t["id"] for t in expected]
+
+    async def test_excludes_tasks_without_due_date(self, dated):
+        """範囲を指定すると期限なしのタスクは含まない"""
+        items, total = await dated.list(
+            limit=200, offset=0, status=None, priority=None, due_before=datetime(2100, 1, 1)
+        )
+
+        assert total == sum(t["due_date"] is not None for t in dated._by_id.values())
+        assert all(t["due_date"] is not None for t in items)
@@ -0,0 +1,222 @@
+"""全文検索（search.SearchIndex と各リポジトリの search）のテスト"""
+
+import random
+from datetime import datetime, timedelta
+from uuid import UUID, uuid4
+
+import pytest
+
+from src.services import search
+from src.services.columnar import ColumnarTaskRepository
+from src.services.fake_firestore import FakeFirestoreClient
+from src.services.firestore import FirestoreTaskRepository
+from src.services.memory import InMemoryTaskRepository
+from src.services.search import SearchIndex, match_score, normalize, query_terms
+from src.services.sqlite import SqliteTaskRepository
+
+_BASE = datetime(2026, 1, 1)
+_WORDS = ["会議", "資料", "作成", "レビュー", "Report", "ｒｅｐｏｒｔ", "週次", "の", "確認", "API"]
+_QUERIES = ["会議", "資料 作成", "report", "REPORT 週次", "の", "レ", "api 確認", "存在しない語"]
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return "".join(rng.choice(_WORDS) for _ in range(words)) + " " + rng.choice(_WORDS)
+
+
+@pytest.fixture(params=["memory", "columnar", "sqlite", "firestore"])
+async def repo(request, tmp_path):
+    if request.param == "sqlite":
+        repo = SqliteTaskRepository(str(tmp_path / "tasks.db"))
+    elif request.param == "firestore":
+        repo = FirestoreTaskRepository(db=FakeFirestoreClient(), max_workers=2)
+    elif request.param == "columnar":
+        repo = ColumnarTaskRepository()
+    else:
+        repo = InMemoryTaskRepository()
+    yield repo
+    if isinstance(repo, SqliteTaskRepository):
+        repo.close()
+
+
+class TestNormalize:
+    def test_width_and_case(self):
+        """全角・半角と大文字・小文字の違いを吸収する"""
+        assert normalize("ＡＰＩ　Ｒｅｖｉｅｗ") == normalize("api review") == "api review"
+        assert normalize("ｶﾀｶﾅ") == "カタカナ"
+
+    def test_query_terms(self):
+        """空白で区切り、正規化後に重複する語は1つにまとめる"""
+        assert query_terms("  Report  ｒｅｐｏｒｔ 会議 ") == ["report", "会議"]
+        assert query_terms("   ") == []
+
+
+class TestSearchIndex:
+    def _index(self, *docs: tuple[str, str]) -> tuple[SearchIndex, list[UUID]]:
+        index = SearchIndex()
+        ids = [UUID(int=i) for i in range(len(docs))]
+        for i, (task_id, (title, description)) in enumerate(zip(ids, docs)):
+            index.add(task_id, title, description, _BASE + timedelta(seconds=i))
+        return index, ids
+
+    def _ids(self, index: SearchIndex, query: str) -> list[UUID]:
+        task_ids, total = index.search(query, 100)
+        assert total == len(task_ids)
+        return task_ids
+
+    def test_substring_in_japanese(self):
+        """分かち書きなしの日本語でも語の途中に一致する"""
+        index, ids = self._index(("週次会議の資料を作成", ""), ("会計処理", ""))
+
+        assert self._ids(index, "議の資") == [ids[0]]
+        assert set(self._ids(index, "会")) == set(ids)
+        assert self._ids(index, "会議室") == []
+
+    def test_all_terms_required(self):
+        """全ての検索語を含むタスクのみ一致する"""
+        index, ids = self._index(("資料作成", "会議用"), ("資料確認", ""))
+
+        assert self._ids(index, "資料 会議") == [ids[0]]
+
+    def test_bigram_across_tokens_is_not_substring(self):
+        """グラムが全て揃っていても部分文字列でなければ一致しない"""
+        index, _ = self._index(("abcd bcde", ""))
+
+        assert self._ids(index, "abcde") == []
+
+    @pytest.mark.parametrize("ratio", [0, 1_000_000])
+    def test_intersection_strategies(self, monkeypatch, ratio):
+        """二分探索・集合演算のどちらで絞り込んでも結果と並び順は同じ"""
+        monkeypatch.setattr(search, "_BISECT_RATIO", ratio)
+        rng = random.Random(1)
+        index, _ = self._index(*[(_text(rng, 2), _text(rng, 1)) for _ in range(200)])
+        for query in _QUERIES:
+            terms = query_terms(query)
+            expected = sorted(
+                (
+                    (match_score(terms, title, description), order)
+                    for (_, title, description), order in zip(index._docs, index._order)
+                    if match_score(terms, title, description)
+                ),
+                reverse=True,
+            )
+            task_ids, total = index.search(query, 10, 3)
+            assert total == len(expected), query
+            assert [UUID(bytes=order[-1]) for _, order in expected[3:13]] == task_ids, query
+
+    def test_scores(self):
+        """タイトルの先頭一致 3 点、タイトル 2 点、説明 1 点を検索語ごとに合計する"""
+        assert match_score(["会議"], "会議の準備", "") == 3
+        assert match_score(["会議"], "週次会議", "会議室") == 3
+        assert match_score(["会議"], "準備", "会議室") == 1
+        assert match_score(["会議", "準備"], "週次会議", "準備") == 3
+        assert match_score(["会議", "予約"], "週次会議", "") == 0
+
+    def test_update_and_remove(self):
+        """置き換え・削除した内容には一致しない"""
+        index, ids = self._index(("古いタイトル", ""), ("別のタスク", ""))
+        index.add(ids[0], "新しいタイトル", "", _BASE)
+        index.remove(ids[1])
+        index.remove(uuid4())
+
+        assert self._ids(index, "古い") == []
+        assert self._ids(index, "新しい") == [ids[0]]
+        assert self._ids(index, "別の") == []
+        assert len(index) == 1
+
+    def test_compaction_keeps_results(self, monkeypatch):
+        """削除済みの文書が多くなったら詰め直し、検索結果は変わらない"""
+        monkeypatch.setattr(search, "_COMPACT_MIN_DEAD", 4)
+        index, ids = self._index(*[(f"タスク{i}", "") for i in range(20)])
+        for task_id in ids[:15]:
+            index.remove(task_id)
+
+        assert len(index._docs) < 20
+        assert set(self._ids(index, "タスク")) == set(ids[15:])
+        assert self._ids(index, "タスク19") == [ids[19]]
+
+
+class TestRepositorySearch:
+    async def test_ranked_by_score_then_newest(self, repo):
+        """得点の高い順、同点は作成日時の新しい順"""
+        tasks = [
+            {"title": "資料の確認", "description": "会議の前に"},
+            {"title": "会議の準備", "description": ""},
+            {"title": "週次会議", "description": ""},
+            {"title": "定例の会議", "description": ""},
+            {"title": "無関係", "description": ""},
+        ]
+        for task in tasks:
+            await repo.create(task)
+
+        items, total = await repo.search("会議", 10)
+
+        assert total == 4
+        assert [item["title"] for item in items] == [
+            "会議の準備",
+            "定例の会議",
+            "週次会議",
+            "資料の確認",
+        ]
+
+    async def test_paging_and_normalization(self, repo):
+        """全角・大文字の検索語でも一致し、limit / offset で切り出す"""
+        for i in range(5):
+            await repo.create({"title": f"Weekly Report {i}", "description": ""})
+
+        first, total = await repo.search("ＲＥＰＯＲＴ", 2)
+        rest, _ = await repo.search("report", 10, 2)
+
+        assert total == 5
+        assert [item["title"] for item in first + rest] == [
+            f"Weekly Report {i}" for i in reversed(range(5))
+        ]
+
+    async def test_reflects_writes(self, repo):
+        """更新・削除が検索結果に反映される"""
+        kept = await repo.create({"title": "請求書の発行", "description": ""})
+        removed = await repo.create({"title": "請求書の確認", "description": ""})
+        await repo.update(kept["id"], {"description": "月末締め"})
+        await repo.update(removed["id"], {"status": "completed"})
+        await repo.delete(removed["id"])
+
+        assert (await repo.search("締め", 10))[1] == 1
+        items, total = await repo.search("請求書", 10)
+        assert total == 1
+        assert items[0]["id"] == kept["id"]
+        assert items[0]["description"] == "月末締め"
+
+        await repo.update(kept["id"], {"title": "領収書の発行"})
+        assert (await repo.search("請求書", 10))[1] == 0
+        assert (await repo.search("領収", 10))[1] == 1
+
+    async def test_blank_and_missing(self, repo):
+        """空白のみのクエリ・一致しない語は 0 件"""
+        await repo.create({"title": "タスク", "description": ""})
+
+        assert await repo.search("   ", 10) == ([], 0)
+        assert await repo.search("存在しない", 10) == ([], 0)
+
+    async def test_symbols_and_offset_past_end(self, repo):
+        """記号を含む検索語も一致し、末尾を越えたページでも件数を返す"""
+        await repo.create({"title": "C++ / C# の比較", "description": "100%"})
+        await repo.create({"title": "C の入門", "description": ""})
+
+        assert [t["title"] for t in (await repo.search("c++", 10))[0]] == ["C++ / C# の比較"]
+        assert (await repo.search("%", 10))[1] == 1
+        assert await repo.search("c", 10, 5) == ([], 2)
+
+    async def test_matches_memory_repository(self, repo):
+        """ランダムなタスクで件数・並び順がインメモリ実装と一致する"""
+        rng = random.Random(0)
+        memory = InMemoryTaskRepository()
+        for _ in range(120):
+            data = {"title": _text(rng, rng.randint(1, 3)), "description": _text(rng, 2)}
+            task = await repo.create(data)
+            memory._insert(dict(task))
+            memory._search.add(task["id"], task["title"], task["description"], task["created_at"])
+
+        for query in _QUERIES:
+            expected, expected_total = await memory.search(query, 200)
+            items, total = await repo.search(query, 15, 5)
+            assert total == expected_total, query
+            assert [t["id"] for t in items] == [t["id"] for t in expected[5:20]], query
@@ -0,0 +1,306 @@
+"""SnapshotTaskRepository のテスト"""
+
+import asyncio
+import threading
+import zlib
+from datetime import UTC, datetime, timedelta, timezone
+from uuid import UUID
+
+import pytest
+
+from src.services import snapshot as snapshot_module
+from src.services.firestore import get_repository, repository_lifespan, reset_repository
+from src.services.memory import InMemoryTaskRepository
+from src.services.snapshot import (
+    SnapshotCorruptedError,
+    SnapshotTaskRepository,
+    with_snapshots,
+)
+
+
+def _open(directory) -> SnapshotTaskRepository:
+    return SnapshotTaskRepository(InMemoryTaskRepository(), directory)
+
+
+def _crash(repo: SnapshotTaskRepository) -> None:
+    """スナップショットを書かずにログだけ閉じる（プロセスの異常終了相当）"""
+    repo._log.close()
+
+
+def _state(repo: SnapshotTaskRepository) -> dict:
+    return {task["id"]: task for task in repo._repo.dump()}
+
+
+async def _seed(repo: SnapshotTaskRepository) -> list[dict]:
+    return await repo.create_many(
+        [
+            {"title": "タスク", "description": "説明📝", "priority": "high", "tags": ["仕事", "a"]},
+            {"title": "期限あり", "due_date": datetime(2026, 3, 1, 9, 30)},
+            {
+                "title": "JST",
+                "due_date": datetime(2026, 3, 1, 9, tzinfo=timezone(timedelta(hours=9))),
+                "status": "completed",
+                "tags": ["home"],
+            },
+        ]
+    )
+
+
+class TestSnapshotRestore:
+    async def test_round_trip(self, tmp_path):
+        """スナップショットから同じ内容・同じ一覧順で復元する"""
+        repo = _open(tmp_path)
+        await _seed(repo)
+        await repo.close()
+
+        restored = _open(tmp_path)
+
+        assert _state(restored) == _state(repo)
+        for sort in ("created_at", "due_date", "priority"):
+            expected = await repo.list(10, 0, None, None, sort=sort)
+            assert await restored.list(10, 0, None, None, sort=sort) == expected
+        assert (await restored.list(10, 0, "completed", None))[1] == 1
+        assert (await restored.list(10, 0, None, None, tags=["仕事", "home"]))[1] == 2
+
+    async def test_reads_format_without_tags(self, tmp_path):
+        """タグ導入前の形式のスナップショット・ログはタグなしとして復元する"""
+        ids = [UUID(int=1), UUID(int=2)]
+
+        def record(task_id: UUID, title: str) -> bytes:
+            fields = (task_id.bytes, 0, -(2**63), 0, 0, 1, len(title), 0)
+            return snapshot_module._TASK_V2.pack(*fields) + title.encode()
+
+        body = record(ids[0], "旧スナップショット")
+        text_size = len("旧スナップショット".encode())
+        header = snapshot_module._HEADER.pack(
+            snapshot_module._MAGIC_V2, 1, text_size, zlib.crc32(body)
+        )
+        (tmp_path / SnapshotTaskRepository.SNAPSHOT_FILE).write_bytes(header + body)
+        payload = bytes((snapshot_module._OP_PUT_V2,)) + record(ids[1], "旧ログ")
+        log = snapshot_module._LOG_RECORD.pack(len(payload), zlib.crc32(payload)) + payload
+        (tmp_path / SnapshotTaskRepository.LOG_FILE).write_bytes(log)
+
+        restored = _open(tmp_path)
+
+        tasks = await restored.get_many(ids)
+        assert [tasks[task_id]["title"] for task_id in ids] == ["旧スナップショット", "旧ログ"]
+        assert all(task["tags"] == [] and task["priority"] == "medium" for task in tasks.values())
+
+    async def test_timezone_normalized_to_utc(self, tmp_path):
+        """タイムゾーン付きの日時は UTC として復元する"""
+        repo = _open(tmp_path)
+        tasks = await _seed(repo)
+        await repo.close()
+
+        restored = await _open(tmp_path).get(tasks[2]["id"])
+
+        assert restored["due_date"] == datetime(2026, 3, 1, 0, tzinfo=UTC)
+        assert restored["due_date"].utcoffset() == timedelta(0)
+
+    async def test_replays_log_without_snapshot(self, tmp_path):
+        """スナップショット後の変更はログから復元する"""
+        repo = _open(tmp_path)
+        tasks = await _seed(repo)
+        await repo.snapshot()
+        await repo.update(tasks[0]["id"], {"status": "in_progress"})
+        await repo.update_many([(tasks[1]["id"], {"title": "更新"})])
+        await repo.delete(tasks[2]["id"])
+        extra = await repo.create({"title": "追加", "status": "completed"})
+        await repo.create_many([{"title": "削除予定", "status": "completed"}])
+        await repo.delete_where(status="completed")
+        await repo.delete_many([extra["id"]])
+        _crash(repo)
+
+        restored = _open(tmp_path)
+
+        assert _state(restored) == _state(repo)
+        assert [t["title"] for t in (await restored.list(10, 0, None, None))[0]] == [
+            "タスク",
+            "更新",
+        ]
+        assert [t["title"] for t in (await restored.search("更新", 10))[0]] == ["更新"]
+        assert (await restored.search("期限", 10))[1] == 0
+
+    async def test_torn_log_tail_is_discarded(self, tmp_path):
+        """書き込み途中で止まった末尾のレコードは読み捨てて切り詰める"""
+        repo = _open(tmp_path)
+        await repo.create({"title": "タスク"})
+        _crash(repo)
+        log_path = tmp_path / SnapshotTaskRepository.LOG_FILE
+        valid_size = log_path.stat().st_size
+        with open(log_path, "ab") as f:
+            f.write(b"\x40\x00\x00\x00\x00")
+
+        restored = _open(tmp_path)
+
+        assert len(_state(restored)) == 1
+        assert log_path.stat().st_size == valid_size
+
+    async def test_corrupted_snapshot_raises(self, tmp_path):
+        """チェックサムが一致しないスナップショットはエラー"""
+        repo = _open(tmp_path)
+        await _seed(repo)
+        await repo.close()
+        snapshot_path = tmp_path / SnapshotTaskRepository.SNAPSHOT_FILE
+        data = bytearray(snapshot_path.read_bytes())
+        data[-1] ^= 0xFF
+        snapshot_path.write_bytes(bytes(data))
+
+        with pytest.raises(SnapshotCorruptedError):
+            _open(tmp_path)
+
+
+class TestSnapshotWrites:
+    async def test_snapshot_truncates_log(self, tmp_path):
+        """スナップショット後はログが空になる"""
+        repo = _open(tmp_path)
+        await _seed(repo)
+
+        assert await repo.snapshot() == 3
+
+        assert (tmp_path / SnapshotTaskRepository.LOG_FILE).stat().st_size == 0
+        assert not (tmp_path / SnapshotTaskRepository.ROTATED_LOG_FILE).exists()
+        assert repo.pending == 0
+
+    async def test_writes_during_snapshot_are_logged(self, tmp_path, monkeypatch):
+        """書き出し中の変更は新しいログに記録され、失われない"""
+        repo = _open(tmp_path)
+        await _seed(repo)
+        started, release = threading.Event(), threading.Event()
+        write_snapshot = snapshot_module.write_snapshot
+
+        def slow_write(path, tasks):
+            started.set()
+            release.wait()
+            write_snapshot(path, tasks)
+
+        monkeypatch.setattr(snapshot_module, "write_snapshot", slow_write)
+        pending = asyncio.create_task(repo.snapshot())
+        await asyncio.to_thread(started.wait)
+        created = await repo.create({"title": "書き出し中"})
+        release.set()
+        assert await pending == 3
+        _crash(repo)
+
+        restored = _open(tmp_path)
+
+        assert created["id"] in _state(restored)
+        assert len(_state(restored)) == 4
+
+    async def test_cancelled_snapshot_finishes_before_next(self, tmp_path, monkeypatch):
+        """取り消されたスナップショットも書き終えてから次の書き出し（終了時など）を始める"""
+        repo = _open(tmp_path)
+        await _seed(repo)
+        started, release = threading.Event(), threading.Event()
+        active: list[int] = []
+        overlaps: list[int] = []
+        write_snapshot = snapshot_module.write_snapshot
+
+        def slow_write(path, tasks):
+            overlaps.append(len(active))
+            active.append(1)
+            started.set()
+            release.wait()
+            write_snapshot(path, tasks)
+            active.pop()
+
+        monkeypatch.setattr(snapshot_module, "write_snapshot", slow_write)
+        pending = asyncio.create_task(repo.snapshot())
+        await asyncio.to_thread(started.wait)
+        pending.cancel()
+        closing = asyncio.create_task(repo.close())
+        await asyncio.sleep(0.05)
+        done = pending.done()
+        release.set()
+        assert not done
+
+        with pytest.raises(asyncio.CancelledError):
+            await pending
+        await closing
+        assert overlaps == [0, 0]
+        assert len(_state(_open(tmp_path))) == 3
+
+    async def test_failed_snapshot_keeps_rotated_log(self, tmp_path, monkeypatch):
+        """書き出しに失敗した場合は退避したログを残し、次回のスナップショットで取り込む"""
+        repo = _open(tmp_path)
+        await _seed(repo)
+
+        def fail(path, tasks):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(snapshot_module, "write_snapshot", fail)
+        with pytest.raises(OSError):
+            await repo.snapshot()
+        await repo.create({"title": "失敗後"})
+        assert (tmp_path / SnapshotTaskRepository.ROTATED_LOG_FILE).exists()
+        monkeypatch.undo()
+
+        await repo.snapshot()
+        _crash(repo)
+
+        assert not (tmp_path / SnapshotTaskRepository.ROTATED_LOG_FILE).exists()
+        assert len(_state(_open(tmp_path))) == 4
+
+
+class TestDeferredIndexes:
+    async def test_indexes_built_after_restore(self, tmp_path):
+        """復元では索引を作らず、作り終えるまでの書き込み・検索も正しく扱う"""
+        repo = _open(tmp_path)
+        tasks = await _seed(repo)
+        await repo.close()
+
+        restored = _open(tmp_path)
+        assert restored._repo._indexes == {}
+        assert len(restored._repo._search) == 0
+        await restored.update(tasks[0]["id"], {"title": "更新"})
+        await restored.delete(tasks[1]["id"])
+        await restored.build_indexes()
+
+        assert len(restored._repo._search) == 2
+        assert (await restored.search("更新", 10))[1] == 1
+        assert (await restored.search("期限", 10))[1] == 0
+        items, total = await restored.list(10, 0, None, None, sort="priority", descending=True)
+        assert total == 2
+        assert [t["title"] for t in items] == ["更新", "JST"]
+        _crash(restored)
+
+    async def test_search_before_indexes_are_built(self, tmp_path):
+        """索引を作り終える前の検索も全てのタスクを対象にする"""
+        repo = _open(tmp_path)
+        await _seed(repo)
+        await repo.close()
+
+        restored = _open(tmp_path)
+
+        assert (await restored.search("jst", 10))[1] == 1
+        items, _ = await restored.list(10, 0, ["pending", "completed"], None, tags=["home"])
+        assert [t["title"] for t in items] == ["JST"]
+        _crash(restored)
+
+
+class TestSnapshotConfiguration:
+    def test_disabled_by_default(self, monkeypatch):
+        """MEMORY_SNAPSHOT_DIR が未設定なら何もしない"""
+        monkeypatch.delenv("MEMORY_SNAPSHOT_DIR", raising=False)
+        repo = InMemoryTaskRepository()
+
+        assert with_snapshots(repo) is repo
+
+    async def test_lifespan_writes_final_snapshot(self, monkeypatch, tmp_path):
+        """MEMORY_SNAPSHOT_DIR を指定すると終了時にスナップショットを書き出す"""
+        monkeypatch.delenv("USE_FIRESTORE", raising=False)
+        monkeypatch.delenv("SQLITE_DB_PATH", raising=False)
+        monkeypatch.delenv("USE_TASK_CACHE", raising=False)
+        monkeypatch.setenv("MEMORY_SNAPSHOT_DIR", str(tmp_path))
+        reset_repository()
+        try:
+            async with repository_lifespan():
+                repo = get_repository()
+                assert isinstance(repo, SnapshotTaskRepository)
+                await repo.create({"title": "タスク"})
+            reset_repository()
+
+            assert len(_state(get_repository())) == 1
+            assert (tmp_path / SnapshotTaskRepository.LOG_FILE).stat().st_size == 0
+        finally:
+            reset_repository()
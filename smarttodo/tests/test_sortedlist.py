@@ -0,0 +1,69 @@
+"""SortedList のテスト"""
+
+import random
+
+import pytest
+
+from src.services import sortedlist
+from src.services.sortedlist import SortedList
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    """チャンクの分割・削除を少ない件数で起こす"""
+    monkeypatch.setattr(sortedlist, "_CHUNK", 4)
+    monkeypatch.setattr(sortedlist, "_MAX_CHUNK", 8)
+
+
+class TestSortedList:
+    def test_matches_plain_list_after_random_writes(self):
+        """ランダムな挿入・削除の後も整列済みの list と同じ内容・位置参照になる"""
+        rng = random.Random(0)
+        values = SortedList(range(0, 60, 3))
+        expected = list(range(0, 60, 3))
+        for _ in range(500):
+            value = rng.randrange(200)
+            if value in expected:
+                values.remove(value)
+                expected.remove(value)
+            else:
+                values.add(value)
+                expected.append(value)
+                expected.sort()
+
+            assert values == expected
+            assert len(values) == len(expected)
+            assert list(reversed(values)) == expected[::-1]
+            i = rng.randrange(-len(expected), len(expected)) if expected else 0
+            if expected:
+                assert values[i] == expected[i]
+            start, stop = sorted(rng.randrange(-5, len(expected) + 5) for _ in range(2))
+            assert values[start:stop] == expected[start:stop]
+        assert values[::2] == expected[::2]
+
+    def test_remove_missing_raises(self):
+        values = SortedList([1, 3, 5])
+
+        with pytest.raises(ValueError):
+            values.remove(4)
+        with pytest.raises(ValueError):
+            values.remove(9)
+        assert values == [1, 3, 5]
+
+    def test_index_out_of_range(self):
+        values = SortedList([1, 2])
+
+        with pytest.raises(IndexError):
+            values[2]
+        with pytest.raises(IndexError):
+            values[-3]
+        assert SortedList()[0:5] == []
+
+    def test_remove_until_empty(self):
+        values = SortedList(range(10))
+        for value in range(10):
+            values.remove(value)
+
+        assert values == []
+        values.add(7)
+        assert values == [7]
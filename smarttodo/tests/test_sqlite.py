@@ -0,0 +1,266 @@
+"""SqliteTaskRepository のテスト"""
+
+import random
+import sqlite3
+from datetime import UTC, datetime, timedelta, timezone
+from uuid import UUID, uuid4
+
+import pytest
+
+from src.services.cache import CachedTaskRepository
+from src.services.firestore import get_repository, reset_repository
+from src.services.memory import InMemoryTaskRepository
+from src.services.pagination import SORT_KEYS, encode_cursor
+from src.services.sqlite import SqliteTaskRepository
+
+# 一覧の条件: (ステータス, 優先度[, 期限の下限, 期限の上限])
+_CONDITIONS = [
+    (None, None),
+    ("pending", None),
+    (None, "high"),
+    ("done", None),
+    (None, None, datetime(2026, 1, 2), datetime(2026, 1, 4)),
+    ("pending", None, datetime(2026, 1, 2, tzinfo=UTC), None),
+    (None, "high", None, datetime(2026, 1, 3)),
+    (["pending", "in_progress"], None),
+    (None, ["low", "high"], datetime(2026, 1, 2), None),
+]
+
+
+@pytest.fixture
+def path(tmp_path) -> str:
+    return str(tmp_path / "tasks.db")
+
+
+@pytest.fixture
+def repo(path):
+    repo = SqliteTaskRepository(path)
+    yield repo
+    repo.close()
+
+
+async def _seed(repo, count: int, rng: random.Random) -> None:
+    base = datetime(2026, 1, 1)
+    await repo.create_many(
+        [
+            {
+                "title": f"タスク{i}",
+                "status": rng.choice(["pending", "in_progress", "completed"]),
+                "priority": rng.choice(["low", "medium", "high"]),
+                # 期限なし・タイムゾーン付き・同じ期限を混在させる
+                "due_date": rng.choice(
+                    [
+                        None,
+                        base + timedelta(days=rng.randrange(5)),
+                        (base + timedelta(days=rng.randrange(5))).replace(tzinfo=UTC),
+                    ]
+                ),
+            }
+            for i in range(count)
+        ]
+    )
+
+
+class TestSqliteStorage:
+    async def test_persists_across_reopen(self, path):
+        """接続を開き直してもタスクが残る"""
+        repo = SqliteTaskRepository(path)
+        created = await repo.create({"title": "タスク", "due_date": datetime(2026, 1, 1)})
+        repo.close()
+
+        reopened = SqliteTaskRepository(path)
+        try:
+            fetched = await reopened.get(created["id"])
+        finally:
+            reopened.close()
+
+        assert fetched == created
+
+    async def test_wal_mode(self, repo):
+        """WAL モードで開く"""
+        mode = await repo._run(lambda: repo._conn.execute("PRAGMA journal_mode").fetchone()[0])
+
+        assert mode == "wal"
+
+    async def test_list_uses_index(self, repo):
+        """フィルタ付きの一覧は索引を使い、全件走査しない"""
+        plan = await repo._run(
+            lambda: repo._conn.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM tasks WHERE status = ?"
+                " ORDER BY created_at, id LIMIT 10",
+                ("pending",),
+            ).fetchall()
+        )
+
+        details = " ".join(row["detail"] for row in plan)
+        assert "INDEX idx_tasks_status" in details
+        assert "TEMP B-TREE" not in details
+
+    async def test_timezone_normalized_to_utc(self, repo):
+        """タイムゾーン付きの期限は UTC に揃えて保存する"""
+        jst = datetime(2026, 1, 1, 9, tzinfo=timezone(timedelta(hours=9)))
+        created = await repo.create({"title": "タスク", "due_date": jst})
+
+        fetched = await repo.get(created["id"])
+
+        assert fetched["due_date"] == jst
+        assert fetched["due_date"].utcoffset() == timedelta(0)
+
+
+class TestSqliteList:
+    @pytest.mark.parametrize("sort", list(SORT_KEYS))
+    @pytest.mark.parametrize("descending", [False, True])
+    async def test_matches_memory_repository(self, repo, sort, descending):
+        """並び順・フィルタ・カーソルの結果がインメモリ実装と一致する"""
+        rng = random.Random(0)
+        await _seed(repo, 60, rng)
+        memory = InMemoryTaskRepository()
+        for task in (await repo.list(100, 0, None, None))[0]:
+            memory._insert(task)
+
+        for status, priority, *due_range in _CONDITIONS:
+            due = dict(zip(("due_after", "due_before"), due_range))
+            expected, expected_total = await memory.list(
+                100, 0, status, priority, sort=sort, descending=descending, **due
+            )
+            pages = []
+            cursor = None
+            while True:
+                page, total = await repo.list(
+                    7, 0, status, priority, cursor=cursor, sort=sort, descending=descending, **due
+                )
+                assert total == expected_total
+                if not page:
+                    break
+                pages.extend(page)
+                cursor = encode_cursor(page[-1], sort, descending)
+
+            assert [t["id"] for t in pages] == [t["id"] for t in expected]
+
+    async def test_fields_projection(self, repo):
+        """指定フィールドと並び順キーのみを返す"""
+        await repo.create({"title": "タスク"})
+
+        items, _ = await repo.list(10, 0, None, None, fields=["title"], sort="priority")
+
+        assert set(items[0]) == {"title", "priority", "created_at", "id"}
+
+
+class TestSqliteWrites:
+    async def test_update_returns_row(self, repo):
+        """更新後の行を返す"""
+        created = await repo.create({"title": "タスク", "description": "説明"})
+
+        updated = await repo.update(created["id"], {"priority": "high", "due_date": None})
+
+        assert updated == {**created, "priority": "high"}
+        assert await repo.get(created["id"]) == updated
+
+    async def test_update_not_found(self, repo):
+        """存在しないタスクの更新は None"""
+        assert await repo.update(uuid4(), {"title": "更新"}) is None
+        assert await repo.update(uuid4(), {}) is None
+
+    async def test_update_many_in_order(self, repo):
+        """同一IDへの複数の更新はリクエスト順に適用する"""
+        created = await repo.create({"title": "タスク"})
+        missing = uuid4()
+
+        results = await repo.update_many(
+            [
+                (created["id"], {"title": "1回目"}),
+                (missing, {"title": "なし"}),
+                (created["id"], {"status": "completed"}),
+            ]
+        )
+
+        assert results[1] is None
+        assert results[2]["title"] == "1回目"
+        assert results[2]["status"] == "completed"
+
+    async def test_create_many_rolls_back(self, repo):
+        """一括作成の途中で失敗した場合は何も書き込まない"""
+        with pytest.raises(KeyError):
+            await repo.create_many([{"title": "タスク"}, {"title": "不正", "priority": "urgent"}])
+
+        assert (await repo.list(10, 0, None, None))[1] == 0
+
+    async def test_delete_many_duplicates(self, repo):
+        """重複したIDは最初の1件のみ True"""
+        created = await repo.create({"title": "タスク"})
+
+        assert await repo.delete_many([created["id"], created["id"], uuid4()]) == [
+            True,
+            False,
+            False,
+        ]
+
+    async def test_delete_where(self, repo):
+        """条件に一致するタスクのみ削除し、進捗に件数を渡す"""
+        await repo.create_many([{"title": "完了", "status": "completed"}, {"title": "未完了"}] * 3)
+        progress = []
+
+        deleted = await repo.delete_where(status="completed", on_progress=progress.append)
+
+        assert deleted == 3
+        assert progress == [3]
+        assert (await repo.list(10, 0, None, None))[1] == 3
+
+
+class TestSqliteMigration:
+    async def test_adds_tags_to_existing_database(self, path):
+        """タグの導入前に作成したデータベースに列を追加し、既存のタスクはタグなしとする"""
+        task_id = UUID(int=1)
+        conn = sqlite3.connect(path)
+        conn.execute(
+            "CREATE TABLE tasks (id TEXT PRIMARY KEY, title TEXT NOT NULL,"
+            " description TEXT NOT NULL, due_date TEXT,"
+            " due_date_has_tz INTEGER NOT NULL DEFAULT 0, status TEXT NOT NULL,"
+            " priority TEXT NOT NULL, priority_rank INTEGER NOT NULL, created_at TEXT NOT NULL)"
+        )
+        conn.execute(
+            "INSERT INTO tasks VALUES (?, '既存', '', NULL, 0, 'pending', 'medium', 1,"
+            " '2026-01-01T00:00:00.000000')",
+            (str(task_id),),
+        )
+        conn.commit()
+        conn.close()
+
+        repo = SqliteTaskRepository(path)
+        try:
+            assert (await repo.get(task_id))["tags"] == []
+            await repo.update(task_id, {"tags": ["work"]})
+            items, total = await repo.list(10, 0, None, None, tags=["work"])
+            assert total == 1
+            assert items[0]["tags"] == ["work"]
+        finally:
+            repo.close()
+
+
+class TestSqliteConfiguration:
+    def test_selected_by_env(self, monkeypatch, path):
+        """SQLITE_DB_PATH を指定すると get_repository が SQLite を使う"""
+        monkeypatch.delenv("USE_FIRESTORE", raising=False)
+        monkeypatch.delenv("USE_TASK_CACHE", raising=False)
+        monkeypatch.setenv("SQLITE_DB_PATH", path)
+        reset_repository()
+        try:
+            repo = get_repository()
+            assert isinstance(repo, SqliteTaskRepository)
+            repo.close()
+        finally:
+            reset_repository()
+
+    def test_with_cache(self, monkeypatch, path):
+        """読み取りキャッシュと併用できる"""
+        monkeypatch.delenv("USE_FIRESTORE", raising=False)
+        monkeypatch.setenv("USE_TASK_CACHE", "true")
+        monkeypatch.setenv("SQLITE_DB_PATH", path)
+        reset_repository()
+        try:
+            repo = get_repository()
+            assert isinstance(repo, CachedTaskRepository)
+            assert isinstance(repo.inner, SqliteTaskRepository)
+            repo.inner.close()
+        finally:
+            reset_repository()
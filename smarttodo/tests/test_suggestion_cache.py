@@ -0,0 +1,331 @@
+"""提案キャッシュのバックエンド（src.ai.cache）と Redis スタンドインのテスト"""
+
+import asyncio
+import sqlite3
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+from uuid import UUID, uuid4
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from src.ai.cache import (
+    CacheEntry,
+    MemorySuggestionCache,
+    RedisSuggestionCache,
+    SqliteSuggestionCache,
+    cache_backend_from_env,
+)
+from src.ai.suggestions import SuggestionService, get_suggestion_service
+from src.main import app
+from src.models.task import TaskPriority, TaskResponse, TaskStatus
+from src.services.fake_redis import FakeRedisServer
+from src.services.firestore import InMemoryTaskRepository, reset_repository, set_repository
+from src.services.resp import RedisClient, RedisError, read_reply
+
+_TTL = 60
+_A, _B, _C = UUID(int=1), UUID(int=2), UUID(int=3)
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _entry(fingerprints: dict[UUID, int], origin: str = "a") -> CacheEntry:
+    suggestions = [{"title": "提案", "reason": "理由", "priority": "high"}]
+    return CacheEntry(fingerprints, suggestions, origin)
+
+
+def _task(title: str) -> TaskResponse:
+    return TaskResponse(
+        id=uuid4(),
+        title=title,
+        description="",
+        due_date=None,
+        status=TaskStatus.PENDING,
+        priority=TaskPriority.MEDIUM,
+        created_at=datetime(2026, 1, 1),
+    )
+
+
+def _mock_client() -> AsyncMock:
+    client = AsyncMock()
+    response = MagicMock()
+    choice = MagicMock()
+    choice.message.content = '{"suggestions": [{"title": "タスク1", "reason": "理由1"}]}'
+    response.choices = [choice]
+    client.chat.completions.create = AsyncMock(return_value=response)
+    return client
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+async def backend(request, tmp_path):
+    """(バックエンド, 時計) を返す（Redis はスタンドインの時計で期限を判定する）"""
+    clock = _Clock()
+    if request.param == "memory":
+        yield MemorySuggestionCache(ttl=_TTL, timer=clock), clock
+    elif request.param == "sqlite":
+        cache = SqliteSuggestionCache(str(tmp_path / "cache.db"), _TTL, timer=clock)
+        yield cache, clock
+        await cache.close()
+    else:
+        async with FakeRedisServer(timer=clock) as server:
+            cache = RedisSuggestionCache(RedisClient(server.url), _TTL)
+            yield cache, clock
+            await cache.close()
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+async def shared(request, tmp_path):
+    """同じ保存先を指す2つのバックエンド（別々のインスタンス相当）"""
+    if request.param == "sqlite":
+        path = str(tmp_path / "cache.db")
+        caches = [SqliteSuggestionCache(path), SqliteSuggestionCache(path)]
+        yield caches
+        for cache in caches:
+            await cache.close()
+    else:
+        async with FakeRedisServer() as server:
+            caches = [RedisSuggestionCache(RedisClient(server.url)) for _ in range(2)]
+            yield caches
+            for cache in caches:
+                await cache.close()
+
+
+class TestBackends:
+    async def test_round_trip_and_expiry(self, backend):
+        """保存したエントリを取得でき、有効期限を過ぎると取得できない"""
+        cache, clock = backend
+        entry = _entry({_A: 2**64 - 1, _B: 7})
+        await cache.set("key", entry)
+
+        assert await cache.get("key") == entry
+        assert await cache.get("other") is None
+        clock.now += _TTL + 1
+        assert await cache.get("key") is None
+
+    async def test_invalidate_only_affected_entries(self, backend):
+        """削除したタスク・フィンガープリントの変わったタスクを含むエントリのみ消す"""
+        cache, _ = backend
+        await cache.set("ab", _entry({_A: 1, _B: 2}))
+        await cache.set("b", _entry({_B: 2}))
+        await cache.set("c", _entry({_C: 3}))
+
+        assert await cache.invalidate({_A: 1, _B: 2}, []) == 0
+        assert await cache.invalidate({_B: 20}, []) == 2
+        assert await cache.get("ab") is None and await cache.get("b") is None
+        assert await cache.invalidate({}, [_C, uuid4()]) == 1
+        assert await cache.get("c") is None
+
+    async def test_replace_and_clear(self, backend):
+        """同じキーへの保存は置き換え、clear で全て消える"""
+        cache, _ = backend
+        await cache.set("key", _entry({_A: 1}))
+        await cache.set("key", _entry({_B: 2}, origin="b"))
+
+        assert (await cache.get("key")).origin == "b"
+        await cache.clear()
+        assert await cache.get("key") is None
+
+
+class TestSharedCache:
+    async def test_cross_instance_hits(self, shared):
+        """他のインスタンスが保存した提案を返し、インスタンス間のヒットとして数える"""
+        first_client, second_client = _mock_client(), _mock_client()
+        first = SuggestionService(client=first_client, cache=shared[0], instance_id="first")
+        second = SuggestionService(client=second_client, cache=shared[1], instance_id="second")
+        tasks = [_task("資料作成"), _task("会議")]
+
+        assert (await first.get_suggestions(tasks)).cached is False
+        result = await second.get_suggestions(tasks)
+        await second.get_suggestions(tasks[:1])
+
+        assert result.cached is True
+        assert result.suggestions[0].title == "タスク1"
+        assert second_client.chat.completions.create.call_count == 1
+        metrics = second.metrics()
+        assert (metrics.hits, metrics.cross_instance_hits, metrics.misses) == (1, 1, 1)
+        assert metrics.cross_instance_hit_rate == 0.5
+
+        # 一方のインスタンスでの書き込みは他方のキャッシュからも消える
+        await second.invalidate(deleted=[tasks[0].id])
+        assert (await first.get_suggestions(tasks)).cached is False
+
+    async def test_unreachable_redis_falls_back_to_openai(self):
+        """Redis に接続できなくても提案を返し、エラーとして数える"""
+        client = _mock_client()
+        cache = RedisSuggestionCache(RedisClient("redis://127.0.0.1:1", timeout=0.5))
+        service = SuggestionService(client=client, cache=cache)
+
+        result = await service.get_suggestions([_task("資料作成")])
+        assert await service.invalidate(deleted=[uuid4()]) == 0
+
+        assert result.cached is False
+        assert service.metrics().errors == 3
+
+    @pytest.mark.parametrize("kind", ["sqlite", "redis"])
+    @pytest.mark.parametrize(
+        "value",
+        [
+            "{",
+            '{"fingerprints": [], "suggestions": [], "origin": "x"}',
+            '{"fingerprints": {}, "suggestions": "提案", "origin": "x"}',
+            '{"fingerprints": {}, "suggestions": [{"title": 1}], "origin": "x"}',
+        ],
+    )
+    async def test_unreadable_entry_is_a_miss(self, tmp_path, kind, value):
+        """読めない値（壊れた・他の形式のエントリ）はミスとして扱い、エラーとして数える"""
+        tasks = [_task("資料作成")]
+        if kind == "sqlite":
+            path = str(tmp_path / "cache.db")
+            cache = SqliteSuggestionCache(path)
+            service = SuggestionService(client=_mock_client(), cache=cache)
+            await service.get_suggestions(tasks)
+            conn = sqlite3.connect(path)
+            with conn:
+                conn.execute("UPDATE suggestion_cache SET value = ?", (value,))
+            conn.close()
+            result = await service.get_suggestions(tasks)
+        else:
+            async with FakeRedisServer() as server:
+                cache = RedisSuggestionCache(RedisClient(server.url))
+                service = SuggestionService(client=_mock_client(), cache=cache)
+                await service.get_suggestions(tasks)
+                client = RedisClient(server.url)
+                _, keys = await client.execute("SCAN", 0, "MATCH", "*entry:*")
+                for key in keys:
+                    await client.execute("SET", key, value)
+                await client.close()
+                result = await service.get_suggestions(tasks)
+        await cache.close()
+
+        assert result.cached is False
+        assert result.suggestions[0].title == "タスク1"
+        assert service.metrics().errors == 1
+
+
+class TestRedisStandIn:
+    async def test_commands(self):
+        """スタンドインが使うコマンドに応答し、エラー応答は RedisError になる"""
+        async with FakeRedisServer() as server:
+            client = RedisClient(server.url)
+            replies = await client.pipeline(
+                [
+                    ("SET", "k", "値"),
+                    ("GET", "k"),
+                    ("HSET", "h", "f1", "1", "f2", "2"),
+                    ("HDEL", "h", "f1"),
+                    ("HGETALL", "h"),
+                    ("SCAN", 0, "MATCH", "h*"),
+                    ("DEL", "k", "missing"),
+                ]
+            )
+            assert replies == ["OK", "値".encode(), 2, 1, [b"f2", b"2"], [b"0", [b"h"]], 1]
+            with pytest.raises(RedisError, match="WRONGTYPE"):
+                await client.execute("GET", "h")
+            with pytest.raises(RedisError, match="unknown command"):
+                await client.execute("NOPE")
+            assert await client.execute("PING") == "PONG"
+            await client.close()
+
+    async def test_cancelled_call_does_not_leave_reply_behind(self):
+        """応答を読む前にキャンセルした呼び出しの応答を、次の呼び出しが受け取らない"""
+        received = asyncio.Event()
+        release = asyncio.Event()
+
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            # GET のキーを値として返すサーバー（release まで応答を保留する）
+            try:
+                while True:
+                    _, key = await read_reply(reader)
+                    received.set()
+                    await release.wait()
+                    writer.write(b"$%d\r\nvalue-of-%s\r\n" % (len(key) + 9, key))
+                    await writer.drain()
+            except (asyncio.IncompleteReadError, ConnectionError):
+                pass
+            finally:
+                writer.close()
+
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        host, port = server.sockets[0].getsockname()[:2]
+        client = RedisClient(f"redis://{host}:{port}/0")
+        call = asyncio.create_task(client.execute("GET", "a"))
+        await received.wait()
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+        release.set()
+
+        assert await client.execute("GET", "b") == b"value-of-b"
+        await client.close()
+        server.close()
+        await server.wait_closed()
+
+    async def test_reconnects_after_restart(self):
+        """接続が切れた後の呼び出しで接続し直す"""
+        server = FakeRedisServer()
+        url = await server.start()
+        client = RedisClient(url)
+        await client.execute("SET", "k", "v")
+        await server.close()
+        restarted = FakeRedisServer(port=int(url.rsplit(":", 1)[1].split("/")[0]))
+        await restarted.start()
+
+        with pytest.raises((OSError, EOFError)):
+            await client.execute("GET", "k")
+        assert await client.execute("GET", "k") is None
+        await client.close()
+        await restarted.close()
+
+
+class TestConfiguration:
+    async def test_backend_from_env(self, monkeypatch, tmp_path):
+        """環境変数で Redis・SQLite・プロセス内を切り替える"""
+        monkeypatch.delenv("SUGGESTION_CACHE_REDIS_URL", raising=False)
+        monkeypatch.delenv("SUGGESTION_CACHE_PATH", raising=False)
+        assert isinstance(cache_backend_from_env(), MemorySuggestionCache)
+
+        monkeypatch.setenv("SUGGESTION_CACHE_PATH", str(tmp_path / "cache.db"))
+        sqlite_cache = cache_backend_from_env()
+        assert isinstance(sqlite_cache, SqliteSuggestionCache)
+        await sqlite_cache.close()
+
+        monkeypatch.setenv("SUGGESTION_CACHE_REDIS_URL", "redis://localhost:6379/1")
+        assert isinstance(cache_backend_from_env(), RedisSuggestionCache)
+
+    async def test_metrics_endpoint(self):
+        """GET /api/tasks/suggestions/metrics でヒット率を返す"""
+        service = SuggestionService(client=_mock_client(), instance_id="instance-1")
+        reset_repository()
+        set_repository(InMemoryTaskRepository())
+        app.dependency_overrides[get_suggestion_service] = lambda: service
+        try:
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+                await ac.get("/api/tasks/suggestions")
+                await ac.get("/api/tasks/suggestions")
+                response = await ac.get("/api/tasks/suggestions/metrics")
+        finally:
+            app.dependency_overrides.clear()
+            reset_repository()
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "backend": "MemorySuggestionCache",
+            "instance": "instance-1",
+            "hits": 1,
+            "stale_hits": 0,
+            "cross_instance_hits": 0,
+            "misses": 1,
+            "errors": 0,
+            "coalesced": 0,
+            "hit_rate": 0.5,
+            "cross_instance_hit_rate": 0.0,
+            "prompt_tokens": response.json()["prompt_tokens"],
+            "prompt_tokens_saved": 0,
+        }
+        assert response.json()["prompt_tokens"] > 0
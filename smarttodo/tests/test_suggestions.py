@@ -1,3 +1,5 @@
+import asyncio
+import json
 from datetime import datetime
 from unittest.mock import AsyncMock, MagicMock
 from uuid import uuid4
@@ -5,11 +7,42 @@ from uuid import uuid4
 import pytest
 from httpx import ASGITransport, AsyncClient
 
-from src.ai.prompts import SUGGESTION_SYSTEM_PROMPT, build_suggestion_prompt
-from src.ai.suggestions import SuggestionService, TaskSuggestion
+from src.ai.cache import MemorySuggestionCache
+from src.ai.prompts import (
+    COMPLETED_SAMPLE,
+    DESCRIPTION_MAX_CHARS,
+    SUGGESTION_SYSTEM_PROMPT,
+    build_budgeted_prompt,
+    build_suggestion_prompt,
+    estimate_tokens,
+    rank_tasks,
+)
+from src.ai.stream import SuggestionStreamParser
+from src.ai.suggestions import (
+    SuggestionResponse,
+    SuggestionService,
+    TaskSuggestion,
+    task_fingerprint,
+)
 from src.main import app
-from src.models.task import TaskPriority, TaskResponse, TaskStatus
-from src.services.firestore import InMemoryTaskRepository, reset_repository, set_repository
+from src.models.task import (
+    SuggestionTask,
+    TaskCounts,
+    TaskPriority,
+    TaskResponse,
+    TaskStatus,
+)
+from src.services.cache import with_cache
+from src.services.columnar import ColumnarTaskRepository
+from src.services.fake_firestore import FakeFirestoreClient
+from src.services.firestore import (
+    FirestoreTaskRepository,
+    InMemoryTaskRepository,
+    reset_repository,
+    set_repository,
+)
+from src.services.snapshot import SnapshotTaskRepository
+from src.services.sqlite import SqliteTaskRepository
 
 
 @pytest.fixture
@@ -70,6 +103,88 @@ class TestPrompts:
         assert "3件" in prompt
         assert "JSON形式" in prompt
 
+    def test_estimate_tokens(self):
+        """日本語は1文字1トークン、ASCII は4文字で1トークンとして見積もる"""
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("週次レポート") == 6
+        assert estimate_tokens("abcdefgh") == 2
+        assert estimate_tokens("資料 draft") == 4
+
+    def test_rank_tasks(self):
+        """期限切れ・優先度「高」・その他の未完了の順、完了は直近のものだけ"""
+        now = datetime(2026, 1, 10)
+        low_later = _prompt_task("後で", due_date=datetime(2026, 2, 1))
+        high = _prompt_task("重要", priority=TaskPriority.HIGH)
+        overdue = _prompt_task("期限切れ", due_date=datetime(2026, 1, 5))
+        low_soon = _prompt_task("もうすぐ", due_date=datetime(2026, 1, 12))
+        completed = [
+            _prompt_task(
+                f"完了{i}", status=TaskStatus.COMPLETED, created_at=datetime(2025, 1, i + 1)
+            )
+            for i in range(COMPLETED_SAMPLE + 2)
+        ]
+
+        ranked = rank_tasks([*completed, low_later, high, overdue, low_soon], now)
+
+        assert [t.title for t in ranked[:4]] == ["期限切れ", "重要", "もうすぐ", "後で"]
+        assert len(ranked) == 4 + COMPLETED_SAMPLE
+        assert ranked[4].title == f"完了{COMPLETED_SAMPLE + 1}"
+
+    def test_budgeted_prompt_fits_budget(self):
+        """予算に収まる行だけを書き、説明を切り詰め、削減したトークン数を返す"""
+        tasks = [_prompt_task(f"タスク{i}", description="説明" * 500) for i in range(100)]
+
+        prompt = build_budgeted_prompt(tasks, limit=3, budget=800)
+
+        assert prompt.tokens <= 800
+        assert 0 < prompt.included < 100
+        assert prompt.included + prompt.omitted == 100
+        assert prompt.saved_tokens == prompt.full_tokens - prompt.tokens > 90_000
+        row = next(line for line in prompt.text.splitlines() if "タスク0|" in line)
+        description = row.rsplit("|", 1)[1]
+        assert len(description) == DESCRIPTION_MAX_CHARS and description.endswith("…")
+        assert "タスクは全100件（未完了・進行中100件、うち期限切れ0件、完了0件）" in prompt.text
+        assert f"そのうち{prompt.included}件の一覧" in prompt.text
+        assert "JSON形式" in prompt.text
+
+    def test_budgeted_prompt_with_repository_counts(self):
+        """リポジトリで数えた件数を見出しに書き、省いた件数に含める"""
+        tasks = [_prompt_task("資料作成", due_date=datetime(2026, 1, 5))]
+
+        prompt = build_budgeted_prompt(tasks, counts=TaskCounts(40, 60, 3))
+        local = build_budgeted_prompt(tasks, now=datetime(2026, 1, 10))
+
+        assert "全100件（未完了・進行中40件、うち期限切れ3件、完了60件）" in prompt.text
+        assert (prompt.included, prompt.omitted) == (1, 99)
+        assert "全1件（未完了・進行中1件、うち期限切れ1件、完了0件）" in local.text
+
+    def test_budgeted_prompt_escapes_cells(self):
+        """改行・区切り文字を含むフィールドでも1件1行になる"""
+        task = _prompt_task("A|B", description="1行目\n2行目", due_date=datetime(2026, 3, 1))
+
+        prompt = build_budgeted_prompt([task])
+
+        assert "未完了|中|2026-03-01|A｜B|1行目 2行目" in prompt.text.splitlines()
+
+
+def _prompt_task(
+    title: str,
+    description: str = "",
+    due_date: datetime | None = None,
+    status: TaskStatus = TaskStatus.PENDING,
+    priority: TaskPriority = TaskPriority.MEDIUM,
+    created_at: datetime = datetime(2026, 1, 1),
+) -> TaskResponse:
+    return TaskResponse(
+        id=uuid4(),
+        title=title,
+        description=description,
+        due_date=due_date,
+        status=status,
+        priority=priority,
+        created_at=created_at,
+    )
+
 
 # --------------------------------------------------------------------------
 # SuggestionService テスト
@@ -150,13 +265,80 @@ class TestSuggestionService:
         service = SuggestionService(client=mock_client)
 
         await service.get_suggestions(sample_tasks, limit=3)
-        service.clear_cache()
+        await service.clear_cache()
         result = await service.get_suggestions(sample_tasks, limit=3)
 
         # キャッシュクリア後は新規取得
         assert result.cached is False
         assert mock_client.chat.completions.create.call_count == 2
 
+    async def test_content_change_misses_cache(self, sample_tasks):
+        """同じタスクでもプロンプトに使う内容が変わればキャッシュを使わない"""
+        mock_client = self._create_mock_client(
+            '{"suggestions": [{"title": "タスク1", "reason": "理由1", "priority": "medium"}]}'
+        )
+        service = SuggestionService(client=mock_client)
+
+        await service.get_suggestions(sample_tasks, limit=3)
+        changed = [sample_tasks[0].model_copy(update={"status": TaskStatus.COMPLETED})]
+        result = await service.get_suggestions(changed + sample_tasks[1:], limit=3)
+        tagged = [sample_tasks[0].model_copy(update={"tags": ["work"]})]
+        reordered = await service.get_suggestions(sample_tasks[1:] + tagged, limit=3)
+
+        assert result.cached is False
+        # プロンプトに使わないタグの変更・並び順の違いはキャッシュを使う
+        assert reordered.cached is True
+        assert mock_client.chat.completions.create.call_count == 2
+
+    async def test_count_change_misses_cache(self, sample_tasks):
+        """一覧に含まれないタスクの増減で件数が変われば、同じタスクでもキャッシュを使わない"""
+        mock_client = self._create_mock_client(
+            '{"suggestions": [{"title": "タスク1", "reason": "理由1", "priority": "medium"}]}'
+        )
+        service = SuggestionService(client=mock_client)
+
+        await service.get_suggestions(sample_tasks, limit=3, counts=TaskCounts(40, 60, 3))
+        more = await service.get_suggestions(sample_tasks, limit=3, counts=TaskCounts(41, 60, 3))
+        same = await service.get_suggestions(sample_tasks, limit=3, counts=TaskCounts(40, 60, 3))
+        counted = await service.get_suggestions(sample_tasks, limit=3)
+
+        assert more.cached is False
+        assert same.cached is True
+        # 件数を渡さない場合は tasks から数えた件数をキーにする
+        assert counted.cached is False
+        assert mock_client.chat.completions.create.call_count == 3
+
+    def test_suggestion_task_fingerprint_matches_response(self, sample_tasks):
+        """SuggestionTask の（使い回す）フィンガープリントは同じ内容の TaskResponse と一致する"""
+        for task in sample_tasks:
+            light = SuggestionTask.from_dict(task.model_dump())
+
+            assert task_fingerprint(light) == task_fingerprint(task)
+            assert task_fingerprint(light) == task_fingerprint(
+                SuggestionTask.from_dict(task.model_dump())
+            )
+            changed = light._replace(title=light.title + "!")
+            assert task_fingerprint(changed) != task_fingerprint(light)
+
+    async def test_invalidate_only_affected_entries(self, sample_tasks):
+        """書き込まれたタスクを含み、内容が変わったエントリのみ無効化する"""
+        mock_client = self._create_mock_client(
+            '{"suggestions": [{"title": "タスク1", "reason": "理由1", "priority": "medium"}]}'
+        )
+        service = SuggestionService(client=mock_client)
+        first, second = sample_tasks
+        await service.get_suggestions([first], limit=3)
+        await service.get_suggestions([second], limit=3)
+        await service.get_suggestions(sample_tasks, limit=3)
+
+        unchanged = first.model_copy(update={"tags": ["work"]})
+        assert await service.invalidate(updated=[unchanged]) == 0
+        renamed = first.model_copy(update={"title": "月次レポート作成"})
+        assert await service.invalidate(updated=[renamed]) == 2
+        assert (await service.get_suggestions([second], limit=3)).cached is True
+        assert await service.invalidate(deleted=[second.id, uuid4()]) == 1
+        assert len(service._cache) == 0
+
     async def test_parse_response_handles_invalid_json(self, sample_tasks):
         """不正なJSONでも空リストを返す"""
         mock_client = self._create_mock_client("invalid json")
@@ -205,6 +387,473 @@ class TestSuggestionService:
         assert result.suggestions[0].priority == TaskPriority.MEDIUM
 
 
+# --------------------------------------------------------------------------
+# 同時リクエストの集約（single-flight）テスト
+# --------------------------------------------------------------------------
+class TestSingleFlight:
+    def _gated_client(self, gate: asyncio.Event, error: Exception | None = None) -> AsyncMock:
+        """gate が立つまで応答しないモッククライアント"""
+        response = MagicMock()
+        choice = MagicMock()
+        choice.message.content = '{"suggestions": [{"title": "共有", "reason": "理由"}]}'
+        response.choices = [choice]
+
+        async def create(**kwargs):
+            await gate.wait()
+            if error is not None:
+                raise error
+            return response
+
+        mock_client = AsyncMock()
+        mock_client.chat.completions.create = AsyncMock(side_effect=create)
+        return mock_client
+
+    async def test_concurrent_requests_share_one_call(self, sample_tasks):
+        """同じキーへの同時のリクエストは1回の呼び出しの結果を共有する"""
+        gate = asyncio.Event()
+        mock_client = self._gated_client(gate)
+        service = SuggestionService(client=mock_client)
+
+        waiters = [asyncio.create_task(service.get_suggestions(sample_tasks)) for _ in range(5)]
+        other = asyncio.create_task(service.get_suggestions(sample_tasks, limit=5))
+        await asyncio.sleep(0)
+        gate.set()
+        results = await asyncio.gather(*waiters, other)
+
+        assert mock_client.chat.completions.create.call_count == 2
+        assert all(r.suggestions[0].title == "共有" and r.cached is False for r in results)
+        assert (service.stats.misses, service.stats.coalesced) == (2, 4)
+        assert service.metrics().coalesced == 4
+        assert (await service.get_suggestions(sample_tasks)).cached is True
+        assert service._inflight == {}
+
+    async def test_joins_before_cache_lookup(self, sample_tasks):
+        """生成中の提案があれば、後のリクエストは共有キャッシュを見ずにそれを待つ"""
+        gate = asyncio.Event()
+        cache = MemorySuggestionCache()
+        get = cache.get
+        cache.get = AsyncMock(side_effect=get)
+        service = SuggestionService(client=self._gated_client(gate), cache=cache)
+
+        first = asyncio.create_task(service.get_suggestions(sample_tasks))
+        await asyncio.sleep(0)
+        later = [asyncio.create_task(service.get_suggestions(sample_tasks)) for _ in range(3)]
+        await asyncio.sleep(0)
+        gate.set()
+        await asyncio.gather(first, *later)
+
+        assert cache.get.call_count == 1
+        assert (service.stats.misses, service.stats.coalesced) == (1, 3)
+
+    async def test_error_propagates_to_all_waiters(self, sample_tasks):
+        """呼び出しのエラーは待っている全員に伝わり、次のリクエストは呼び直す"""
+        gate = asyncio.Event()
+        service = SuggestionService(client=self._gated_client(gate, RuntimeError("rate limit")))
+
+        waiters = [asyncio.create_task(service.get_suggestions(sample_tasks)) for _ in range(3)]
+        await asyncio.sleep(0)
+        gate.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+
+        assert all(isinstance(r, RuntimeError) and str(r) == "rate limit" for r in results)
+        assert service._inflight == {}
+        service._client = self._gated_client(gate)
+        assert (await service.get_suggestions(sample_tasks)).cached is False
+
+    async def test_cancelled_waiter_does_not_cancel_others(self, sample_tasks):
+        """最初のリクエストが取り消されても、他のリクエストは結果を受け取る"""
+        gate = asyncio.Event()
+        mock_client = self._gated_client(gate)
+        service = SuggestionService(client=mock_client)
+
+        first = asyncio.create_task(service.get_suggestions(sample_tasks))
+        second = asyncio.create_task(service.get_suggestions(sample_tasks))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        gate.set()
+
+        assert (await second).suggestions[0].title == "共有"
+        assert first.cancelled()
+        assert mock_client.chat.completions.create.call_count == 1
+
+    async def test_call_cancelled_when_all_waiters_leave(self, sample_tasks):
+        """待つリクエストがいなくなれば呼び出しを取り消し、次のリクエストは呼び直す"""
+        gate = asyncio.Event()
+        mock_client = self._gated_client(gate)
+        service = SuggestionService(client=mock_client)
+
+        waiters = [asyncio.create_task(service.get_suggestions(sample_tasks)) for _ in range(2)]
+        await asyncio.sleep(0)
+        flight = service._inflight[next(iter(service._inflight))]
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0)
+
+        assert flight.task.cancelled()
+        assert service._inflight == {}
+        gate.set()
+        assert (await service.get_suggestions(sample_tasks)).cached is False
+        assert mock_client.chat.completions.create.call_count == 2
+
+
+# --------------------------------------------------------------------------
+# stale-while-revalidate テスト
+# --------------------------------------------------------------------------
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestStaleWhileRevalidate:
+    def _service(self, client: AsyncMock, clock: _Clock) -> SuggestionService:
+        cache = MemorySuggestionCache(ttl=3600, timer=clock)
+        return SuggestionService(
+            client=client, cache_ttl=300, cache_hard_ttl=3600, cache=cache, timer=clock
+        )
+
+    def _client(self, gate: asyncio.Event, titles: list[str]) -> AsyncMock:
+        """呼び出しごとに titles の順にタイトルを返し、gate が立つまで応答しないクライアント"""
+        responses = iter(titles)
+
+        async def create(**kwargs):
+            title = next(responses)
+            await gate.wait()
+            if title is None:
+                raise RuntimeError("rate limit")
+            response = MagicMock()
+            choice = MagicMock()
+            choice.message.content = f'{{"suggestions": [{{"title": "{title}", "reason": ""}}]}}'
+            response.choices = [choice]
+            return response
+
+        mock_client = AsyncMock()
+        mock_client.chat.completions.create = AsyncMock(side_effect=create)
+        return mock_client
+
+    async def _refreshed(self, service: SuggestionService) -> None:
+        """バックグラウンドの更新の終了を待つ"""
+        for flight in list(service._inflight.values()):
+            await asyncio.gather(flight.task, return_exceptions=True)
+
+    async def test_stale_served_while_refreshing(self, sample_tasks):
+        """ソフト TTL を過ぎた提案は待たずに返し、更新は1回だけバックグラウンドで行う"""
+        clock = _Clock()
+        gate = asyncio.Event()
+        gate.set()
+        mock_client = self._client(gate, ["初回", "更新後"])
+        service = self._service(mock_client, clock)
+        await service.get_suggestions(sample_tasks)
+
+        clock.now += 299
+        fresh = await service.get_suggestions(sample_tasks)
+        assert (fresh.cached, fresh.stale) == (True, False)
+
+        gate.clear()
+        clock.now += 1
+        stale = [await service.get_suggestions(sample_tasks) for _ in range(3)]
+        assert all(r.stale and r.cached and r.suggestions[0].title == "初回" for r in stale)
+        await asyncio.sleep(0)
+        assert mock_client.chat.completions.create.call_count == 2
+
+        gate.set()
+        await self._refreshed(service)
+        result = await service.get_suggestions(sample_tasks)
+        assert (result.stale, result.suggestions[0].title) == (False, "更新後")
+        assert service.metrics().stale_hits == 3
+
+    async def test_blocks_after_hard_ttl(self, sample_tasks):
+        """ハード TTL を過ぎた提案は返さずに生成を待つ"""
+        clock = _Clock()
+        gate = asyncio.Event()
+        gate.set()
+        mock_client = self._client(gate, ["初回", "再生成"])
+        service = self._service(mock_client, clock)
+        await service.get_suggestions(sample_tasks)
+
+        clock.now += 3600
+        result = await service.get_suggestions(sample_tasks)
+
+        assert (result.cached, result.stale) == (False, False)
+        assert result.suggestions[0].title == "再生成"
+
+    async def test_failed_refresh_keeps_stale_entry(self, sample_tasks):
+        """更新に失敗しても古い提案を返し続け、次の読み取りで更新し直す"""
+        clock = _Clock()
+        gate = asyncio.Event()
+        gate.set()
+        mock_client = self._client(gate, ["初回", None, "更新後"])
+        service = self._service(mock_client, clock)
+        await service.get_suggestions(sample_tasks)
+
+        clock.now += 600
+        assert (await service.get_suggestions(sample_tasks)).stale is True
+        await self._refreshed(service)
+        assert (await service.get_suggestions(sample_tasks)).suggestions[0].title == "初回"
+        await self._refreshed(service)
+
+        assert (await service.get_suggestions(sample_tasks)).suggestions[0].title == "更新後"
+        assert mock_client.chat.completions.create.call_count == 3
+
+
+# --------------------------------------------------------------------------
+# ストリーミングテスト
+# --------------------------------------------------------------------------
+_STREAMED = json.dumps(
+    {
+        "suggestions": [
+            {"title": "議事録の共有", "reason": "会議 {週次} の後", "priority": "high"},
+            {"title": '"引用" と \\ を含む', "reason": "[括弧]", "priority": "invalid"},
+            {"title": "請求書の送付", "reason": "月末", "priority": "low"},
+        ]
+    },
+    ensure_ascii=False,
+)
+
+
+class _Stream:
+    """stream=True の応答（断片を1つずつ返し、読んだ数と閉じたかを記録する）"""
+
+    def __init__(self, parts: list[str]) -> None:
+        self.parts = parts
+        self.consumed = 0
+        self.closed = False
+
+    async def __aenter__(self) -> "_Stream":
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        self.closed = True
+
+    def __aiter__(self):
+        return self._chunks()
+
+    async def _chunks(self):
+        for part in self.parts:
+            # ネットワークからの受信を待つ間は他のタスクに切り替わる
+            await asyncio.sleep(0)
+            self.consumed += 1
+            chunk = MagicMock()
+            chunk.choices = [MagicMock()]
+            chunk.choices[0].delta.content = part
+            yield chunk
+
+
+def _split(text: str, size: int) -> list[str]:
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+class TestSuggestionStreamParser:
+    @pytest.mark.parametrize("size", [1, 2, 7, 1000])
+    def test_items_in_order_regardless_of_chunking(self, size):
+        """どこで区切られても、文字列中の括弧・エスケープを含む要素を順に取り出す"""
+        parser = SuggestionStreamParser()
+        items = [item for part in _split(_STREAMED, size) for item in parser.feed(part)]
+
+        assert items == json.loads(_STREAMED)["suggestions"]
+        assert parser.done
+
+    def test_item_emitted_when_closed(self):
+        """要素は閉じ括弧が届いた時点で返し、配列以外や不正な要素は無視する"""
+        parser = SuggestionStreamParser()
+
+        assert parser.feed('{"note": {"a": 1}, "suggestions": [{"title": "A"') == []
+        assert parser.feed('}, 3, {"title": "B"}') == [{"title": "A"}, {"title": "B"}]
+        assert parser.feed(', {"title": }, {"title": "C"}]} {"title": "D"}') == [{"title": "C"}]
+
+
+class TestStreamSuggestions:
+    def _client(self, stream: _Stream) -> AsyncMock:
+        mock_client = AsyncMock()
+        mock_client.chat.completions.create = AsyncMock(return_value=stream)
+        return mock_client
+
+    async def test_yields_each_suggestion_as_completed(self, sample_tasks):
+        """提案は配列の要素が閉じるたびに返し、最後まで受け取った結果はキャッシュする"""
+        stream = _Stream(_split(_STREAMED, 5))
+        mock_client = self._client(stream)
+        service = SuggestionService(client=mock_client)
+
+        consumed = []
+        items = []
+        async for item in service.stream_suggestions(sample_tasks, limit=3):
+            consumed.append(stream.consumed)
+            items.append(item)
+
+        assert mock_client.chat.completions.create.call_args.kwargs["stream"] is True
+        assert [i.title for i in items[:3]] == [
+            "議事録の共有",
+            '"引用" と \\ を含む',
+            "請求書の送付",
+        ]
+        assert items[1].priority == TaskPriority.MEDIUM
+        # 最初の提案は全体を読み終える前に返る
+        assert consumed[0] < consumed[1] < consumed[2] <= len(stream.parts)
+        assert isinstance(items[3], SuggestionResponse)
+        assert items[3].suggestions == items[:3] and items[3].cached is False
+
+        cached = await service.get_suggestions(sample_tasks, limit=3)
+        assert cached.cached is True
+        assert cached.suggestions == items[:3]
+
+    async def test_stops_reading_at_limit(self, sample_tasks):
+        """limit 件そろったら残りを読まずに接続を閉じる"""
+        stream = _Stream(_split(_STREAMED, 5))
+        service = SuggestionService(client=self._client(stream))
+
+        items = [item async for item in service.stream_suggestions(sample_tasks, limit=1)]
+
+        assert len(items) == 2 and items[-1].suggestions == items[:1]
+        assert stream.consumed < len(stream.parts)
+        assert stream.closed
+
+    async def test_disconnected_stream_is_not_cached(self, sample_tasks):
+        """途中で打ち切られたストリームはキャッシュしない"""
+        stream = _Stream(_split(_STREAMED, 5))
+        mock_client = self._client(stream)
+        service = SuggestionService(client=mock_client)
+
+        events = service.stream_suggestions(sample_tasks, limit=3)
+        await anext(events)
+        await events.aclose()
+        # 待つリクエストがいなくなった生成は取り消され、次のループで接続を閉じる
+        await asyncio.sleep(0)
+
+        assert stream.closed
+        mock_client.chat.completions.create.return_value = _Stream([_STREAMED])
+        items = [item async for item in service.stream_suggestions(sample_tasks, limit=3)]
+        assert items[-1].cached is False
+        assert mock_client.chat.completions.create.call_count == 2
+
+    async def test_truncated_stream_is_not_cached(self, sample_tasks):
+        """配列が閉じる前に終わったストリーム（長さの上限など）の提案はキャッシュしない"""
+        mock_client = self._client(_Stream([_STREAMED[: _STREAMED.index("請求書")]]))
+        service = SuggestionService(client=mock_client)
+
+        items = [item async for item in service.stream_suggestions(sample_tasks, limit=3)]
+        assert len(items[-1].suggestions) == 2
+
+        mock_client.chat.completions.create.return_value = _Stream([_STREAMED])
+        items = [item async for item in service.stream_suggestions(sample_tasks, limit=3)]
+        assert items[-1].cached is False and len(items[-1].suggestions) == 3
+        assert mock_client.chat.completions.create.call_count == 2
+
+    async def test_concurrent_requests_share_stream(self, sample_tasks):
+        """生成中のストリームに後から加わったリクエストも同じ1回の呼び出しの提案を受け取る"""
+        mock_client = self._client(_Stream(_split(_STREAMED, 5)))
+        service = SuggestionService(client=mock_client)
+
+        async def collect():
+            return [item async for item in service.stream_suggestions(sample_tasks, limit=3)]
+
+        first = service.stream_suggestions(sample_tasks, limit=3)
+        head = await anext(first)
+        streams = [asyncio.create_task(collect()) for _ in range(3)]
+        response = await service.get_suggestions(sample_tasks, limit=3)
+        rest = [item async for item in first]
+
+        assert mock_client.chat.completions.create.call_count == 1
+        assert [head, *rest[:-1]] == response.suggestions
+        for items in await asyncio.gather(*streams):
+            assert items[:-1] == response.suggestions
+        assert service.stats.misses == 1 and service.stats.coalesced == 4
+
+    async def test_stream_error_reaches_joined_requests(self, sample_tasks):
+        """ストリームの生成のエラーは加わった全てのリクエストに伝わる"""
+        mock_client = AsyncMock()
+        mock_client.chat.completions.create = AsyncMock(side_effect=RuntimeError("API error"))
+        service = SuggestionService(client=mock_client)
+
+        async def collect():
+            return [item async for item in service.stream_suggestions(sample_tasks)]
+
+        results = await asyncio.gather(
+            collect(), service.get_suggestions(sample_tasks), return_exceptions=True
+        )
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert mock_client.chat.completions.create.call_count == 1
+
+    async def test_cache_hit_skips_openai(self, sample_tasks):
+        """キャッシュにある提案はそのまま返す"""
+        mock_client = self._client(_Stream([]))
+        service = SuggestionService(client=mock_client)
+        mock_client.chat.completions.create.return_value = MagicMock(
+            choices=[MagicMock(message=MagicMock(content=_STREAMED))]
+        )
+        await service.get_suggestions(sample_tasks, limit=2)
+
+        items = [item async for item in service.stream_suggestions(sample_tasks, limit=2)]
+
+        assert [i.title for i in items[:2]] == ["議事録の共有", '"引用" と \\ を含む']
+        assert items[2].cached is True
+        assert mock_client.chat.completions.create.call_count == 1
+
+
+# --------------------------------------------------------------------------
+# リポジトリの suggestion_context テスト
+# --------------------------------------------------------------------------
+@pytest.fixture(params=["memory", "columnar", "sqlite", "firestore", "cached", "snapshot"])
+async def repo(request, tmp_path):
+    if request.param == "sqlite":
+        repo = SqliteTaskRepository(str(tmp_path / "tasks.db"))
+    elif request.param == "firestore":
+        repo = FirestoreTaskRepository(db=FakeFirestoreClient(), max_workers=2)
+    elif request.param == "columnar":
+        repo = ColumnarTaskRepository()
+    elif request.param == "cached":
+        repo = with_cache(InMemoryTaskRepository())
+    elif request.param == "snapshot":
+        repo = SnapshotTaskRepository(ColumnarTaskRepository(), tmp_path)
+    else:
+        repo = InMemoryTaskRepository()
+    yield repo
+    if isinstance(repo, SqliteTaskRepository):
+        repo.close()
+    elif isinstance(repo, SnapshotTaskRepository):
+        await repo.close()
+
+
+class TestSuggestionContext:
+    async def test_working_set_and_counts(self, repo):
+        """未完了は期限の近い順（期限なしは後）、完了は新しい順に上限まで取得し、全件を数える"""
+        for title, status, due in [
+            ("期限切れ", "pending", datetime(2026, 1, 5)),
+            ("来週", "in_progress", datetime(2026, 1, 20)),
+            ("来月", "pending", datetime(2026, 2, 1)),
+            ("期限なし1", "pending", None),
+            ("期限なし2", "in_progress", None),
+            ("完了1", "completed", datetime(2025, 12, 1)),
+            ("完了2", "completed", None),
+            ("完了3", "completed", None),
+        ]:
+            await repo.create({"title": title, "status": status, "due_date": due})
+
+        context = await repo.suggestion_context(
+            open_limit=4, completed_limit=2, now=datetime(2026, 1, 10)
+        )
+        wide = await repo.suggestion_context(open_limit=10, now=datetime(2026, 1, 10))
+
+        assert [t.title for t in context.open_tasks] == ["期限切れ", "来週", "来月", "期限なし1"]
+        assert [t.title for t in context.completed] == ["完了3", "完了2"]
+        assert context.counts == TaskCounts(5, 3, 1)
+        assert [t.title for t in wide.open_tasks][3:] == ["期限なし1", "期限なし2"]
+        task = context.open_tasks[1]
+        assert isinstance(task, SuggestionTask)
+        assert (task.status, task.priority) == (TaskStatus.IN_PROGRESS, TaskPriority.MEDIUM)
+
+    async def test_empty(self, repo):
+        """タスクがない場合は空の作業セット"""
+        context = await repo.suggestion_context()
+
+        assert context.tasks == []
+        assert context.counts == TaskCounts(0, 0, 0)
+
+
 # --------------------------------------------------------------------------
 # API エンドポイントテスト
 # --------------------------------------------------------------------------
@@ -264,6 +913,27 @@ class TestSuggestionsAPI:
         # 位置引数またはキーワード引数で limit=5 が渡されることを確認
         assert call_args[0][1] == 5 or call_args.kwargs.get("limit") == 5
 
+    async def test_get_suggestions_uses_suggestion_context(self, mock_service):
+        """リポジトリの suggestion_context のタスクと件数を渡す"""
+        from src.ai.suggestions import get_suggestion_service
+
+        reset_repository()
+        repo = InMemoryTaskRepository()
+        await repo.create({"title": "資料作成", "status": "pending"})
+        await repo.create({"title": "会議", "status": "completed"})
+        set_repository(repo)
+        app.dependency_overrides[get_suggestion_service] = lambda: mock_service
+
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            await ac.get("/api/tasks/suggestions")
+
+        app.dependency_overrides.clear()
+        reset_repository()
+
+        tasks, limit, counts = mock_service.get_suggestions.call_args.args
+        assert [t.title for t in tasks] == ["資料作成", "会議"]
+        assert (limit, counts) == (3, TaskCounts(1, 1, 0))
+
     async def test_get_suggestions_limit_validation_min(self, client: AsyncClient):
         """limit の最小値バリデーション"""
         response = await client.get("/api/tasks/suggestions", params={"limit": 0})
@@ -291,3 +961,71 @@ class TestSuggestionsAPI:
 
         assert response.status_code == 204
         mock_service.clear_cache.assert_called_once()
+
+    async def test_task_writes_invalidate_suggestions(self, client: AsyncClient):
+        """タスクの更新・削除で、そのタスクを含む提案キャッシュのみ無効化する"""
+        from src.ai.suggestions import get_suggestion_service
+
+        mock_client = AsyncMock()
+        mock_response = MagicMock()
+        mock_response.choices = [MagicMock()]
+        mock_response.choices[0].message.content = '{"suggestions": []}'
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+        service = SuggestionService(client=mock_client)
+        app.dependency_overrides[get_suggestion_service] = lambda: service
+        try:
+            task_id = (await client.post("/api/tasks", json={"title": "資料作成"})).json()["id"]
+            other_id = (await client.post("/api/tasks", json={"title": "会議"})).json()["id"]
+            await client.get("/api/tasks/suggestions")
+
+            await client.put(f"/api/tasks/{task_id}", json={"tags": ["work"]})
+            assert (await client.get("/api/tasks/suggestions")).json()["cached"] is True
+
+            await client.put(f"/api/tasks/{task_id}", json={"status": "completed"})
+            assert len(service._cache) == 0
+            await client.get("/api/tasks/suggestions")
+
+            batch = {"operations": [{"op": "delete", "id": other_id}]}
+            await client.post("/api/tasks/batch", json=batch)
+            assert len(service._cache) == 0
+            assert mock_client.chat.completions.create.call_count == 2
+        finally:
+            app.dependency_overrides.clear()
+
+    async def test_stream_endpoint(self, client: AsyncClient):
+        """GET /api/tasks/suggestions/stream は提案ごとのイベントと done イベントを送る"""
+        from src.ai.suggestions import get_suggestion_service
+
+        mock_client = AsyncMock()
+        mock_client.chat.completions.create = AsyncMock(return_value=_Stream(_split(_STREAMED, 9)))
+        app.dependency_overrides[get_suggestion_service] = lambda: SuggestionService(
+            client=mock_client
+        )
+        try:
+            response = await client.get("/api/tasks/suggestions/stream", params={"limit": 2})
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [block.split("\n") for block in response.text.strip().split("\n\n")]
+        assert [e[0] for e in events] == ["event: suggestion", "event: suggestion", "event: done"]
+        assert json.loads(events[0][1].removeprefix("data: "))["title"] == "議事録の共有"
+        assert len(json.loads(events[2][1].removeprefix("data: "))["suggestions"]) == 2
+
+    async def test_stream_endpoint_reports_errors(self, client: AsyncClient):
+        """生成に失敗した場合は error イベントを送る"""
+        from src.ai.suggestions import get_suggestion_service
+
+        mock_client = AsyncMock()
+        mock_client.chat.completions.create = AsyncMock(side_effect=RuntimeError("rate limit"))
+        app.dependency_overrides[get_suggestion_service] = lambda: SuggestionService(
+            client=mock_client
+        )
+        try:
+            response = await client.get("/api/tasks/suggestions/stream")
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == 200
+        assert response.text.startswith("event: error\n")
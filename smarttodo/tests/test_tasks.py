@@ -1,19 +1,34 @@
 import pytest
 from httpx import ASGITransport, AsyncClient
 
+from src.api import tasks as tasks_api
 from src.main import app
-from src.services.firestore import InMemoryTaskRepository, reset_repository, set_repository
-
-
-@pytest.fixture
-async def client():
-    # テスト用にインメモリリポジトリを設定
+from src.services.columnar import ColumnarTaskRepository
+from src.services.firestore import (
+    InMemoryTaskRepository,
+    get_repository,
+    reset_repository,
+    set_repository,
+)
+from src.services.sqlite import SqliteTaskRepository
+
+
+@pytest.fixture(params=["memory", "columnar", "sqlite"])
+async def client(request, tmp_path):
+    # テスト用にインメモリ / 列指向 / SQLite のリポジトリを設定（同じテストを各実装で実行）
     reset_repository()
-    repo = InMemoryTaskRepository()
+    if request.param == "sqlite":
+        repo = SqliteTaskRepository(str(tmp_path / "tasks.db"))
+    elif request.param == "columnar":
+        repo = ColumnarTaskRepository()
+    else:
+        repo = InMemoryTaskRepository()
     set_repository(repo)
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
         yield ac
     reset_repository()
+    if isinstance(repo, SqliteTaskRepository):
+        repo.close()
 
 
 # タスク作成 正常系テスト
@@ -51,6 +66,17 @@ class TestCreateTaskSuccess:
         assert response.status_code == 201
         assert response.json()["description"] == ""
 
+    async def test_create_task_with_tags(self, client: AsyncClient):
+        """タグ付きでタスク作成（重複は1つにまとめる）"""
+        response = await client.post(
+            "/api/tasks", json={"title": "タスク", "tags": ["work", "仕事", "work"]}
+        )
+        assert response.status_code == 201
+        assert response.json()["tags"] == ["work", "仕事"]
+
+        fetched = await client.get(f"/api/tasks/{response.json()['id']}")
+        assert fetched.json()["tags"] == ["work", "仕事"]
+
 
 # 異常系テスト
 class TestCreateTaskValidation:
@@ -88,6 +114,14 @@ class TestCreateTaskValidation:
         response = await client.post("/api/tasks", content="not json")
         assert response.status_code == 422
 
+    @pytest.mark.parametrize(
+        "tags", [[""], ["a b"], ["a,b"], ["a" * 51], [f"t{i}" for i in range(21)]]
+    )
+    async def test_create_task_with_invalid_tags(self, client: AsyncClient, tags):
+        """空・空白やカンマを含む・長すぎるタグ、多すぎるタグでエラー"""
+        response = await client.post("/api/tasks", json={"title": "タスク", "tags": tags})
+        assert response.status_code == 422
+
 
 # タスク一覧取得 正常系テスト
 class TestListTasksSuccess:
@@ -172,6 +206,37 @@ class TestListTasksSuccess:
         assert data["total"] == 1
         assert data["items"][0]["title"] == "タスク1"
 
+    async def test_list_tasks_filter_by_multiple_values_and_tags(self, client: AsyncClient):
+        """ステータスの複数指定（いずれか）・優先度・タグ（いずれかを持つ）の複合フィルタリング"""
+        tasks = [
+            {"title": "タスク1", "status": "pending", "priority": "high", "tags": ["work"]},
+            {"title": "タスク2", "status": "in_progress", "priority": "high", "tags": ["home"]},
+            {"title": "タスク3", "status": "completed", "priority": "high", "tags": ["work"]},
+            {"title": "タスク4", "status": "in_progress", "priority": "low", "tags": ["work"]},
+            {"title": "タスク5", "status": "in_progress", "priority": "high", "tags": []},
+            {"title": "タスク6", "status": "pending", "priority": "high", "tags": ["x", "work"]},
+        ]
+        for task in tasks:
+            await client.post("/api/tasks", json=task)
+
+        response = await client.get(
+            "/api/tasks",
+            params={"status": ["pending", "in_progress"], "priority": "high", "tag": "work"},
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 2
+        assert [item["title"] for item in data["items"]] == ["タスク1", "タスク6"]
+
+        response = await client.get("/api/tasks", params={"tag": ["home", "x"], "limit": 1})
+        data = response.json()
+        assert data["total"] == 2
+        assert [item["title"] for item in data["items"]] == ["タスク2"]
+        response = await client.get(
+            "/api/tasks", params={"tag": ["home", "x"], "cursor": data["next_cursor"]}
+        )
+        assert [item["title"] for item in response.json()["items"]] == ["タスク6"]
+
     async def test_list_tasks_offset_beyond_total(self, client: AsyncClient):
         """offsetがtotalを超える場合は空"""
         await client.post("/api/tasks", json={"title": "タスク1"})
@@ -183,6 +248,380 @@ class TestListTasksSuccess:
         assert data["total"] == 1
 
 
+# カーソルページネーション テスト
+class TestListTasksCursor:
+    async def _collect_pages(self, client: AsyncClient, **params) -> list[list[str]]:
+        pages = []
+        cursor = None
+        while True:
+            query = {**params, **({"cursor": cursor} if cursor else {})}
+            data = (await client.get("/api/tasks", params=query)).json()
+            pages.append([item["title"] for item in data["items"]])
+            cursor = data["next_cursor"]
+            if cursor is None:
+                return pages
+
+    async def test_cursor_pages_cover_all_tasks(self, client: AsyncClient):
+        """next_cursor をたどると全タスクを作成順に取得できる"""
+        for i in range(5):
+            await client.post("/api/tasks", json={"title": f"タスク{i}"})
+
+        pages = await self._collect_pages(client, limit=2)
+
+        assert pages == [["タスク0", "タスク1"], ["タスク2", "タスク3"], ["タスク4"]]
+
+    async def test_next_cursor_none_on_last_page(self, client: AsyncClient):
+        """最後のページでは next_cursor が null"""
+        await client.post("/api/tasks", json={"title": "タスク1"})
+
+        data = (await client.get("/api/tasks", params={"limit": 1})).json()
+
+        assert len(data["items"]) == 1
+        assert data["next_cursor"] is None
+
+    async def test_cursor_with_filter(self, client: AsyncClient):
+        """フィルタ付きでもカーソルで続きを取得できる"""
+        for i in range(6):
+            status = "completed" if i % 2 else "pending"
+            await client.post("/api/tasks", json={"title": f"タスク{i}", "status": status})
+
+        pages = await self._collect_pages(client, limit=2, status="pending")
+
+        assert pages == [["タスク0", "タスク2"], ["タスク4"]]
+
+    async def test_cursor_stable_when_tasks_change(self, client: AsyncClient):
+        """ページ間で作成・削除があっても重複や欠落が起きない"""
+        ids = []
+        for i in range(4):
+            response = await client.post("/api/tasks", json={"title": f"タスク{i}"})
+            ids.append(response.json()["id"])
+
+        first = (await client.get("/api/tasks", params={"limit": 2})).json()
+        await client.delete(f"/api/tasks/{ids[0]}")
+        await client.post("/api/tasks", json={"title": "タスク4"})
+        second = (
+            await client.get("/api/tasks", params={"limit": 2, "cursor": first["next_cursor"]})
+        ).json()
+
+        assert [item["title"] for item in second["items"]] == ["タスク2", "タスク3"]
+
+    async def test_invalid_cursor(self, client: AsyncClient):
+        """不正なカーソルで400"""
+        response = await client.get("/api/tasks", params={"cursor": "invalid"})
+        assert response.status_code == 400
+
+    async def test_cursor_with_offset(self, client: AsyncClient):
+        """cursor と offset の同時指定で400"""
+        await client.post("/api/tasks", json={"title": "タスク1"})
+        await client.post("/api/tasks", json={"title": "タスク2"})
+        first = (await client.get("/api/tasks", params={"limit": 1})).json()
+
+        response = await client.get(
+            "/api/tasks", params={"cursor": first["next_cursor"], "offset": 1}
+        )
+        assert response.status_code == 400
+
+
+class TestListTasksSort:
+    @pytest.fixture
+    async def seeded(self, client: AsyncClient):
+        tasks = [
+            {"title": "A", "priority": "low", "due_date": "2026-03-01T00:00:00"},
+            {"title": "B", "priority": "high"},
+            {"title": "C", "priority": "medium", "due_date": "2026-01-01T09:00:00+09:00"},
+            {"title": "D", "priority": "high", "due_date": "2026-02-01T00:00:00Z"},
+        ]
+        for task in tasks:
+            await client.post("/api/tasks", json=task)
+        return client
+
+    async def _titles(self, client: AsyncClient, **params) -> list[str]:
+        data = (await client.get("/api/tasks", params=params)).json()
+        return [item["title"] for item in data["items"]]
+
+    async def test_sort_due_date(self, seeded):
+        """期限順（期限なしは昇順で先頭、降順で末尾）"""
+        assert await self._titles(seeded, sort="due_date") == ["B", "C", "D", "A"]
+        assert await self._titles(seeded, sort="due_date", order="desc") == ["A", "D", "C", "B"]
+
+    async def test_sort_priority_desc(self, seeded):
+        """優先度の高い順（同じ優先度は作成日時の降順）"""
+        assert await self._titles(seeded, sort="priority", order="desc") == ["D", "B", "C", "A"]
+
+    async def test_sort_created_at_desc(self, seeded):
+        """作成日時の降順"""
+        assert await self._titles(seeded, order="desc") == ["D", "C", "B", "A"]
+
+    async def test_sort_with_filter_and_cursor(self, seeded):
+        """フィルタ・並び順を保ったままカーソルで続きを取得できる"""
+        await seeded.post("/api/tasks", json={"title": "E", "priority": "high"})
+        params = {"sort": "due_date", "order": "desc", "priority": "high", "limit": 2}
+        first = (await seeded.get("/api/tasks", params=params)).json()
+        second = (
+            await seeded.get("/api/tasks", params={**params, "cursor": first["next_cursor"]})
+        ).json()
+
+        titles = [item["title"] for item in first["items"] + second["items"]]
+        assert titles == ["D", "E", "B"]
+        assert second["next_cursor"] is None
+
+    async def test_cursor_sort_mismatch(self, seeded):
+        """別の並び順で発行されたカーソルは400"""
+        first = (await seeded.get("/api/tasks", params={"limit": 1})).json()
+
+        response = await seeded.get(
+            "/api/tasks", params={"cursor": first["next_cursor"], "sort": "priority"}
+        )
+
+        assert response.status_code == 400
+
+    async def test_invalid_sort(self, client: AsyncClient):
+        """不明な並び順で422"""
+        response = await client.get("/api/tasks", params={"sort": "title"})
+        assert response.status_code == 422
+
+
+class TestListTasksDueRange:
+    @pytest.fixture
+    async def seeded(self, client: AsyncClient):
+        tasks = [
+            {"title": "A", "due_date": "2026-03-02T10:00:00"},
+            {"title": "B"},
+            {"title": "C", "due_date": "2026-03-03T08:00:00+09:00"},
+            {"title": "D", "due_date": "2026-03-04T00:00:00Z", "status": "completed"},
+            {"title": "E", "due_date": "2026-03-09T00:00:00"},
+        ]
+        for task in tasks:
+            await client.post("/api/tasks", json=task)
+        return client
+
+    async def _titles(self, client: AsyncClient, **params) -> tuple[list[str], int]:
+        data = (await client.get("/api/tasks", params=params)).json()
+        return [item["title"] for item in data["items"]], data["total"]
+
+    async def test_due_range(self, seeded):
+        """期限が due_after 以上 due_before 未満のタスク（期限なしは含まない）"""
+        titles, total = await self._titles(
+            seeded, due_after="2026-03-02T10:00:00", due_before="2026-03-04T00:00:00Z"
+        )
+
+        # C は UTC で 2026-03-02T23:00
+        assert titles == ["A", "C"]
+        assert total == 2
+
+    async def test_due_range_with_sort_filter_and_cursor(self, seeded):
+        """並び順・フィルタ・カーソルと組み合わせられる"""
+        params = {"due_after": "2026-03-01T00:00:00", "sort": "due_date", "order": "desc"}
+        params |= {"status": "pending", "limit": 2}
+        first = (await seeded.get("/api/tasks", params=params)).json()
+        second = (
+            await seeded.get("/api/tasks", params={**params, "cursor": first["next_cursor"]})
+        ).json()
+
+        titles = [item["title"] for item in first["items"] + second["items"]]
+        assert titles == ["E", "C", "A"]
+        assert first["total"] == 3
+
+    async def test_due_before_only(self, seeded):
+        """上限のみの指定でも期限なしは含まない"""
+        titles, _ = await self._titles(seeded, due_before="2026-03-03T00:00:00")
+
+        assert titles == ["A", "C"]
+
+
+class TestTaskCalendar:
+    async def test_buckets_by_day(self, client: AsyncClient):
+        """期間内の全ての日を返し、タスクは期限の日付（UTC）にまとめる"""
+        for task in [
+            {"title": "A", "due_date": "2026-03-02T10:00:00"},
+            {"title": "B", "due_date": "2026-03-02T01:00:00"},
+            {"title": "C", "due_date": "2026-03-03T08:00:00+09:00"},
+            {"title": "外", "due_date": "2026-03-05T00:00:00"},
+            {"title": "期限なし"},
+        ]:
+            await client.post("/api/tasks", json=task)
+
+        response = await client.get(
+            "/api/tasks/calendar", params={"from": "2026-03-01", "to": "2026-03-04"}
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 3
+        assert [day["day"] for day in data["days"]] == [
+            "2026-03-01",
+            "2026-03-02",
+            "2026-03-03",
+            "2026-03-04",
+        ]
+        assert [[t["title"] for t in day["items"]] for day in data["days"]] == [
+            [],
+            ["B", "A", "C"],
+            [],
+            [],
+        ]
+
+    async def test_status_filter(self, client: AsyncClient):
+        """ステータスで絞り込める"""
+        await client.post(
+            "/api/tasks",
+            json={"title": "完了", "due_date": "2026-03-01T09:00:00", "status": "completed"},
+        )
+        await client.post("/api/tasks", json={"title": "未完了", "due_date": "2026-03-01T09:00:00"})
+
+        data = (
+            await client.get(
+                "/api/tasks/calendar",
+                params={"from": "2026-03-01", "to": "2026-03-01", "status": "pending"},
+            )
+        ).json()
+
+        assert [t["title"] for t in data["days"][0]["items"]] == ["未完了"]
+
+    async def test_pages_through_large_window(self, client: AsyncClient, monkeypatch):
+        """取得単位を超える件数でも全件を集計する"""
+        monkeypatch.setattr(tasks_api, "CALENDAR_PAGE_SIZE", 2)
+        await client.post(
+            "/api/tasks/batch",
+            json={
+                "operations": [
+                    {
+                        "op": "create",
+                        "data": {"title": f"T{i}", "due_date": f"2026-03-0{i % 3 + 1}T09:00:00"},
+                    }
+                    for i in range(7)
+                ]
+            },
+        )
+
+        data = (
+            await client.get(
+                "/api/tasks/calendar", params={"from": "2026-03-01", "to": "2026-03-03"}
+            )
+        ).json()
+
+        assert data["total"] == 7
+        assert [len(day["items"]) for day in data["days"]] == [3, 2, 2]
+
+    @pytest.mark.parametrize(
+        "params",
+        [
+            {"from": "2026-03-02", "to": "2026-03-01"},
+            {"from": "2026-01-01", "to": "2027-01-02"},
+        ],
+    )
+    async def test_invalid_range(self, client: AsyncClient, params):
+        """終了日が開始日より前、または期間が長すぎる場合は400"""
+        response = await client.get("/api/tasks/calendar", params=params)
+
+        assert response.status_code == 400
+
+    async def test_missing_params(self, client: AsyncClient):
+        """from / to は必須"""
+        response = await client.get("/api/tasks/calendar", params={"from": "2026-03-01"})
+
+        assert response.status_code == 422
+
+
+class TestSearchTasks:
+    async def test_ranked_results(self, client: AsyncClient):
+        """タイトル・説明に一致したタスクを一致度の高い順に返す"""
+        for task in [
+            {"title": "資料の確認", "description": "会議で使う"},
+            {"title": "会議の準備"},
+            {"title": "買い物"},
+        ]:
+            await client.post("/api/tasks", json=task)
+
+        response = await client.get("/api/tasks/search", params={"q": "会議"})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 2
+        assert (data["limit"], data["offset"]) == (20, 0)
+        assert [t["title"] for t in data["items"]] == ["会議の準備", "資料の確認"]
+
+    async def test_paging(self, client: AsyncClient):
+        """limit / offset で切り出し、total は一致した全件数"""
+        for i in range(3):
+            await client.post("/api/tasks", json={"title": f"Report {i}"})
+
+        data = (
+            await client.get(
+                "/api/tasks/search", params={"q": "ＲＥＰＯＲＴ", "limit": 1, "offset": 1}
+            )
+        ).json()
+
+        assert data["total"] == 3
+        assert [t["title"] for t in data["items"]] == ["Report 1"]
+
+    @pytest.mark.parametrize("params", [{}, {"q": ""}, {"q": "a" * 101}, {"q": "a", "limit": 0}])
+    async def test_invalid_params(self, client: AsyncClient, params):
+        """検索語なし・長すぎる検索語・範囲外の limit は422"""
+        response = await client.get("/api/tasks/search", params=params)
+
+        assert response.status_code == 422
+
+
+class TestListTasksFields:
+    async def test_fields_trims_items(self, client: AsyncClient):
+        """指定したフィールドと id のみを返す"""
+        await client.post(
+            "/api/tasks", json={"title": "タスク", "description": "長い説明", "priority": "high"}
+        )
+
+        response = await client.get("/api/tasks", params={"fields": "title,priority"})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 1
+        assert data["next_cursor"] is None
+        assert set(data["items"][0]) == {"id", "title", "priority"}
+        assert data["items"][0]["priority"] == "high"
+
+    async def test_fields_with_cursor(self, client: AsyncClient):
+        """フィールド指定時も next_cursor で続きを取得できる"""
+        for i in range(3):
+            await client.post("/api/tasks", json={"title": f"タスク{i}"})
+
+        first = (await client.get("/api/tasks", params={"limit": 2, "fields": "title"})).json()
+        second = (
+            await client.get(
+                "/api/tasks",
+                params={"limit": 2, "fields": "title", "cursor": first["next_cursor"]},
+            )
+        ).json()
+
+        assert [item["title"] for item in first["items"] + second["items"]] == [
+            "タスク0",
+            "タスク1",
+            "タスク2",
+        ]
+        assert set(first["items"][0]) == {"id", "title"}
+
+    async def test_without_fields_returns_full_items(self, client: AsyncClient):
+        """fields 未指定時は全フィールドを返す"""
+        await client.post("/api/tasks", json={"title": "タスク"})
+
+        item = (await client.get("/api/tasks")).json()["items"][0]
+
+        assert set(item) == {
+            "id",
+            "title",
+            "description",
+            "due_date",
+            "status",
+            "priority",
+            "tags",
+            "created_at",
+        }
+
+    async def test_unknown_field(self, client: AsyncClient):
+        """不明なフィールド名で400"""
+        response = await client.get("/api/tasks", params={"fields": "title,secret"})
+        assert response.status_code == 400
+
+
 # タスク一覧取得 異常系テスト
 class TestListTasksValidation:
     async def test_list_tasks_invalid_limit_too_small(self, client: AsyncClient):
@@ -210,6 +649,16 @@ class TestListTasksValidation:
         response = await client.get("/api/tasks", params={"priority": "invalid"})
         assert response.status_code == 422
 
+    async def test_list_tasks_invalid_one_of_statuses(self, client: AsyncClient):
+        """複数指定したステータスの一部が不正でもエラー"""
+        response = await client.get("/api/tasks", params={"status": ["pending", "invalid"]})
+        assert response.status_code == 422
+
+    async def test_list_tasks_too_many_tags(self, client: AsyncClient):
+        """タグの指定数が上限を超えるとエラー"""
+        response = await client.get("/api/tasks", params={"tag": [f"t{i}" for i in range(11)]})
+        assert response.status_code == 400
+
 
 # 個別タスク取得 正常系テスト
 class TestGetTaskSuccess:
@@ -332,6 +781,20 @@ class TestUpdateTaskSuccess:
         assert data["title"] == "タスク"
         assert data["description"] == "説明"
 
+    async def test_update_task_does_not_prefetch(self, client: AsyncClient, monkeypatch):
+        """更新時にAPI層で事前取得しない"""
+        create_response = await client.post("/api/tasks", json={"title": "タスク"})
+        task_id = create_response.json()["id"]
+
+        async def fail_get(task_id):
+            raise AssertionError("get should not be called")
+
+        monkeypatch.setattr(get_repository(), "get", fail_get)
+        response = await client.put(f"/api/tasks/{task_id}", json={"title": "更新後"})
+
+        assert response.status_code == 200
+        assert response.json()["title"] == "更新後"
+
     async def test_update_task_preserves_created_at(self, client: AsyncClient):
         """更新時にcreated_atは変わらない"""
         create_response = await client.post("/api/tasks", json={"title": "タスク"})
@@ -453,3 +916,112 @@ class TestDeleteTaskError:
 
         response2 = await client.delete(f"/api/tasks/{task_id}")
         assert response2.status_code == 404
+
+
+# 一括操作 テスト
+class TestBatchTasks:
+    async def test_batch_mixed_operations(self, client: AsyncClient):
+        """作成・更新・削除を1リクエストで実行し、順序通りに結果を返す"""
+        first = (await client.post("/api/tasks", json={"title": "既存1"})).json()
+        second = (await client.post("/api/tasks", json={"title": "既存2"})).json()
+
+        response = await client.post(
+            "/api/tasks/batch",
+            json={
+                "operations": [
+                    {"op": "delete", "id": second["id"]},
+                    {"op": "create", "data": {"title": "新規", "priority": "high"}},
+                    {"op": "update", "id": first["id"], "data": {"status": "completed"}},
+                ]
+            },
+        )
+
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [r["op"] for r in results] == ["delete", "create", "update"]
+        assert [r["status"] for r in results] == [204, 201, 200]
+        assert results[1]["task"]["title"] == "新規"
+        assert results[1]["task"]["priority"] == "high"
+        assert results[2]["task"]["status"] == "completed"
+
+        titles = [item["title"] for item in (await client.get("/api/tasks")).json()["items"]]
+        assert titles == ["既存1", "新規"]
+
+    async def test_batch_missing_tasks(self, client: AsyncClient):
+        """存在しないタスクの更新・削除は個別に404"""
+        missing = "00000000-0000-0000-0000-000000000000"
+        response = await client.post(
+            "/api/tasks/batch",
+            json={
+                "operations": [
+                    {"op": "update", "id": missing, "data": {"title": "更新"}},
+                    {"op": "delete", "id": missing},
+                    {"op": "create", "data": {"title": "新規"}},
+                ]
+            },
+        )
+
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [r["status"] for r in results] == [404, 404, 201]
+        assert results[0]["error"] == "タスクが見つかりません"
+
+    async def test_batch_validates_operations(self, client: AsyncClient):
+        """TaskCreate / TaskUpdate のバリデーションを適用する"""
+        response = await client.post(
+            "/api/tasks/batch",
+            json={"operations": [{"op": "create", "data": {"title": ""}}]},
+        )
+        assert response.status_code == 422
+
+    async def test_batch_unknown_operation(self, client: AsyncClient):
+        """不明な操作種別で422"""
+        response = await client.post(
+            "/api/tasks/batch", json={"operations": [{"op": "upsert", "data": {"title": "x"}}]}
+        )
+        assert response.status_code == 422
+
+    async def test_batch_empty_operations(self, client: AsyncClient):
+        """空の操作一覧で422"""
+        response = await client.post("/api/tasks/batch", json={"operations": []})
+        assert response.status_code == 422
+
+
+class TestLookupTasks:
+    async def test_lookup_found_and_missing(self, client: AsyncClient):
+        """見つかったタスクと見つからなかったIDをリクエスト順に返す"""
+        first = (await client.post("/api/tasks", json={"title": "タスク1"})).json()
+        second = (await client.post("/api/tasks", json={"title": "タスク2"})).json()
+        missing = "00000000-0000-0000-0000-000000000000"
+
+        response = await client.post(
+            "/api/tasks/lookup", json={"ids": [second["id"], missing, first["id"], second["id"]]}
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [item["title"] for item in data["items"]] == ["タスク2", "タスク1"]
+        assert data["missing"] == [missing]
+
+    async def test_lookup_uses_single_bulk_read(self, client: AsyncClient, monkeypatch):
+        """個別の get を呼ばずに get_many で取得する"""
+        created = (await client.post("/api/tasks", json={"title": "タスク"})).json()
+
+        async def fail_get(task_id):
+            raise AssertionError("get should not be called")
+
+        monkeypatch.setattr(get_repository(), "get", fail_get)
+        response = await client.post("/api/tasks/lookup", json={"ids": [created["id"]]})
+
+        assert response.status_code == 200
+        assert response.json()["items"][0]["id"] == created["id"]
+
+    async def test_lookup_empty_ids(self, client: AsyncClient):
+        """空のID一覧で422"""
+        response = await client.post("/api/tasks/lookup", json={"ids": []})
+        assert response.status_code == 422
+
+    async def test_lookup_invalid_id(self, client: AsyncClient):
+        """UUID形式でないIDで422"""
+        response = await client.post("/api/tasks/lookup", json={"ids": ["invalid"]})
+        assert response.status_code == 422